@@ -177,7 +177,8 @@ def _warm_chapters_global(course_limit: int = 100) -> int:
     """Warm GLOBAL cache for chapter lists
 
     Pre-warms chapter list cache for all chapters in the first N courses.
-    Uses ChapterGlobalSerializer and SEPARATED:GLOBAL cache keys.
+    Uses ChapterListGlobalSerializer (no Markdown content, same as
+    ChapterViewSet.list) and SEPARATED:GLOBAL cache keys.
 
     Args:
         course_limit: Number of courses to process (default: 100)
@@ -186,13 +187,13 @@ def _warm_chapters_global(course_limit: int = 100) -> int:
         Number of chapters warmed
     """
     try:
-        from courses.models import Chapter
-        from courses.serializers import ChapterGlobalSerializer
+        from courses.serializers import ChapterListGlobalSerializer
+        from courses.services import get_chapter_list_global_queryset
         from common.utils.cache import get_standard_cache_key, set_cache
         from collections import defaultdict
 
         chapters = (
-            Chapter.objects.select_related("course")
+            get_chapter_list_global_queryset()
             .filter(course__id__isnull=False)
             .order_by("course__id", "order")[: course_limit * 30]
         )
@@ -210,7 +211,7 @@ def _warm_chapters_global(course_limit: int = 100) -> int:
                 is_separated=True,
                 separated_type="GLOBAL",
             )
-            serializer = ChapterGlobalSerializer(course_chapters, many=True)
+            serializer = ChapterListGlobalSerializer(course_chapters, many=True)
             set_cache(cache_key, list(serializer.data), DEFAULT_GLOBAL_TTL)
             count += 1
 
@@ -280,7 +281,8 @@ def _warm_problems_global(
 def _warm_high_priority_chapters_global() -> int:
     """Warm high hit-rate chapter GLOBAL caches
 
-    Uses AdaptiveTTLCalculator.get_hit_rate() to identify chapters with >30% hit rate.
+    Uses AdaptiveTTLCalculator.get_hit_rate() (sampled, per key family) to skip
+    warming when the chapter GLOBAL family hit rate is <= 30%.
 
     Returns:
         Number of high-priority chapters warmed
@@ -322,7 +324,8 @@ def _warm_high_priority_chapters_global() -> int:
 def _warm_high_priority_problems_global() -> int:
     """Warm high hit-rate problem GLOBAL caches
 
-    Uses AdaptiveTTLCalculator.get_hit_rate() to identify problems with >30% hit rate.
+    Uses AdaptiveTTLCalculator.get_hit_rate() (sampled, per key family) to skip
+    warming when the problem GLOBAL family hit rate is <= 30%.
 
     Returns:
         Number of high-priority problem lists warmed
@@ -599,6 +602,9 @@ def cache_performance_summary():
     - Top 5 endpoints with lowest hit rates
     - Active alerts (low hit rate, high penetration, slow operations)
 
+    Statistics are read from the last closed window, which expires on its
+    own (CACHE_STATS_TTL), so no reset is needed afterwards.
+
     This task runs every 60 seconds via Celery Beat.
     """
     try:
@@ -606,9 +612,59 @@ def cache_performance_summary():
 
         _cache_performance_logger.log_performance_summary()
 
-        _cache_performance_logger.reset_stats()
-
-        logger.debug("Cache performance summary logged and stats reset")
+        logger.debug("Cache performance summary logged")
 
     except Exception as e:
         logger.error(f"Failed to generate cache performance summary: {e}")
+
+
+@shared_task
+def rebuild_resource_id_bitmaps():
+    """Rebuild resource id bitmaps from the database
+
+    Rebuilds the per-model id bitmaps used by ResourceIdFilterMixin for every
+    model listed in settings.RESOURCE_ID_BITMAP_MODELS and refreshes their
+    ready markers. Runs every 30 minutes via Celery Beat; if it stops running,
+    the markers expire (RESOURCE_ID_BITMAP_TTL) and retrieve views fall back
+    to the cache/database path.
+    """
+    from django.apps import apps
+    from django.conf import settings
+
+    from common.utils.cache import rebuild_resource_id_bitmap
+
+    results = {}
+    for label in getattr(settings, "RESOURCE_ID_BITMAP_MODELS", []):
+        lock_key = get_warming_lock_key("id_bitmap", label)
+        if not acquire_warming_lock(lock_key, timeout=600):
+            continue
+        try:
+            results[label] = rebuild_resource_id_bitmap(apps.get_model(label))
+        except Exception as e:
+            logger.error(f"Failed to rebuild resource id bitmap for {label}: {e}")
+        finally:
+            release_warming_lock(lock_key)
+
+    logger.info(f"Resource id bitmaps rebuilt: {results}")
+    return results
+
+
+@shared_task
+def refresh_adaptive_ttl_table():
+    """Rebuild and publish the adaptive TTL table
+
+    Aggregates the sampled per-family hit/miss counters and HyperLogLogs
+    recorded by AdaptiveTTLCalculator, assigns each key family a TTL tier and
+    publishes the table that workers load into memory. Runs every 5 minutes
+    via Celery Beat.
+    """
+    try:
+        from common.utils.cache import AdaptiveTTLCalculator
+
+        report = AdaptiveTTLCalculator.build_ttl_table()
+        tiers = {family: row["tier"] for family, row in report.items()}
+        logger.info(f"Adaptive TTL table refreshed: {tiers}")
+        return report
+    except Exception as e:
+        logger.error(f"Failed to refresh adaptive TTL table: {e}")
+        return {}
@@ -5,6 +5,8 @@ Provides metrics collection for:
 - Cache hit/miss rates
 - Cache penetration detection
 - Cache warming statistics
+- Per-view database query counts and durations
+- Per-view HTTP latency, response size and in-flight requests
 """
 
 from .cache_metrics import (
@@ -16,6 +18,12 @@ from .cache_metrics import (
     get_cache_hit_rate,
     get_all_cache_stats,
 )
+from .query_metrics import record_request_queries
+from .http_metrics import (
+    record_http_request,
+    get_metrics_registry,
+    generate_metrics_output,
+)
 
 __all__ = [
     'get_cache_metrics_registry',
@@ -25,4 +33,8 @@ __all__ = [
     'record_penetration_attempt',
     'get_cache_hit_rate',
     'get_all_cache_stats',
+    'record_request_queries',
+    'record_http_request',
+    'get_metrics_registry',
+    'generate_metrics_output',
 ]
@@ -0,0 +1,383 @@
+"""
+Sampling CPU profiler for running gunicorn and Celery workers.
+
+The profiler periodically captures the Python stack and aggregates the samples
+as collapsed stacks ("frame;frame;frame count" lines), the input format of
+flamegraph.pl / speedscope / inferno.
+
+Two sampling modes are supported:
+- signal: ITIMER_PROF delivers SIGPROF after every `interval` seconds of CPU
+  time and the handler records the interrupted main-thread stack. This is the
+  mode used in gunicorn sync workers and Celery prefork children, where the
+  main thread does all the work. The SIGPROF handler must be installed from
+  the main thread (install_profiler_signals()).
+- thread: a daemon thread wakes up every `interval` seconds (wall time) and
+  records the stacks of all other threads via sys._current_frames(). Used when
+  the signal handler is not available (threaded servers, non-main threads).
+
+Nothing runs while no profile is active: the only idle cost is the installed
+signal handlers. A profile is started for a fixed duration; when it finishes
+the result is stored in the Django cache under get_profile_key(profile_id),
+so it can be fetched from any process:
+- staff endpoint: POST /api/v1/profiling/cpu/ profiles the worker serving the
+  request, GET /api/v1/profiling/cpu/<profile_id>/ returns the result
+- management command: `manage.py profile_cpu --pid <worker pid>` asks another
+  process to profile itself through CPU_PROFILER_TRIGGER_SIGNAL
+"""
+
+import os
+import sys
+import atexit
+import time
+import uuid
+import signal
+import logging
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger("teaching_platform.performance")
+
+PROFILE_KEY_PREFIX = "cpu_profile"
+
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+
+MODE_SIGNAL = "signal"
+MODE_THREAD = "thread"
+
+
+class ProfilerBusy(RuntimeError):
+    """A profile is already running in this process"""
+
+
+class ProfilerNotInstalled(RuntimeError):
+    """The target process has not installed the profiler signal handlers"""
+
+
+def get_profile_key(profile_id: str) -> str:
+    """Cache key of a profile result"""
+    return f"{PROFILE_KEY_PREFIX}:result:{profile_id}"
+
+
+def get_profile_request_key(pid: int) -> str:
+    """Cache key of a pending profile request for a process"""
+    return f"{PROFILE_KEY_PREFIX}:request:{pid}"
+
+
+def get_profile_handler_key(pid: int) -> str:
+    """Cache key marking that a process installed the trigger signal handler"""
+    return f"{PROFILE_KEY_PREFIX}:handler:{pid}"
+
+
+def _process_start_time(pid: int) -> Optional[str]:
+    """
+    Start time of a process (clock ticks since boot, from /proc)
+
+    Stored with the handler marker so a marker left by a dead worker does not
+    match an unrelated process that reused its PID. None where /proc is missing.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # The command name may contain spaces and parentheses; fields after it are fixed
+    return stat.rsplit(b")", 1)[-1].split()[19].decode()
+
+
+def clamp_duration(duration: float) -> float:
+    """Profile duration limited to CPU_PROFILER_MAX_DURATION"""
+    return min(float(duration), getattr(settings, "CPU_PROFILER_MAX_DURATION", 120))
+
+
+@lru_cache(maxsize=1)
+def _path_prefixes():
+    """Project and sys.path prefixes stripped from frame file names (longest first)"""
+    return sorted({str(settings.BASE_DIR), *sys.path}, key=len, reverse=True)
+
+
+def _frame_label(code) -> str:
+    """Short, flamegraph-safe label for a code object"""
+    filename = code.co_filename
+    for prefix in _path_prefixes():
+        if prefix and filename.startswith(prefix + os.sep):
+            filename = filename[len(prefix) + 1:]
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    """Aggregates sampled Python stacks into collapsed-stack counts"""
+
+    def __init__(self):
+        self.samples = Counter()
+        self.interval = 0.01
+        self.mode: Optional[str] = None
+        self.running = False
+        self.started_at: Optional[float] = None
+        self._labels: Dict[Any, str] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    # ---- sampling ----
+
+    def _record(self, frame, thread_name: Optional[str] = None):
+        stack = []
+        labels = self._labels
+        while frame is not None:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = _frame_label(code)
+            stack.append(label)
+            frame = frame.f_back
+        if thread_name:
+            stack.append(thread_name)
+        if stack:
+            stack.reverse()
+            self.samples[";".join(stack)] += 1
+
+    def _handle_sigprof(self, signum, frame):
+        if self.running and self.mode == MODE_SIGNAL:
+            self._record(frame)
+
+    def _sample_threads(self):
+        own_ident = threading.get_ident()
+        names = {}
+        while not self._stop_event.wait(self.interval):
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own_ident:
+                    self._record(frame, names.get(ident, f"thread-{ident}"))
+
+    # ---- control ----
+
+    def install_signal_handler(self) -> bool:
+        """Install the SIGPROF handler (main thread only); returns whether it is installed"""
+        if not hasattr(signal, "setitimer"):
+            return False
+        # The handler may have been replaced; arming ITIMER_PROF without it kills the process
+        if signal.getsignal(signal.SIGPROF) == self._handle_sigprof:
+            return True
+        if threading.current_thread() is not threading.main_thread():
+            return False
+        signal.signal(signal.SIGPROF, self._handle_sigprof)
+        return True
+
+    def start(self, interval: float = 0.01, mode: Optional[str] = None) -> str:
+        """Start sampling; mode defaults to signal when the handler can be installed"""
+        if self.running:
+            raise ProfilerBusy("A CPU profile is already running in this process")
+        if mode is None:
+            mode = MODE_SIGNAL if self.install_signal_handler() else MODE_THREAD
+        if mode == MODE_SIGNAL and not self.install_signal_handler():
+            raise RuntimeError("Signal sampling requires installing the handler from the main thread")
+
+        self.samples = Counter()
+        self.interval = interval
+        self.mode = mode
+        self.started_at = time.time()
+        self.running = True
+        if mode == MODE_SIGNAL:
+            signal.setitimer(signal.ITIMER_PROF, interval, interval)
+        else:
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._sample_threads, name="cpu-profiler", daemon=True
+            )
+            self._thread.start()
+        return mode
+
+    def stop(self) -> Counter:
+        """Stop sampling and return the collected samples"""
+        if not self.running:
+            return self.samples
+        if self.mode == MODE_SIGNAL:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        else:
+            self._stop_event.set()
+            if self._thread is not None and self._thread is not threading.current_thread():
+                self._thread.join()
+            self._thread = None
+        self.running = False
+        return self.samples
+
+    def collapsed(self) -> str:
+        """Render the samples in collapsed-stack format, heaviest stacks first"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+
+_profiler = SamplingProfiler()
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> SamplingProfiler:
+    """The per-process profiler"""
+    return _profiler
+
+
+def start_profile(
+    duration: float,
+    interval: Optional[float] = None,
+    profile_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Profile this process for `duration` seconds in the background
+
+    The result is written to the cache when the profile finishes; until then
+    get_profile_result() returns the running status.
+
+    Raises:
+        ProfilerBusy: a profile is already running in this process
+    """
+    duration = clamp_duration(duration)
+    interval = max(
+        float(interval or getattr(settings, "CPU_PROFILER_INTERVAL", 0.01)), 0.001
+    )
+    profile_id = profile_id or uuid.uuid4().hex
+    ttl = getattr(settings, "CPU_PROFILER_RESULT_TTL", 3600)
+
+    with _profiler_lock:
+        mode = _profiler.start(interval)
+
+    info = {
+        "profile_id": profile_id,
+        "pid": os.getpid(),
+        "mode": mode,
+        "duration": duration,
+        "interval": interval,
+        "started_at": _profiler.started_at,
+        "status": STATUS_RUNNING,
+    }
+    try:
+        cache.set(get_profile_key(profile_id), info, timeout=ttl)
+    except Exception as e:
+        logger.debug(f"Failed to store CPU profile status: {e}")
+
+    def finish():
+        samples = _profiler.stop()
+        result = dict(info)
+        result.update(
+            status=STATUS_DONE,
+            samples=sum(samples.values()),
+            collapsed=_profiler.collapsed(),
+        )
+        try:
+            cache.set(get_profile_key(profile_id), result, timeout=ttl)
+        except Exception as e:
+            logger.warning(f"Failed to store CPU profile {profile_id}: {e}")
+        logger.info(
+            f"CPU profile {profile_id} finished with {result['samples']} samples",
+            extra={"event": "cpu_profile_done", "profile_id": profile_id, "pid": info["pid"]},
+        )
+
+    timer = threading.Timer(duration, finish)
+    timer.daemon = True
+    timer.start()
+    return info
+
+
+def get_profile_result(profile_id: str) -> Optional[Dict[str, Any]]:
+    """Status / result of a profile (None if unknown or expired)"""
+    return cache.get(get_profile_key(profile_id))
+
+
+def request_profile(
+    pid: int, duration: float, interval: Optional[float] = None
+) -> str:
+    """
+    Ask another process to profile itself (see install_profiler_signals)
+
+    Only processes that registered the trigger handler are signalled: the
+    default action of SIGUSR2 terminates a process, and the gunicorn master
+    treats it as a binary upgrade.
+
+    Returns:
+        The profile id to poll with get_profile_result()
+
+    Raises:
+        ProfilerNotInstalled: the process has not installed the handler
+    """
+    marker = cache.get(get_profile_handler_key(pid))
+    if marker != {"start_time": _process_start_time(pid)}:
+        raise ProfilerNotInstalled(
+            f"Process {pid} has not installed the CPU profiler signal handler"
+        )
+
+    profile_id = uuid.uuid4().hex
+    cache.set(
+        get_profile_request_key(pid),
+        {"profile_id": profile_id, "duration": clamp_duration(duration), "interval": interval},
+        timeout=60,
+    )
+    os.kill(pid, _get_trigger_signal())
+    return profile_id
+
+
+def _get_trigger_signal() -> int:
+    return getattr(signal, getattr(settings, "CPU_PROFILER_TRIGGER_SIGNAL", "SIGUSR2"))
+
+
+def _start_requested_profile():
+    """Read the pending request for this process and start it (runs off the signal handler)"""
+    try:
+        key = get_profile_request_key(os.getpid())
+        request = cache.get(key)
+        if not request:
+            return
+        cache.delete(key)
+        start_profile(request["duration"], request.get("interval"), request["profile_id"])
+    except ProfilerBusy:
+        logger.warning("CPU profile requested while another profile is running")
+    except Exception as e:
+        logger.warning(f"Failed to start requested CPU profile: {e}")
+
+
+def _handle_trigger_signal(signum, frame):
+    # Cache access may take locks held by the interrupted code, so do it in a thread
+    threading.Thread(target=_start_requested_profile, name="cpu-profiler-trigger", daemon=True).start()
+
+
+def install_profiler_signals() -> bool:
+    """
+    Install the SIGPROF sampling handler and the trigger signal handler
+
+    Must be called from the main thread of the worker process, after the
+    server installed its own handlers (gunicorn post_worker_init, Celery
+    worker_process_init). Registers the process under
+    get_profile_handler_key(pid) so request_profile() will signal it.
+    """
+    if not getattr(settings, "CPU_PROFILER_ENABLED", True):
+        return False
+    try:
+        if not _profiler.install_signal_handler():
+            return False
+        signal.signal(_get_trigger_signal(), _handle_trigger_signal)
+    except (ValueError, OSError, AttributeError) as e:
+        logger.debug(f"Failed to install CPU profiler signals: {e}")
+        return False
+
+    pid = os.getpid()
+    try:
+        cache.set(
+            get_profile_handler_key(pid),
+            {"start_time": _process_start_time(pid)},
+            timeout=None,
+        )
+        atexit.register(_unregister_profiler_handler, pid)
+    except Exception as e:
+        logger.warning(f"Failed to register CPU profiler handler for PID {pid}: {e}")
+    return True
+
+
+def _unregister_profiler_handler(pid: int):
+    try:
+        cache.delete(get_profile_handler_key(pid))
+    except Exception:
+        pass
@@ -0,0 +1,134 @@
+"""
+HTTP request metrics collection for Prometheus monitoring.
+
+This module provides per-view Prometheus metrics for HTTP traffic (collected by
+PrometheusMetricsMiddleware):
+- Request latency (histogram, by view/method/status)
+- Response size (histogram, by view/method/status)
+- In-flight requests (gauge, by method)
+
+Metrics are registered on the same registry as the cache metrics. When
+PROMETHEUS_MULTIPROC_DIR is set (gunicorn with several workers), every worker
+writes its samples to that directory and get_metrics_registry() aggregates
+them, so serve_metrics exports one consistent view of all workers.
+"""
+
+import logging
+import os
+from typing import Optional, Tuple
+
+from prometheus_client import CollectorRegistry, Gauge, Histogram, generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from .cache_metrics import _cache_metrics_registry
+
+logger = logging.getLogger("teaching_platform.performance")
+
+# ============ Prometheus Metrics ============
+
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency in seconds",
+    ["view", "method", "status"],
+    registry=_cache_metrics_registry,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+http_response_size_bytes = Histogram(
+    "http_response_size_bytes",
+    "HTTP response body size in bytes (non-streaming responses only)",
+    ["view", "method", "status"],
+    registry=_cache_metrics_registry,
+    buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000),
+)
+
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method"],
+    registry=_cache_metrics_registry,
+    multiprocess_mode="livesum",
+)
+
+
+# ============ Metrics Recording Functions ============
+
+
+def get_view_label(request) -> Tuple[str, Optional[type], Optional[str]]:
+    """Resolve a bounded-cardinality label for the view that served a request
+
+    Returns:
+        (label, view_class, action), where label is "ViewSet.action" for DRF
+        viewsets, the view class/function name otherwise, and "unmatched"
+        when URL resolution failed.
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched", None, None
+
+    func = match.func
+    view_class = getattr(func, "cls", None) or getattr(func, "view_class", None)
+    actions = getattr(func, "actions", None) or {}
+    action = actions.get(request.method.lower())
+
+    if view_class is not None:
+        label = view_class.__name__
+    else:
+        label = match.view_name or getattr(func, "__name__", "unknown")
+    if action:
+        label = f"{label}.{action}"
+    return label, view_class, action
+
+
+def record_http_request(
+    view: str,
+    method: str,
+    status: int,
+    duration: float,
+    response_size: Optional[int] = None,
+):
+    """Record one served HTTP request
+
+    Args:
+        view: The view label (see get_view_label)
+        method: HTTP method
+        status: Response status code
+        duration: Request latency in seconds
+        response_size: Response body size in bytes (None for streaming responses)
+    """
+    try:
+        labels = {"view": view, "method": method, "status": str(status)}
+        http_request_duration_seconds.labels(**labels).observe(duration)
+        if response_size is not None:
+            http_response_size_bytes.labels(**labels).observe(response_size)
+    except Exception as e:
+        # Don't let metrics errors affect request handling
+        logger.debug(f"Failed to record HTTP request metrics: {e}")
+
+
+# ============ Exposition ============
+
+
+def get_metrics_registry() -> CollectorRegistry:
+    """Get the registry to expose
+
+    In multiprocess mode (PROMETHEUS_MULTIPROC_DIR set) a fresh registry with a
+    MultiProcessCollector is returned so that samples from every worker are
+    merged; otherwise the in-process registry is returned.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return _cache_metrics_registry
+
+
+def generate_metrics_output() -> Tuple[bytes, str]:
+    """Render all metrics in the Prometheus text format
+
+    Returns:
+        (body, content_type)
+    """
+    return generate_latest(get_metrics_registry()), CONTENT_TYPE_LATEST
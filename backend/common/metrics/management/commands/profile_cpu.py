@@ -0,0 +1,95 @@
+"""
+Django management command to take a sampling CPU profile of a running worker
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Take a sampling CPU profile of a running gunicorn/Celery worker (collapsed stacks)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pid',
+            type=int,
+            required=True,
+            help='PID of the worker process to profile'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=30,
+            help='Profile duration in seconds (default: 30)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=None,
+            help='Sampling interval in seconds (default: settings.CPU_PROFILER_INTERVAL)'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            default=None,
+            help='Write collapsed stacks to this file instead of stdout'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=30,
+            help='Extra seconds to wait for the result after the duration (default: 30)'
+        )
+
+    def handle(self, *args, **options):
+        from common.metrics.cpu_profiler import (
+            STATUS_DONE,
+            ProfilerNotInstalled,
+            clamp_duration,
+            get_profile_result,
+            request_profile,
+        )
+
+        duration = clamp_duration(options['duration'])
+        try:
+            profile_id = request_profile(options['pid'], duration, options['interval'])
+        except ProfilerNotInstalled:
+            raise CommandError(
+                f"PID {options['pid']} has not installed the CPU profiler signal handler "
+                '(not a gunicorn/Celery worker, or CPU_PROFILER_ENABLED is off); refusing to signal it'
+            )
+        except ProcessLookupError:
+            raise CommandError(f"No process with PID {options['pid']}")
+        except PermissionError:
+            raise CommandError(f"Not allowed to signal PID {options['pid']}")
+
+        self.stderr.write(
+            f"Profiling PID {options['pid']} for {duration}s (profile id {profile_id})..."
+        )
+
+        deadline = time.monotonic() + duration + options['timeout']
+        result = None
+        while time.monotonic() < deadline:
+            result = get_profile_result(profile_id)
+            if result and result['status'] == STATUS_DONE:
+                break
+            time.sleep(0.5)
+        else:
+            if result is None:
+                raise CommandError(
+                    'The worker did not start profiling. Is CPU_PROFILER_ENABLED set and '
+                    'install_profiler_signals() called in the worker?'
+                )
+            raise CommandError('Timed out waiting for the profile result')
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(result['collapsed'] + '\n')
+            self.stderr.write(
+                self.style.SUCCESS(
+                    f"Wrote {result['samples']} samples ({result['mode']} mode) to {options['output']}"
+                )
+            )
+        else:
+            self.stdout.write(result['collapsed'])
@@ -0,0 +1,84 @@
+"""
+Database query metrics collection for Prometheus monitoring.
+
+This module provides per-view Prometheus metrics for the SQL issued while
+serving a request (collected by QueryBudgetMiddleware):
+- Queries per request (histogram, by view)
+- Database time per request (histogram, by view)
+- Requests with repeated query shapes, i.e. likely N+1 patterns (counter, by view)
+- Requests exceeding their declared query budget (counter, by view)
+
+Metrics are registered on the same registry as the cache metrics so that
+serve_metrics exports them together.
+"""
+
+import logging
+
+from prometheus_client import Counter, Histogram
+
+from .cache_metrics import _cache_metrics_registry
+
+logger = logging.getLogger("teaching_platform.database")
+
+# ============ Prometheus Metrics ============
+
+db_queries_per_request = Histogram(
+    "http_request_db_queries",
+    "Number of SQL queries executed per request",
+    ["view"],
+    registry=_cache_metrics_registry,
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233),
+)
+
+db_duration_per_request_seconds = Histogram(
+    "http_request_db_duration_seconds",
+    "Total SQL execution time per request in seconds",
+    ["view"],
+    registry=_cache_metrics_registry,
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+db_repeated_queries_total = Counter(
+    "http_request_db_repeated_queries_total",
+    "Requests that repeated the same query shape beyond the N+1 threshold",
+    ["view"],
+    registry=_cache_metrics_registry,
+)
+
+db_query_budget_exceeded_total = Counter(
+    "http_request_db_query_budget_exceeded_total",
+    "Requests that executed more queries than the view's declared budget",
+    ["view"],
+    registry=_cache_metrics_registry,
+)
+
+
+# ============ Metrics Recording Functions ============
+
+
+def record_request_queries(
+    view: str,
+    query_count: int,
+    duration: float,
+    has_repeated_queries: bool = False,
+    budget_exceeded: bool = False,
+):
+    """Record the SQL issued while serving one request
+
+    Args:
+        view: The view label (e.g. "CourseViewSet.list")
+        query_count: Number of SQL queries executed
+        duration: Total SQL execution time in seconds
+        has_repeated_queries: Whether a query shape repeated beyond the threshold
+        budget_exceeded: Whether the view's query budget was exceeded
+    """
+    try:
+        db_queries_per_request.labels(view=view).observe(query_count)
+        db_duration_per_request_seconds.labels(view=view).observe(duration)
+        if has_repeated_queries:
+            db_repeated_queries_total.labels(view=view).inc()
+        if budget_exceeded:
+            db_query_budget_exceeded_total.labels(view=view).inc()
+    except Exception as e:
+        # Don't let metrics errors affect request handling
+        logger.debug(f"Failed to record request query metrics: {e}")
@@ -2,6 +2,7 @@
 
 import uuid
 import time
+import random
 import logging
 from typing import Callable, Any, Dict, Optional, Union
 from django.conf import settings
@@ -14,10 +15,20 @@ logger = get_logger('common.middleware.logging_middleware')
 
 
 class LoggingMiddleware:
-    """日志中间件"""
+    """
+    日志中间件
+
+    为降低每个请求的日志开销：
+    - 只有按 REQUEST_LOG_SAMPLE_RATE 采样到的请求才收集参数/头部并记录详细的请求/响应日志
+    - 未采样的请求只在 5xx 或耗时超过 REQUEST_LOG_SLOW_MS 时记录一条响应日志
+    - 响应大小取自 Content-Length 或已渲染的 content，流式响应不读取内容
+    - 日志的格式化和写文件由 QueueListener 在后台线程完成（见 LOGGING_CONFIG）
+    """
 
     def __init__(self, get_response: Callable):
         self.get_response = get_response
+        self.sample_rate = getattr(settings, 'REQUEST_LOG_SAMPLE_RATE', 1.0)
+        self.slow_ms = getattr(settings, 'REQUEST_LOG_SLOW_MS', 1000)
 
     def __call__(self, request: DjangoHttpRequest) -> DjangoHttpResponse:
         """处理请求和响应"""
@@ -26,36 +37,44 @@ class LoggingMiddleware:
 
         # 创建请求日志记录器
         request_logger = RequestLogger(request.id)
+        sampled = self._should_sample()
 
         # 开始计时
-        start_time = time.time()
-
-        # 记录请求信息
-        request_logger.log_request(
-            method=request.method,
-            path=request.path,
-            user_id=getattr(request.user, 'id', None),
-            params=self._get_request_params(request),
-            headers=self._get_request_headers(request),
-            ip_address=self._get_client_ip(request)
-        )
+        start_time = time.perf_counter()
+
+        # 记录请求信息（仅采样请求收集参数和头部）
+        if sampled:
+            request_logger.log_request(
+                method=request.method,
+                path=request.path,
+                user_id=getattr(request.user, 'id', None),
+                params=self._get_request_params(request),
+                headers=self._get_request_headers(request),
+                ip_address=self._get_client_ip(request)
+            )
 
         # 处理请求
         response = self.get_response(request)
 
         # 计算响应时间
-        duration_ms = (time.time() - start_time) * 1000
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        is_server_error = 500 <= response.status_code < 600
+        is_slow = duration_ms >= self.slow_ms
 
         # 记录响应信息
-        request_logger.log_response(
-            status_code=response.status_code,
-            duration_ms=duration_ms,
-            response_size=len(response.content) if hasattr(response, 'content') else None
-        )
+        if sampled or is_server_error or is_slow:
+            request_logger.log_response(
+                status_code=response.status_code,
+                duration_ms=duration_ms,
+                response_size=self._get_response_size(response),
+                method=request.method,
+                path=request.path,
+                sampled=sampled,
+            )
 
         # 检查并记录缓存性能统计（Phase 2）
         cache_stats = getattr(request, '_cache_stats', None)
-        if cache_stats:
+        if cache_stats and (sampled or is_slow):
             try:
                 total_requests = cache_stats['hits'] + cache_stats['misses'] + cache_stats['null_values']
                 hit_rate = cache_stats['hits'] / (cache_stats['hits'] + cache_stats['misses']) if (cache_stats['hits'] + cache_stats['misses']) > 0 else None
@@ -77,7 +96,7 @@ class LoggingMiddleware:
                 logger.debug(f"Failed to log cache stats: {e}")
 
         # 如果是 5xx 错误，额外记录错误
-        if 500 <= response.status_code < 600:
+        if is_server_error:
             request_logger.log_error(
                 error=f"Server error: {response.status_code}",
                 context={
@@ -92,6 +111,25 @@ class LoggingMiddleware:
 
         return response
 
+    def _should_sample(self) -> bool:
+        """按采样率决定是否记录该请求的详细日志"""
+        if self.sample_rate >= 1:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    @staticmethod
+    def _get_response_size(response: DjangoHttpResponse) -> Optional[int]:
+        """响应体大小；流式响应不读取内容，只使用 Content-Length（如果有）"""
+        content_length = response.get('Content-Length')
+        if content_length:
+            try:
+                return int(content_length)
+            except ValueError:
+                pass
+        if getattr(response, 'streaming', False):
+            return None
+        return len(response.content)
+
     def process_exception(self, request: DjangoHttpRequest, exception: Exception) -> Optional[DjangoHttpResponse]:
         """处理异常"""
         request_id = getattr(request, 'id', str(uuid.uuid4()))
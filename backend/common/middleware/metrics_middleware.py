@@ -0,0 +1,53 @@
+"""Prometheus HTTP 指标中间件
+
+按视图（ViewSet.action）、方法和状态码记录请求耗时与响应大小，并统计进行中的请求数。
+指标注册在与缓存指标相同的 registry 上，由 serve_metrics 统一导出；
+设置 PROMETHEUS_MULTIPROC_DIR 后可在多个 gunicorn worker 之间聚合。
+"""
+
+import time
+from typing import Callable
+
+from django.http.request import HttpRequest as DjangoHttpRequest
+from django.http.response import HttpResponseBase as DjangoHttpResponse
+
+from common.metrics.http_metrics import (
+    get_view_label,
+    http_requests_in_progress,
+    record_http_request,
+)
+
+
+class PrometheusMetricsMiddleware:
+    """Prometheus HTTP 指标中间件"""
+
+    def __init__(self, get_response: Callable):
+        self.get_response = get_response
+
+    def __call__(self, request: DjangoHttpRequest) -> DjangoHttpResponse:
+        in_progress = http_requests_in_progress.labels(method=request.method)
+        in_progress.inc()
+        start_time = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            in_progress.dec()
+        duration = time.perf_counter() - start_time
+
+        view_label, _, _ = get_view_label(request)
+        record_http_request(
+            view=view_label,
+            method=request.method,
+            status=response.status_code,
+            duration=duration,
+            response_size=self._get_response_size(response),
+        )
+        return response
+
+    @staticmethod
+    def _get_response_size(response: DjangoHttpResponse):
+        """响应体大小；流式响应不读取内容，只使用 Content-Length（如果有）"""
+        if getattr(response, "streaming", False):
+            content_length = response.get("Content-Length")
+            return int(content_length) if content_length else None
+        return len(response.content)
@@ -0,0 +1,169 @@
+"""查询预算 / N+1 检测中间件
+
+通过 connection.execute_wrapper 统计每个请求执行的 SQL 数量和数据库耗时：
+- 按视图（ViewSet.action）输出 Prometheus 直方图
+- 同一查询形状重复超过阈值时记录疑似 N+1 日志
+- 视图声明了查询预算（query_budget）且超出时记录告警；
+  测试模式下（settings.QUERY_BUDGET_ENFORCE）直接抛出 QueryBudgetExceeded
+
+声明预算:
+    class CourseViewSet(viewsets.ModelViewSet):
+        query_budget = {"list": 6, "retrieve": 4}   # 按 action
+        # 或 query_budget = 6                         # 所有 action
+
+    # 也可以在 settings.QUERY_BUDGETS 中按视图标签覆盖:
+    QUERY_BUDGETS = {"CourseViewSet.list": 6}
+"""
+
+import re
+import time
+import logging
+from collections import Counter
+from contextlib import ExitStack
+from typing import Callable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+from django.http.request import HttpRequest as DjangoHttpRequest
+from django.http.response import HttpResponseBase as DjangoHttpResponse
+
+from common.metrics.http_metrics import get_view_label
+
+try:
+    from common.metrics import record_request_queries
+except ImportError:
+    record_request_queries = None
+
+logger = logging.getLogger("teaching_platform.database")
+
+# 查询形状归一化：折叠 IN 列表、字符串/数字字面量和空白
+_IN_LIST_RE = re.compile(r"\bIN \((?:%s, )*%s\)")
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL_RE = re.compile(r"\b\d+\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """视图执行的查询数超过声明的预算（仅在测试模式下抛出）"""
+
+
+def normalize_sql(sql: str) -> str:
+    """把 SQL 归一化为查询形状，参数不同但结构相同的查询得到同一形状"""
+    shape = _STRING_LITERAL_RE.sub("?", sql)
+    shape = _NUMBER_LITERAL_RE.sub("?", shape)
+    shape = _IN_LIST_RE.sub("IN (...)", shape)
+    return _WHITESPACE_RE.sub(" ", shape).strip()
+
+
+class QueryCollector:
+    """execute_wrapper 回调：统计查询次数、耗时和查询形状"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[normalize_sql(sql)] += 1
+
+    def repeated_shapes(self, threshold: int) -> List[Tuple[str, int]]:
+        """返回执行次数达到阈值的查询形状（按次数降序）"""
+        return [
+            (shape, count)
+            for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+
+class QueryBudgetMiddleware:
+    """查询预算 / N+1 检测中间件"""
+
+    def __init__(self, get_response: Callable):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "QUERY_BUDGET_ENABLED", True)
+
+    def __call__(self, request: DjangoHttpRequest) -> DjangoHttpResponse:
+        if not self.enabled:
+            return self.get_response(request)
+
+        collector = QueryCollector()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collector))
+            response = self.get_response(request)
+
+        self._check(request, collector)
+        return response
+
+    def _check(self, request: DjangoHttpRequest, collector: QueryCollector) -> None:
+        """记录 metrics，检测重复查询和预算超限"""
+        view_label, budget = self._resolve_view(request)
+
+        threshold = getattr(settings, "QUERY_BUDGET_REPEAT_THRESHOLD", 5)
+        repeated = collector.repeated_shapes(threshold)
+        budget_exceeded = budget is not None and collector.count > budget
+
+        if record_request_queries:
+            record_request_queries(
+                view_label,
+                collector.count,
+                collector.duration,
+                has_repeated_queries=bool(repeated),
+                budget_exceeded=budget_exceeded,
+            )
+
+        if repeated:
+            logger.warning(
+                f"Possible N+1 queries in {view_label}",
+                extra={
+                    "event": "db_repeated_queries",
+                    "view": view_label,
+                    "path": request.path,
+                    "query_count": collector.count,
+                    "repeated_queries": [
+                        {"sql": shape[:500], "count": count}
+                        for shape, count in repeated[:5]
+                    ],
+                },
+            )
+
+        if budget_exceeded:
+            message = (
+                f"{view_label} executed {collector.count} queries, "
+                f"budget is {budget} ({request.method} {request.path})"
+            )
+            logger.warning(
+                message,
+                extra={
+                    "event": "db_query_budget_exceeded",
+                    "view": view_label,
+                    "query_count": collector.count,
+                    "query_budget": budget,
+                    "db_duration_ms": collector.duration * 1000,
+                },
+            )
+            if getattr(settings, "QUERY_BUDGET_ENFORCE", False):
+                top = "\n".join(
+                    f"  {count}x {shape[:200]}"
+                    for shape, count in collector.shapes.most_common(5)
+                )
+                raise QueryBudgetExceeded(f"{message}\nMost frequent queries:\n{top}")
+
+    def _resolve_view(self, request: DjangoHttpRequest) -> Tuple[str, Optional[int]]:
+        """解析视图标签（ViewSet.action）和该视图声明的查询预算"""
+        view_label, view_class, action = get_view_label(request)
+
+        overrides = getattr(settings, "QUERY_BUDGETS", {})
+        if view_label in overrides:
+            return view_label, overrides[view_label]
+
+        budget = getattr(view_class, "query_budget", None)
+        if isinstance(budget, dict):
+            budget = budget.get(action)
+        return view_label, budget
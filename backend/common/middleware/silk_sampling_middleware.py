@@ -0,0 +1,196 @@
+"""Silk 采样中间件
+
+SilkyMiddleware 默认记录每个请求和每条 SQL，会给每次调用增加数据库写入和延迟。
+SampledSilkyMiddleware 只在以下情况交给 Silk 做完整记录（写入数据库）：
+- 按 SILK_SAMPLE_RATE 随机采样到的请求
+- 带有 SILK_PROFILE_HEADER 请求头且认证用户是管理员（staff）的请求
+- 最近出现过慢请求的路由（接下来的 SILK_SLOW_ROUTE_PROFILES 个请求）
+
+其余请求只计时；超过 SILK_SLOW_REQUEST_MS 的请求写入进程内的环形缓冲区
+（slow_request_buffer），不产生任何数据库写入，可通过管理员接口查看。
+
+启用:
+    MIDDLEWARE = ["common.middleware.silk_sampling_middleware.SampledSilkyMiddleware", ...]
+    SILKY_MIDDLEWARE_CLASS = "common.middleware.silk_sampling_middleware.SampledSilkyMiddleware"
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.http.request import HttpRequest as DjangoHttpRequest
+from django.http.response import HttpResponseBase as DjangoHttpResponse
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from silk.collector import DataCollector
+from silk.middleware import SilkyMiddleware
+
+from common.metrics.http_metrics import get_view_label
+
+logger = logging.getLogger("teaching_platform.performance")
+
+# 记录原因
+PROFILE_REASON_SAMPLED = "sampled"
+PROFILE_REASON_HEADER = "header"
+PROFILE_REASON_SLOW_ROUTE = "slow_route"
+
+
+class SlowRequestBuffer:
+    """
+    进程内慢请求环形缓冲区
+
+    只保存少量摘要字段（不含参数和响应体），超出容量时丢弃最旧的记录。
+    同时记录最近变慢的路由，供中间件对这些路由的后续请求做完整记录。
+    """
+
+    MAX_SLOW_ROUTES = 100
+
+    def __init__(self, maxlen: int = 200):
+        self._entries = deque(maxlen=maxlen)
+        self._slow_routes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, entry: Dict[str, Any], route: Optional[str] = None, profiles: int = 0):
+        """记录一个慢请求；route 不为空时标记该路由接下来的 profiles 个请求需要完整记录"""
+        with self._lock:
+            self._entries.append(entry)
+            if route and profiles > 0 and (
+                route in self._slow_routes or len(self._slow_routes) < self.MAX_SLOW_ROUTES
+            ):
+                self._slow_routes[route] = profiles
+
+    def has_slow_routes(self) -> bool:
+        return bool(self._slow_routes)
+
+    def consume_slow_route(self, route: str) -> bool:
+        """路由被标记为慢路由时消耗一次完整记录名额"""
+        with self._lock:
+            remaining = self._slow_routes.get(route)
+            if not remaining:
+                return False
+            if remaining <= 1:
+                del self._slow_routes[route]
+            else:
+                self._slow_routes[route] = remaining - 1
+            return True
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """按时间倒序返回缓冲区中的慢请求"""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._slow_routes.clear()
+
+
+slow_request_buffer = SlowRequestBuffer(
+    maxlen=getattr(settings, "SILK_SLOW_REQUEST_BUFFER_SIZE", 200)
+)
+
+
+def _get_route(request: DjangoHttpRequest) -> Optional[str]:
+    """请求对应的 URL 路由模式（不含具体 id），用于慢路由标记"""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+    return match.route
+
+
+class SampledSilkyMiddleware(SilkyMiddleware):
+    """按采样 / 请求头 / 慢路由决定是否交给 Silk 记录的 SilkyMiddleware"""
+
+    def __init__(self, get_response: Callable):
+        super().__init__(get_response)
+        self.sample_rate = getattr(settings, "SILK_SAMPLE_RATE", 0.01)
+        self.profile_header = getattr(settings, "SILK_PROFILE_HEADER", "X-Silk-Profile")
+        self.slow_ms = getattr(settings, "SILK_SLOW_REQUEST_MS", 1000)
+        self.slow_route_profiles = getattr(settings, "SILK_SLOW_ROUTE_PROFILES", 3)
+
+    def __call__(self, request: DjangoHttpRequest) -> DjangoHttpResponse:
+        reason = self._get_profile_reason(request)
+        start_time = time.perf_counter()
+
+        if reason:
+            response = super().__call__(request)
+        else:
+            # 与 SilkyMiddleware.process_request 一致：清理线程内的收集器，
+            # 避免本请求的 SQL 被记到同一线程上一个被记录的请求上
+            DataCollector().clear()
+            response = self.get_response(request)
+
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        if duration_ms >= self.slow_ms:
+            self._record_slow_request(request, response, duration_ms, reason)
+        return response
+
+    def _get_profile_reason(self, request: DjangoHttpRequest) -> Optional[str]:
+        """返回需要完整记录的原因；不需要记录时返回 None"""
+        if self.profile_header and request.headers.get(self.profile_header) and self._is_staff(request):
+            return PROFILE_REASON_HEADER
+        if slow_request_buffer.has_slow_routes():
+            route = _get_route(request)
+            if route is not None and slow_request_buffer.consume_slow_route(route):
+                return PROFILE_REASON_SLOW_ROUTE
+        if self.sample_rate >= 1 or (self.sample_rate > 0 and random.random() < self.sample_rate):
+            return PROFILE_REASON_SAMPLED
+        return None
+
+    @staticmethod
+    def _is_staff(request: DjangoHttpRequest) -> bool:
+        """
+        判断请求用户是否为管理员
+
+        本中间件位于认证中间件之前，这里按 DRF 的 JWT 认证解析用户；
+        只有携带了 profile 请求头的请求才会走到这里。
+        """
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return user.is_staff
+        try:
+            from rest_framework_simplejwt.authentication import JWTAuthentication
+
+            result = JWTAuthentication().authenticate(request)
+        except Exception as e:
+            logger.debug(f"Failed to authenticate silk profile request: {e}")
+            return False
+        return bool(result and result[0].is_staff)
+
+    def _record_slow_request(
+        self,
+        request: DjangoHttpRequest,
+        response: DjangoHttpResponse,
+        duration_ms: float,
+        reason: Optional[str],
+    ):
+        """把慢请求摘要写入环形缓冲区；未被记录的慢请求同时标记其路由"""
+        try:
+            view_label, _, _ = get_view_label(request)
+            route = _get_route(request)
+            slow_request_buffer.add(
+                {
+                    "timestamp": timezone.now().isoformat(),
+                    "method": request.method,
+                    "path": request.path,
+                    "view": view_label,
+                    "status_code": response.status_code,
+                    "duration_ms": round(duration_ms, 2),
+                    "profiled": bool(reason),
+                    "profile_reason": reason,
+                    "pid": os.getpid(),
+                },
+                route=None if reason else route,
+                profiles=self.slow_route_profiles,
+            )
+        except Exception as e:
+            # Don't let profiling bookkeeping affect the request
+            logger.debug(f"Failed to record slow request: {e}")
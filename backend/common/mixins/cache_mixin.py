@@ -12,7 +12,8 @@ from common.utils.cache import (
     get_cache,
     set_cache,
     AdaptiveTTLCalculator,
-    delete_cache_pattern,
+    CacheInvalidator,
+    resource_id_may_exist,
 )
 
 # Import cache metrics (optional)
@@ -21,11 +22,13 @@ try:
         record_cache_hit,
         record_cache_miss,
         record_cache_null_value,
+        record_penetration_attempt,
     )
 except ImportError:
     record_cache_hit = None
     record_cache_miss = None
     record_cache_null_value = None
+    record_penetration_attempt = None
 
 """
 统一的缓存 Mixin 模块
@@ -44,6 +47,10 @@ except ImportError:
    - 用于在 CRUD 操作时自动清除缓存
    - 使用 get_standard_cache_key()
 
+4. ResourceIdFilterMixin
+   - 用资源 ID 位图在访问缓存和数据库前拒绝不存在的 ID
+   - StandardCacheRetrieveMixin 已内置
+
 迁移状态:
 - 已完成: 所有ViewSet迁移到新系统
 - 已完成: cache_warming迁移到新系统
@@ -110,9 +117,11 @@ class InvalidateCacheMixin:
         对于嵌套路由，只清除当前父资源下的缓存。
         例如：只清除 course_pk=1 的 chapters 缓存，不影响 course_pk=2 的缓存。
         """
-        parent_pks = self._get_parent_pks()
-        base_key = self._get_base_cache_key(parent_pks=parent_pks)
-        delete_cache_pattern(f"{base_key}:*")
+        CacheInvalidator.invalidate_viewset_list(
+            prefix=self.cache_prefix,
+            view_name=self.__class__.__name__,
+            parent_pks=self._get_parent_pks(),
+        )
 
     def _invalidate_detail_cache(self, pk):
         """清除单个对象缓存
@@ -230,8 +239,12 @@ class StandardCacheListMixin:
         response_data = response.data if hasattr(response, "data") else response
         is_empty = response_data in ([], {}, None)
 
-        # 使用默认 TTL 设置缓存
-        cache_timeout = 60 if is_empty else self.cache_timeout
+        # 按键族的自适应 TTL 设置缓存（TTL 表未覆盖时使用默认 TTL）
+        cache_timeout = (
+            60
+            if is_empty
+            else AdaptiveTTLCalculator.calculate_ttl(cache_key, self.cache_timeout)
+        )
         set_cache(cache_key, response_data, cache_timeout)
 
         return response
@@ -321,7 +334,16 @@ class StandardCacheListMixin:
     def _get_allowed_cache_params(self):
         """获取应该包含在缓存键中的查询参数"""
         # 通用的分页和搜索参数
-        common_params = {"page", "page_size", "limit", "offset", "search", "exclude"}
+        common_params = {
+            "page",
+            "page_size",
+            "limit",
+            "offset",
+            "cursor",
+            "pagination",
+            "search",
+            "exclude",
+        }
 
         # 从 ViewSet 获取 filterset_fields
         filter_fields = set()
@@ -345,7 +367,34 @@ class StandardCacheListMixin:
         return common_params | filter_fields | ordering_fields
 
 
-class StandardCacheRetrieveMixin:
+class ResourceIdFilterMixin:
+    """
+    资源 ID 过滤 Mixin
+
+    在访问缓存和数据库之前，用资源 ID 位图（见 resource_id_may_exist）
+    拒绝一定不存在的 ID，避免随机 ID 扫描为每个新 ID 写入空值标记并查询数据库。
+    位图未构建或 Redis 不可用时放行。
+    """
+
+    def _reject_nonexistent_pk(self, pk):
+        """
+        检查主键是否可能存在
+
+        Returns:
+            Response | None: ID 一定不存在时返回 404 响应，否则返回 None
+        """
+        queryset = getattr(self, "queryset", None)
+        if pk is None or queryset is None:
+            return None
+        if resource_id_may_exist(queryset.model, pk):
+            return None
+
+        if record_penetration_attempt:
+            record_penetration_attempt(self.__class__.__name__, str(pk))
+        return Response({"detail": "Not found"}, status=404)
+
+
+class StandardCacheRetrieveMixin(ResourceIdFilterMixin):
     """
     标准缓存详情 Mixin
 
@@ -381,6 +430,11 @@ class StandardCacheRetrieveMixin:
         lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
         pk = kwargs.get(lookup_url_kwarg)
 
+        # 资源 ID 位图判定一定不存在时直接返回 404，不访问缓存和数据库
+        rejected = self._reject_nonexistent_pk(pk)
+        if rejected is not None:
+            return rejected
+
         # 提取父资源主键（用于嵌套路由）
         parent_pks = self._get_parent_pks()
 
@@ -423,8 +477,12 @@ class StandardCacheRetrieveMixin:
         response_data = response.data if hasattr(response, "data") else response
         is_empty = response_data in ([], {}, None)
 
-        # 使用默认 TTL 设置缓存
-        cache_timeout = 60 if is_empty else self.cache_timeout
+        # 按键族的自适应 TTL 设置缓存（TTL 表未覆盖时使用默认 TTL）
+        cache_timeout = (
+            60
+            if is_empty
+            else AdaptiveTTLCalculator.calculate_ttl(cache_key, self.cache_timeout)
+        )
         set_cache(cache_key, response_data, cache_timeout)
 
         return response
@@ -514,7 +572,16 @@ class StandardCacheRetrieveMixin:
     def _get_allowed_cache_params(self):
         """获取应该包含在缓存键中的查询参数"""
         # 通用的分页和搜索参数
-        common_params = {"page", "page_size", "limit", "offset", "search", "exclude"}
+        common_params = {
+            "page",
+            "page_size",
+            "limit",
+            "offset",
+            "cursor",
+            "pagination",
+            "search",
+            "exclude",
+        }
 
         # 从 ViewSet 获取 filterset_fields
         filter_fields = set()
@@ -21,6 +21,19 @@ class DynamicFieldsSerializerMixin:
         context['exclude_fields'] = {'description'}
     """
 
+    @property
+    def _readable_fields(self):
+        """
+        Skip excluded fields before they are evaluated.
+
+        Excluded fields are never read from the instance, so deferred model
+        fields are not loaded and SerializerMethodFields are not called.
+        """
+        exclude_fields = self.context.get('exclude_fields', set())
+        for field in super()._readable_fields:
+            if field.field_name not in exclude_fields:
+                yield field
+
     def to_representation(self, instance: Any) -> Dict[str, Any]:
         """
         Remove excluded fields from the serialized representation.
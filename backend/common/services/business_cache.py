@@ -46,6 +46,7 @@ import logging
 from typing import Any, Callable, Optional, Dict
 
 from common.utils.cache import (
+    CacheResult,
     get_cache,
     set_cache,
     delete_cache,
@@ -75,7 +76,10 @@ class BusinessCacheService:
 
     @staticmethod
     def cache_result(
-        cache_key: str, fetcher: Callable[[], Any], timeout: int = 900
+        cache_key: str,
+        fetcher: Callable[[], Any],
+        timeout: int = 900,
+        prefetched: Optional[CacheResult] = None,
     ) -> Any:
         """
         通用缓存方法
@@ -86,6 +90,7 @@ class BusinessCacheService:
             cache_key: 缓存key
             fetcher: 回调函数，在缓存未命中时调用获取数据
             timeout: 缓存过期时间（秒），默认900秒（15分钟）
+            prefetched: 已批量读取的结果（可选，见 SeparatedCacheService.get_many）
 
         Returns:
             Any: 缓存的数据
@@ -98,7 +103,11 @@ class BusinessCacheService:
             )
         """
         # 尝试从缓存获取
-        result = get_cache(cache_key, return_result=True)
+        result = (
+            prefetched
+            if prefetched is not None
+            else get_cache(cache_key, return_result=True)
+        )
 
         if result and result.is_hit:
             logger.debug(f"Business cache hit: {cache_key}")
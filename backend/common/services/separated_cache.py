@@ -31,6 +31,14 @@
         ttl=900
     )
 
+    # 一次往返批量读取全局数据和用户状态，再交给各自的获取方法
+    prefetched = SeparatedCacheService.get_many([global_key, status_key])
+    data, is_hit = SeparatedCacheService.get_global_data(
+        cache_key=global_key,
+        data_fetcher=fetch_global,
+        prefetched=prefetched.get(global_key),
+    )
+
     # 失效全局数据
     SeparatedCacheService.invalidate_global("courses:chapters:course_1")
 
@@ -42,9 +50,15 @@
 """
 
 import logging
-from typing import Any, Callable, Tuple, Optional
+from typing import Any, Callable, Dict, Iterable, Tuple, Optional
 
-from common.utils.cache import get_cache, set_cache, delete_cache
+from common.utils.cache import (
+    CacheResult,
+    get_cache,
+    get_cache_many,
+    set_cache,
+    delete_cache,
+)
 
 logger = logging.getLogger("teaching_platform.cache")
 
@@ -63,9 +77,37 @@ class SeparatedCacheService:
         - 支持独立失效全局数据和用户状态
     """
 
+    @staticmethod
+    def get_many(cache_keys: Iterable[str]) -> Dict[str, CacheResult]:
+        """
+        批量读取多个缓存key（一次 MGET 往返）
+
+        用于在请求开始时收集全局数据和用户状态等所有需要的key，
+        读取结果通过 prefetched 参数交给 get_global_data / get_user_status /
+        BusinessCacheService.cache_result，未命中的key再各自回源。
+
+        Args:
+            cache_keys: 缓存key列表
+
+        Returns:
+            Dict[str, CacheResult]: 缓存key到 CacheResult 的映射
+
+        Example:
+            prefetched = SeparatedCacheService.get_many([global_key, status_key])
+            data, is_hit = SeparatedCacheService.get_global_data(
+                cache_key=global_key,
+                data_fetcher=fetch_global,
+                prefetched=prefetched.get(global_key),
+            )
+        """
+        return get_cache_many(cache_keys)
+
     @staticmethod
     def get_global_data(
-        cache_key: str, data_fetcher: Callable[[], Any], ttl: int = 1800
+        cache_key: str,
+        data_fetcher: Callable[[], Any],
+        ttl: int = 1800,
+        prefetched: Optional[CacheResult] = None,
     ) -> Tuple[Any, bool]:
         """
         获取全局数据（分离缓存的全局部分）
@@ -74,6 +116,7 @@ class SeparatedCacheService:
             cache_key: 全局数据的缓存key（应包含 GLOBAL 标记）
             data_fetcher: 回调函数，在缓存未命中时调用获取数据
             ttl: 缓存过期时间（秒），默认1800秒（30分钟）
+            prefetched: 已通过 get_many 批量读取的结果（可选，提供时不再单独读取）
 
         Returns:
             Tuple[Any, bool]: (数据, 是否命中缓存)
@@ -86,7 +129,11 @@ class SeparatedCacheService:
             )
         """
         # 尝试从缓存获取
-        result = get_cache(cache_key, return_result=True)
+        result = (
+            prefetched
+            if prefetched is not None
+            else get_cache(cache_key, return_result=True)
+        )
 
         if result and result.is_hit:
             logger.debug(f"Separated cache global hit: {cache_key}")
@@ -112,7 +159,11 @@ class SeparatedCacheService:
 
     @staticmethod
     def get_user_status(
-        cache_key: str, user_id: int, status_fetcher: Callable[[], Any], ttl: int = 900
+        cache_key: str,
+        user_id: int,
+        status_fetcher: Callable[[], Any],
+        ttl: int = 900,
+        prefetched: Optional[CacheResult] = None,
     ) -> Tuple[Any, bool]:
         """
         获取用户状态（分离缓存的用户状态部分）
@@ -122,6 +173,7 @@ class SeparatedCacheService:
             user_id: 用户ID
             status_fetcher: 回调函数，在缓存未命中时调用获取用户状态
             ttl: 缓存过期时间（秒），默认900秒（15分钟）
+            prefetched: 已通过 get_many 批量读取的结果（key 为 "{cache_key}:user_id={user_id}"）
 
         Returns:
             Tuple[Any, bool]: (用户状态数据, 是否命中缓存)
@@ -138,7 +190,11 @@ class SeparatedCacheService:
         user_cache_key = f"{cache_key}:user_id={user_id}"
 
         # 尝试从缓存获取
-        result = get_cache(user_cache_key, return_result=True)
+        result = (
+            prefetched
+            if prefetched is not None
+            else get_cache(user_cache_key, return_result=True)
+        )
 
         if result and result.is_hit:
             logger.debug(f"Separated cache status hit: {user_cache_key}")
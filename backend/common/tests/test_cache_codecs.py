@@ -0,0 +1,291 @@
+"""
+缓存编解码层（CacheCodec）单元测试
+"""
+
+import json
+import unittest
+import zlib
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django_redis.compressors.zlib import ZlibCompressor
+from django_redis.exceptions import CompressorError
+from django_redis.serializers.pickle import PickleSerializer
+
+from common.utils import cache as cache_module
+from common.utils.cache import (
+    CODEC_MAGIC,
+    CacheCodec,
+    CodecAwareZlibCompressor,
+    get_cache,
+    get_cache_codec,
+    set_cache,
+)
+
+
+SAMPLE_PAYLOAD = [
+    {
+        "id": i,
+        "course": 1,
+        "course_title": "Python 入门",
+        "title": f"第 {i} 章",
+        "content": "# 标题\n\n" + "正文内容 " * 200,
+        "order": i,
+        "created_at": "2024-01-01T00:00:00Z",
+        "prerequisite_chapters": [],
+    }
+    for i in range(5)
+]
+
+
+class TestCacheCodec(unittest.TestCase):
+    """测试 CacheCodec 编解码"""
+
+    def test_json_codec_keeps_legacy_string_payload(self):
+        """json codec 写入旧格式 JSON 字符串"""
+        codec = CacheCodec.from_name("json")
+
+        raw = codec.encode({"title": "章节"})
+
+        self.assertTrue(codec.is_legacy)
+        self.assertIsInstance(raw, str)
+        self.assertEqual(json.loads(raw), {"title": "章节"})
+
+    def test_round_trip_all_codecs(self):
+        """所有 codec 编码后都能还原数据"""
+        for name in [
+            "json+zlib",
+            "orjson",
+            "orjson+lz4",
+            "orjson+zstd",
+            "msgpack",
+            "msgpack+lz4",
+            "msgpack+zstd",
+        ]:
+            with self.subTest(codec=name):
+                codec = CacheCodec.from_name(name)
+                if codec.name != name:
+                    # 可选依赖未安装，codec 已回退
+                    self.skipTest(f"{name} unavailable, falls back to {codec.name}")
+
+                raw = codec.encode(SAMPLE_PAYLOAD)
+                self.assertIsInstance(raw, bytes)
+                self.assertTrue(raw.startswith(CODEC_MAGIC))
+                self.assertEqual(CacheCodec.decode(raw), SAMPLE_PAYLOAD)
+
+    def test_missing_packages_fall_back(self):
+        """可选依赖缺失时回退：无压缩时为旧格式字符串，否则为 json+zlib"""
+        with patch.object(cache_module, "orjson", None), patch.object(
+            cache_module, "lz4_frame", None
+        ):
+            legacy = CacheCodec.from_name("orjson")
+            compressed = CacheCodec.from_name("orjson+lz4")
+
+            raw = legacy.encode(SAMPLE_PAYLOAD)
+            self.assertTrue(legacy.is_legacy)
+            self.assertIsInstance(raw, str)
+            self.assertEqual(CacheCodec.decode(raw), SAMPLE_PAYLOAD)
+
+            self.assertEqual(compressed.name, "json+zlib")
+            raw = compressed.encode(SAMPLE_PAYLOAD)
+            self.assertTrue(raw.startswith(CODEC_MAGIC))
+            self.assertEqual(CacheCodec.decode(raw), SAMPLE_PAYLOAD)
+
+    def test_decode_legacy_json_string(self):
+        """解码兼容旧的 JSON 字符串载荷"""
+        self.assertEqual(CacheCodec.decode('{"a": 1}'), {"a": 1})
+
+    def test_compression_reduces_large_payload(self):
+        """大载荷压缩后体积更小"""
+        plain = CacheCodec.from_name("json", compress_min_bytes=0).encode(
+            SAMPLE_PAYLOAD
+        )
+        compressed = CacheCodec.from_name("json+zlib").encode(SAMPLE_PAYLOAD)
+
+        self.assertLess(len(compressed), len(plain.encode("utf-8")))
+        self.assertEqual(compressed[3], CacheCodec.COMPRESSOR_IDS["zlib"])
+
+    def test_small_payload_skips_compression(self):
+        """小于阈值的载荷不压缩"""
+        raw = CacheCodec.from_name("json+zlib", compress_min_bytes=1024).encode(
+            {"id": 1}
+        )
+
+        self.assertEqual(raw[3], CacheCodec.COMPRESSOR_IDS["none"])
+        self.assertEqual(CacheCodec.decode(raw), {"id": 1})
+
+    def test_non_json_types_use_str_fallback(self):
+        """不可 JSON 序列化的值按 str 处理（与 json.dumps(default=str) 一致）"""
+        from decimal import Decimal
+
+        for name in ["json", "orjson", "msgpack"]:
+            with self.subTest(codec=name):
+                raw = CacheCodec.from_name(name).encode({"score": Decimal("1.5")})
+                self.assertEqual(CacheCodec.decode(raw), {"score": "1.5"})
+
+    def test_missing_optional_dependencies_fall_back(self):
+        """可选依赖缺失时回退到 json / zlib"""
+        with patch.object(cache_module, "orjson", None), patch.object(
+            cache_module, "lz4_frame", None
+        ):
+            codec = CacheCodec.from_name("orjson+lz4")
+
+        self.assertEqual(codec.name, "json+zlib")
+        self.assertEqual(CacheCodec.decode(codec.encode(SAMPLE_PAYLOAD)), SAMPLE_PAYLOAD)
+
+    def test_unknown_codec_raises(self):
+        """未知的序列化器/压缩器抛出 ValueError"""
+        with self.assertRaises(ValueError):
+            CacheCodec.from_name("pickle")
+        with self.assertRaises(ValueError):
+            CacheCodec.from_name("json+gzip")
+
+
+class TestCodecAwareZlibCompressor(unittest.TestCase):
+    """测试 django-redis 层的 zlib 压缩器"""
+
+    def setUp(self):
+        self.compressor = CodecAwareZlibCompressor(options={})
+        self.serializer = PickleSerializer(options={})
+
+    def _round_trip(self, value):
+        stored = self.compressor.compress(self.serializer.dumps(value))
+        try:
+            payload = self.compressor.decompress(stored)
+        except CompressorError:
+            payload = stored
+        return stored, self.serializer.loads(payload)
+
+    def test_compresses_legacy_and_session_values(self):
+        """旧格式 JSON 字符串和 session 字典照常 zlib 压缩"""
+        for value in (
+            json.dumps(SAMPLE_PAYLOAD, ensure_ascii=False),
+            {"_auth_user_id": "1", "data": "x" * 200},
+        ):
+            with self.subTest(value=type(value).__name__):
+                plain = self.serializer.dumps(value)
+                stored, loaded = self._round_trip(value)
+                self.assertEqual(stored, zlib.compress(plain, self.compressor.preset))
+                self.assertEqual(loaded, value)
+
+    def test_reads_values_written_by_zlib_compressor(self):
+        """部署前由 ZlibCompressor 写入的数据仍可读取"""
+        value = {"_auth_user_id": "1", "data": "x" * 200}
+        stored = ZlibCompressor(options={}).compress(self.serializer.dumps(value))
+        self.assertEqual(
+            self.serializer.loads(self.compressor.decompress(stored)), value
+        )
+
+    def test_skips_payloads_already_compressed_by_codec(self):
+        """codec 层已压缩的载荷不再做 zlib，未压缩的小载荷仍压缩"""
+        for size in (1, 300):
+            with self.subTest(size=size):
+                raw = CacheCodec("json", "zlib").encode(SAMPLE_PAYLOAD * size)
+                plain = self.serializer.dumps(raw)
+                stored, loaded = self._round_trip(raw)
+                self.assertEqual(stored, plain)
+                self.assertEqual(loaded, raw)
+
+        raw = CacheCodec("json", "zlib").encode({"id": 1})
+        self.assertEqual(raw[3], CacheCodec.COMPRESSOR_IDS["none"])
+        stored, loaded = self._round_trip(raw)
+        self.assertNotEqual(stored, self.serializer.dumps(raw))
+        self.assertEqual(loaded, raw)
+
+
+class TestGetCacheCodec(TestCase):
+    """测试按键族选择 codec"""
+
+    @override_settings(
+        CACHE_CODECS={
+            "default": "json",
+            "courses:ChapterViewSet": "orjson+lz4",
+            "courses:ChapterViewSet:SEPARATED:USER": "orjson",
+        }
+    )
+    def test_longest_prefix_wins(self):
+        """最长前缀匹配优先"""
+        global_key = "courses:ChapterViewSet:SEPARATED:GLOBAL:course_pk=1"
+        user_key = "courses:ChapterViewSet:SEPARATED:USER:course_pk=1:user_id=2"
+
+        self.assertEqual(
+            get_cache_codec(global_key).name,
+            CacheCodec.from_name("orjson+lz4").name,
+        )
+        self.assertEqual(
+            get_cache_codec(user_key).name, CacheCodec.from_name("orjson").name
+        )
+        self.assertEqual(get_cache_codec("courses:CourseViewSet:LIST").name, "json")
+
+    @override_settings(CACHE_CODECS={})
+    def test_defaults_to_json(self):
+        """未配置时使用旧格式 json"""
+        self.assertTrue(get_cache_codec("any:key").is_legacy)
+
+
+class TestSetGetCacheWithCodecs(TestCase):
+    """测试 set_cache / get_cache 与 codec 层的集成"""
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(CACHE_CODECS={"default": "json", "test:binary": "orjson+lz4"})
+    def test_binary_codec_round_trip(self):
+        """二进制 codec 写入后 get_cache 能正确读取"""
+        set_cache("test:binary:list", SAMPLE_PAYLOAD, timeout=60)
+
+        self.assertIsInstance(cache.get("test:binary:list"), bytes)
+        result = get_cache("test:binary:list", return_result=True)
+        self.assertTrue(result.is_hit)
+        self.assertEqual(result.data, SAMPLE_PAYLOAD)
+
+    @override_settings(CACHE_CODECS={"default": "json", "test:binary": "msgpack+zstd"})
+    def test_markers_survive_binary_codec(self):
+        """空值/空列表哨兵在二进制 codec 下仍然生效"""
+        set_cache("test:binary:null", None, timeout=60, is_null=True)
+        set_cache("test:binary:empty", [], timeout=60)
+
+        self.assertTrue(get_cache("test:binary:null", return_result=True).is_null_value)
+        empty = get_cache("test:binary:empty", return_result=True)
+        self.assertTrue(empty.is_hit)
+        self.assertEqual(empty.data, [])
+
+    def test_codec_switch_keeps_old_entries_readable(self):
+        """切换 codec 配置后旧数据仍可读取"""
+        with self.settings(CACHE_CODECS={"default": "json"}):
+            set_cache("test:switch", {"v": 1}, timeout=60)
+        with self.settings(CACHE_CODECS={"default": "msgpack+lz4"}):
+            self.assertEqual(get_cache("test:switch"), {"v": 1})
+            set_cache("test:switch", {"v": 2}, timeout=60)
+        with self.settings(CACHE_CODECS={"default": "json"}):
+            self.assertEqual(get_cache("test:switch"), {"v": 2})
+
+
+class TestBenchmarkCacheCodecsCommand(TestCase):
+    """测试 benchmark_cache_codecs 管理命令"""
+
+    def test_benchmark_outputs_results_for_both_serializers(self):
+        from courses.tests.factories import ChapterFactory, ProblemFactory
+
+        chapter = ChapterFactory()
+        ProblemFactory(chapter=chapter)
+
+        out = StringIO()
+        call_command(
+            "benchmark_cache_codecs",
+            "--iterations=2",
+            "--codecs=json,orjson+lz4",
+            "--json",
+            stdout=out,
+        )
+
+        results = json.loads(out.getvalue())
+        families = {row["family"] for row in results}
+        self.assertEqual(
+            families, {"ChapterGlobalSerializer", "ProblemGlobalSerializer"}
+        )
+        for row in results:
+            self.assertGreater(row["avg_bytes"], 0)
@@ -5,7 +5,21 @@ CacheInvalidator 单元测试
 import unittest
 from unittest.mock import patch, MagicMock
 
-from common.utils.cache import CacheInvalidator
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django_redis import get_redis_connection
+
+from common.utils.cache import (
+    CACHE_TAG_PREFIX,
+    CacheInvalidator,
+    bump_cache_generation,
+    get_cache,
+    get_cache_generation,
+    get_cache_key_tags,
+    get_standard_cache_key,
+    register_cache_tags,
+    set_cache,
+)
 
 
 class TestCacheInvalidator(unittest.TestCase):
@@ -45,35 +59,35 @@ class TestCacheInvalidator(unittest.TestCase):
 
         mock_delete.assert_called_once()
 
-    @patch("common.utils.cache.delete_cache_pattern")
-    @patch("common.utils.cache.get_standard_cache_key")
-    def test_invalidate_viewset_list_uses_pattern(
-        self, mock_get_key, mock_delete_pattern
-    ):
-        """测试 invalidate_viewset_list 使用通配符模式"""
-        mock_get_key.return_value = "courses:ChapterViewSet"
-        mock_delete_pattern.return_value = True
+    @patch("common.utils.cache.invalidate_cache_tags")
+    def test_invalidate_viewset_list_uses_tag(self, mock_invalidate_tags):
+        """测试 invalidate_viewset_list 按标签失效"""
+        mock_invalidate_tags.return_value = 2
 
         result = CacheInvalidator.invalidate_viewset_list(
             prefix="courses", view_name="ChapterViewSet"
         )
 
-        # 验证 key 以 :* 结尾
-        mock_delete_pattern.assert_called_once()
-        call_args = mock_delete_pattern.call_args[0][0]
-        self.assertTrue(call_args.endswith(":*"))
+        mock_invalidate_tags.assert_called_once_with("courses:ChapterViewSet")
         self.assertTrue(result)
 
     @patch("common.utils.cache.delete_cache_pattern")
-    def test_invalidate_viewset_list_calls_delete_pattern(self, mock_delete_pattern):
-        """测试 invalidate_viewset_list 调用 delete_cache_pattern"""
-        mock_delete_pattern.return_value = True
-
-        with patch("common.utils.cache.get_standard_cache_key") as mock_get_key:
-            mock_get_key.return_value = "test:ViewSet"
-            CacheInvalidator.invalidate_viewset_list(prefix="test", view_name="ViewSet")
+    @patch("common.utils.cache.invalidate_cache_tags")
+    def test_invalidate_viewset_list_does_not_scan(
+        self, mock_invalidate_tags, mock_delete_pattern
+    ):
+        """测试 invalidate_viewset_list 不再使用 SCAN 模式删除"""
+        CacheInvalidator.invalidate_viewset_list(
+            prefix="test",
+            view_name="ViewSet",
+            parent_pks={"course_pk": 1},
+            user_id=5,
+        )
 
-        mock_delete_pattern.assert_called_once()
+        mock_invalidate_tags.assert_called_once_with(
+            "test:ViewSet:course_pk=1:user_id=5"
+        )
+        mock_delete_pattern.assert_not_called()
 
     @patch("common.utils.cache.delete_cache")
     @patch("common.utils.cache.get_standard_cache_key")
@@ -135,19 +149,219 @@ class TestCacheInvalidator(unittest.TestCase):
         # 应该返回 False 而不是抛出异常
         self.assertFalse(result)
 
-    @patch("common.utils.cache.delete_cache_pattern")
-    def test_invalidate_list_handles_failure_gracefully(self, mock_delete_pattern):
-        """测试 delete_cache_pattern 抛出异常时不抛出"""
-        mock_delete_pattern.side_effect = Exception("Redis error")
+    @patch("common.utils.cache.invalidate_cache_tags")
+    def test_invalidate_list_handles_failure_gracefully(self, mock_invalidate_tags):
+        """测试 invalidate_cache_tags 抛出异常时不抛出"""
+        mock_invalidate_tags.side_effect = Exception("Redis error")
 
-        with patch("common.utils.cache.get_standard_cache_key") as mock_get_key:
-            mock_get_key.return_value = "test:ViewSet"
-            result = CacheInvalidator.invalidate_viewset_list(
-                prefix="test", view_name="ViewSet"
-            )
+        result = CacheInvalidator.invalidate_viewset_list(
+            prefix="test", view_name="ViewSet"
+        )
 
         self.assertFalse(result)
 
 
+class TestCacheKeyTags(unittest.TestCase):
+    """测试从缓存键推导标签"""
+
+    def test_list_key_with_parent_and_user(self):
+        key = get_standard_cache_key(
+            prefix="courses",
+            view_name="ChapterViewSet",
+            parent_pks={"course_pk": 1},
+            query_params={"page": 2},
+            user_id=5,
+        )
+
+        self.assertEqual(
+            get_cache_key_tags(key),
+            [
+                "courses:ChapterViewSet",
+                "courses:ChapterViewSet:user_id=5",
+                "courses:ChapterViewSet:course_pk=1",
+                "courses:ChapterViewSet:course_pk=1:user_id=5",
+            ],
+        )
+
+    def test_multiple_parents_register_each_and_combined(self):
+        key = get_standard_cache_key(
+            prefix="courses",
+            view_name="ChapterUnlockService",
+            parent_pks={"chapter_pk": 3, "enrollment_pk": 7},
+            query_params={"type": "UNLOCK"},
+        )
+
+        tags = get_cache_key_tags(key)
+
+        self.assertIn("courses:ChapterUnlockService:chapter_pk=3", tags)
+        self.assertIn("courses:ChapterUnlockService:enrollment_pk=7", tags)
+        self.assertIn(
+            "courses:ChapterUnlockService:chapter_pk=3:enrollment_pk=7", tags
+        )
+
+    def test_separated_key_parent_tags_are_scoped(self):
+        """分离缓存的父资源标签不与普通列表标签混用"""
+        key = get_standard_cache_key(
+            prefix="courses",
+            view_name="ChapterViewSet",
+            parent_pks={"course_pk": 1},
+            is_separated=True,
+            separated_type="GLOBAL",
+        )
+
+        tags = get_cache_key_tags(key)
+
+        self.assertIn("courses:ChapterViewSet", tags)
+        self.assertIn("courses:ChapterViewSet:SEPARATED:GLOBAL:course_pk=1", tags)
+        self.assertNotIn("courses:ChapterViewSet:course_pk=1", tags)
+
+    def test_non_standard_key_has_no_tags(self):
+        self.assertEqual(get_cache_key_tags("folder_by_path:1:/docs"), [])
+
+
+class TestTagInvalidationIntegration(TestCase):
+    """测试基于标签的失效（真实 Redis）"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_invalidate_viewset_list_only_affects_target_scope(self):
+        key_user1 = get_standard_cache_key(
+            prefix="api", view_name="EnrollmentViewSet", query_params={"page": 1}, user_id=1
+        )
+        key_user2 = get_standard_cache_key(
+            prefix="api", view_name="EnrollmentViewSet", query_params={"page": 1}, user_id=2
+        )
+        set_cache(key_user1, [{"id": 1}])
+        set_cache(key_user2, [{"id": 2}])
+
+        self.assertTrue(
+            CacheInvalidator.invalidate_viewset_list(
+                prefix="api", view_name="EnrollmentViewSet", user_id=1
+            )
+        )
+
+        self.assertIsNone(get_cache(key_user1))
+        self.assertEqual(get_cache(key_user2), [{"id": 2}])
+
+    def test_invalidate_viewset_list_covers_bare_list_key(self):
+        """无查询参数的列表键同样被失效"""
+        key = get_standard_cache_key(
+            prefix="courses", view_name="ChapterViewSet", parent_pks={"course_pk": 9}
+        )
+        set_cache(key, [{"id": 1}])
+
+        CacheInvalidator.invalidate_viewset_list(
+            prefix="courses", view_name="ChapterViewSet", parent_pks={"course_pk": 9}
+        )
+
+        self.assertIsNone(get_cache(key))
+
+    def test_invalidate_custom_tags(self):
+        set_cache("courses:custom:data", {"v": 1}, tags=["course:1"])
+        set_cache("courses:custom:other", {"v": 2}, tags=["course:2"])
+
+        self.assertTrue(CacheInvalidator.invalidate_tags("course:1"))
+
+        self.assertIsNone(get_cache("courses:custom:data"))
+        self.assertEqual(get_cache("courses:custom:other"), {"v": 2})
+
+    def test_register_prunes_expired_members(self):
+        """登记时删除已过期的成员，标签集合不会无限增长"""
+        redis_conn = get_redis_connection("default")
+        tag_key = f"{CACHE_TAG_PREFIX}:course:3"
+        redis_conn.zadd(tag_key, {"courses:custom:expired": 1})
+
+        set_cache("courses:custom:live", {"v": 1}, tags=["course:3"])
+
+        self.assertEqual(
+            [member.decode() for member in redis_conn.zrange(tag_key, 0, -1)],
+            ["courses:custom:live"],
+        )
+        self.assertTrue(CacheInvalidator.invalidate_tags("course:3"))
+        self.assertIsNone(get_cache("courses:custom:live"))
+
+    def test_register_never_shortens_tag_ttl(self):
+        """较短 TTL 的缓存键不会缩短标签集合的 TTL"""
+        redis_conn = get_redis_connection("default")
+        tag_key = f"{CACHE_TAG_PREFIX}:course:4"
+
+        register_cache_tags("courses:custom:long", ["course:4"], 7200)
+        register_cache_tags("courses:custom:short", ["course:4"], 60)
+
+        self.assertGreater(redis_conn.ttl(tag_key), 3600)
+
+
+class TestCacheGenerationNamespaces(TestCase):
+    """测试命名空间代际失效"""
+
+    def setUp(self):
+        cache.clear()
+
+    def _status_key(self, course_pk, user_id):
+        return get_standard_cache_key(
+            prefix="courses",
+            view_name="ChapterViewSet",
+            parent_pks={"course_pk": course_pk},
+            user_id=user_id,
+            is_separated=True,
+            separated_type="STATUS",
+        )
+
+    def test_key_unchanged_before_any_bump(self):
+        key = get_standard_cache_key(
+            prefix="courses", view_name="ChapterViewSet", parent_pks={"course_pk": 990001}
+        )
+
+        self.assertEqual(key, "courses:ChapterViewSet:course_pk=990001")
+
+    def test_bump_changes_keys_of_namespace_only(self):
+        old_key = self._status_key(990002, 77)
+        other_key = self._status_key(990003, 77)
+        set_cache(old_key, [{"id": 1}])
+
+        bump_cache_generation("course:990002")
+
+        new_key = self._status_key(990002, 77)
+        self.assertNotEqual(new_key, old_key)
+        self.assertIn(":gen=", new_key)
+        self.assertTrue(new_key.endswith(":user_id=77"))
+        self.assertIsNone(get_cache(new_key))
+        self.assertEqual(self._status_key(990003, 77), other_key)
+
+    def test_generation_is_sum_of_namespaces(self):
+        bump_cache_generation("course:990004")
+        bump_cache_generation("user:990005")
+        bump_cache_generation("user:990005")
+
+        self.assertEqual(get_cache_generation("course:990004", "user:990005"), 3)
+
+    def test_invalidate_namespace_returns_true(self):
+        before = self._status_key(990006, 88)
+
+        self.assertTrue(CacheInvalidator.invalidate_namespace("user:88"))
+        self.assertNotEqual(self._status_key(990006, 88), before)
+
+    @override_settings(CACHE_GENERATION_L1_MAX_ENTRIES=3)
+    def test_l1_is_bounded_lru(self):
+        from common.utils.cache import _generation_l1
+
+        _generation_l1.clear()
+        for i in range(5):
+            get_cache_generation(f"user:99100{i}")
+        get_cache_generation("user:991002")
+        get_cache_generation("user:991005")
+
+        self.assertEqual(
+            list(_generation_l1), ["user:991004", "user:991002", "user:991005"]
+        )
+
+    @patch("common.utils.cache.get_redis_connection")
+    def test_lookup_failure_falls_back_to_zero(self, mock_get_redis):
+        mock_get_redis.side_effect = Exception("Redis down")
+
+        self.assertEqual(get_cache_generation("course:990007"), 0)
+
+
 if __name__ == "__main__":
     unittest.main()
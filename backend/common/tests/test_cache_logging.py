@@ -1,10 +1,11 @@
 """
 Unit tests for cache performance logging.
 
-Tests the CachePerformanceLogger with the new separate counters implementation:
+Tests the CachePerformanceLogger with per-process buffering and windowed storage:
+- Operations are buffered in-process and merged into Redis with one pipeline
 - Total operations tracking
 - Slow operations tracking
-- Accurate rate calculations
+- Accurate rate calculations from the window index (no key scans)
 - Backward compatibility
 """
 
@@ -15,156 +16,114 @@ from django.test import override_settings
 from common.utils.logging import CachePerformanceLogger
 
 
+def make_logger():
+    """Logger that only flushes when asked to"""
+    logger = CachePerformanceLogger()
+    logger._flush_interval = 3600
+    return logger
+
+
 class TestCachePerformanceLoggerRecordOperation(unittest.TestCase):
-    """Test CachePerformanceLogger.record_cache_operation method"""
+    """Test CachePerformanceLogger.record_cache_operation and flush"""
 
     def setUp(self):
         """Set up test fixtures"""
-        self.logger = CachePerformanceLogger()
-
-    @patch('django_redis.get_redis_connection')
-    def test_record_hit_increments_hits_counter(self, mock_get_redis):
-        """Test that recording a hit increments the hits counter"""
-        mock_redis = MagicMock()
-        mock_get_redis.return_value = mock_redis
-
-        self.logger.record_cache_operation(
-            endpoint='TestViewSet',
-            operation_type='hit',
-            duration_ms=5.0,
-            is_slow=False
-        )
-
-        # Verify Redis pipeline was created
-        mock_redis.pipeline.assert_called_once()
+        self.logger = make_logger()
+        self.window = self.logger.current_window()
+        self.key = f'cache:perf:stats:{self.window}:TestViewSet'
 
-        # Get the pipeline and verify hincrby was called for hits
-        pipe = mock_redis.pipeline.return_value
-        pipe.hincrby.assert_any_call('cache:perf:stats:TestViewSet', 'hits', 1)
+    def pending(self, endpoint='TestViewSet'):
+        return self.logger._pending[(self.window, endpoint)]
 
     @patch('django_redis.get_redis_connection')
-    def test_record_miss_increments_misses_counter(self, mock_get_redis):
-        """Test that recording a miss increments the misses counter"""
-        mock_redis = MagicMock()
-        mock_get_redis.return_value = mock_redis
-
-        self.logger.record_cache_operation(
-            endpoint='TestViewSet',
-            operation_type='miss',
-            duration_ms=10.0,
-            is_slow=False
-        )
-
-        pipe = mock_redis.pipeline.return_value
-        pipe.hincrby.assert_any_call('cache:perf:stats:TestViewSet', 'misses', 1)
+    def test_record_does_not_touch_redis(self, mock_get_redis):
+        """Test that recording only updates the process buffer"""
+        self.logger.record_cache_operation('TestViewSet', 'hit', duration_ms=5.0)
+        self.logger.record_cache_operation('TestViewSet', 'hit', duration_ms=3.0)
+        self.logger.record_cache_operation('TestViewSet', 'miss')
+        self.logger.record_cache_operation('TestViewSet', 'null_value')
+
+        mock_get_redis.assert_not_called()
+        self.assertEqual(self.pending(), {
+            'hits': 2,
+            'misses': 1,
+            'null_values': 1,
+            'total_duration_ms': 8.0,
+        })
+
+    def test_record_slow_operation_increments_slow_operations_counter(self):
+        """Test that recording a slow operation increments the slow_operations counter"""
+        self.logger.record_cache_operation('TestViewSet', 'hit', duration_ms=150.0, is_slow=True)
+        self.logger.record_cache_operation('TestViewSet', 'hit', duration_ms=5.0, is_slow=False)
 
-    @patch('django_redis.get_redis_connection')
-    def test_record_null_value_increments_null_values_counter(self, mock_get_redis):
-        """Test that recording a null_value increments the null_values counter"""
-        mock_redis = MagicMock()
-        mock_get_redis.return_value = mock_redis
+        self.assertEqual(self.pending()['slow_operations'], 1)
 
-        self.logger.record_cache_operation(
-            endpoint='TestViewSet',
-            operation_type='null_value',
-            duration_ms=3.0,
-            is_slow=False
-        )
+    def test_record_total_operations(self):
+        """Test that total operations are buffered separately"""
+        self.logger.record_total_operations('TestViewSet')
+        self.logger.record_total_operations('TestViewSet', count=3)
 
-        pipe = mock_redis.pipeline.return_value
-        pipe.hincrby.assert_any_call('cache:perf:stats:TestViewSet', 'null_values', 1)
+        self.assertEqual(self.pending()['total_operations'], 4)
 
     @patch('django_redis.get_redis_connection')
-    def test_record_slow_operation_increments_slow_operations_counter(self, mock_get_redis):
-        """Test that recording a slow operation increments the slow_operations counter"""
+    def test_flush_writes_one_pipeline(self, mock_get_redis):
+        """Test that flush merges the buffer with a single non-transactional pipeline"""
         mock_redis = MagicMock()
         mock_get_redis.return_value = mock_redis
 
-        self.logger.record_cache_operation(
-            endpoint='TestViewSet',
-            operation_type='hit',
-            duration_ms=150.0,
-            is_slow=True
-        )
+        self.logger.record_cache_operation('TestViewSet', 'hit', duration_ms=25.5)
+        self.logger.record_cache_operation('TestViewSet', 'hit', duration_ms=4.5, is_slow=True)
+        self.logger.record_total_operations('TestViewSet', count=2)
+        self.logger.flush(force=True)
 
+        mock_redis.pipeline.assert_called_once_with(transaction=False)
         pipe = mock_redis.pipeline.return_value
-        pipe.hincrby.assert_any_call('cache:perf:stats:TestViewSet', 'slow_operations', 1)
+        pipe.hincrby.assert_any_call(self.key, 'hits', 2)
+        pipe.hincrby.assert_any_call(self.key, 'slow_operations', 1)
+        pipe.hincrby.assert_any_call(self.key, 'total_operations', 2)
+        pipe.hincrbyfloat.assert_called_once_with(self.key, 'total_duration_ms', 30.0)
+        pipe.expire.assert_any_call(self.key, 300)
+        pipe.sadd.assert_called_once_with(f'cache:perf:stats:{self.window}', 'TestViewSet')
+        pipe.execute.assert_called_once()
+        self.assertEqual(self.logger._pending, {})
 
     @patch('django_redis.get_redis_connection')
-    def test_record_fast_operation_does_not_increment_slow_operations(self, mock_get_redis):
-        """Test that recording a fast operation does not increment slow_operations counter"""
-        mock_redis = MagicMock()
-        mock_get_redis.return_value = mock_redis
+    def test_flush_is_throttled(self, mock_get_redis):
+        """Test that a non-forced flush waits for the flush interval"""
+        self.logger.record_cache_operation('TestViewSet', 'hit')
+        self.logger.flush()
 
-        self.logger.record_cache_operation(
-            endpoint='TestViewSet',
-            operation_type='hit',
-            duration_ms=5.0,
-            is_slow=False
-        )
-
-        pipe = mock_redis.pipeline.return_value
-
-        # Verify slow_operations is NOT incremented
-        for call_item in pipe.hincrby.call_args_list:
-            args, kwargs = call_item
-            if len(args) >= 3:
-                field = args[1]
-                # slow_operations should not be in the calls
-                if field == 'slow_operations':
-                    self.fail("slow_operations should not be incremented for fast operations")
+        mock_get_redis.assert_not_called()
 
     @patch('django_redis.get_redis_connection')
-    def test_record_operation_with_duration_increments_total_duration(self, mock_get_redis):
-        """Test that recording with duration increments total_duration_ms"""
+    def test_record_flushes_when_interval_elapsed(self, mock_get_redis):
+        """Test that recording flushes once the interval has elapsed"""
         mock_redis = MagicMock()
         mock_get_redis.return_value = mock_redis
+        self.logger._flush_interval = 0
 
-        self.logger.record_cache_operation(
-            endpoint='TestViewSet',
-            operation_type='hit',
-            duration_ms=25.5,
-            is_slow=False
-        )
+        self.logger.record_cache_operation('TestViewSet', 'miss')
 
-        pipe = mock_redis.pipeline.return_value
-        pipe.hincrbyfloat.assert_called_once_with(
-            'cache:perf:stats:TestViewSet',
-            'total_duration_ms',
-            25.5
-        )
+        mock_redis.pipeline.return_value.hincrby.assert_any_call(self.key, 'misses', 1)
 
     @patch('django_redis.get_redis_connection')
-    def test_record_operation_sets_ttl(self, mock_get_redis):
-        """Test that recording an operation sets TTL on the stats key"""
-        mock_redis = MagicMock()
-        mock_get_redis.return_value = mock_redis
-
-        self.logger.record_cache_operation(
-            endpoint='TestViewSet',
-            operation_type='hit',
-            duration_ms=5.0,
-            is_slow=False
-        )
-
-        pipe = mock_redis.pipeline.return_value
-        pipe.expire.assert_called_once_with('cache:perf:stats:TestViewSet', 300)
-
-    @patch('django_redis.get_redis_connection')
-    def test_record_operation_handles_redis_errors_gracefully(self, mock_get_redis):
+    def test_flush_handles_redis_errors_gracefully(self, mock_get_redis):
         """Test that Redis errors are handled gracefully"""
         mock_get_redis.side_effect = Exception("Redis connection error")
 
-        # Should not raise exception
+        self.logger.record_cache_operation('TestViewSet', 'hit', duration_ms=5.0)
         try:
-            self.logger.record_cache_operation(
-                endpoint='TestViewSet',
-                operation_type='hit',
-                duration_ms=5.0,
-                is_slow=False
-            )
+            self.logger.flush(force=True)
         except Exception:
-            self.fail("record_cache_operation should handle Redis errors gracefully")
+            self.fail("flush should handle Redis errors gracefully")
+
+    def test_reset_after_fork_drops_parent_buffer(self):
+        """Test that a forked child does not re-send the parent's counters"""
+        self.logger.record_cache_operation('TestViewSet', 'hit')
+
+        self.logger._reset_after_fork()
+
+        self.assertEqual(self.logger._pending, {})
 
 
 class TestCachePerformanceLoggerGetStats(unittest.TestCase):
@@ -172,14 +131,21 @@ class TestCachePerformanceLoggerGetStats(unittest.TestCase):
 
     def setUp(self):
         """Set up test fixtures"""
-        self.logger = CachePerformanceLogger()
+        self.logger = make_logger()
+
+    def mock_window(self, mock_get_redis, data):
+        """Window index + pipelined HGETALL results"""
+        mock_redis = MagicMock()
+        mock_redis.smembers.return_value = {ep.encode() for ep in data}
+        pipe = mock_redis.pipeline.return_value
+        pipe.execute.side_effect = lambda: [data[ep] for ep in sorted(data)]
+        mock_get_redis.return_value = mock_redis
+        return mock_redis
 
     @patch('django_redis.get_redis_connection')
     def test_get_endpoint_stats_returns_zero_stats_when_no_data(self, mock_get_redis):
         """Test that get_endpoint_stats returns zeros when no stats exist"""
-        mock_redis = MagicMock()
-        mock_redis.hgetall.return_value = {}
-        mock_get_redis.return_value = mock_redis
+        self.mock_window(mock_get_redis, {'TestViewSet': {}})
 
         stats = self.logger.get_endpoint_stats('TestViewSet')
 
@@ -197,19 +163,29 @@ class TestCachePerformanceLoggerGetStats(unittest.TestCase):
         self.assertEqual(stats['slow_operations'], 0)
         self.assertIsNone(stats['slow_operation_rate'])
 
+    @patch('django_redis.get_redis_connection')
+    def test_get_endpoint_stats_reads_last_closed_window(self, mock_get_redis):
+        """Test that reads default to the previous window"""
+        mock_redis = self.mock_window(mock_get_redis, {'TestViewSet': {}})
+        window = self.logger.current_window() - 1
+
+        self.logger.get_endpoint_stats('TestViewSet')
+
+        mock_redis.pipeline.return_value.hgetall.assert_called_once_with(
+            f'cache:perf:stats:{window}:TestViewSet'
+        )
+
     @patch('django_redis.get_redis_connection')
     def test_get_endpoint_stats_calculates_hit_rate_correctly(self, mock_get_redis):
         """Test that hit_rate is calculated correctly using total_operations"""
-        mock_redis = MagicMock()
-        mock_redis.hgetall.return_value = {
+        self.mock_window(mock_get_redis, {'TestViewSet': {
             b'hits': 80,
             b'misses': 15,
             b'null_values': 5,
             b'total_duration_ms': 500.0,
             b'slow_operations': 2,
             b'total_operations': 100,
-        }
-        mock_get_redis.return_value = mock_redis
+        }})
 
         stats = self.logger.get_endpoint_stats('TestViewSet')
 
@@ -218,16 +194,14 @@ class TestCachePerformanceLoggerGetStats(unittest.TestCase):
     @patch('django_redis.get_redis_connection')
     def test_get_endpoint_stats_calculates_slow_operation_rate_correctly(self, mock_get_redis):
         """Test that slow_operation_rate is calculated correctly"""
-        mock_redis = MagicMock()
-        mock_redis.hgetall.return_value = {
+        self.mock_window(mock_get_redis, {'TestViewSet': {
             b'hits': 600,
             b'misses': 300,
             b'null_values': 100,
             b'total_duration_ms': 1500.0,
             b'slow_operations': 10,
             b'total_operations': 1000,
-        }
-        mock_get_redis.return_value = mock_redis
+        }})
 
         stats = self.logger.get_endpoint_stats('TestViewSet')
 
@@ -237,16 +211,14 @@ class TestCachePerformanceLoggerGetStats(unittest.TestCase):
     @patch('django_redis.get_redis_connection')
     def test_get_endpoint_stats_backward_compatibility_missing_total_operations(self, mock_get_redis):
         """Test backward compatibility when total_operations field is missing"""
-        mock_redis = MagicMock()
-        mock_redis.hgetall.return_value = {
+        self.mock_window(mock_get_redis, {'TestViewSet': {
             b'hits': 80,
             b'misses': 15,
             b'null_values': 5,
             b'total_duration_ms': 500.0,
             b'slow_operations': 2,
             # total_operations is missing
-        }
-        mock_get_redis.return_value = mock_redis
+        }})
 
         stats = self.logger.get_endpoint_stats('TestViewSet')
 
@@ -259,34 +231,24 @@ class TestCachePerformanceLoggerGetStats(unittest.TestCase):
     @patch('django_redis.get_redis_connection')
     def test_get_global_stats_aggregates_correctly(self, mock_get_redis):
         """Test that get_global_stats aggregates across all endpoints"""
-        mock_redis = MagicMock()
-        mock_redis.scan_iter.return_value = [
-            b'cache:perf:stats:Endpoint1',
-            b'cache:perf:stats:Endpoint2',
-        ]
-
-        def mock_hgetall(key):
-            if b'Endpoint1' in key:
-                return {
-                    b'hits': 100,
-                    b'misses': 20,
-                    b'null_values': 5,
-                    b'total_duration_ms': 300.0,
-                    b'slow_operations': 3,
-                    b'total_operations': 125,
-                }
-            else:
-                return {
-                    b'hits': 80,
-                    b'misses': 30,
-                    b'null_values': 10,
-                    b'total_duration_ms': 400.0,
-                    b'slow_operations': 4,
-                    b'total_operations': 120,
-                }
-
-        mock_redis.hgetall.side_effect = mock_hgetall
-        mock_get_redis.return_value = mock_redis
+        mock_redis = self.mock_window(mock_get_redis, {
+            'Endpoint1': {
+                b'hits': 100,
+                b'misses': 20,
+                b'null_values': 5,
+                b'total_duration_ms': 300.0,
+                b'slow_operations': 3,
+                b'total_operations': 125,
+            },
+            'Endpoint2': {
+                b'hits': 80,
+                b'misses': 30,
+                b'null_values': 10,
+                b'total_duration_ms': 400.0,
+                b'slow_operations': 4,
+                b'total_operations': 120,
+            },
+        })
 
         stats = self.logger.get_global_stats()
 
@@ -296,50 +258,48 @@ class TestCachePerformanceLoggerGetStats(unittest.TestCase):
         self.assertEqual(stats['total_operations'], 245)  # 125+120
         self.assertEqual(stats['total_requests'], 245)  # Uses total_operations
         self.assertAlmostEqual(stats['hit_rate'], 180/245, places=2)
+        self.assertAlmostEqual(stats['avg_duration_ms'], 700/245, places=2)
+        self.assertEqual(stats['endpoint_count'], 2)
+        mock_redis.scan_iter.assert_not_called()
 
     @patch('django_redis.get_redis_connection')
     def test_get_all_endpoint_stats(self, mock_get_redis):
-        """Test get_all_endpoint_stats returns stats for all endpoints"""
-        mock_redis = MagicMock()
-        mock_redis.scan_iter.return_value = [
-            b'cache:perf:stats:Endpoint1',
-            b'cache:perf:stats:Endpoint2',
-        ]
-
-        def mock_hgetall(key):
-            if b'Endpoint1' in key:
-                return {
-                    b'hits': 100,
-                    b'misses': 20,
-                    b'null_values': 5,
-                    b'total_duration_ms': 300.0,
-                    b'slow_operations': 3,
-                    b'total_operations': 125,
-                }
-            else:
-                return {
-                    b'hits': 80,
-                    b'misses': 30,
-                    b'null_values': 10,
-                    b'total_duration_ms': 400.0,
-                    b'slow_operations': 4,
-                    b'total_operations': 120,
-                }
-
-        mock_redis.hgetall.side_effect = mock_hgetall
-        mock_get_redis.return_value = mock_redis
+        """Test get_all_endpoint_stats reads the window index with one pipeline"""
+        mock_redis = self.mock_window(mock_get_redis, {
+            'Endpoint1': {b'hits': 100, b'total_operations': 125},
+            'Endpoint2': {b'hits': 80, b'total_operations': 120},
+            'Endpoint3': {},
+        })
+
+        all_stats = self.logger.get_all_endpoint_stats()
+
+        self.assertEqual(set(all_stats), {'Endpoint1', 'Endpoint2'})
+        self.assertEqual(all_stats['Endpoint1']['total_requests'], 125)
+        mock_redis.pipeline.return_value.execute.assert_called_once()
+        mock_redis.scan_iter.assert_not_called()
+
+    def test_checks_use_precomputed_stats(self):
+        """Test that alert checks do not read Redis when stats are passed in"""
+        stats = {
+            'hit_rate': 0.5,
+            'penetration_rate': 0.3,
+            'null_values': 30,
+            'total_requests': 100,
+            'slow_operation_rate': 0.5,
+            'avg_duration_ms': 120.0,
+        }
 
         with patch.object(self.logger, 'get_endpoint_stats') as mock_get_stats:
-            mock_get_stats.side_effect = lambda ep: {
-                'endpoint': ep,
-                'total_requests': 125 if 'Endpoint1' in ep else 120,
-            }
-
-            all_stats = self.logger.get_all_endpoint_stats()
-
-            self.assertEqual(len(all_stats), 2)
-            self.assertIn('Endpoint1', all_stats)
-            self.assertIn('Endpoint2', all_stats)
+            self.assertEqual(self.logger.check_low_hit_rate('Ep', 0.8, stats)['type'], 'low_hit_rate')
+            self.assertEqual(
+                self.logger.check_high_penetration_rate('Ep', 0.1, stats)['type'],
+                'high_penetration_rate',
+            )
+            self.assertEqual(
+                self.logger.check_slow_operations('Ep', 100, stats)['type'],
+                'high_slow_operation_rate',
+            )
+            mock_get_stats.assert_not_called()
 
 
 class TestCachePerformanceLoggerConfiguration(unittest.TestCase):
@@ -348,7 +308,8 @@ class TestCachePerformanceLoggerConfiguration(unittest.TestCase):
     @patch('django_redis.get_redis_connection')
     @override_settings(
         CACHE_STATS_KEY_PREFIX='custom:prefix',
-        CACHE_STATS_TTL=600
+        CACHE_STATS_TTL=600,
+        CACHE_STATS_WINDOW_SECONDS=30,
     )
     def test_custom_configuration(self, mock_get_redis):
         """Test that custom configuration is used"""
@@ -356,14 +317,16 @@ class TestCachePerformanceLoggerConfiguration(unittest.TestCase):
         mock_get_redis.return_value = mock_redis
 
         logger = CachePerformanceLogger()
+        window = logger.current_window()
+        self.assertEqual(logger._window_seconds, 30)
 
-        # Record an operation
         logger.record_cache_operation(
             endpoint='TestViewSet',
             operation_type='hit',
             duration_ms=5.0,
             is_slow=False
         )
+        logger.flush(force=True)
 
         pipe = mock_redis.pipeline.return_value
 
@@ -372,68 +335,41 @@ class TestCachePerformanceLoggerConfiguration(unittest.TestCase):
         self.assertTrue(key_arg.startswith('custom:prefix:'))
 
         # Verify custom TTL is used
-        pipe.expire.assert_called_with('custom:prefix:TestViewSet', 600)
+        pipe.expire.assert_any_call(f'custom:prefix:{window}:TestViewSet', 600)
 
-    @patch('django_redis.get_redis_connection')
-    def test_default_configuration(self, mock_get_redis):
+    def test_default_configuration(self):
         """Test that default configuration is used when settings are not provided"""
-        mock_redis = MagicMock()
-        mock_get_redis.return_value = mock_redis
-
-        with patch('django.conf.settings') as mock_settings:
-            mock_settings.CACHE_STATS_KEY_PREFIX = 'cache:perf:stats'
-            mock_settings.CACHE_STATS_TTL = 300
-
+        with patch('django.conf.settings', new=object()):
             logger = CachePerformanceLogger()
 
-            # Record an operation
-            logger.record_cache_operation(
-                endpoint='TestViewSet',
-                operation_type='hit',
-                duration_ms=5.0,
-                is_slow=False
-            )
-
-            pipe = mock_redis.pipeline.return_value
-
-            # Verify default prefix is used
-            key_arg = pipe.hincrby.call_args_list[0][0][0]
-            self.assertTrue(key_arg.startswith('cache:perf:stats:'))
-
-            # Verify default TTL is used
-            pipe.expire.assert_called_with('cache:perf:stats:TestViewSet', 300)
+        self.assertEqual(logger._stats_key_prefix, 'cache:perf:stats')
+        self.assertEqual(logger._stats_ttl, 300)
+        self.assertEqual(logger._window_seconds, 60)
+        self.assertEqual(logger._flush_interval, 5)
 
 
 class TestCachePerformanceLoggerResetStats(unittest.TestCase):
     """Test CachePerformanceLogger.reset_stats method"""
 
     @patch('django_redis.get_redis_connection')
-    def test_reset_stats_deletes_all_keys(self, mock_get_redis):
-        """Test that reset_stats deletes all cache stats keys"""
+    def test_reset_stats_deletes_recent_windows(self, mock_get_redis):
+        """Test that reset_stats drops the buffer and the recent windows"""
         mock_redis = MagicMock()
-        mock_scan_iter = MagicMock(return_value=[
-            b'cache:perf:stats:Endpoint1',
-            b'cache:perf:stats:Endpoint2',
-        ])
-        mock_redis.scan_iter = mock_scan_iter
-        mock_redis.delete.return_value = 2
+        mock_redis.smembers.return_value = {b'Endpoint1'}
         mock_get_redis.return_value = mock_redis
 
-        logger = CachePerformanceLogger()
+        logger = make_logger()
+        window = logger.current_window()
+        logger.record_cache_operation('Endpoint1', 'hit')
         logger.reset_stats()
 
-        # Verify scan_iter was called with correct pattern
-        mock_scan_iter.assert_called_with(match='cache:perf:stats:*', count=100)
-
-        # Verify delete was called once with the keys
+        self.assertEqual(logger._pending, {})
+        mock_redis.scan_iter.assert_not_called()
         mock_redis.delete.assert_called_once()
-        call_args = mock_redis.delete.call_args
-
-        # Verify it was called with two keys
-        self.assertEqual(len(call_args[0]), 2)
-        keys = call_args[0][0]
-        self.assertIn(b'cache:perf:stats:Endpoint1', keys)
-        self.assertIn(b'cache:perf:stats:Endpoint2', keys)
+        keys = mock_redis.delete.call_args[0]
+        self.assertIn(f'cache:perf:stats:{window}:Endpoint1', keys)
+        self.assertIn(f'cache:perf:stats:{window - 1}:Endpoint1', keys)
+        self.assertIn(f'cache:perf:stats:{window}', keys)
 
 
 if __name__ == '__main__':
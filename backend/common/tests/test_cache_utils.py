@@ -10,11 +10,14 @@ Tests the new cache utilities with separate counters implementation:
 
 import unittest
 from unittest.mock import patch, MagicMock, call
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django_redis import get_redis_connection
 
 from common.utils.cache import (
     record_cache_total_operation,
     get_cache,
+    get_cache_many,
     set_cache,
     CacheResult,
     AdaptiveTTLCalculator,
@@ -30,83 +33,41 @@ class TestRecordCacheTotalOperation(unittest.TestCase):
         """Set up test fixtures"""
         self.endpoint = "TestViewSet"
 
-    @patch('django_redis.get_redis_connection')
-    def test_record_total_operation_increments_counter(self, mock_get_redis):
-        """Test that record_cache_total_operation increments the counter"""
-        mock_redis = MagicMock()
-        mock_redis.hincrby.return_value = 1
-        mock_redis.expire.return_value = True
-        mock_get_redis.return_value = mock_redis
-
+    @patch('common.utils.logging._cache_performance_logger')
+    def test_record_total_operation_buffers_counter(self, mock_perf_logger):
+        """Test that record_cache_total_operation counts in the process buffer"""
         record_cache_total_operation(self.endpoint)
 
-        # Verify Redis commands
-        mock_redis.hincrby.assert_called_once()
-        mock_redis.expire.assert_called_once()
-
-        # Verify correct arguments
-        hincrby_args = mock_redis.hincrby.call_args[0]
-        self.assertEqual(hincrby_args[1], 'total_operations')
-        self.assertEqual(hincrby_args[2], 1)
+        mock_perf_logger.record_total_operations.assert_called_once_with(self.endpoint, 1)
 
-    @patch('django_redis.get_redis_connection')
-    def test_record_total_operation_with_duration(self, mock_get_redis):
-        """Test that record_cache_total_operation works with duration parameter"""
-        mock_redis = MagicMock()
-        mock_redis.hincrby.return_value = 1
-        mock_redis.expire.return_value = True
-        mock_get_redis.return_value = mock_redis
-
-        record_cache_total_operation(self.endpoint, duration=0.005)
+    @patch('common.utils.logging._cache_performance_logger')
+    def test_record_total_operation_with_count(self, mock_perf_logger):
+        """Test that batched reads pass their count through"""
+        record_cache_total_operation(self.endpoint, duration=0.005, count=3)
 
-        # Should not raise any exceptions
-        self.assertTrue(True)
+        mock_perf_logger.record_total_operations.assert_called_once_with(self.endpoint, 3)
 
     @patch('django_redis.get_redis_connection')
-    def test_record_total_operation_sets_ttl(self, mock_get_redis):
-        """Test that record_cache_total_operation sets TTL"""
-        mock_redis = MagicMock()
-        mock_redis.hincrby.return_value = 1
-        mock_redis.expire.return_value = True
-        mock_get_redis.return_value = mock_redis
+    def test_record_total_operation_does_not_touch_redis(self, mock_get_redis):
+        """Test that recording does not issue Redis commands"""
+        from common.utils.logging import _cache_performance_logger
 
-        record_cache_total_operation(self.endpoint)
+        with patch.object(_cache_performance_logger, '_flush_interval', 3600), \
+                patch.object(_cache_performance_logger, '_pending', {}):
+            record_cache_total_operation(self.endpoint)
 
-        # Verify TTL is set
-        mock_redis.expire.assert_called_once()
-        expire_args = mock_redis.expire.call_args[0]
-        self.assertEqual(expire_args[1], 300)  # Default TTL
+        mock_get_redis.assert_not_called()
 
-    @patch('django_redis.get_redis_connection')
-    def test_record_total_operation_handles_errors(self, mock_get_redis):
-        """Test that record_cache_total_operation handles Redis errors gracefully"""
-        mock_get_redis.side_effect = Exception("Redis connection error")
+    @patch('common.utils.logging._cache_performance_logger')
+    def test_record_total_operation_handles_errors(self, mock_perf_logger):
+        """Test that record_cache_total_operation handles errors gracefully"""
+        mock_perf_logger.record_total_operations.side_effect = Exception("boom")
 
         # Should not raise exception
         try:
             record_cache_total_operation(self.endpoint)
         except Exception:
-            self.fail("record_cache_total_operation should handle Redis errors gracefully")
-
-    @patch('django_redis.get_redis_connection')
-    @patch('common.utils.cache.settings')
-    def test_record_total_operation_uses_custom_prefix_and_ttl(self, mock_settings, mock_get_redis):
-        """Test that custom prefix and TTL are used"""
-        mock_redis = MagicMock()
-        mock_redis.hincrby.return_value = 1
-        mock_redis.expire.return_value = True
-        mock_get_redis.return_value = mock_redis
-
-        mock_settings.CACHE_STATS_KEY_PREFIX = 'custom:prefix'
-        mock_settings.CACHE_STATS_TTL = 600
-
-        record_cache_total_operation(self.endpoint)
-
-        # Verify custom prefix and TTL are used
-        key_arg = mock_redis.hincrby.call_args[0][0]
-        self.assertTrue(key_arg.startswith('custom:prefix:'))
-        expire_args = mock_redis.expire.call_args[0]
-        self.assertEqual(expire_args[1], 600)
+            self.fail("record_cache_total_operation should handle errors gracefully")
 
 
 class TestGetCacheWithTotalOperationTracking(TestCase):
@@ -241,82 +202,160 @@ class TestCacheResult(TestCase):
         self.assertEqual(result.ttl, 900)
 
 
+@override_settings(ADAPTIVE_TTL_SAMPLE_RATE=1.0)
 class TestAdaptiveTTLCalculator(TestCase):
     """Test AdaptiveTTLCalculator functionality"""
 
-    def test_get_stats_key_format(self):
-        """Test that get_stats_key returns the correct format"""
-        key = AdaptiveTTLCalculator.get_stats_key("test_key")
-        self.assertEqual(key, "cache_stats:test_key")
+    FAMILY = "test:TTLViewSet"
 
-    @patch('django_redis.get_redis_connection')
-    def test_calculate_ttl_default(self, mock_get_redis):
-        """Test calculate_ttl with no existing stats"""
-        mock_redis = MagicMock()
-        mock_redis.hgetall.return_value = {}
-        mock_get_redis.return_value = mock_redis
+    def setUp(self):
+        cache.clear()
+        AdaptiveTTLCalculator._ttl_table_expires_at = 0.0
+
+    def tearDown(self):
+        cache.clear()
+        AdaptiveTTLCalculator._ttl_table_expires_at = 0.0
+
+    def _record(self, hits=0, misses=0, keys=1):
+        for i in range(hits):
+            AdaptiveTTLCalculator.record_hit(f"{self.FAMILY}:{i % keys}")
+        for i in range(misses):
+            AdaptiveTTLCalculator.record_miss(f"{self.FAMILY}:{i % keys}")
+
+    def test_get_key_family(self):
+        """Test key family extraction for standard and separated keys"""
+        self.assertEqual(
+            AdaptiveTTLCalculator.get_key_family("courses:CourseViewSet:1"),
+            "courses:CourseViewSet",
+        )
+        self.assertEqual(
+            AdaptiveTTLCalculator.get_key_family(
+                "courses:ChapterViewSet:SEPARATED:GLOBAL:course_pk=1"
+            ),
+            "courses:ChapterViewSet:SEPARATED:GLOBAL",
+        )
+
+    def test_get_stats_key_format(self):
+        """Test that get_stats_key returns the per-family hourly bucket key"""
+        key = AdaptiveTTLCalculator.get_stats_key(self.FAMILY, 100)
+        self.assertEqual(key, "cache_stats:test:TTLViewSet:100")
 
-        ttl = AdaptiveTTLCalculator.calculate_ttl("test_key", 900)
+    def test_calculate_ttl_default(self):
+        """Test calculate_ttl with no published table"""
+        ttl = AdaptiveTTLCalculator.calculate_ttl(f"{self.FAMILY}:1", 900)
         self.assertEqual(ttl, 900)  # Default TTL
 
-    @patch('django_redis.get_redis_connection')
-    def test_calculate_ttl_cold_data(self, mock_get_redis):
+    def test_no_per_key_stats_hash(self):
+        """Recording accesses only touches per-family keys"""
+        self._record(hits=5, keys=5)
+
+        redis_conn = get_redis_connection("default")
+        stats_key = AdaptiveTTLCalculator.get_stats_key(self.FAMILY)
+        self.assertEqual(
+            {key.decode() for key in redis_conn.scan_iter(f"cache_stats:{self.FAMILY}:*")},
+            {stats_key, f"{stats_key}:keys"},
+        )
+        stats = AdaptiveTTLCalculator.get_family_stats(self.FAMILY)
+        self.assertEqual(stats, {"hits": 5, "misses": 0})
+
+    @override_settings(ADAPTIVE_TTL_SAMPLE_RATE=0.0)
+    def test_sampling_disabled_records_nothing(self):
+        """Test that a zero sample rate skips Redis writes"""
+        with patch("common.utils.cache.get_redis_connection") as mock_get_redis:
+            self._record(hits=10)
+        mock_get_redis.assert_not_called()
+
+    def test_calculate_ttl_cold_data(self):
         """Test TTL for cold data"""
-        mock_redis = MagicMock()
-        mock_redis.hgetall.return_value = {
-            b'hits': 5,
-            b'misses': 0,
-        }
-        mock_get_redis.return_value = mock_redis
+        self._record(hits=25, keys=5)  # 5 hits per key
 
-        ttl = AdaptiveTTLCalculator.calculate_ttl("test_key", 900)
+        AdaptiveTTLCalculator.build_ttl_table()
+        ttl = AdaptiveTTLCalculator.calculate_ttl(f"{self.FAMILY}:1", 900)
         self.assertEqual(ttl, 300)  # Cold data TTL
 
-    @patch('django_redis.get_redis_connection')
-    def test_calculate_ttl_warm_data(self, mock_get_redis):
+    def test_calculate_ttl_warm_data(self):
         """Test TTL for warm data"""
-        mock_redis = MagicMock()
-        mock_redis.hgetall.return_value = {
-            b'hits': 50,  # > 10 hits
-            b'misses': 10,
-            b'total_requests': 60,
-        }
-        mock_redis.hgetall.return_value = {
-            b'hits': 50,
-            b'misses': 10,
-        }
-        mock_get_redis.return_value = mock_redis
+        self._record(hits=50, misses=10, keys=2)  # 25 hits per key
 
-        ttl = AdaptiveTTLCalculator.calculate_ttl("test_key", 900)
+        AdaptiveTTLCalculator.build_ttl_table()
+        ttl = AdaptiveTTLCalculator.calculate_ttl(f"{self.FAMILY}:1", 900)
         self.assertEqual(ttl, 900)  # Default TTL for warm data
 
-    @patch('django_redis.get_redis_connection')
-    def test_calculate_ttl_hot_data(self, mock_get_redis):
+    def test_calculate_ttl_hot_data(self):
         """Test TTL for hot data"""
-        mock_redis = MagicMock()
-        mock_redis.hgetall.return_value = {
-            b'hits': 200,  # > 100 hits
-            b'misses': 50,
-        }
-        mock_get_redis.return_value = mock_redis
+        self._record(hits=200, misses=50, keys=1)
 
-        ttl = AdaptiveTTLCalculator.calculate_ttl("test_key", 900)
+        AdaptiveTTLCalculator.build_ttl_table()
+        ttl = AdaptiveTTLCalculator.calculate_ttl(f"{self.FAMILY}:1", 900)
         self.assertEqual(ttl, 1800)  # Hot data TTL (30 minutes)
 
-    @patch('django_redis.get_redis_connection')
-    def test_calculate_ttl_low_hit_rate(self, mock_get_redis):
+    def test_calculate_ttl_low_hit_rate(self):
         """Test TTL for data with low hit rate"""
-        mock_redis = MagicMock()
-        mock_redis.hgetall.return_value = {
-            b'hits': 10,
-            b'misses': 90,  # Low hit rate
-            b'total_requests': 100,
-        }
-        mock_get_redis.return_value = mock_redis
+        self._record(hits=10, misses=90, keys=1)
 
-        ttl = AdaptiveTTLCalculator.calculate_ttl("test_key", 900)
+        AdaptiveTTLCalculator.build_ttl_table()
+        ttl = AdaptiveTTLCalculator.calculate_ttl(f"{self.FAMILY}:1", 900)
         self.assertEqual(ttl, 300)  # Short TTL for low hit rate data
 
+    @override_settings(ADAPTIVE_TTL_SAMPLE_RATE=0.5)
+    def test_sampled_counts_are_scaled(self):
+        """Test that sampled hit counts are scaled by the sample rate"""
+        with patch("common.utils.cache.random.random", return_value=0.0):
+            self._record(hits=60, keys=1)
+
+        report = AdaptiveTTLCalculator.build_ttl_table()
+        self.assertAlmostEqual(report[self.FAMILY]["hits_per_key"], 120, delta=1)
+        self.assertEqual(report[self.FAMILY]["tier"], "hot")
+
+    @override_settings(ADAPTIVE_TTL_SAMPLE_RATE=0.01)
+    def test_sparse_sampled_keys_stay_cold(self):
+        """Test that keys sampled about once each are not scaled into a hot tier"""
+        with patch("common.utils.cache.random.random", return_value=0.0):
+            self._record(hits=50, keys=50)
+
+        report = AdaptiveTTLCalculator.build_ttl_table()
+        self.assertLessEqual(report[self.FAMILY]["hits_per_key"], 1)
+        self.assertEqual(report[self.FAMILY]["tier"], "cold")
+
+    def test_estimate_hits_per_key(self):
+        """Test the hits-per-key estimate from sampled counts"""
+        estimate = AdaptiveTTLCalculator.estimate_hits_per_key
+        self.assertEqual(estimate(50, 5, 1.0), 10)
+        self.assertEqual(estimate(50, 50, 0.01), 1)
+        # 每键被采样约 100 次 => 实际约 10000 次
+        self.assertAlmostEqual(estimate(2000, 20, 0.01), 10000, delta=10)
+
+    def test_too_few_samples_uses_default(self):
+        """Test that families below MIN_SAMPLES are left out of the table"""
+        self._record(hits=5, keys=1)
+
+        report = AdaptiveTTLCalculator.build_ttl_table()
+        self.assertNotIn(self.FAMILY, report)
+        self.assertEqual(
+            AdaptiveTTLCalculator.calculate_ttl(f"{self.FAMILY}:1", 600), 600
+        )
+
+    def test_workers_reuse_in_memory_table(self):
+        """Test that calculate_ttl does not hit Redis while the table is fresh"""
+        self._record(hits=200, keys=1)
+        AdaptiveTTLCalculator.build_ttl_table()
+        AdaptiveTTLCalculator.calculate_ttl(f"{self.FAMILY}:1", 900)
+
+        with patch("common.utils.cache.get_redis_connection") as mock_get_redis:
+            ttl = AdaptiveTTLCalculator.calculate_ttl(f"{self.FAMILY}:2", 900)
+
+        mock_get_redis.assert_not_called()
+        self.assertEqual(ttl, 1800)
+
+    def test_get_hit_rate_uses_family_stats(self):
+        """Test that get_hit_rate reports the sampled family hit rate"""
+        self.assertIsNone(AdaptiveTTLCalculator.get_hit_rate(f"{self.FAMILY}:1"))
+
+        self._record(hits=3, misses=1)
+        self.assertEqual(
+            AdaptiveTTLCalculator.get_hit_rate(f"{self.FAMILY}:9"), 0.75
+        )
+
 
 class TestCacheGetWithDifferentDataTypes(TestCase):
     """Test get_cache function with different data types and scenarios"""
@@ -392,5 +431,52 @@ class TestCacheWithMetricsRecording(TestCase):
         self.assertGreaterEqual(mock_record_total.call_count, 3)
 
 
+class TestGetCacheMany(TestCase):
+    """Test get_cache_many batched reads"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_resolves_hit_miss_null_and_empty_in_one_call(self):
+        """All marker types are resolved from a single get_many call"""
+        set_cache('test:many:hit', {"a": 1})
+        set_cache('test:many:null', None, is_null=True)
+        set_cache('test:many:empty', [])
+
+        with patch(
+            'common.utils.cache.cache.get_many', wraps=cache.get_many
+        ) as mock_get_many:
+            results = get_cache_many(
+                ['test:many:hit', 'test:many:null', 'test:many:empty', 'test:many:miss']
+            )
+
+        mock_get_many.assert_called_once()
+        self.assertEqual(results['test:many:hit'].data, {"a": 1})
+        self.assertTrue(results['test:many:null'].is_null_value)
+        self.assertTrue(results['test:many:empty'].is_hit)
+        self.assertEqual(results['test:many:empty'].data, [])
+        self.assertTrue(results['test:many:miss'].is_miss)
+
+    @patch('common.utils.cache.record_cache_total_operation')
+    def test_records_total_operations_once_per_endpoint(self, mock_record_total):
+        get_cache_many(['a:ViewA:1', 'a:ViewA:2', 'a:ViewB:1', None])
+
+        mock_record_total.assert_any_call('ViewA', count=2)
+        mock_record_total.assert_any_call('ViewB', count=1)
+        self.assertEqual(mock_record_total.call_count, 2)
+
+    @patch('common.utils.cache.record_cache_total_operation')
+    @patch('common.utils.cache.cache.get_many')
+    def test_backend_error_returns_misses(self, mock_get_many, mock_record_total):
+        mock_get_many.side_effect = Exception("Redis down")
+
+        results = get_cache_many(['test:k1', 'test:k2'])
+
+        self.assertTrue(all(result.is_miss for result in results.values()))
+
+    def test_empty_keys(self):
+        self.assertEqual(get_cache_many([]), {})
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,224 @@
+"""
+采样 CPU 分析（common.metrics.cpu_profiler）单元测试
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.tests.factories import UserFactory
+from common.metrics.cpu_profiler import (
+    MODE_SIGNAL,
+    MODE_THREAD,
+    STATUS_DONE,
+    ProfilerBusy,
+    ProfilerNotInstalled,
+    SamplingProfiler,
+    get_profile_handler_key,
+    get_profile_request_key,
+    get_profile_result,
+    get_profiler,
+    install_profiler_signals,
+    request_profile,
+    start_profile,
+)
+
+
+def busy_loop(seconds):
+    deadline = time.process_time() + seconds
+    total = 0
+    while time.process_time() < deadline:
+        total += sum(range(100))
+    return total
+
+
+def wait_for_result(profile_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = get_profile_result(profile_id)
+        if result and result["status"] == STATUS_DONE:
+            return result
+        time.sleep(0.05)
+    return None
+
+
+class TestSamplingProfiler(TestCase):
+    """测试栈采样与 collapsed 输出"""
+
+    def setUp(self):
+        self.previous_sigprof = signal.getsignal(signal.SIGPROF)
+        self.addCleanup(signal.signal, signal.SIGPROF, self.previous_sigprof)
+
+    def test_signal_mode_samples_main_thread(self):
+        """signal 模式按 CPU 时间采样主线程"""
+        profiler = SamplingProfiler()
+
+        self.assertEqual(profiler.start(interval=0.005), MODE_SIGNAL)
+        busy_loop(0.3)
+        samples = profiler.stop()
+
+        self.assertGreater(sum(samples.values()), 0)
+        self.assertIn("busy_loop (common/tests/test_cpu_profiler.py:", profiler.collapsed())
+
+    def test_thread_mode_samples_other_threads(self):
+        """thread 模式采样其他线程，并以线程名作为根帧"""
+        profiler = SamplingProfiler()
+        worker = threading.Thread(target=busy_loop, args=(0.3,), name="busy-worker")
+
+        self.assertEqual(profiler.start(interval=0.005, mode=MODE_THREAD), MODE_THREAD)
+        worker.start()
+        worker.join()
+        profiler.stop()
+
+        lines = profiler.collapsed().splitlines()
+        self.assertTrue(any(line.startswith("busy-worker;") and "busy_loop" in line for line in lines))
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertTrue(count.isdigit())
+
+    def test_only_one_profile_at_a_time(self):
+        profiler = SamplingProfiler()
+        profiler.start(interval=0.01, mode=MODE_THREAD)
+        self.addCleanup(profiler.stop)
+
+        with self.assertRaises(ProfilerBusy):
+            profiler.start(interval=0.01, mode=MODE_THREAD)
+
+
+class TestProfileLifecycle(TestCase):
+    """测试后台分析、结果存储和信号触发"""
+
+    def setUp(self):
+        cache.clear()
+        self.previous_sigprof = signal.getsignal(signal.SIGPROF)
+        self.previous_trigger = signal.getsignal(signal.SIGUSR2)
+        self.addCleanup(signal.signal, signal.SIGPROF, self.previous_sigprof)
+        self.addCleanup(signal.signal, signal.SIGUSR2, self.previous_trigger)
+        self.addCleanup(get_profiler().stop)
+
+    def test_start_profile_stores_result(self):
+        """分析结束后结果写入缓存"""
+        info = start_profile(duration=0.2, interval=0.005)
+        self.assertEqual(get_profile_result(info["profile_id"])["status"], "running")
+        busy_loop(0.3)
+
+        result = wait_for_result(info["profile_id"])
+
+        self.assertIsNotNone(result)
+        self.assertEqual(result["pid"], os.getpid())
+        self.assertGreater(result["samples"], 0)
+        self.assertIn("busy_loop", result["collapsed"])
+
+    def test_trigger_signal_starts_requested_profile(self):
+        """profile_cpu 通过信号让目标进程开始分析"""
+        self.assertTrue(install_profiler_signals())
+
+        profile_id = request_profile(os.getpid(), duration=0.2, interval=0.005)
+        busy_loop(0.4)
+
+        result = wait_for_result(profile_id)
+        self.assertIsNotNone(result)
+        self.assertEqual(result["profile_id"], profile_id)
+
+    def test_request_profile_refuses_process_without_handler(self):
+        """未安装触发信号处理器的进程（如 gunicorn master）不会收到信号"""
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        self.addCleanup(child.wait)
+        self.addCleanup(child.kill)
+
+        with self.assertRaises(ProfilerNotInstalled):
+            request_profile(child.pid, duration=0.1)
+
+        # PID 被复用时旧进程留下的标记不匹配
+        cache.set(get_profile_handler_key(child.pid), {"start_time": "0"})
+        with self.assertRaises(ProfilerNotInstalled):
+            request_profile(child.pid, duration=0.1)
+
+        self.assertIsNone(child.poll())
+        self.assertIsNone(cache.get(get_profile_request_key(child.pid)))
+
+    def test_install_registers_handler_marker(self):
+        """安装处理器后登记本进程，request_profile 才会发送信号"""
+        self.assertIsNone(cache.get(get_profile_handler_key(os.getpid())))
+
+        self.assertTrue(install_profiler_signals())
+
+        self.assertIsNotNone(cache.get(get_profile_handler_key(os.getpid())))
+
+    def test_profile_cpu_command_refuses_process_without_handler(self):
+        """profile_cpu 拒绝向未安装处理器的进程发信号"""
+        with self.assertRaises(CommandError):
+            call_command("profile_cpu", pid=os.getpid(), duration=0.1, stderr=StringIO())
+
+    @override_settings(CPU_PROFILER_MAX_DURATION=0.1)
+    def test_profile_cpu_command_waits_for_clamped_duration(self):
+        """profile_cpu 按 CPU_PROFILER_MAX_DURATION 截断后的时长等待"""
+        install_profiler_signals()
+        stderr = StringIO()
+
+        call_command(
+            "profile_cpu", pid=os.getpid(), duration=600, interval=0.005,
+            timeout=5, stdout=StringIO(), stderr=stderr,
+        )
+
+        self.assertIn("for 0.1s", stderr.getvalue())
+
+    def test_profile_cpu_command_writes_collapsed_stacks(self):
+        """profile_cpu 管理命令等待结果并写入文件"""
+        install_profiler_signals()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, "profile.collapsed")
+            call_command(
+                "profile_cpu", pid=os.getpid(), duration=0.1, interval=0.005,
+                output=output, stderr=StringIO(),
+            )
+            self.assertTrue(os.path.exists(output))
+
+
+class TestCPUProfileViews(TestCase):
+    """测试管理员分析接口"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.addCleanup(get_profiler().stop)
+        previous_sigprof = signal.getsignal(signal.SIGPROF)
+        self.addCleanup(signal.signal, signal.SIGPROF, previous_sigprof)
+
+    def test_admin_starts_and_fetches_profile(self):
+        self.client.force_authenticate(user=UserFactory(admin=True))
+
+        response = self.client.post("/api/v1/profiling/cpu/", {"duration": 0.1}, format="json")
+        self.assertEqual(response.status_code, 202)
+        profile_id = response.data["profile_id"]
+
+        busy_loop(0.2)
+        self.assertIsNotNone(wait_for_result(profile_id))
+        response = self.client.get(f"/api/v1/profiling/cpu/{profile_id}/?output=collapsed")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+
+    def test_non_admin_is_forbidden(self):
+        self.client.force_authenticate(user=UserFactory())
+
+        response = self.client.post("/api/v1/profiling/cpu/", {"duration": 1}, format="json")
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_unknown_profile_returns_404(self):
+        self.client.force_authenticate(user=UserFactory(admin=True))
+
+        response = self.client.get("/api/v1/profiling/cpu/unknown/")
+
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,118 @@
+"""
+Prometheus HTTP 指标（PrometheusMetricsMiddleware / http_metrics）单元测试
+"""
+
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, TestCase
+from prometheus_client import CollectorRegistry
+from rest_framework.test import APIClient
+
+from accounts.tests.factories import UserFactory
+from common.metrics.cache_metrics import _cache_metrics_registry
+from common.metrics.http_metrics import (
+    generate_metrics_output,
+    get_metrics_registry,
+)
+from common.middleware.metrics_middleware import PrometheusMetricsMiddleware
+
+
+def _sample(name, labels):
+    return _cache_metrics_registry.get_sample_value(name, labels) or 0
+
+
+class TestPrometheusMetricsMiddleware(TestCase):
+    """测试中间件记录的 HTTP 指标"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=UserFactory())
+
+    def test_records_latency_and_size_per_view_and_status(self):
+        """按视图和状态码记录耗时与响应大小"""
+        labels = {"view": "CourseViewSet.list", "method": "GET", "status": "200"}
+        count_before = _sample("http_request_duration_seconds_count", labels)
+        size_before = _sample("http_response_size_bytes_sum", labels)
+
+        response = self.client.get("/api/v1/courses/")
+
+        self.assertEqual(
+            _sample("http_request_duration_seconds_count", labels), count_before + 1
+        )
+        self.assertEqual(
+            _sample("http_response_size_bytes_sum", labels),
+            size_before + len(response.content),
+        )
+
+    def test_unmatched_urls_share_one_label(self):
+        """无法解析的 URL 使用统一标签，避免标签基数膨胀"""
+        labels = {"view": "unmatched", "method": "GET", "status": "404"}
+        before = _sample("http_request_duration_seconds_count", labels)
+
+        self.client.get("/no-such-path/abc/")
+
+        self.assertEqual(
+            _sample("http_request_duration_seconds_count", labels), before + 1
+        )
+
+    def test_in_progress_gauge_returns_to_zero(self):
+        """请求结束后进行中的请求数恢复"""
+        seen = []
+
+        def get_response(request):
+            seen.append(
+                _sample("http_requests_in_progress", {"method": "PATCH"})
+            )
+            return StreamingHttpResponse(iter([b"a", b"b"]))
+
+        middleware = PrometheusMetricsMiddleware(get_response)
+        middleware(RequestFactory().patch("/stream/"))
+
+        self.assertEqual(seen, [1])
+        self.assertEqual(_sample("http_requests_in_progress", {"method": "PATCH"}), 0)
+
+    def test_streaming_response_is_not_consumed(self):
+        """流式响应不读取内容，也不记录响应大小"""
+        response = StreamingHttpResponse(iter([b"chunk"]))
+        middleware = PrometheusMetricsMiddleware(lambda request: response)
+        labels = {"view": "unmatched", "method": "GET", "status": "200"}
+        size_count_before = _sample("http_response_size_bytes_count", labels)
+
+        result = middleware(RequestFactory().get("/stream/"))
+
+        self.assertEqual(b"".join(result.streaming_content), b"chunk")
+        self.assertEqual(
+            _sample("http_response_size_bytes_count", labels), size_count_before
+        )
+
+
+class TestMetricsExposition(TestCase):
+    """测试指标导出"""
+
+    def test_output_contains_http_and_cache_metrics(self):
+        """导出内容同时包含 HTTP 指标和缓存指标"""
+        body, content_type = generate_metrics_output()
+
+        self.assertIn(b"http_request_duration_seconds", body)
+        self.assertIn(b"cache_requests_total", body)
+        self.assertTrue(content_type.startswith("text/plain"))
+
+    def test_multiprocess_mode_uses_multiprocess_collector(self):
+        """设置 PROMETHEUS_MULTIPROC_DIR 时聚合各 worker 的数据"""
+        with tempfile.TemporaryDirectory() as multiproc_dir:
+            with patch.dict("os.environ", {"PROMETHEUS_MULTIPROC_DIR": multiproc_dir}):
+                registry = get_metrics_registry()
+
+        self.assertIsInstance(registry, CollectorRegistry)
+        self.assertIsNot(registry, _cache_metrics_registry)
+
+    def test_single_process_mode_uses_shared_registry(self):
+        """未设置时直接使用进程内 registry"""
+        env = {k: v for k, v in os.environ.items() if k != "PROMETHEUS_MULTIPROC_DIR"}
+        with patch.dict("os.environ", env, clear=True):
+            self.assertIs(get_metrics_registry(), _cache_metrics_registry)
@@ -0,0 +1,176 @@
+"""
+请求日志中间件（LoggingMiddleware）与异步日志队列单元测试
+"""
+
+import json
+import logging
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from common.middleware.logging_middleware import LoggingMiddleware
+from common.utils import logging as logging_utils
+
+
+class TestLoggingMiddlewareSampling(TestCase):
+    """测试请求日志采样"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def _call(self, response, **settings):
+        with override_settings(**settings):
+            middleware = LoggingMiddleware(lambda request: response)
+        request = self.factory.get("/api/v1/courses/", {"page": "1"})
+        request.user = AnonymousUser()
+        with patch("common.middleware.logging_middleware.RequestLogger") as mock_cls:
+            result = middleware(request)
+        return result, mock_cls.return_value
+
+    def test_sampled_request_logs_request_and_response(self):
+        """采样到的请求记录详细请求日志和响应日志"""
+        result, request_logger = self._call(HttpResponse(b"ok"), REQUEST_LOG_SAMPLE_RATE=1.0)
+
+        request_logger.log_request.assert_called_once()
+        self.assertEqual(request_logger.log_request.call_args.kwargs["params"], {"page": ["1"]})
+        request_logger.log_response.assert_called_once()
+        self.assertEqual(request_logger.log_response.call_args.kwargs["response_size"], 2)
+        self.assertIn("X-Request-ID", result)
+
+    @patch.object(LoggingMiddleware, "_get_request_headers")
+    @patch.object(LoggingMiddleware, "_get_request_params")
+    def test_unsampled_fast_request_skips_verbose_logging(self, mock_params, mock_headers):
+        """未采样的正常请求不收集参数/头部，也不记录日志"""
+        result, request_logger = self._call(HttpResponse(b"ok"), REQUEST_LOG_SAMPLE_RATE=0)
+
+        mock_params.assert_not_called()
+        mock_headers.assert_not_called()
+        request_logger.log_request.assert_not_called()
+        request_logger.log_response.assert_not_called()
+        self.assertIn("X-Request-ID", result)
+
+    def test_unsampled_server_error_is_always_logged(self):
+        """5xx 响应不受采样影响"""
+        _, request_logger = self._call(HttpResponse(status=503), REQUEST_LOG_SAMPLE_RATE=0)
+
+        request_logger.log_request.assert_not_called()
+        kwargs = request_logger.log_response.call_args.kwargs
+        self.assertEqual(kwargs["status_code"], 503)
+        self.assertEqual(kwargs["path"], "/api/v1/courses/")
+        self.assertFalse(kwargs["sampled"])
+        request_logger.log_error.assert_called_once()
+
+    def test_unsampled_slow_request_is_logged(self):
+        """超过 REQUEST_LOG_SLOW_MS 的请求不受采样影响"""
+        _, request_logger = self._call(
+            HttpResponse(b"ok"), REQUEST_LOG_SAMPLE_RATE=0, REQUEST_LOG_SLOW_MS=0
+        )
+
+        request_logger.log_response.assert_called_once()
+
+    def test_streaming_response_is_not_consumed(self):
+        """流式响应不读取内容来计算大小"""
+        response = StreamingHttpResponse(iter([b"chunk"]))
+        result, request_logger = self._call(response, REQUEST_LOG_SAMPLE_RATE=1.0)
+
+        self.assertIsNone(request_logger.log_response.call_args.kwargs["response_size"])
+        self.assertEqual(b"".join(result.streaming_content), b"chunk")
+
+
+class _RecordingHandler(logging.Handler):
+    """记录 emit 所在线程的 handler"""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.threads = []
+        self.done = threading.Event()
+
+    def emit(self, record):
+        self.records.append(record)
+        self.threads.append(threading.current_thread())
+        self.done.set()
+
+
+class TestQueueLogging(TestCase):
+    """测试 QueueHandler / QueueListener 异步日志"""
+
+    def setUp(self):
+        self.logger = logging.getLogger("teaching_platform.tests.queue")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.handler = _RecordingHandler()
+        self.logger.addHandler(self.handler)
+        self.previous_disable = logging.root.manager.disable
+        logging.disable(logging.NOTSET)
+
+        patcher_listener = patch.object(logging_utils, "_queue_listener", None)
+        patcher_handlers = patch.object(logging_utils, "_queue_handlers", [])
+        patcher_listener.start()
+        patcher_handlers.start()
+        self.addCleanup(patcher_listener.stop)
+        self.addCleanup(patcher_handlers.stop)
+
+    def tearDown(self):
+        logging.disable(self.previous_disable)
+        listener = logging_utils._queue_listener
+        if listener is not None:
+            listener.stop()
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+
+    @patch("os.register_at_fork")
+    @patch("atexit.register")
+    def test_handlers_run_on_listener_thread(self, mock_atexit, mock_at_fork):
+        """原 handler 被移到后台线程执行，请求线程只负责入队"""
+        listener = logging_utils.enable_queue_logging([self.logger.name])
+
+        self.assertEqual(len(self.logger.handlers), 1)
+        self.assertIsInstance(self.logger.handlers[0], logging_utils.RoutingQueueHandler)
+
+        self.logger.info("hello %s", "queue", extra={"request_id": "abc"})
+        self.assertTrue(self.handler.done.wait(timeout=5))
+        listener.stop()
+
+        record = self.handler.records[0]
+        self.assertEqual(record.getMessage(), "hello queue")
+        self.assertEqual(record.request_id, "abc")
+        self.assertIsNot(self.handler.threads[0], threading.current_thread())
+
+    @patch("os.register_at_fork")
+    @patch("atexit.register")
+    def test_handler_level_is_respected(self, mock_atexit, mock_at_fork):
+        """监听线程按原 handler 的级别过滤"""
+        self.handler.setLevel(logging.ERROR)
+        listener = logging_utils.enable_queue_logging([self.logger.name])
+
+        self.logger.info("dropped")
+        self.logger.error("kept")
+        self.assertTrue(self.handler.done.wait(timeout=5))
+        listener.stop()
+
+        self.assertEqual([r.getMessage() for r in self.handler.records], ["kept"])
+
+    @patch("os.register_at_fork")
+    @patch("atexit.register")
+    def test_exception_info_reaches_formatter(self, mock_atexit, mock_at_fork):
+        """入队时不提前格式化，JSON 格式化器仍能拿到 exc_info"""
+        self.handler.setFormatter(logging_utils.setup_json_formatter())
+        listener = logging_utils.enable_queue_logging([self.logger.name])
+
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            self.logger.exception("failed %s", "job")
+        self.assertTrue(self.handler.done.wait(timeout=5))
+        listener.stop()
+
+        record = self.handler.records[0]
+        self.assertEqual(record.msg, "failed %s")
+        self.assertIs(record.exc_info[0], ValueError)
+        payload = json.loads(self.handler.format(record))
+        self.assertEqual(payload["message"], "failed job")
+        self.assertIn("ValueError: boom", payload["exc_info"])
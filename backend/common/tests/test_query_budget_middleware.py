@@ -0,0 +1,117 @@
+"""
+查询预算 / N+1 检测中间件（QueryBudgetMiddleware）单元测试
+"""
+
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.tests.factories import UserFactory
+from common.middleware.query_budget_middleware import (
+    QueryBudgetExceeded,
+    QueryCollector,
+    normalize_sql,
+)
+from courses.models import Course
+from courses.tests.factories import CourseFactory
+
+
+class TestNormalizeSql(TestCase):
+    """测试查询形状归一化"""
+
+    def test_collapses_in_lists_and_literals(self):
+        """IN 列表长度和字面量不同的查询得到同一形状"""
+        self.assertEqual(
+            normalize_sql('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s)'),
+            normalize_sql('SELECT * FROM "t" WHERE "id" IN (%s)'),
+        )
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE id = 1 AND name = 'a'"),
+            normalize_sql("SELECT  *\nFROM t WHERE id = 42 AND name = 'b'"),
+        )
+
+
+class TestQueryCollector(TestCase):
+    """测试 execute_wrapper 回调统计"""
+
+    def test_counts_queries_and_repeated_shapes(self):
+        """统计查询次数并识别重复形状"""
+        courses = CourseFactory.create_batch(3)
+        collector = QueryCollector()
+
+        with connection.execute_wrapper(collector):
+            for course in courses:
+                Course.objects.filter(pk=course.pk).first()
+            list(Course.objects.all())
+
+        self.assertEqual(collector.count, 4)
+        self.assertGreater(collector.duration, 0)
+        repeated = collector.repeated_shapes(threshold=3)
+        self.assertEqual(len(repeated), 1)
+        self.assertEqual(repeated[0][1], 3)
+
+
+class TestQueryBudgetMiddleware(TestCase):
+    """测试中间件的 metrics、N+1 检测和预算检查"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        CourseFactory.create_batch(2)
+
+    @patch("common.middleware.query_budget_middleware.record_request_queries")
+    def test_records_metrics_per_view_action(self, mock_record):
+        """按 ViewSet.action 记录查询数"""
+        response = self.client.get("/api/v1/courses/")
+
+        self.assertEqual(response.status_code, 200)
+        view, query_count, duration = mock_record.call_args.args
+        self.assertEqual(view, "CourseViewSet.list")
+        self.assertGreater(query_count, 0)
+        self.assertFalse(mock_record.call_args.kwargs["budget_exceeded"])
+
+    @override_settings(QUERY_BUDGETS={"CourseViewSet.list": 0})
+    def test_budget_exceeded_raises_in_test_mode(self):
+        """测试模式下超出预算抛出 QueryBudgetExceeded"""
+        with self.assertRaises(QueryBudgetExceeded) as ctx:
+            self.client.get("/api/v1/courses/")
+
+        self.assertIn("CourseViewSet.list", str(ctx.exception))
+        self.assertIn("budget is 0", str(ctx.exception))
+
+    @override_settings(QUERY_BUDGETS={"CourseViewSet.list": 0}, QUERY_BUDGET_ENFORCE=False)
+    @patch("common.middleware.query_budget_middleware.logger")
+    def test_budget_exceeded_only_logs_outside_test_mode(self, mock_logger):
+        """非测试模式只记录告警，不影响响应"""
+        response = self.client.get("/api/v1/courses/")
+
+        self.assertEqual(response.status_code, 200)
+        messages = [c.args[0] for c in mock_logger.warning.call_args_list]
+        self.assertTrue(any("budget is 0" in message for message in messages))
+
+    @override_settings(QUERY_BUDGET_REPEAT_THRESHOLD=1)
+    @patch("common.middleware.query_budget_middleware.logger")
+    def test_repeated_queries_logged(self, mock_logger):
+        """重复查询形状超过阈值时记录疑似 N+1"""
+        self.client.get("/api/v1/courses/")
+
+        mock_logger.warning.assert_called_once()
+        self.assertEqual(
+            mock_logger.warning.call_args.args[0],
+            "Possible N+1 queries in CourseViewSet.list",
+        )
+        extra = mock_logger.warning.call_args.kwargs["extra"]
+        self.assertEqual(extra["event"], "db_repeated_queries")
+
+    def test_declared_view_budget_is_respected(self):
+        """视图声明的预算在正常请求下不会超出"""
+        from courses.views import CourseViewSet
+
+        self.assertEqual(CourseViewSet.query_budget["list"], 6)
+        response = self.client.get("/api/v1/courses/")
+        self.assertEqual(response.status_code, 200)
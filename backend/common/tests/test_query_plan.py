@@ -0,0 +1,125 @@
+"""
+查询计划工具（common.utils.query_plan）单元测试
+"""
+
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+
+from common.utils.query_plan import (
+    capture_queries,
+    compare_plan_reports,
+    explain,
+    find_seq_scans,
+    get_large_tables,
+    seq_scans_disabled,
+    summarize_plan,
+)
+from courses.models import Chapter
+
+
+SAMPLE_PLAN = {
+    "Plan": {
+        "Node Type": "Nested Loop",
+        "Total Cost": 42.5,
+        "Shared Hit Blocks": 12,
+        "Shared Read Blocks": 3,
+        "Plans": [
+            {
+                "Node Type": "Seq Scan",
+                "Relation Name": "courses_course",
+                "Total Cost": 1.0,
+            },
+            {
+                "Node Type": "Index Scan",
+                "Relation Name": "courses_chapter",
+                "Index Name": "courses_chapter_course_id_idx",
+                "Total Cost": 40.0,
+                "Plans": [
+                    {
+                        "Node Type": "Seq Scan",
+                        "Relation Name": "courses_problem",
+                        "Total Cost": 1.5,
+                    }
+                ],
+            },
+        ],
+    },
+    "Planning Time": 0.2,
+    "Execution Time": 1.3,
+}
+
+
+class TestPlanSummary(TestCase):
+    """测试计划遍历和汇总"""
+
+    def test_find_seq_scans_filters_by_table(self):
+        self.assertEqual(
+            find_seq_scans(SAMPLE_PLAN), ["courses_course", "courses_problem"]
+        )
+        self.assertEqual(
+            find_seq_scans(SAMPLE_PLAN, {"courses_problem"}), ["courses_problem"]
+        )
+
+    def test_summarize_plan(self):
+        summary = summarize_plan(SAMPLE_PLAN, {"courses_problem", "courses_chapter"})
+
+        self.assertEqual(summary["total_cost"], 42.5)
+        self.assertEqual(summary["execution_ms"], 1.3)
+        self.assertEqual(summary["shared_hit_blocks"], 12)
+        self.assertEqual(summary["seq_scans"], ["courses_problem"])
+        self.assertIn(
+            "Index Scan on courses_chapter using courses_chapter_course_id_idx",
+            summary["scans"],
+        )
+
+    def test_large_tables_include_through_tables(self):
+        tables = get_large_tables()
+        self.assertIn(Chapter._meta.db_table, tables)
+        self.assertIn(
+            "courses_chapterunlockcondition_prerequisite_chapters", tables
+        )
+
+
+class TestComparePlanReports(TestCase):
+    """测试规划器代价对比"""
+
+    def _report(self, cost, scale=None):
+        return {
+            "scale": scale or {"chapters": 10},
+            "queries": {"chapter_list": [{"total_cost": cost}, {"total_cost": 1.0}]},
+        }
+
+    def test_flags_cost_regression(self):
+        comparison = compare_plan_reports(self._report(20.0), self._report(10.0), 0.2)
+
+        self.assertAlmostEqual(comparison["chapter_list"]["change"], 10.0 / 11.0)
+        self.assertTrue(comparison["chapter_list"]["regression"])
+
+    def test_skips_different_scale_or_missing_previous(self):
+        self.assertEqual(compare_plan_reports(self._report(20.0), None), {})
+        self.assertEqual(
+            compare_plan_reports(
+                self._report(20.0), self._report(10.0, scale={"chapters": 20})
+            ),
+            {},
+        )
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "EXPLAIN JSON requires PostgreSQL")
+class TestExplain(TestCase):
+    """测试捕获并 EXPLAIN 查询"""
+
+    def test_capture_and_explain_select(self):
+        queries = capture_queries(lambda: list(Chapter.objects.filter(course_id=1)))
+
+        self.assertEqual(len(queries), 1)
+        sql, params = queries[0]
+        plan = explain(sql, params)
+        self.assertIn("Plan", plan)
+        self.assertIn("Execution Time", plan)
+
+        with seq_scans_disabled():
+            forced = explain(sql, params, analyze=False)
+        self.assertEqual(find_seq_scans(forced, {Chapter._meta.db_table}), [])
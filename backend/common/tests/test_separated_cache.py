@@ -169,5 +169,53 @@ class TestSeparatedCacheService(unittest.TestCase):
         self.assertTrue(is_hit)
 
 
+    @patch("common.services.separated_cache.get_cache_many")
+    def test_get_many_delegates_to_batch_read(self, mock_get_cache_many):
+        """测试 get_many 一次性批量读取"""
+        mock_get_cache_many.return_value = {
+            "test:global": CacheResult.hit([1]),
+            "test:status": CacheResult.miss(),
+        }
+
+        result = SeparatedCacheService.get_many(["test:global", "test:status"])
+
+        mock_get_cache_many.assert_called_once_with(["test:global", "test:status"])
+        self.assertTrue(result["test:global"].is_hit)
+
+    @patch("common.services.separated_cache.get_cache")
+    def test_get_global_data_uses_prefetched_hit(self, mock_get_cache):
+        """测试提供 prefetched 命中结果时不再单独读取缓存"""
+        mock_fetcher = MagicMock()
+
+        result, is_hit = SeparatedCacheService.get_global_data(
+            cache_key="test:key",
+            data_fetcher=mock_fetcher,
+            prefetched=CacheResult.hit({"data": "cached"}),
+        )
+
+        mock_get_cache.assert_not_called()
+        mock_fetcher.assert_not_called()
+        self.assertEqual(result, {"data": "cached"})
+        self.assertTrue(is_hit)
+
+    @patch("common.services.separated_cache.set_cache")
+    @patch("common.services.separated_cache.get_cache")
+    def test_get_user_status_prefetched_miss_calls_fetcher(
+        self, mock_get_cache, mock_set_cache
+    ):
+        """测试 prefetched 未命中时直接回源，不再重复读取缓存"""
+        result, is_hit = SeparatedCacheService.get_user_status(
+            cache_key="test:key",
+            user_id=1,
+            status_fetcher=lambda: {"status": "new"},
+            prefetched=CacheResult.miss(),
+        )
+
+        mock_get_cache.assert_not_called()
+        mock_set_cache.assert_called_once()
+        self.assertEqual(result, {"status": "new"})
+        self.assertFalse(is_hit)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,137 @@
+"""
+Silk 采样中间件（SampledSilkyMiddleware）与慢请求缓冲区单元测试
+"""
+
+from unittest.mock import patch
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.tests.factories import UserFactory
+from common.middleware.silk_sampling_middleware import (
+    PROFILE_REASON_HEADER,
+    PROFILE_REASON_SAMPLED,
+    PROFILE_REASON_SLOW_ROUTE,
+    SampledSilkyMiddleware,
+    SlowRequestBuffer,
+    slow_request_buffer,
+)
+
+
+def _silk_call(self, request):
+    """替代 SilkyMiddleware.__call__：测试中不写入 Silk 数据"""
+    return self.get_response(request)
+
+
+@patch("silk.middleware.SilkyMiddleware.__call__", _silk_call)
+class TestSampledSilkyMiddleware(TestCase):
+    """测试哪些请求交给 Silk 完整记录"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        slow_request_buffer.clear()
+        self.addCleanup(slow_request_buffer.clear)
+
+    def _call(self, request, **settings):
+        """调用中间件，返回本次请求的记录原因"""
+        reasons = []
+        get_profile_reason = SampledSilkyMiddleware._get_profile_reason
+
+        def record_reason(middleware, req):
+            reason = get_profile_reason(middleware, req)
+            reasons.append(reason)
+            return reason
+
+        with override_settings(**settings):
+            middleware = SampledSilkyMiddleware(lambda req: HttpResponse(b"ok"))
+        with patch.object(SampledSilkyMiddleware, "_get_profile_reason", record_reason):
+            middleware(request)
+        return reasons[0]
+
+    def _request(self, path="/api/v1/courses/", **headers):
+        request = self.factory.get(path, **headers)
+        request.user = AnonymousUser()
+        return request
+
+    def test_unsampled_request_is_not_profiled(self):
+        """采样率为 0 时普通请求不交给 Silk"""
+        self.assertIsNone(self._call(self._request(), SILK_SAMPLE_RATE=0))
+
+    def test_sampled_request_is_profiled(self):
+        """采样到的请求交给 Silk"""
+        self.assertEqual(
+            self._call(self._request(), SILK_SAMPLE_RATE=1.0), PROFILE_REASON_SAMPLED
+        )
+
+    def test_profile_header_requires_staff(self):
+        """profile 请求头只对管理员生效"""
+        student = UserFactory()
+        admin = UserFactory(admin=True)
+
+        def with_token(user):
+            return self._request(
+                HTTP_X_SILK_PROFILE="1",
+                HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}",
+            )
+
+        self.assertIsNone(self._call(with_token(student), SILK_SAMPLE_RATE=0))
+        self.assertEqual(
+            self._call(with_token(admin), SILK_SAMPLE_RATE=0), PROFILE_REASON_HEADER
+        )
+
+    def test_slow_request_buffered_and_route_profiled_next(self):
+        """未记录的慢请求进入缓冲区，并让同一路由的后续请求被完整记录"""
+        settings = {"SILK_SAMPLE_RATE": 0, "SILK_SLOW_REQUEST_MS": 0, "SILK_SLOW_ROUTE_PROFILES": 1}
+
+        self.assertIsNone(self._call(self._request("/api/v1/courses/1/"), **settings))
+        entries = slow_request_buffer.snapshot()
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]["path"], "/api/v1/courses/1/")
+        self.assertFalse(entries[0]["profiled"])
+
+        # 同一路由（不同 id）的下一个请求被记录，名额用完后恢复采样
+        self.assertEqual(
+            self._call(self._request("/api/v1/courses/2/"), SILK_SAMPLE_RATE=0),
+            PROFILE_REASON_SLOW_ROUTE,
+        )
+        self.assertIsNone(self._call(self._request("/api/v1/courses/3/"), SILK_SAMPLE_RATE=0))
+
+
+class TestSlowRequestBuffer(TestCase):
+    """测试环形缓冲区"""
+
+    def test_keeps_latest_entries_only(self):
+        """超出容量时丢弃最旧的记录，按时间倒序返回"""
+        buffer = SlowRequestBuffer(maxlen=2)
+        for i in range(3):
+            buffer.add({"path": f"/{i}/"})
+
+        self.assertEqual([e["path"] for e in buffer.snapshot()], ["/2/", "/1/"])
+
+
+class TestSlowRequestListView(TestCase):
+    """测试慢请求管理员接口"""
+
+    def setUp(self):
+        slow_request_buffer.clear()
+        self.addCleanup(slow_request_buffer.clear)
+        slow_request_buffer.add({"path": "/api/v1/courses/", "duration_ms": 1500})
+        self.client = APIClient()
+
+    def test_admin_can_list_slow_requests(self):
+        self.client.force_authenticate(user=UserFactory(admin=True))
+
+        response = self.client.get("/api/v1/profiling/slow-requests/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["duration_ms"], 1500)
+
+    def test_non_admin_is_forbidden(self):
+        self.client.force_authenticate(user=UserFactory())
+
+        response = self.client.get("/api/v1/profiling/slow-requests/")
+
+        self.assertEqual(response.status_code, 403)
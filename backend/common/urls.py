@@ -0,0 +1,9 @@
+# backend/common/urls.py
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('profiling/slow-requests/', views.SlowRequestListView.as_view(), name='slow-requests'),
+    path('profiling/cpu/', views.CPUProfileView.as_view(), name='cpu-profile'),
+    path('profiling/cpu/<str:profile_id>/', views.CPUProfileDetailView.as_view(), name='cpu-profile-detail'),
+]
@@ -1,12 +1,15 @@
 # utils/cache.py
 import json
+import random
 import time
+import zlib
 import logging
 from typing import Any, Optional, Literal, Dict, Dict, Callable
 from urllib.parse import urlencode
 from collections import OrderedDict
 from django.core.cache import cache
 from django_redis import get_redis_connection
+from django_redis.compressors.zlib import ZlibCompressor
 
 # Import cache metrics
 try:
@@ -21,10 +24,33 @@ except ImportError:
     record_cache_miss = None
     record_cache_null_value = None
 
+# 可选的高性能编解码依赖（未安装时回退到 json / zlib）
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 logger = logging.getLogger("teaching_platform.cache")
 
 
-def record_cache_total_operation(endpoint: str, duration: Optional[float] = None) -> None:
+def record_cache_total_operation(
+    endpoint: str, duration: Optional[float] = None, count: int = 1
+) -> None:
     """Record a total cache operation (for tracking all operations, not just slow ones).
 
     This function increments the total_operations counter for an endpoint, which is used
@@ -34,21 +60,15 @@ def record_cache_total_operation(endpoint: str, duration: Optional[float] = None
     Args:
         endpoint: The endpoint/view name (e.g., "ChapterViewSet")
         duration: Optional duration in seconds (for debugging only)
+        count: Number of operations to record (batched reads record once per endpoint)
 
-    This is a lightweight operation that only increments a counter in Redis.
+    The counter lives in the per-process CachePerformanceLogger buffer and is
+    merged into Redis periodically, so this does not touch Redis.
     """
     try:
-        from django_redis import get_redis_connection
+        from common.utils.logging import _cache_performance_logger
 
-        redis_conn = get_redis_connection("default")
-        # Use the same key prefix as the performance logger
-        from django.conf import settings
-        stats_key_prefix = getattr(settings, 'CACHE_STATS_KEY_PREFIX', 'cache:perf:stats')
-        stats_ttl = getattr(settings, 'CACHE_STATS_TTL', 300)
-
-        key = f"{stats_key_prefix}:{endpoint}"
-        redis_conn.hincrby(key, 'total_operations', 1)
-        redis_conn.expire(key, stats_ttl)
+        _cache_performance_logger.record_total_operations(endpoint, count)
     except Exception as e:
         # Don't let stats recording errors affect cache operations
         logger.debug(f"Failed to record total operation: {e}")
@@ -110,14 +130,223 @@ NULL_VALUE_MARKER = "__NULL_VALUE__"
 EMPTY_VALUE_MARKER = "__EMPTY_VALUE__"  # 用于空列表/空字典
 
 
-def set_cache(key, value, timeout=900, is_null: bool = False):  # 默认15分钟
+# 二进制载荷魔数头。JSON 文本不会以 NUL 开头，据此区分旧格式的 JSON 字符串载荷
+CODEC_MAGIC = b"\x00\xcc"
+
+
+class CacheCodec:
+    """缓存编解码器（序列化 + 压缩）
+
+    codec 名称格式为 ``<serializer>[+<compressor>]``，例如 ``json``、
+    ``orjson+lz4``、``msgpack+zstd``。
+
+    - ``json``（不压缩）保持旧格式：直接写入 JSON 字符串，与历史数据完全兼容
+    - 其他组合写入二进制载荷：``CODEC_MAGIC`` + 序列化器 ID + 压缩器 ID + 数据，
+      解码时只依赖载荷头，因此切换 codec 配置后旧数据仍可读取
+    - 载荷小于 ``compress_min_bytes`` 时跳过压缩（小载荷压缩得不偿失）
+    - 可选依赖未安装时自动回退：orjson/msgpack -> json，lz4/zstd -> zlib
+
+    Example:
+        codec = CacheCodec.from_name("orjson+lz4")
+        raw = codec.encode({"id": 1})
+        data = CacheCodec.decode(raw)
+    """
+
+    SERIALIZER_IDS = {"json": 1, "orjson": 2, "msgpack": 3}
+    COMPRESSOR_IDS = {"none": 0, "zlib": 1, "lz4": 2, "zstd": 3}
+
+    def __init__(
+        self,
+        serializer: str = "json",
+        compressor: str = "none",
+        compress_min_bytes: int = 1024,
+    ):
+        if serializer not in self.SERIALIZER_IDS:
+            raise ValueError(f"Unknown cache serializer: {serializer}")
+        if compressor not in self.COMPRESSOR_IDS:
+            raise ValueError(f"Unknown cache compressor: {compressor}")
+
+        # 可选依赖缺失时回退
+        if serializer == "orjson" and orjson is None:
+            serializer = "json"
+        elif serializer == "msgpack" and msgpack is None:
+            serializer = "json"
+        if compressor == "lz4" and lz4_frame is None:
+            compressor = "zlib"
+        elif compressor == "zstd" and zstandard is None:
+            compressor = "zlib"
+
+        self.serializer = serializer
+        self.compressor = compressor
+        self.compress_min_bytes = compress_min_bytes
+
+    @classmethod
+    def from_name(cls, name: str, compress_min_bytes: int = 1024) -> "CacheCodec":
+        """根据名称（如 ``orjson+lz4``）创建编解码器"""
+        serializer, _, compressor = name.partition("+")
+        return cls(serializer, compressor or "none", compress_min_bytes)
+
+    @property
+    def name(self) -> str:
+        """实际生效的 codec 名称（已应用回退）"""
+        if self.compressor == "none":
+            return self.serializer
+        return f"{self.serializer}+{self.compressor}"
+
+    @property
+    def is_legacy(self) -> bool:
+        """是否为旧格式（JSON 字符串，不压缩）"""
+        return self.serializer == "json" and self.compressor == "none"
+
+    def encode(self, value: Any):
+        """编码缓存值
+
+        Returns:
+            旧格式返回 JSON 字符串，其他返回带载荷头的 bytes
+        """
+        if self.is_legacy:
+            return json.dumps(value, ensure_ascii=False, default=str)
+
+        payload = _serialize(self.serializer, value)
+        compressor = self.compressor
+        if compressor != "none" and len(payload) >= self.compress_min_bytes:
+            payload = _compress(compressor, payload)
+        else:
+            compressor = "none"
+
+        return (
+            CODEC_MAGIC
+            + bytes(
+                (
+                    self.SERIALIZER_IDS[self.serializer],
+                    self.COMPRESSOR_IDS[compressor],
+                )
+            )
+            + payload
+        )
+
+    @classmethod
+    def decode(cls, raw: Any) -> Any:
+        """解码缓存值（根据载荷头自动识别格式，兼容旧的 JSON 字符串）"""
+        if isinstance(raw, (bytes, bytearray)) and raw[:2] == CODEC_MAGIC:
+            serializer = _SERIALIZER_NAMES[raw[2]]
+            compressor = _COMPRESSOR_NAMES[raw[3]]
+            payload = bytes(raw[4:])
+            if compressor != "none":
+                payload = _decompress(compressor, payload)
+            return _deserialize(serializer, payload)
+
+        return json.loads(raw)
+
+
+_SERIALIZER_NAMES = {v: k for k, v in CacheCodec.SERIALIZER_IDS.items()}
+_COMPRESSOR_NAMES = {v: k for k, v in CacheCodec.COMPRESSOR_IDS.items()}
+
+
+def _serialize(serializer: str, value: Any) -> bytes:
+    if serializer == "orjson":
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+    if serializer == "msgpack":
+        return msgpack.packb(value, use_bin_type=True, default=str)
+    return json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _deserialize(serializer: str, payload: bytes) -> Any:
+    if serializer == "orjson":
+        return orjson.loads(payload)
+    if serializer == "msgpack":
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+    return json.loads(payload)
+
+
+def _compress(compressor: str, payload: bytes) -> bytes:
+    if compressor == "lz4":
+        return lz4_frame.compress(payload)
+    if compressor == "zstd":
+        return zstandard.compress(payload, 3)
+    return zlib.compress(payload)
+
+
+def _decompress(compressor: str, payload: bytes) -> bytes:
+    if compressor == "lz4":
+        return lz4_frame.decompress(payload)
+    if compressor == "zstd":
+        return zstandard.decompress(payload)
+    return zlib.decompress(payload)
+
+
+class CodecAwareZlibCompressor(ZlibCompressor):
+    """django-redis 压缩器：zlib 压缩，但跳过已由 codec 层压缩过的载荷
+
+    未单独配置 codec 的键族（以及 session 等直接走 django cache 的数据）仍按
+    原来的 ZlibCompressor 压缩，部署前写入的 zlib 数据也照常解压；
+    ``orjson+lz4`` 等已压缩的 codec 载荷不再重复做 zlib 压缩。
+    """
+
+    # pickle 头（协议号 + 帧长度 + BINBYTES 操作码和长度）之后即为 codec 载荷
+    codec_header_window = 24
+
+    def compress(self, value: bytes) -> bytes:
+        pos = value.find(CODEC_MAGIC, 0, self.codec_header_window)
+        if pos != -1 and value[pos + 3:pos + 4] not in (b"", b"\x00"):
+            return value
+        return super().compress(value)
+
+
+# 已创建的编解码器实例缓存：(codec 名称, 压缩阈值) -> CacheCodec
+_codec_instances: Dict[tuple, CacheCodec] = {}
+
+
+def get_cache_codec(key: str) -> CacheCodec:
+    """按键族选择编解码器
+
+    从 ``settings.CACHE_CODECS`` 中按最长前缀匹配缓存键，
+    未匹配时使用 ``default`` 项（缺省为 ``json``，即旧格式）。
+
+    Example:
+        CACHE_CODECS = {
+            "default": "json",
+            "courses:ChapterViewSet": "orjson+lz4",
+        }
+        get_cache_codec("courses:ChapterViewSet:SEPARATED:GLOBAL:course_pk=1").name
+        # => "orjson+lz4"
+    """
+    from django.conf import settings
+
+    codecs = getattr(settings, "CACHE_CODECS", None) or {}
+    compress_min_bytes = getattr(settings, "CACHE_CODEC_COMPRESS_MIN_BYTES", 1024)
+
+    name = codecs.get("default", "json")
+    matched_len = -1
+    for prefix, codec_name in codecs.items():
+        if prefix == "default":
+            continue
+        if key.startswith(prefix) and len(prefix) > matched_len:
+            name = codec_name
+            matched_len = len(prefix)
+
+    instance_key = (name, compress_min_bytes)
+    codec = _codec_instances.get(instance_key)
+    if codec is None:
+        codec = CacheCodec.from_name(name, compress_min_bytes)
+        _codec_instances[instance_key] = codec
+    return codec
+
+
+def set_cache(
+    key, value, timeout=900, is_null: bool = False, tags: Optional[list] = None
+):  # 默认15分钟
     """设置缓存数据
 
+    标准缓存键会自动登记到由键推导出的标签集合（见 get_cache_key_tags），
+    供 CacheInvalidator 按标签失效，无需 SCAN 整个键空间。
+
     Args:
         key: 缓存键
         value: 缓存值
         timeout: 超时时间（秒）
         is_null: 是否是空值（用于缓存穿透保护）
+        tags: 额外的业务标签（可选），如 ["course:1", "user:42:enrollments"]
     """
     start_time = time.time()
     try:
@@ -149,9 +378,8 @@ def set_cache(key, value, timeout=900, is_null: bool = False):  # 默认15分钟
             cache_data = value
             actual_timeout = timeout
 
-        cache.set(
-            key, json.dumps(cache_data, ensure_ascii=False, default=str), actual_timeout
-        )
+        cache.set(key, get_cache_codec(key).encode(cache_data), actual_timeout)
+        register_cache_tags(key, get_cache_key_tags(key) + list(tags or []), actual_timeout)
 
         duration_ms = (time.time() - start_time) * 1000
         if duration_ms > 100:
@@ -168,6 +396,66 @@ def set_cache(key, value, timeout=900, is_null: bool = False):  # 默认15分钟
         pass
 
 
+def _get_cache_endpoint(key: str) -> str:
+    """从缓存键中提取 endpoint（视图名），用于 metrics 统计"""
+    # Extract view name from key - handle keys with varying number of parts
+    key_parts = key.split(":")
+    return (
+        key_parts[1]
+        if len(key_parts) > 1
+        else (key_parts[0] if key_parts else "unknown")
+    )
+
+
+def _resolve_cached_value(key: str, endpoint: str, data: Any, start_time: float) -> CacheResult:
+    """将缓存中读出的原始值解析为 CacheResult，并记录命中/未命中 metrics"""
+    if data is None:
+        # 记录未命中
+        AdaptiveTTLCalculator.record_miss(key)
+        if record_cache_miss:
+            duration = time.time() - start_time
+            record_cache_miss(endpoint, duration, cache_key=key)
+        return CacheResult.miss()
+
+    # 反序列化数据（按载荷头识别 codec）
+    parsed_data = CacheCodec.decode(data)
+
+    # 检查是否是哨兵值
+    if isinstance(parsed_data, dict):
+        if parsed_data.get("__marker__") == NULL_VALUE_MARKER:
+            duration = time.time() - start_time
+            if record_cache_null_value:
+                record_cache_null_value(endpoint, duration)
+            return CacheResult.null_value(
+                cached_at=parsed_data.get("cached_at"), ttl=parsed_data.get("ttl")
+            )
+        elif parsed_data.get("__marker__") == EMPTY_VALUE_MARKER:
+            AdaptiveTTLCalculator.record_hit(key)
+            duration = time.time() - start_time
+            if record_cache_hit:
+                record_cache_hit(endpoint, duration, cache_key=key)
+            return CacheResult.hit(
+                data=parsed_data.get("data"),
+                cached_at=parsed_data.get("cached_at"),
+                ttl=parsed_data.get("ttl"),
+            )
+
+    # 普通数据命中
+    AdaptiveTTLCalculator.record_hit(key)
+    duration = time.time() - start_time
+    if record_cache_hit:
+        record_cache_hit(endpoint, duration, cache_key=key)
+    return CacheResult.hit(parsed_data)
+
+
+def _record_cache_read_failure(key: str, endpoint: str, start_time: float) -> CacheResult:
+    """读取/解析异常时按未命中处理"""
+    AdaptiveTTLCalculator.record_miss(key)
+    if record_cache_miss:
+        record_cache_miss(endpoint, time.time() - start_time, cache_key=key)
+    return CacheResult.miss()
+
+
 def get_cache(key, return_result: bool = False):
     """获取缓存数据
 
@@ -181,166 +469,326 @@ def get_cache(key, return_result: bool = False):
         否则返回原始数据（向后兼容）
     """
     start_time = time.time()
-    # Extract view name from key - handle keys with varying number of parts
-    key_parts = key.split(":")
-    endpoint = (
-        key_parts[1]
-        if len(key_parts) > 1
-        else (key_parts[0] if key_parts else "unknown")
-    )
+    endpoint = _get_cache_endpoint(key)
 
     # Always record total operation for accurate denominator in rate calculations
     record_cache_total_operation(endpoint)
 
     try:
-        data = cache.get(key)
-
-        if data is None:
-            # 记录未命中
-            AdaptiveTTLCalculator.record_miss(key)
-            if record_cache_miss:
-                duration = time.time() - start_time
-                record_cache_miss(endpoint, duration, cache_key=key)
-            return CacheResult.miss() if return_result else None
-
-        # 反序列化数据
-        parsed_data = json.loads(data)
-
-        # 检查是否是哨兵值
-        if isinstance(parsed_data, dict):
-            if parsed_data.get("__marker__") == NULL_VALUE_MARKER:
-                duration = time.time() - start_time
-                if record_cache_null_value:
-                    record_cache_null_value(endpoint, duration)
-                result = CacheResult.null_value(
-                    cached_at=parsed_data.get("cached_at"), ttl=parsed_data.get("ttl")
-                )
-                return result if return_result else None
-            elif parsed_data.get("__marker__") == EMPTY_VALUE_MARKER:
-                duration = time.time() - start_time
-                if record_cache_hit:
-                    record_cache_hit(endpoint, duration, cache_key=key)
-                result = CacheResult.hit(
-                    data=parsed_data.get("data"),
-                    cached_at=parsed_data.get("cached_at"),
-                    ttl=parsed_data.get("ttl"),
-                )
-                return result if return_result else parsed_data.get("data")
+        result = _resolve_cached_value(key, endpoint, cache.get(key), start_time)
+    except Exception:
+        # 异常也记录为未命中
+        result = _record_cache_read_failure(key, endpoint, start_time)
+
+    return result if return_result else result.data
 
-        # 普通数据命中
-        duration = time.time() - start_time
-        if record_cache_hit:
-            record_cache_hit(endpoint, duration, cache_key=key)
-        result = CacheResult.hit(parsed_data)
-        return result if return_result else parsed_data
 
+def get_cache_many(keys) -> Dict[str, CacheResult]:
+    """批量获取缓存数据（一次 MGET 往返）
+
+    请求处理前先收集需要的全部缓存键，一次性读取，
+    再把各自的 CacheResult 交给 SeparatedCacheService / BusinessCacheService 使用，
+    避免每个键单独一次 Redis 往返。
+
+    Args:
+        keys: 缓存键列表（重复键只读取一次）
+
+    Returns:
+        Dict[str, CacheResult]: 缓存键到 CacheResult 的映射
+
+    Example:
+        results = get_cache_many([global_key, status_key])
+        if results[global_key].is_hit:
+            ...
+    """
+    keys = list(dict.fromkeys(key for key in keys if key))
+    if not keys:
+        return {}
+
+    start_time = time.time()
+    endpoints = {key: _get_cache_endpoint(key) for key in keys}
+
+    # 每个 endpoint 只记录一次总操作数
+    endpoint_counts: Dict[str, int] = {}
+    for endpoint in endpoints.values():
+        endpoint_counts[endpoint] = endpoint_counts.get(endpoint, 0) + 1
+    for endpoint, count in endpoint_counts.items():
+        record_cache_total_operation(endpoint, count=count)
+
+    try:
+        raw_values = cache.get_many(keys)
     except Exception as e:
-        # 异常也记录为未命中
-        AdaptiveTTLCalculator.record_miss(key)
-        if record_cache_miss:
-            record_cache_miss(endpoint, time.time() - start_time, cache_key=key)
-        return CacheResult.miss() if return_result else None
+        logger.debug(f"Failed to batch read cache keys: {e}")
+        raw_values = None
+
+    results = {}
+    for key in keys:
+        if raw_values is None:
+            results[key] = _record_cache_read_failure(key, endpoints[key], start_time)
+            continue
+        try:
+            results[key] = _resolve_cached_value(
+                key, endpoints[key], raw_values.get(key), start_time
+            )
+        except Exception:
+            results[key] = _record_cache_read_failure(key, endpoints[key], start_time)
+    return results
 
 
 class AdaptiveTTLCalculator:
-    """自适应 TTL 计算器，基于访问频率和数据特性动态调整 TTL"""
+    """自适应 TTL 计算器，基于采样的访问统计按键族（key family）分层 TTL
+
+    - 读取路径只按 settings.ADAPTIVE_TTL_SAMPLE_RATE（默认 1%）采样记录命中/未命中：
+      每个键族每小时一个计数 HASH 和一个 HyperLogLog（估计被访问的不同键数），
+      不再为每个缓存键维护一个统计 HASH
+    - 定时任务 refresh_adaptive_ttl_table 调用 build_ttl_table() 批量计算各键族的
+      TTL 分层（hot / warm / cold），发布为一张紧凑的 TTL 表
+    - 各 worker 把 TTL 表加载到进程内存（settings.ADAPTIVE_TTL_TABLE_REFRESH 秒刷新一次），
+      calculate_ttl() 不访问 Redis
+    """
 
     # 统计键前缀
     STATS_PREFIX = "cache_stats"
+    # 已发布的 TTL 表（JSON: {键族: 分层}）
+    TTL_TABLE_KEY = "cache_stats:ttl_table"
+    # 出现过采样的键族集合
+    FAMILIES_KEY = "cache_stats:families"
+
+    # 统计窗口（小时桶数量）
+    WINDOW_HOURS = 3
+    # 键族样本数少于该值时不分层（使用默认 TTL）
+    MIN_SAMPLES = 20
+
+    # 分层 TTL（秒），"warm" 使用调用方的默认 TTL
+    TIER_TTLS = {"hot": 1800, "cold": 300}
+
+    # 进程内 TTL 表：(表, 过期时间戳)
+    _ttl_table: Dict[str, str] = {}
+    _ttl_table_expires_at: float = 0.0
+
+    @staticmethod
+    def get_key_family(cache_key: str) -> str:
+        """提取缓存键所属的键族
+
+        Examples:
+            courses:ChapterViewSet:SEPARATED:GLOBAL:course_pk=1 -> courses:ChapterViewSet:SEPARATED:GLOBAL
+            courses:CourseViewSet:1 -> courses:CourseViewSet
+        """
+        parts = cache_key.split(":")
+        if len(parts) > 3 and parts[2] == "SEPARATED":
+            return ":".join(parts[:4])
+        return ":".join(parts[:2])
 
     @classmethod
-    def get_stats_key(cls, cache_key: str) -> str:
-        """获取统计数据的 Redis 键"""
-        return f"{cls.STATS_PREFIX}:{cache_key}"
+    def get_stats_key(cls, family: str, bucket: Optional[int] = None) -> str:
+        """获取键族在某个小时桶的计数 HASH 键"""
+        if bucket is None:
+            bucket = int(time.time() // 3600)
+        return f"{cls.STATS_PREFIX}:{family}:{bucket}"
 
     @classmethod
-    def calculate_ttl(cls, cache_key: str, default_ttl: int = 900) -> int:
-        """计算自适应 TTL
+    def _sample_rate(cls) -> float:
+        from django.conf import settings
 
-        Args:
-            cache_key: 缓存键
-            default_ttl: 默认 TTL（秒）
+        return getattr(settings, "ADAPTIVE_TTL_SAMPLE_RATE", 0.01)
 
-        Returns:
-            计算后的 TTL（秒）
-        """
+    @classmethod
+    def _record(cls, cache_key: str, field: str):
+        """按采样率记录一次访问"""
+        sample_rate = cls._sample_rate()
+        if sample_rate <= 0 or random.random() >= sample_rate:
+            return
         try:
-            redis_conn = get_redis_connection("default")
-            stats_key = cls.get_stats_key(cache_key)
-            stats = redis_conn.hgetall(stats_key)
+            family = cls.get_key_family(cache_key)
+            stats_key = cls.get_stats_key(family)
+            ttl = cls.WINDOW_HOURS * 3600 + 3600
 
-            if not stats:
-                # 首次访问，使用默认 TTL
-                return default_ttl
+            redis_conn = get_redis_connection("default")
+            pipe = redis_conn.pipeline(transaction=False)
+            pipe.hincrby(stats_key, field, 1)
+            pipe.pfadd(f"{stats_key}:keys", cache_key)
+            pipe.expire(stats_key, ttl)
+            pipe.expire(f"{stats_key}:keys", ttl)
+            pipe.sadd(cls.FAMILIES_KEY, family)
+            pipe.execute()
+        except Exception:
+            pass
 
-            hits = int(stats.get(b"hits", 0))
-            misses = int(stats.get(b"misses", 0))
-            total_requests = hits + misses
+    @classmethod
+    def record_hit(cls, cache_key: str):
+        """记录缓存命中（采样）"""
+        cls._record(cache_key, "hits")
 
-            if total_requests == 0:
-                return default_ttl
+    @classmethod
+    def record_miss(cls, cache_key: str):
+        """记录缓存未命中（采样）"""
+        cls._record(cache_key, "misses")
 
-            hit_rate = hits / total_requests
+    @staticmethod
+    def classify(hit_rate: float, hits_per_key: float) -> str:
+        """根据命中率和单键命中数选择 TTL 分层"""
+        if hit_rate > 0.5 and hits_per_key > 100:
+            return "hot"
+        elif hit_rate > 0.2 and hits_per_key > 10:
+            return "warm"
+        else:
+            return "cold"
 
-            # 基于 TTL 分层策略
-            if hit_rate > 0.5 and hits > 100:
-                # 热点数据：30 分钟
-                return 1800
-            elif hit_rate > 0.2 and hits > 10:
-                # 常规数据：15 分钟（默认）
-                return 900
+    @staticmethod
+    def estimate_hits_per_key(
+        sampled_hits: int, sampled_keys: int, sample_rate: float
+    ) -> float:
+        """由采样数据估计单键命中数
+
+        sampled_keys 只是被采样到的不同键数，不能把命中数按采样率放大后再除以它：
+        键稀疏时每个键通常只被采样一次，结果会接近 1/采样率。单键命中 R 次时
+        采样比值 m = pR / (1 - (1-p)^R)，随 R 单调递增，二分求解 R。
+        """
+        ratio = sampled_hits / max(sampled_keys, 1)
+        if sample_rate >= 1 or ratio <= 1:
+            return ratio
+        low, high = 0.0, ratio / sample_rate
+        for _ in range(50):
+            mid = (low + high) / 2
+            if sample_rate * mid / (1 - (1 - sample_rate) ** mid) < ratio:
+                low = mid
             else:
-                # 冷数据：5 分钟
-                return 300
+                high = mid
+        return high
 
-        except Exception:
-            return default_ttl
+    @classmethod
+    def get_tier_ttl(cls, tier: Optional[str], default_ttl: int = 900) -> int:
+        """分层对应的 TTL：热点不短于 30 分钟，冷数据不长于 5 分钟，常规/未知使用默认 TTL"""
+        if tier == "hot":
+            return max(cls.TIER_TTLS["hot"], default_ttl)
+        if tier == "cold":
+            return min(cls.TIER_TTLS["cold"], default_ttl)
+        return default_ttl
 
     @classmethod
-    def record_hit(cls, cache_key: str):
-        """记录缓存命中"""
+    def build_ttl_table(cls) -> Dict[str, Dict[str, Any]]:
+        """从最近 WINDOW_HOURS 小时的采样统计批量计算各键族的 TTL 分层并发布
+
+        被采样到的不同键数由各小时桶 HyperLogLog 的并集估计，单键命中数
+        由 estimate_hits_per_key 根据采样数据估计。
+
+        Returns:
+            dict: {键族: {"tier", "hit_rate", "hits_per_key", "samples"}}
+        """
+        redis_conn = get_redis_connection("default")
+        current_bucket = int(time.time() // 3600)
+        buckets = range(current_bucket - cls.WINDOW_HOURS + 1, current_bucket + 1)
+        sample_rate = cls._sample_rate() or 1.0
+
+        families = sorted(
+            member.decode() if isinstance(member, bytes) else member
+            for member in redis_conn.smembers(cls.FAMILIES_KEY)
+        )
+
+        pipe = redis_conn.pipeline(transaction=False)
+        for family in families:
+            stats_keys = [cls.get_stats_key(family, bucket) for bucket in buckets]
+            for stats_key in stats_keys:
+                pipe.hmget(stats_key, "hits", "misses")
+            pipe.pfcount(*[f"{stats_key}:keys" for stats_key in stats_keys])
+        results = pipe.execute()
+
+        report = {}
+        step = len(buckets) + 1
+        for index, family in enumerate(families):
+            family_results = results[index * step : (index + 1) * step]
+            hits = sum(int(h or 0) for h, _ in family_results[:-1])
+            misses = sum(int(m or 0) for _, m in family_results[:-1])
+            distinct_keys = max(int(family_results[-1] or 0), 1)
+            samples = hits + misses
+            if samples < cls.MIN_SAMPLES:
+                continue
+
+            hit_rate = hits / samples
+            hits_per_key = cls.estimate_hits_per_key(hits, distinct_keys, sample_rate)
+            report[family] = {
+                "tier": cls.classify(hit_rate, hits_per_key),
+                "hit_rate": hit_rate,
+                "hits_per_key": hits_per_key,
+                "samples": samples,
+            }
+
+        redis_conn.set(
+            cls.TTL_TABLE_KEY,
+            json.dumps({family: row["tier"] for family, row in report.items()}),
+            ex=cls.WINDOW_HOURS * 3600,
+        )
+        # 本进程立即使用新表
+        cls._ttl_table_expires_at = 0.0
+        return report
+
+    @classmethod
+    def get_ttl_table(cls) -> Dict[str, str]:
+        """获取进程内 TTL 表，过期后从 Redis 重新加载（失败时沿用旧表）"""
+        now = time.time()
+        if cls._ttl_table_expires_at > now:
+            return cls._ttl_table
+
+        from django.conf import settings
+
+        refresh = getattr(settings, "ADAPTIVE_TTL_TABLE_REFRESH", 60)
         try:
             redis_conn = get_redis_connection("default")
-            stats_key = cls.get_stats_key(cache_key)
-            redis_conn.hincrby(stats_key, "hits", 1)
-            redis_conn.hset(stats_key, "last_access", time.time())
-            redis_conn.expire(stats_key, 86400)  # 统计数据保留 24 小时
-        except Exception:
-            pass
+            raw = redis_conn.get(cls.TTL_TABLE_KEY)
+            cls._ttl_table = json.loads(raw) if raw else {}
+        except Exception as e:
+            logger.debug(f"Failed to load adaptive TTL table: {e}")
+        cls._ttl_table_expires_at = now + refresh
+        return cls._ttl_table
 
     @classmethod
-    def record_miss(cls, cache_key: str):
-        """记录缓存未命中"""
+    def get_family_stats(cls, family: str) -> Optional[Dict[str, Any]]:
+        """读取键族在当前统计窗口内的采样命中/未命中数"""
         try:
             redis_conn = get_redis_connection("default")
-            stats_key = cls.get_stats_key(cache_key)
-            redis_conn.hincrby(stats_key, "misses", 1)
-            redis_conn.expire(stats_key, 86400)  # 统计数据保留 24 小时
+            current_bucket = int(time.time() // 3600)
+            pipe = redis_conn.pipeline(transaction=False)
+            for bucket in range(current_bucket - cls.WINDOW_HOURS + 1, current_bucket + 1):
+                pipe.hmget(cls.get_stats_key(family, bucket), "hits", "misses")
+            rows = pipe.execute()
         except Exception:
-            pass
+            return None
+        hits = sum(int(h or 0) for h, _ in rows)
+        misses = sum(int(m or 0) for _, m in rows)
+        return {"hits": hits, "misses": misses}
 
     @classmethod
-    def get_hit_rate(cls, cache_key: str) -> Optional[float]:
-        """获取指定缓存的命中率
+    def calculate_ttl(cls, cache_key: str, default_ttl: int = 900) -> int:
+        """计算自适应 TTL（只查进程内 TTL 表）
+
+        Args:
+            cache_key: 缓存键
+            default_ttl: 默认 TTL（秒），键族不在 TTL 表中时使用
 
         Returns:
-            命中率 (0-1)，如果无统计数据返回 None
+            计算后的 TTL（秒）
         """
         try:
-            redis_conn = get_redis_connection("default")
-            stats_key = cls.get_stats_key(cache_key)
-            stats = redis_conn.hgetall(stats_key)
+            tier = cls.get_ttl_table().get(cls.get_key_family(cache_key))
+            return cls.get_tier_ttl(tier, default_ttl)
+        except Exception:
+            return default_ttl
 
-            if not stats:
-                return None
+    @classmethod
+    def get_hit_rate(cls, cache_key: str) -> Optional[float]:
+        """获取缓存键所属键族的采样命中率
 
-            hits = int(stats.get(b"hits", 0))
-            misses = int(stats.get(b"misses", 0))
-            total = hits + misses
+        Returns:
+            命中率 (0-1)，如果无统计数据返回 None
+        """
+        stats = cls.get_family_stats(cls.get_key_family(cache_key))
+        if not stats:
+            return None
 
-            return hits / total if total > 0 else 0.0
-        except Exception:
+        total = stats["hits"] + stats["misses"]
+        if total == 0:
             return None
+        return stats["hits"] / total
 
 
 def delete_cache(key: str) -> bool:
@@ -364,6 +812,12 @@ def delete_cache(key: str) -> bool:
 def delete_cache_pattern(pattern):
     """
     删除所有匹配 pattern 的 Redis key（支持通配符 *）
+
+    注意：SCAN 的开销与 Redis 键总数成正比，只用于运维命令等临时场景。
+    业务失效请使用标签（CacheInvalidator.invalidate_tags / invalidate_viewset_list）。
+
+    Returns:
+        int: 删除的键数量
     """
     redis_conn = get_redis_connection("default")
 
@@ -371,16 +825,16 @@ def delete_cache_pattern(pattern):
     # Based on the debug output, keys are stored with ":1:" prefix
     db_pattern = f"*:1:{pattern}"
 
-    cursor = 0
-    found_keys = []
-    while True:
-        cursor, keys = redis_conn.scan(cursor=cursor, match=db_pattern, count=100)
-        found_keys.extend(keys)
-        if cursor == 0:
-            break
-
-    if found_keys:
-        redis_conn.delete(*found_keys)
+    deleted = 0
+    batch = []
+    for key in redis_conn.scan_iter(match=db_pattern, count=1000):
+        batch.append(key)
+        if len(batch) >= 500:
+            deleted += redis_conn.unlink(*batch)
+            batch = []
+    if batch:
+        deleted += redis_conn.unlink(*batch)
+    return deleted
 
 
 def invalidate_dir_cache(user_id, path):
@@ -411,6 +865,302 @@ def invalidate_dir_cache(user_id, path):
     cache.delete(make_key("/"))
 
 
+# 代际计数器（generation）的 Redis 键前缀（原始键，永不过期）
+CACHE_GENERATION_PREFIX = "cache_gen"
+
+# 进程内 L1 缓存：namespace -> (generation, 过期时间戳)，按 LRU 淘汰，
+# 最多 settings.CACHE_GENERATION_L1_MAX_ENTRIES 个命名空间
+_generation_l1: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+def _remember_generation(namespace: str, generation: int, expires_at: float) -> None:
+    """写入 L1 缓存，超出容量时淘汰最久未使用的命名空间"""
+    from django.conf import settings
+
+    max_entries = getattr(settings, "CACHE_GENERATION_L1_MAX_ENTRIES", 10000)
+    _generation_l1[namespace] = (generation, expires_at)
+    _generation_l1.move_to_end(namespace)
+    while len(_generation_l1) > max_entries:
+        try:
+            _generation_l1.popitem(last=False)
+        except KeyError:
+            break
+
+
+def get_cache_namespaces(
+    parent_pks: Optional[Dict[str, int]] = None, user_id: Optional[int] = None
+) -> list:
+    """
+    根据缓存键的父资源和用户推导所属的代际命名空间
+
+    - parent_pks 中的 course_pk / chapter_pk -> "course:{id}" / "chapter:{id}"
+    - user_id -> "user:{id}"
+    """
+    namespaces = []
+    if parent_pks:
+        if parent_pks.get("course_pk") is not None:
+            namespaces.append(f"course:{parent_pks['course_pk']}")
+        if parent_pks.get("chapter_pk") is not None:
+            namespaces.append(f"chapter:{parent_pks['chapter_pk']}")
+    if user_id is not None:
+        namespaces.append(f"user:{user_id}")
+    return namespaces
+
+
+def get_cache_generation(*namespaces: str) -> int:
+    """
+    获取命名空间的代际之和
+
+    优先读取进程内 L1 缓存（TTL 为 settings.CACHE_GENERATION_L1_TTL，默认 2 秒），
+    未命中的命名空间用一次 MGET 从 Redis 读取。各计数器只增不减，
+    因此任一命名空间递增都会得到一个从未使用过的和。
+
+    Returns:
+        int: 代际之和，读取失败时返回 0
+    """
+    if not namespaces:
+        return 0
+
+    now = time.time()
+    total = 0
+    missing = []
+    for namespace in namespaces:
+        cached = _generation_l1.get(namespace)
+        if cached and cached[1] > now:
+            total += cached[0]
+            try:
+                _generation_l1.move_to_end(namespace)
+            except KeyError:
+                pass
+        else:
+            missing.append(namespace)
+
+    if missing:
+        try:
+            from django.conf import settings
+
+            l1_ttl = getattr(settings, "CACHE_GENERATION_L1_TTL", 2)
+            redis_conn = get_redis_connection("default")
+            values = redis_conn.mget(
+                [f"{CACHE_GENERATION_PREFIX}:{namespace}" for namespace in missing]
+            )
+            for namespace, value in zip(missing, values):
+                generation = int(value) if value else 0
+                _remember_generation(namespace, generation, now + l1_ttl)
+                total += generation
+        except Exception as e:
+            logger.debug(f"Failed to read cache generation {missing}: {e}")
+
+    return total
+
+
+def bump_cache_generation(*namespaces: str) -> None:
+    """
+    递增命名空间代际，使该命名空间下的所有缓存键一次性失效（无需枚举键）
+
+    旧代际的缓存不再被访问，由 TTL 自然过期。当前进程的 L1 立即更新，
+    其他进程在 L1 TTL 内感知新代际。
+
+    Example:
+        bump_cache_generation("course:1")   # 课程内容变更
+        bump_cache_generation("user:42")    # 用户选课变化
+    """
+    if not namespaces:
+        return
+    try:
+        from django.conf import settings
+
+        l1_ttl = getattr(settings, "CACHE_GENERATION_L1_TTL", 2)
+        redis_conn = get_redis_connection("default")
+        pipe = redis_conn.pipeline(transaction=False)
+        for namespace in namespaces:
+            pipe.incr(f"{CACHE_GENERATION_PREFIX}:{namespace}")
+        now = time.time()
+        for namespace, generation in zip(namespaces, pipe.execute()):
+            _remember_generation(namespace, int(generation), now + l1_ttl)
+    except Exception as e:
+        logger.debug(f"Failed to bump cache generation {namespaces}: {e}")
+
+
+# 资源 ID 位图的 Redis 键前缀（原始键）。每种资源一个位图，第 pk 位为 1 表示该 ID 可能存在
+RESOURCE_ID_BITMAP_PREFIX = "id_bitmap"
+
+# Redis 位图的最大偏移量（512MB 字符串）
+RESOURCE_ID_BITMAP_MAX_OFFSET = 2**32 - 1
+
+
+def _get_resource_label(model) -> str:
+    """返回模型的资源标识，例如 "courses.Problem"（也接受已经是字符串的标识）"""
+    return model if isinstance(model, str) else model._meta.label
+
+
+def get_resource_id_bitmap_key(model) -> str:
+    """获取资源 ID 位图的 Redis 键"""
+    return f"{RESOURCE_ID_BITMAP_PREFIX}:{_get_resource_label(model).lower()}"
+
+
+def _is_resource_id_bitmap_enabled(model) -> bool:
+    from django.conf import settings
+
+    return _get_resource_label(model) in getattr(
+        settings, "RESOURCE_ID_BITMAP_MODELS", []
+    )
+
+
+def _parse_resource_id(pk) -> Optional[int]:
+    """把 URL 中的主键转换为位图偏移量，无法表示时返回 None"""
+    try:
+        offset = int(pk)
+    except (TypeError, ValueError):
+        return None
+    if offset < 0 or offset > RESOURCE_ID_BITMAP_MAX_OFFSET:
+        return None
+    return offset
+
+
+# 只在位图键存在时改位：位图被淘汰或删除后，SETBIT 会新建一个只有这几位的
+# 位图，在 ready 标记过期前把其余合法 ID 全部误判为不存在
+_SET_RESOURCE_ID_BITS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 2, #ARGV do
+    redis.call('SETBIT', KEYS[1], ARGV[i], ARGV[1])
+end
+return 1
+"""
+
+# 重建前确保位图键存在，构建期间由信号登记的 ID 才不会被上面的脚本丢弃；
+# 位图缺失时先删除残留的 ready 标记，避免构建期间用空位图拒绝请求
+_PREPARE_RESOURCE_ID_BITMAP_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('DEL', KEYS[2])
+    redis.call('SETBIT', KEYS[1], 0, 0)
+end
+return 1
+"""
+
+
+def _set_resource_id_bits(model, pks, value: int) -> None:
+    offsets = [
+        offset for offset in map(_parse_resource_id, pks) if offset is not None
+    ]
+    if not offsets:
+        return
+    bitmap_key = get_resource_id_bitmap_key(model)
+    redis_conn = get_redis_connection("default")
+    redis_conn.eval(_SET_RESOURCE_ID_BITS_SCRIPT, 1, bitmap_key, value, *offsets)
+
+
+def add_resource_ids(model, *pks) -> None:
+    """
+    在资源 ID 位图中标记 ID 存在
+
+    由 post_save（创建）信号和 bulk_create 调用方维护。
+    提前标记只会产生假阳性（回退到查库），不影响正确性。
+    位图键不存在（未构建或已被淘汰）时不做任何事，等待下次重建。
+    """
+    if not pks or not _is_resource_id_bitmap_enabled(model):
+        return
+    try:
+        _set_resource_id_bits(model, pks, 1)
+    except Exception as e:
+        logger.debug(f"Failed to add resource ids {pks} for {model}: {e}")
+
+
+def remove_resource_ids(model, *pks) -> None:
+    """
+    在资源 ID 位图中清除 ID
+
+    应在删除事务提交后调用，否则回滚会让仍然存在的资源被误判为不存在。
+    位图键不存在时不做任何事。
+    """
+    if not pks or not _is_resource_id_bitmap_enabled(model):
+        return
+    try:
+        _set_resource_id_bits(model, pks, 0)
+    except Exception as e:
+        logger.debug(f"Failed to remove resource ids {pks} for {model}: {e}")
+
+
+def resource_id_may_exist(model, pk) -> bool:
+    """
+    判断资源 ID 是否可能存在
+
+    只有位图已经由 rebuild_resource_id_bitmap() 构建完成（ready 标记未过期）、
+    位图键本身仍然存在且对应位为 0 时才返回 False。未启用、未构建、位图被
+    淘汰或删除、ID 无法解析或 Redis 故障时一律返回 True（fail open），
+    交给缓存和数据库判断。
+
+    Returns:
+        bool: False 表示该 ID 一定不存在
+    """
+    if not _is_resource_id_bitmap_enabled(model):
+        return True
+    offset = _parse_resource_id(pk)
+    if offset is None:
+        return True
+    try:
+        bitmap_key = get_resource_id_bitmap_key(model)
+        redis_conn = get_redis_connection("default")
+        pipe = redis_conn.pipeline(transaction=False)
+        pipe.exists(f"{bitmap_key}:ready")
+        pipe.exists(bitmap_key)
+        pipe.getbit(bitmap_key, offset)
+        is_ready, has_bitmap, bit = pipe.execute()
+        return not (is_ready and has_bitmap) or bool(bit)
+    except Exception as e:
+        logger.debug(f"Failed to check resource id {pk} for {model}: {e}")
+        return True
+
+
+def rebuild_resource_id_bitmap(model, ttl: Optional[int] = None) -> int:
+    """
+    从数据库重建资源 ID 位图，并标记为可用
+
+    位图在进程内一次性构建后写入临时键，再用 BITOP OR 合并到正式位图，
+    因此构建期间由信号新增的 ID 不会丢失（已删除 ID 的残留位只会产生假阳性）。
+    ready 标记的 TTL 为 settings.RESOURCE_ID_BITMAP_TTL（默认 2 小时），
+    定时重建停止后过滤自动失效。
+
+    Returns:
+        int: 写入位图的 ID 数量
+    """
+    from django.conf import settings
+
+    if ttl is None:
+        ttl = getattr(settings, "RESOURCE_ID_BITMAP_TTL", 7200)
+
+    bitmap_key = get_resource_id_bitmap_key(model)
+    ready_key = f"{bitmap_key}:ready"
+    redis_conn = get_redis_connection("default")
+    redis_conn.eval(_PREPARE_RESOURCE_ID_BITMAP_SCRIPT, 2, bitmap_key, ready_key)
+
+    bitmap = bytearray()
+    count = 0
+    for pk in model._default_manager.values_list("pk", flat=True).iterator(
+        chunk_size=10000
+    ):
+        offset = _parse_resource_id(pk)
+        if offset is None:
+            continue
+        index = offset >> 3
+        if index >= len(bitmap):
+            bitmap.extend(b"\x00" * (index + 1 - len(bitmap)))
+        # Redis 位图的第 0 位是首字节的最高位
+        bitmap[index] |= 0x80 >> (offset & 7)
+        count += 1
+
+    tmp_key = f"{bitmap_key}:rebuild"
+    pipe = redis_conn.pipeline(transaction=True)
+    pipe.set(tmp_key, bytes(bitmap), ex=300)
+    pipe.bitop("OR", bitmap_key, bitmap_key, tmp_key)
+    pipe.delete(tmp_key)
+    pipe.set(ready_key, 1, ex=ttl)
+    pipe.execute()
+    return count
+
+
 def get_standard_cache_key(
     prefix: str,
     view_name: str,
@@ -440,9 +1190,14 @@ def get_standard_cache_key(
         str: 标准化的缓存key
 
     格式:
-        - 普通缓存: {prefix}:{view_name}[:parent_keys][:pk][:params][:user_id]
-        - 分离缓存全局: {prefix}:{view_name}:SEPARATED:GLOBAL[:parent_keys][:pk]
-        - 分离缓存用户: {prefix}:{view_name}:SEPARATED:STATUS[:parent_keys][:pk]:user_id={user_id}
+        - 普通缓存: {prefix}:{view_name}[:parent_keys][:pk][:params][:gen][:user_id]
+        - 分离缓存全局: {prefix}:{view_name}:SEPARATED:GLOBAL[:parent_keys][:pk][:gen]
+        - 分离缓存用户: {prefix}:{view_name}:SEPARATED:STATUS[:parent_keys][:pk][:gen]:user_id={user_id}
+
+    代际:
+        键所属命名空间（course/chapter/user，见 get_cache_namespaces）的代际之和
+        大于 0 时追加 gen={n}。bump_cache_generation() 之后生成的键随之变化，
+        旧键不再被访问，从而 O(1) 失效整个命名空间。
 
     Examples:
         >>> get_standard_cache_key("courses", "ChapterViewSet", pk=1)
@@ -482,6 +1237,11 @@ def get_standard_cache_key(
         if param_str:
             key_parts.append(param_str)
 
+    # 添加命名空间代际（未递增过时不追加，保持键格式不变）
+    generation = get_cache_generation(*get_cache_namespaces(parent_pks, user_id))
+    if generation:
+        key_parts.append(f"gen={generation}")
+
     # 添加用户ID
     if user_id is not None:
         key_parts.append(f"user_id={user_id}")
@@ -489,6 +1249,157 @@ def get_standard_cache_key(
     return ":".join(key_parts)
 
 
+# 标签集合的 Redis 键前缀（原始键，不经过 django-redis 的 KEY_PREFIX）。
+# 标签为 ZSET（成员分数为缓存键的过期时间），与旧版 SET 格式的键区分
+CACHE_TAG_PREFIX = "cache_tag_z"
+
+# 失效时每批删除的缓存键数量
+INVALIDATE_BATCH_SIZE = 1000
+
+# 自动推导标签的标准缓存键前缀（get_standard_cache_key 的 prefix）
+TAGGED_KEY_PREFIXES = ("api", "courses", "business")
+
+
+def get_cache_tag(
+    prefix: str,
+    view_name: str,
+    parent_pks: Optional[Dict[str, int]] = None,
+    user_id: Optional[int] = None,
+) -> str:
+    """
+    生成列表失效范围对应的标签
+
+    Examples:
+        >>> get_cache_tag("courses", "ChapterViewSet", parent_pks={"course_pk": 1})
+        'courses:ChapterViewSet:course_pk=1'
+
+        >>> get_cache_tag("api", "EnrollmentViewSet", user_id=42)
+        'api:EnrollmentViewSet:user_id=42'
+    """
+    tag_parts = [prefix, view_name]
+    if parent_pks:
+        for key, value in sorted(parent_pks.items()):
+            tag_parts.append(f"{key}={value}")
+    if user_id is not None:
+        tag_parts.append(f"user_id={user_id}")
+    return ":".join(tag_parts)
+
+
+def get_cache_key_tags(key: str) -> list:
+    """
+    从标准缓存键推导所属标签
+
+    标签与 CacheInvalidator.invalidate_viewset_list 的失效范围一一对应：
+        - {prefix}:{view_name}                      整个 ViewSet
+        - {prefix}:{view_name}:user_id=X            某用户在该 ViewSet 下的全部缓存
+        - {scope}:{parent}[:user_id=X]              某父资源下（某用户）的缓存
+
+    分离缓存的父资源标签挂在 {prefix}:{view_name}:SEPARATED:{type} 下，
+    与原 SCAN 模式的匹配范围保持一致（列表失效不会波及分离缓存）。
+
+    Example:
+        >>> get_cache_key_tags("courses:ChapterViewSet:course_pk=1:page=1:user_id=5")
+        ['courses:ChapterViewSet', 'courses:ChapterViewSet:user_id=5',
+         'courses:ChapterViewSet:course_pk=1', 'courses:ChapterViewSet:course_pk=1:user_id=5']
+    """
+    parts = key.split(":")
+    if len(parts) < 2 or parts[0] not in TAGGED_KEY_PREFIXES:
+        return []
+
+    view = ":".join(parts[:2])
+    rest = parts[2:]
+    scope = view
+    if rest and rest[0] == "SEPARATED":
+        scope_len = 2 if len(rest) > 1 and "=" not in rest[1] else 1
+        scope = ":".join([view] + rest[:scope_len])
+        rest = rest[scope_len:]
+
+    user_part = rest[-1] if rest and rest[-1].startswith("user_id=") else None
+    parents = [
+        part
+        for part in rest
+        if "=" in part and "&" not in part and part.split("=", 1)[0].endswith("_pk")
+    ]
+
+    scopes = [f"{scope}:{parent}" for parent in parents]
+    if len(parents) > 1:
+        scopes.append(f"{scope}:{':'.join(parents)}")
+
+    tags = [view]
+    if user_part:
+        tags.append(f"{view}:{user_part}")
+    for parent_scope in scopes:
+        tags.append(parent_scope)
+        if user_part:
+            tags.append(f"{parent_scope}:{user_part}")
+    return tags
+
+
+def register_cache_tags(key: str, tags: list, timeout: int) -> None:
+    """
+    将缓存键登记到标签集合（Redis ZSET，分数为缓存键的过期时间）
+
+    每次登记顺带删除已过期的成员，标签集合只保留仍存活的缓存键。
+    标签集合的 TTL 不短于缓存本身（settings.CACHE_TAG_TTL，默认 1 小时），
+    且只会延长不会缩短（EXPIRE NX + EXPIRE GT）。
+    """
+    if not tags:
+        return
+    try:
+        from django.conf import settings
+
+        now = time.time()
+        timeout = int(timeout or 0)
+        expires_at = now + timeout if timeout > 0 else float("inf")
+        tag_ttl = max(getattr(settings, "CACHE_TAG_TTL", 3600), timeout)
+        redis_conn = get_redis_connection("default")
+        pipe = redis_conn.pipeline(transaction=False)
+        for tag in tags:
+            tag_key = f"{CACHE_TAG_PREFIX}:{tag}"
+            pipe.zadd(tag_key, {key: expires_at}, gt=True)
+            pipe.zremrangebyscore(tag_key, "-inf", f"({now}")
+            pipe.expire(tag_key, tag_ttl, nx=True)
+            pipe.expire(tag_key, tag_ttl, gt=True)
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"Failed to register cache tags for {key}: {e}")
+
+
+def invalidate_cache_tags(*tags: str) -> int:
+    """
+    失效标签下登记的所有缓存键
+
+    只读取未过期的成员，开销与受影响的存活键数量成正比，与 Redis 键总数无关。
+    标签集合的读取与删除在同一个 MULTI 中完成，避免并发登记的键被遗漏。
+
+    Returns:
+        int: 删除的缓存键数量
+    """
+    if not tags:
+        return 0
+
+    redis_conn = get_redis_connection("default")
+    tag_keys = [f"{CACHE_TAG_PREFIX}:{tag}" for tag in tags]
+
+    now = time.time()
+    pipe = redis_conn.pipeline(transaction=True)
+    for tag_key in tag_keys:
+        pipe.zrangebyscore(tag_key, now, "+inf")
+    pipe.delete(*tag_keys)
+    results = pipe.execute()
+
+    keys = set()
+    for members in results[:-1]:
+        keys.update(
+            member.decode() if isinstance(member, bytes) else member
+            for member in members
+        )
+    keys = list(keys)
+    for start in range(0, len(keys), INVALIDATE_BATCH_SIZE):
+        cache.delete_many(keys[start : start + INVALIDATE_BATCH_SIZE])
+    return len(keys)
+
+
 class CacheInvalidator:
     """
     统一的缓存失效API
@@ -543,6 +1454,9 @@ class CacheInvalidator:
             user_id=user_id,
             parent_pks={"course_pk": course_id}
         )
+
+        # 失效 set_cache(tags=[...]) 登记的业务标签
+        CacheInvalidator.invalidate_tags("course:1")
     """
 
     @staticmethod
@@ -613,7 +1527,7 @@ class CacheInvalidator:
         user_id: Optional[int] = None,
     ) -> bool:
         """
-        失效ViewSet列表的缓存（使用通配符匹配）
+        失效ViewSet列表的缓存（按标签失效，开销只与受影响的键数量相关）
 
         何时传递 user_id：
             - 当 ViewSet 使用用户隔离缓存时（get_queryset 中过滤了 user）
@@ -644,38 +1558,52 @@ class CacheInvalidator:
                 user_id=user.id
             )
         """
-        # 构建模式以匹配所有可能的 query_params 组合
-        if parent_pks:
-            sorted_parent_pks = OrderedDict(sorted(parent_pks.items()))
-            parent_key_str = ":".join(
-                [f"{k}={v}" for k, v in sorted_parent_pks.items()]
-            )
-            if user_id:
-                # 模式: prefix:view_name:parent_pks*user_id=X
-                # 匹配: prefix:view_name:parent_pks:query_params:user_id=X
-                # 以及:  prefix:view_name:parent_pks:user_id=X (无 query_params)
-                pattern = f"{prefix}:{view_name}:{parent_key_str}*user_id={user_id}"
-            else:
-                # 模式: prefix:view_name:parent_pks:*
-                # 匹配所有 query_params 和 user_id 组合
-                pattern = f"{prefix}:{view_name}:{parent_key_str}:*"
-        else:
-            if user_id:
-                # 模式: prefix:view_name:*user_id=X
-                # 匹配: prefix:view_name:query_params:user_id=X
-                # 以及:  prefix:view_name:user_id=X (无 query_params)
-                pattern = f"{prefix}:{view_name}*user_id={user_id}"
-            else:
-                # 模式: prefix:view_name:*
-                # 匹配所有 query_params 和 user_id 组合
-                pattern = f"{prefix}:{view_name}:*"
+        # 失效范围对应的标签（由 set_cache 按缓存键自动登记）
+        tag = get_cache_tag(prefix, view_name, parent_pks=parent_pks, user_id=user_id)
 
         try:
-            delete_cache_pattern(pattern)
-            logger.debug(f"Invalidated viewset list cache: {pattern}")
+            invalidate_cache_tags(tag)
+            logger.debug(f"Invalidated viewset list cache: tag={tag}")
+            return True
+        except Exception as e:
+            logger.debug(f"Failed to invalidate viewset list cache tag={tag}: {e}")
+            return False
+
+    @staticmethod
+    def invalidate_namespace(*namespaces: str) -> bool:
+        """
+        按命名空间整体失效缓存（递增代际，单次 INCR，不枚举键）
+
+        适用于"某课程的全部缓存"、"某用户的全部缓存"这类语义失效。
+
+        Examples:
+            CacheInvalidator.invalidate_namespace(f"course:{course.id}")
+            CacheInvalidator.invalidate_namespace(f"user:{user.id}")
+        """
+        try:
+            bump_cache_generation(*namespaces)
+            logger.debug(f"Invalidated cache namespaces: {namespaces}")
+            return True
+        except Exception as e:
+            logger.debug(f"Failed to invalidate cache namespaces {namespaces}: {e}")
+            return False
+
+    @staticmethod
+    def invalidate_tags(*tags: str) -> bool:
+        """
+        按业务标签失效缓存
+
+        用于 set_cache(tags=[...]) 登记的自定义标签，如 "course:1"、"user:42:enrollments"。
+
+        Returns:
+            bool: 是否成功删除
+        """
+        try:
+            invalidate_cache_tags(*tags)
+            logger.debug(f"Invalidated cache tags: {tags}")
             return True
         except Exception as e:
-            logger.debug(f"Failed to invalidate viewset list cache {pattern}: {e}")
+            logger.debug(f"Failed to invalidate cache tags {tags}: {e}")
             return False
 
     @staticmethod
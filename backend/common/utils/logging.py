@@ -1,10 +1,16 @@
 """日志工具类"""
 
+import os
+import copy
+import queue
+import atexit
+import threading
 import logging
+import logging.handlers
 import uuid
 import time
 import json as json_module
-from typing import Dict, Any, Optional, Union, Any as TypingAny
+from typing import Dict, Any, Iterable, List, Optional, Union, Any as TypingAny
 import pythonjsonlogger.jsonlogger as jsonlogger
 from ..exceptions import BaseAPIException
 
@@ -122,15 +128,21 @@ class RequestLogger:
         status_code: int,
         duration_ms: float,
         response_size: Optional[int] = None,
-        error: Optional[str] = None
+        error: Optional[str] = None,
+        method: Optional[str] = None,
+        path: Optional[str] = None,
+        sampled: bool = True
     ):
-        """记录响应信息"""
+        """记录响应信息（未采样的请求带上 method/path，便于单独定位）"""
         self.logger.info("HTTP response sent", extra={
             'event': 'response_sent',
             'status_code': status_code,
             'duration_ms': duration_ms,
             'response_size': response_size,
             'error': error,
+            'method': method,
+            'path': path,
+            'sampled': sampled,
             'request_id': self.request_id
         })
 
@@ -361,61 +373,192 @@ def setup_json_formatter(date_format: str = '%Y-%m-%d %H:%M:%S') -> TypingAny:
     )
 
 
+# ============ 异步日志（QueueHandler / QueueListener） ============
+
+
+class RoutingQueueHandler(logging.handlers.QueueHandler):
+    """把日志记录放入队列，并标记原 logger 以便监听线程路由到对应的 handlers"""
+
+    def __init__(self, log_queue, target: str):
+        super().__init__(log_queue)
+        self.target = target
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 不调用 QueueHandler.prepare：它会提前格式化 msg 并清空 exc_info，
+        # 监听线程里的 JSON 格式化器就拿不到结构化的异常信息。
+        # 队列只在进程内使用，原样复制记录即可
+        record = copy.copy(record)
+        record.queue_target = self.target
+        return record
+
+
+class RoutingQueueListener(logging.handlers.QueueListener):
+    """单个后台线程消费日志队列，按 queue_target 分发给原 logger 的 handlers"""
+
+    def __init__(self, log_queue, routes: Dict[str, List[logging.Handler]]):
+        super().__init__(log_queue)
+        self.routes = routes
+
+    def handle(self, record: logging.LogRecord):
+        record = self.prepare(record)
+        for handler in self.routes.get(getattr(record, 'queue_target', None), ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+_queue_listener: Optional[RoutingQueueListener] = None
+_queue_handlers: List[RoutingQueueHandler] = []
+
+
+def enable_queue_logging(logger_names: Iterable[str]) -> Optional[RoutingQueueListener]:
+    """
+    把指定 logger 的 handlers 移到后台线程执行
+
+    请求线程只负责把 LogRecord 放入内存队列，格式化（JSON 序列化）和文件写入
+    都在 QueueListener 线程中完成。多次调用只生效一次；fork 出的子进程
+    （Celery prefork worker）会重新创建队列和监听线程。
+
+    Args:
+        logger_names: 需要异步化的 logger 名称
+
+    Returns:
+        监听器实例（没有可异步化的 handler 时返回 None）
+    """
+    global _queue_listener
+    if _queue_listener is not None:
+        return _queue_listener
+
+    log_queue = queue.SimpleQueue()
+    routes = {}
+    for name in logger_names:
+        target_logger = logging.getLogger(name)
+        handlers = [h for h in target_logger.handlers if not isinstance(h, RoutingQueueHandler)]
+        if not handlers:
+            continue
+        routes[name] = handlers
+        for handler in handlers:
+            target_logger.removeHandler(handler)
+        queue_handler = RoutingQueueHandler(log_queue, name)
+        target_logger.addHandler(queue_handler)
+        _queue_handlers.append(queue_handler)
+
+    if not routes:
+        return None
+
+    _queue_listener = RoutingQueueListener(log_queue, routes)
+    _queue_listener.start()
+    atexit.register(_stop_queue_listener)
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_restart_queue_listener_in_child)
+    return _queue_listener
+
+
+def _stop_queue_listener():
+    """进程退出前把队列中剩余的日志写完"""
+    if _queue_listener is not None and _queue_listener._thread is not None:
+        _queue_listener.stop()
+
+
+def _restart_queue_listener_in_child():
+    """fork 后监听线程不会被继承，在子进程中用新队列重新启动"""
+    if _queue_listener is None:
+        return
+    log_queue = queue.SimpleQueue()
+    for queue_handler in _queue_handlers:
+        queue_handler.queue = log_queue
+    _queue_listener.queue = log_queue
+    _queue_listener._thread = None
+    _queue_listener.start()
+
+
+def configure_logging(logging_settings: Dict[str, Any]):
+    """
+    LOGGING_CONFIG 入口：先按 dictConfig 配置，再按 settings 启用异步日志
+
+    settings.LOGGING_QUEUE_ENABLED 为 True 时，LOGGING_QUEUE_LOGGERS 中的 logger
+    改为经由队列写出（见 enable_queue_logging）。
+    """
+    import logging.config
+    from django.conf import settings
+
+    logging.config.dictConfig(logging_settings)
+
+    if getattr(settings, 'LOGGING_QUEUE_ENABLED', False):
+        enable_queue_logging(getattr(settings, 'LOGGING_QUEUE_LOGGERS', []))
+
+
 class CachePerformanceLogger:
     """
     Cache performance statistics collector and logger.
 
-    This class collects cache performance metrics using Redis and provides:
+    This class collects cache performance metrics and provides:
     - Real-time statistics per endpoint (hits, misses, null_values, duration, slow_operations)
     - Periodic performance summary logs (every 60 seconds)
     - Performance anomaly detection and alerts (low hit rate, high penetration rate, slow operations)
     - Alert suppression to prevent alert fatigue (5-minute window)
     - Cross-process data sharing (Django and Celery processes can access the same stats)
 
-    Statistics are stored in Redis Hash and aggregated per endpoint.
+    Recording never talks to Redis: operations are counted in a per-process
+    buffer, and the buffer is merged into Redis with a single pipeline at most
+    every CACHE_STATS_FLUSH_INTERVAL seconds (and whenever a window closes).
+    Counters are bucketed into fixed windows of CACHE_STATS_WINDOW_SECONDS, so
+    the summary reads the last closed window instead of scanning keys.
 
     Storage:
-        Redis Keys: cache:perf:stats:{endpoint}
-        Fields: hits, misses, null_values, total_duration_ms, slow_operations
+        Redis Keys: cache:perf:stats:{window}:{endpoint}
+        Fields: hits, misses, null_values, total_duration_ms, slow_operations, total_operations
         TTL: 300 seconds (auto-cleanup)
 
+        Window index: cache:perf:stats:{window}
+        Members: endpoint names recorded in the window
+
         Alert suppression: cache:perf:alerts:{endpoint}
         Fields: {alert_type}: timestamp
         TTL: 300 seconds
 
     Public Methods:
         record_cache_operation(endpoint, operation_type, duration_ms, is_slow):
-            Record a single cache operation and update statistics.
+            Count a single cache operation in the process buffer.
+
+        record_total_operations(endpoint, count=1):
+            Count operations for the total_operations denominator.
 
-        get_endpoint_stats(endpoint) -> Dict[str, Any]:
+        flush(force=False):
+            Merge the process buffer into Redis.
+
+        get_endpoint_stats(endpoint, window=None) -> Dict[str, Any]:
             Get statistics for a single endpoint.
 
-        get_all_endpoint_stats() -> Dict[str, Dict[str, Any]]:
+        get_all_endpoint_stats(window=None) -> Dict[str, Dict[str, Any]]:
             Get statistics for all endpoints.
 
-        get_global_stats() -> Dict[str, Any]:
+        get_global_stats(window=None, endpoint_stats=None) -> Dict[str, Any]:
             Get aggregated global statistics across all endpoints.
 
         reset_stats():
-            Reset all statistics to zero (delete all Redis keys).
+            Drop buffered counters and the recent windows.
 
-        check_low_hit_rate(endpoint, threshold=0.8) -> Optional[Dict[str, Any]]:
+        check_low_hit_rate(endpoint, threshold=0.8, stats=None) -> Optional[Dict[str, Any]]:
             Check if endpoint has low hit rate below threshold.
 
-        check_high_penetration_rate(endpoint, threshold=0.1) -> Optional[Dict[str, Any]]:
+        check_high_penetration_rate(endpoint, threshold=0.1, stats=None) -> Optional[Dict[str, Any]]:
             Check if endpoint has high penetration rate above threshold.
 
-        check_slow_operations(endpoint, threshold_ms=100.0) -> Optional[Dict[str, Any]]:
+        check_slow_operations(endpoint, threshold_ms=100.0, stats=None) -> Optional[Dict[str, Any]]:
             Check if endpoint has high slow operation rate.
 
         log_performance_summary():
             Log periodic performance summary with all statistics and alerts.
 
+    Reads default to the last closed window; pass window=current_window() to
+    read the window that is still being filled.
+
     Example:
         >>> logger = CachePerformanceLogger()
         >>> logger.record_cache_operation('CourseViewSet', 'hit', duration_ms=2.5)
         >>> logger.record_cache_operation('CourseViewSet', 'miss', duration_ms=50.0)
-        >>> stats = logger.get_endpoint_stats('CourseViewSet')
+        >>> logger.flush(force=True)
+        >>> stats = logger.get_endpoint_stats('CourseViewSet', window=logger.current_window())
         >>> print(stats['hit_rate'])  # 0.5
 
     Configuration:
@@ -431,8 +574,16 @@ class CachePerformanceLogger:
         CACHE_STATS_KEY_PREFIX = "cache:perf:stats"
         CACHE_ALERTS_KEY_PREFIX = "cache:perf:alerts"
         CACHE_STATS_TTL = 300  # seconds
+        CACHE_STATS_WINDOW_SECONDS = 60
+        CACHE_STATS_FLUSH_INTERVAL = 5  # seconds
     """
 
+    _OPERATION_FIELDS = {
+        'hit': 'hits',
+        'miss': 'misses',
+        'null_value': 'null_values',
+    }
+
     def __init__(self):
         self._logger = logging.getLogger('teaching_platform.cache')
         # Get configuration from settings
@@ -440,6 +591,40 @@ class CachePerformanceLogger:
         self._stats_key_prefix = getattr(settings, 'CACHE_STATS_KEY_PREFIX', 'cache:perf:stats')
         self._alerts_key_prefix = getattr(settings, 'CACHE_ALERTS_KEY_PREFIX', 'cache:perf:alerts')
         self._stats_ttl = getattr(settings, 'CACHE_STATS_TTL', 300)  # 5 minutes default
+        self._window_seconds = getattr(settings, 'CACHE_STATS_WINDOW_SECONDS', 60)
+        self._flush_interval = getattr(settings, 'CACHE_STATS_FLUSH_INTERVAL', 5)
+
+        self._lock = threading.Lock()
+        # {(window, endpoint): {field: value}}
+        self._pending: Dict[tuple, Dict[str, float]] = {}
+        self._pending_window = self.current_window()
+        self._last_flush = time.monotonic()
+
+    # ---- keys / windows ----
+
+    def current_window(self) -> int:
+        """Id of the window that is currently being filled"""
+        return int(time.time() // self._window_seconds)
+
+    def _stats_key(self, window: int, endpoint: str) -> str:
+        return f"{self._stats_key_prefix}:{window}:{endpoint}"
+
+    def _index_key(self, window: int) -> str:
+        return f"{self._stats_key_prefix}:{window}"
+
+    # ---- recording (process-local) ----
+
+    def _add(self, endpoint: str, fields: Dict[str, float]):
+        window = self.current_window()
+        with self._lock:
+            counters = self._pending.setdefault((window, endpoint), {})
+            for field, value in fields.items():
+                counters[field] = counters.get(field, 0) + value
+            window_closed = window != self._pending_window
+            self._pending_window = window
+            due = time.monotonic() - self._last_flush >= self._flush_interval
+        if window_closed or due:
+            self.flush(force=True)
 
     def record_cache_operation(
         self,
@@ -449,7 +634,7 @@ class CachePerformanceLogger:
         is_slow: bool = False
     ):
         """
-        Record a cache operation and update statistics in Redis.
+        Record a cache operation in the process buffer.
 
         Args:
             endpoint: The endpoint/view name
@@ -458,248 +643,270 @@ class CachePerformanceLogger:
             is_slow: Whether this operation exceeded the slow threshold
         """
         try:
-            from django_redis import get_redis_connection
-            redis_conn = get_redis_connection("default")
-
-            # Use a pipeline for atomic operations
-            pipe = redis_conn.pipeline(transaction=True)
+            fields = {}
+            field = self._OPERATION_FIELDS.get(operation_type)
+            if field:
+                fields[field] = 1
+            if duration_ms is not None:
+                fields['total_duration_ms'] = duration_ms
+            if is_slow:
+                fields['slow_operations'] = 1
+            if fields:
+                self._add(endpoint, fields)
+        except Exception as e:
+            # Don't let stats recording errors affect cache operations
+            self._logger.debug(f"Failed to record cache stats: {e}")
 
-            # Redis key for this endpoint
-            key = f"{self._stats_key_prefix}:{endpoint}"
+    def record_total_operations(self, endpoint: str, count: int = 1):
+        """
+        Record cache operations for the total_operations denominator.
 
-            # Increment counters
-            if operation_type == 'hit':
-                pipe.hincrby(key, 'hits', 1)
-            elif operation_type == 'miss':
-                pipe.hincrby(key, 'misses', 1)
-            elif operation_type == 'null_value':
-                pipe.hincrby(key, 'null_values', 1)
+        Args:
+            endpoint: The endpoint/view name
+            count: Number of operations
+        """
+        try:
+            self._add(endpoint, {'total_operations': count})
+        except Exception as e:
+            self._logger.debug(f"Failed to record total operations: {e}")
 
-            # Add duration if provided
-            if duration_ms is not None:
-                pipe.hincrbyfloat(key, 'total_duration_ms', duration_ms)
+    def flush(self, force: bool = False):
+        """
+        Merge the buffered counters into Redis with one pipeline.
 
-            # Increment slow operations counter
-            if is_slow:
-                pipe.hincrby(key, 'slow_operations', 1)
+        Args:
+            force: Flush even if CACHE_STATS_FLUSH_INTERVAL has not elapsed
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._last_flush < self._flush_interval:
+                return
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
 
-            # Set TTL to auto-cleanup
-            pipe.expire(key, self._stats_ttl)
+        try:
+            from django_redis import get_redis_connection
+            redis_conn = get_redis_connection("default")
 
-            # Execute all commands atomically
+            pipe = redis_conn.pipeline(transaction=False)
+            for (window, endpoint), counters in pending.items():
+                key = self._stats_key(window, endpoint)
+                for field, value in counters.items():
+                    if field == 'total_duration_ms':
+                        pipe.hincrbyfloat(key, field, value)
+                    else:
+                        pipe.hincrby(key, field, int(value))
+                pipe.expire(key, self._stats_ttl)
+                pipe.sadd(self._index_key(window), endpoint)
+                pipe.expire(self._index_key(window), self._stats_ttl)
             pipe.execute()
-
         except Exception as e:
-            # Don't let stats recording errors affect cache operations
-            self._logger.debug(f"Failed to record cache stats: {e}")
+            # Counters of this flush are dropped rather than retried
+            self._logger.debug(f"Failed to flush cache stats: {e}")
+
+    def _reset_after_fork(self):
+        """Counters buffered by the parent belong to the parent"""
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_flush = time.monotonic()
+
+    # ---- reading (per window) ----
+
+    def _read_window(self, window: int, endpoints: Optional[List[str]] = None) -> Dict[str, Dict[bytes, Any]]:
+        """Raw counters of a window: {endpoint: hgetall result}"""
+        from django_redis import get_redis_connection
+        redis_conn = get_redis_connection("default")
+
+        if endpoints is None:
+            endpoints = sorted(
+                member.decode() if isinstance(member, bytes) else member
+                for member in redis_conn.smembers(self._index_key(window))
+            )
+        if not endpoints:
+            return {}
+
+        pipe = redis_conn.pipeline(transaction=False)
+        for endpoint in endpoints:
+            pipe.hgetall(self._stats_key(window, endpoint))
+        return dict(zip(endpoints, pipe.execute()))
+
+    def _empty_endpoint_stats(self, endpoint: str) -> Dict[str, Any]:
+        return {
+            'endpoint': endpoint,
+            'hits': 0,
+            'misses': 0,
+            'null_values': 0,
+            'total_requests': 0,
+            'total_operations': 0,
+            'hit_rate': None,
+            'miss_rate': None,
+            'penetration_rate': None,
+            'avg_duration_ms': None,
+            'slow_operations': 0,
+            'slow_operation_rate': None,
+        }
 
-    def get_endpoint_stats(self, endpoint: str) -> Dict[str, Any]:
+    def _build_endpoint_stats(self, endpoint: str, stats: Dict[bytes, Any]) -> Dict[str, Any]:
+        if not stats:
+            # No stats for this endpoint yet
+            return self._empty_endpoint_stats(endpoint)
+
+        # Redis returns bytes, convert to int/float
+        hits = int(stats.get(b'hits', 0))
+        misses = int(stats.get(b'misses', 0))
+        null_values = int(stats.get(b'null_values', 0))
+        total_duration_ms = float(stats.get(b'total_duration_ms', 0))
+        slow_operations = int(stats.get(b'slow_operations', 0))
+        total_operations = int(stats.get(b'total_operations', 0))
+
+        # Use total_operations if available, otherwise fall back to old calculation
+        # This provides backward compatibility with existing data
+        if total_operations > 0:
+            total_requests = total_operations
+        else:
+            total_requests = hits + misses + null_values
+
+        return {
+            'endpoint': endpoint,
+            'hits': hits,
+            'misses': misses,
+            'null_values': null_values,
+            'total_requests': total_requests,
+            'total_operations': total_operations,
+            'hit_rate': self._calculate_hit_rate(hits, total_requests),
+            'miss_rate': self._calculate_miss_rate(hits, total_requests),
+            'penetration_rate': self._calculate_penetration_rate(
+                null_values, total_requests
+            ),
+            'avg_duration_ms': self._calculate_avg_duration(
+                total_duration_ms, total_requests
+            ),
+            'slow_operations': slow_operations,
+            'slow_operation_rate': self._calculate_slow_rate(
+                slow_operations, total_requests
+            ),
+            # Raw sum, used to aggregate global stats
+            'total_duration_ms': total_duration_ms,
+        }
+
+    def get_endpoint_stats(self, endpoint: str, window: Optional[int] = None) -> Dict[str, Any]:
         """
         Get statistics for a single endpoint from Redis.
 
         Args:
             endpoint: The endpoint name
+            window: Window id (default: the last closed window)
 
         Returns:
             Dictionary with hits, misses, null_values, hit_rate, avg_duration_ms, etc.
         """
+        if window is None:
+            window = self.current_window() - 1
         try:
-            from django_redis import get_redis_connection
-            redis_conn = get_redis_connection("default")
-
-            key = f"{self._stats_key_prefix}:{endpoint}"
-            stats = redis_conn.hgetall(key)
-
-            if not stats:
-                # No stats for this endpoint yet
-                return {
-                    'endpoint': endpoint,
-                    'hits': 0,
-                    'misses': 0,
-                    'null_values': 0,
-                    'total_requests': 0,
-                    'total_operations': 0,
-                    'hit_rate': None,
-                    'miss_rate': None,
-                    'penetration_rate': None,
-                    'avg_duration_ms': None,
-                    'slow_operations': 0,
-                    'slow_operation_rate': None,
-                }
-
-            # Redis returns bytes, convert to int/float
-            hits = int(stats.get(b'hits', 0))
-            misses = int(stats.get(b'misses', 0))
-            null_values = int(stats.get(b'null_values', 0))
-            total_duration_ms = float(stats.get(b'total_duration_ms', 0))
-            slow_operations = int(stats.get(b'slow_operations', 0))
-            total_operations = int(stats.get(b'total_operations', 0))
-
-            # Use total_operations if available, otherwise fall back to old calculation
-            # This provides backward compatibility with existing data
-            if total_operations > 0:
-                total_requests = total_operations
-            else:
-                total_requests = hits + misses + null_values
-
-            return {
-                'endpoint': endpoint,
-                'hits': hits,
-                'misses': misses,
-                'null_values': null_values,
-                'total_requests': total_requests,
-                'total_operations': total_operations,  # NEW: expose total_operations
-                'hit_rate': self._calculate_hit_rate(hits, total_requests),
-                'miss_rate': self._calculate_miss_rate(hits, total_requests),
-                'penetration_rate': self._calculate_penetration_rate(
-                    null_values, total_requests
-                ),
-                'avg_duration_ms': self._calculate_avg_duration(
-                    total_duration_ms, total_requests
-                ),
-                'slow_operations': slow_operations,
-                'slow_operation_rate': self._calculate_slow_rate(
-                    slow_operations, total_requests
-                )
-            }
+            raw = self._read_window(window, [endpoint])
+            return self._build_endpoint_stats(endpoint, raw.get(endpoint))
         except Exception as e:
             self._logger.debug(f"Failed to get endpoint stats: {e}")
-            return {
-                'endpoint': endpoint,
-                'hits': 0,
-                'misses': 0,
-                'null_values': 0,
-                'total_requests': 0,
-                'total_operations': 0,
-                'hit_rate': None,
-                'miss_rate': None,
-                'penetration_rate': None,
-                'avg_duration_ms': None,
-                'slow_operations': 0,
-                'slow_operation_rate': None,
-            }
+            return self._empty_endpoint_stats(endpoint)
 
-    def get_all_endpoint_stats(self) -> Dict[str, Dict[str, Any]]:
+    def get_all_endpoint_stats(self, window: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
         """
-        Get statistics for all endpoints from Redis.
+        Get statistics for all endpoints of a window from Redis.
+
+        Endpoints come from the window index, and all hashes are read in one
+        pipeline (no key scan).
+
+        Args:
+            window: Window id (default: the last closed window)
 
         Returns:
             Dictionary mapping endpoint names to their statistics
         """
+        if window is None:
+            window = self.current_window() - 1
         try:
-            from django_redis import get_redis_connection
-            redis_conn = get_redis_connection("default")
-
-            # Scan for all keys matching the pattern
-            pattern = f"{self._stats_key_prefix}:*"
             all_stats = {}
-
-            for key in redis_conn.scan_iter(match=pattern, count=100):
-                # Extract endpoint name from key
-                key_str = key.decode() if isinstance(key, bytes) else key
-                endpoint = key_str.split(':')[-1]
-
-                # Get stats for this endpoint
-                stats = self.get_endpoint_stats(endpoint)
+            for endpoint, raw in self._read_window(window).items():
+                stats = self._build_endpoint_stats(endpoint, raw)
                 if stats.get('total_requests', 0) > 0:
                     all_stats[endpoint] = stats
-
             return all_stats
         except Exception as e:
             self._logger.debug(f"Failed to get all endpoint stats: {e}")
             return {}
 
-    def get_global_stats(self) -> Dict[str, Any]:
+    def get_global_stats(
+        self,
+        window: Optional[int] = None,
+        endpoint_stats: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
         """
-        Get aggregated statistics across all endpoints from Redis.
+        Get aggregated statistics across all endpoints.
+
+        Args:
+            window: Window id (default: the last closed window)
+            endpoint_stats: Already loaded get_all_endpoint_stats() result
 
         Returns:
             Dictionary with global hit_rate, avg_duration_ms, total_requests, etc.
         """
-        try:
-            from django_redis import get_redis_connection
-            redis_conn = get_redis_connection("default")
-
-            # Scan for all keys matching the pattern
-            pattern = f"{self._stats_key_prefix}:*"
-            total_hits = 0
-            total_misses = 0
-            total_null_values = 0
-            total_duration_ms = 0.0
-            total_slow_operations = 0
-            endpoint_count = 0
-
-            total_operations = 0
-            for key in redis_conn.scan_iter(match=pattern, count=100):
-                stats = redis_conn.hgetall(key)
-                if stats:
-                    total_hits += int(stats.get(b'hits', 0))
-                    total_misses += int(stats.get(b'misses', 0))
-                    total_null_values += int(stats.get(b'null_values', 0))
-                    total_duration_ms += float(stats.get(b'total_duration_ms', 0))
-                    total_slow_operations += int(stats.get(b'slow_operations', 0))
-                    total_operations += int(stats.get(b'total_operations', 0))
-                    endpoint_count += 1
-
-            # Use total_operations if available, otherwise fall back to old calculation
-            # This provides backward compatibility with existing data
-            if total_operations > 0:
-                total_requests = total_operations
-            else:
-                total_requests = total_hits + total_misses + total_null_values
-
-            return {
-                'total_requests': total_requests,
-                'total_hits': total_hits,
-                'total_misses': total_misses,
-                'total_null_values': total_null_values,
-                'total_operations': total_operations,  # NEW: expose total_operations
-                'hit_rate': self._calculate_hit_rate(total_hits, total_requests),
-                'miss_rate': self._calculate_miss_rate(total_hits, total_requests),
-                'penetration_rate': self._calculate_penetration_rate(total_null_values, total_requests),
-                'avg_duration_ms': self._calculate_avg_duration(total_duration_ms, total_requests),
-                'total_slow_operations': total_slow_operations,
-                'slow_operation_rate': self._calculate_slow_rate(total_slow_operations, total_requests),
-                'endpoint_count': endpoint_count
-            }
-        except Exception as e:
-            self._logger.debug(f"Failed to get global stats: {e}")
-            return {
-                'total_requests': 0,
-                'total_hits': 0,
-                'total_misses': 0,
-                'total_null_values': 0,
-                'total_operations': 0,
-                'hit_rate': None,
-                'miss_rate': None,
-                'penetration_rate': None,
-                'avg_duration_ms': None,
-                'total_slow_operations': 0,
-                'slow_operation_rate': None,
-                'endpoint_count': 0
-            }
+        if endpoint_stats is None:
+            endpoint_stats = self.get_all_endpoint_stats(window)
+
+        total_hits = 0
+        total_misses = 0
+        total_null_values = 0
+        total_duration_ms = 0.0
+        total_slow_operations = 0
+        total_operations = 0
+        for stats in endpoint_stats.values():
+            total_hits += stats['hits']
+            total_misses += stats['misses']
+            total_null_values += stats['null_values']
+            total_duration_ms += stats.get('total_duration_ms', 0.0)
+            total_slow_operations += stats['slow_operations']
+            total_operations += stats['total_operations']
+
+        # Use total_operations if available, otherwise fall back to old calculation
+        # This provides backward compatibility with existing data
+        if total_operations > 0:
+            total_requests = total_operations
+        else:
+            total_requests = total_hits + total_misses + total_null_values
+
+        return {
+            'total_requests': total_requests,
+            'total_hits': total_hits,
+            'total_misses': total_misses,
+            'total_null_values': total_null_values,
+            'total_operations': total_operations,
+            'hit_rate': self._calculate_hit_rate(total_hits, total_requests),
+            'miss_rate': self._calculate_miss_rate(total_hits, total_requests),
+            'penetration_rate': self._calculate_penetration_rate(total_null_values, total_requests),
+            'avg_duration_ms': self._calculate_avg_duration(total_duration_ms, total_requests),
+            'total_slow_operations': total_slow_operations,
+            'slow_operation_rate': self._calculate_slow_rate(total_slow_operations, total_requests),
+            'endpoint_count': len(endpoint_stats)
+        }
 
     def reset_stats(self):
-        """Reset all statistics by deleting all Redis keys."""
+        """Drop the process buffer and the current and last closed windows."""
+        with self._lock:
+            self._pending = {}
         try:
             from django_redis import get_redis_connection
             redis_conn = get_redis_connection("default")
 
-            # Scan for all keys matching the pattern and delete them
-            pattern = f"{self._stats_key_prefix}:*"
+            current = self.current_window()
             keys_to_delete = []
-
-            for key in redis_conn.scan_iter(match=pattern, count=100):
-                keys_to_delete.append(key)
-
-                # Delete in batches to avoid blocking
-                if len(keys_to_delete) >= 100:
-                    redis_conn.delete(*keys_to_delete)
-                    keys_to_delete = []
-
-            # Delete remaining keys
-            if keys_to_delete:
-                redis_conn.delete(*keys_to_delete)
+            for window in (current - 1, current):
+                index_key = self._index_key(window)
+                for member in redis_conn.smembers(index_key):
+                    endpoint = member.decode() if isinstance(member, bytes) else member
+                    keys_to_delete.append(self._stats_key(window, endpoint))
+                keys_to_delete.append(index_key)
+            redis_conn.delete(*keys_to_delete)
 
         except Exception as e:
             self._logger.debug(f"Failed to reset stats: {e}")
@@ -734,18 +941,22 @@ class CachePerformanceLogger:
             return None
         return slow_operations / total_requests
 
-    def check_low_hit_rate(self, endpoint: str, threshold: float = 0.8) -> Optional[Dict[str, Any]]:
+    def check_low_hit_rate(
+        self, endpoint: str, threshold: float = 0.8, stats: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Check if endpoint has low hit rate.
 
         Args:
             endpoint: The endpoint name
             threshold: Hit rate threshold (default 0.8)
+            stats: Precomputed endpoint stats (default: read the last closed window)
 
         Returns:
             Alert dict if hit rate is below threshold, None otherwise
         """
-        stats = self.get_endpoint_stats(endpoint)
+        if stats is None:
+            stats = self.get_endpoint_stats(endpoint)
         if not stats or stats['hit_rate'] is None:
             return None
 
@@ -759,18 +970,22 @@ class CachePerformanceLogger:
             }
         return None
 
-    def check_high_penetration_rate(self, endpoint: str, threshold: float = 0.1) -> Optional[Dict[str, Any]]:
+    def check_high_penetration_rate(
+        self, endpoint: str, threshold: float = 0.1, stats: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Check if endpoint has high penetration rate.
 
         Args:
             endpoint: The endpoint name
             threshold: Penetration rate threshold (default 0.1)
+            stats: Precomputed endpoint stats (default: read the last closed window)
 
         Returns:
             Alert dict if penetration rate is above threshold, None otherwise
         """
-        stats = self.get_endpoint_stats(endpoint)
+        if stats is None:
+            stats = self.get_endpoint_stats(endpoint)
         if not stats or stats['penetration_rate'] is None:
             return None
 
@@ -801,18 +1016,22 @@ class CachePerformanceLogger:
         # For now, return None as we don't have error tracking yet
         return None
 
-    def check_slow_operations(self, endpoint: str, threshold_ms: float = 100.0) -> Optional[Dict[str, Any]]:
+    def check_slow_operations(
+        self, endpoint: str, threshold_ms: float = 100.0, stats: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Check if endpoint has high slow operation rate.
 
         Args:
             endpoint: The endpoint name
             threshold_ms: Slow operation threshold in ms (default 100ms)
+            stats: Precomputed endpoint stats (default: read the last closed window)
 
         Returns:
             Alert dict if slow operation rate is high, None otherwise
         """
-        stats = self.get_endpoint_stats(endpoint)
+        if stats is None:
+            stats = self.get_endpoint_stats(endpoint)
         if not stats or stats['slow_operation_rate'] is None:
             return None
 
@@ -872,6 +1091,9 @@ class CachePerformanceLogger:
         """
         Log periodic performance summary with alerts.
 
+        Reads the last closed window once (index + one pipelined read) and
+        evaluates the alert checks on those stats.
+
         Generates a structured JSON log entry containing:
         - Global statistics
         - Per-endpoint statistics
@@ -890,9 +1112,11 @@ class CachePerformanceLogger:
                 'high_error_rate': 0.05
             })
 
-            # Get all statistics
-            global_stats = self.get_global_stats()
-            all_endpoints = self.get_all_endpoint_stats()
+            # Flush this process's buffer, then read the last closed window
+            self.flush(force=True)
+            window = self.current_window() - 1
+            all_endpoints = self.get_all_endpoint_stats(window)
+            global_stats = self.get_global_stats(window, endpoint_stats=all_endpoints)
 
             # Get top 5 slowest endpoints
             sorted_by_duration = sorted(
@@ -909,19 +1133,21 @@ class CachePerformanceLogger:
 
             # Collect alerts
             alerts = []
-            for endpoint in all_endpoints.keys():
+            for endpoint, stats in all_endpoints.items():
                 # Check low hit rate
-                alert = self.check_low_hit_rate(endpoint, thresholds['low_hit_rate'])
+                alert = self.check_low_hit_rate(endpoint, thresholds['low_hit_rate'], stats)
                 if alert and not self._should_suppress_alert(endpoint, 'low_hit_rate'):
                     alerts.append(alert)
 
                 # Check high penetration rate
-                alert = self.check_high_penetration_rate(endpoint, thresholds['high_penetration_rate'])
+                alert = self.check_high_penetration_rate(
+                    endpoint, thresholds['high_penetration_rate'], stats
+                )
                 if alert and not self._should_suppress_alert(endpoint, 'high_penetration_rate'):
                     alerts.append(alert)
 
                 # Check slow operations
-                alert = self.check_slow_operations(endpoint, thresholds['slow_operation_ms'])
+                alert = self.check_slow_operations(endpoint, thresholds['slow_operation_ms'], stats)
                 if alert and not self._should_suppress_alert(endpoint, 'high_slow_operation_rate'):
                     alerts.append(alert)
 
@@ -930,7 +1156,8 @@ class CachePerformanceLogger:
                 "Cache performance summary",
                 extra={
                     'event': 'cache_performance_summary',
-                    'period': '60s',
+                    'period': f'{self._window_seconds}s',
+                    'window': window,
                     'global': global_stats,
                     'endpoints': all_endpoints,
                     'top_slow_endpoints': sorted_by_duration,
@@ -954,4 +1181,9 @@ class CachePerformanceLogger:
 
 
 # Global instance for cache performance logging
-_cache_performance_logger = CachePerformanceLogger()
\ No newline at end of file
+_cache_performance_logger = CachePerformanceLogger()
+
+# Merge what is left in the buffer on exit; forked children start empty
+atexit.register(_cache_performance_logger.flush, True)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_cache_performance_logger._reset_after_fork)
\ No newline at end of file
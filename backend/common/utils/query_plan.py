@@ -0,0 +1,196 @@
+"""查询计划（EXPLAIN）工具
+
+用于热点查询的执行计划回归检查（PostgreSQL）：
+- capture_queries: 捕获一段代码执行的 SELECT（SQL + 参数），包括 prefetch 查询
+- explain: EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) 获取执行计划
+- seq_scans_disabled: 会话内关闭 enable_seqscan；此时计划中仍出现的
+  Seq Scan 说明没有可用的索引，与数据量无关，适合在小数据集的测试中断言
+- summarize_plan / compare_plan_reports: 汇总计划的代价、耗时、缓冲区，
+  并与上一次结果对比代价变化
+"""
+
+import json
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+
+# 默认视为“大表”的模型（settings.QUERY_PLAN_LARGE_TABLES 可覆盖）
+DEFAULT_LARGE_TABLE_MODELS = (
+    "accounts.User",
+    "courses.Chapter",
+    "courses.ChapterProgress",
+    "courses.ChapterUnlockCondition",
+    "courses.CourseUnlockSnapshot",
+    "courses.Enrollment",
+    "courses.ExamAnswer",
+    "courses.ExamSubmission",
+    "courses.Problem",
+    "courses.ProblemProgress",
+    "courses.Submission",
+    "file_management.FileEntry",
+    "file_management.Folder",
+)
+
+
+def get_large_tables() -> set:
+    """返回大表的表名集合（包括这些模型的多对多中间表）"""
+    tables = set()
+    for label in getattr(settings, "QUERY_PLAN_LARGE_TABLES", DEFAULT_LARGE_TABLE_MODELS):
+        model = apps.get_model(label)
+        tables.add(model._meta.db_table)
+        for field in model._meta.local_many_to_many:
+            tables.add(field.remote_field.through._meta.db_table)
+    return tables
+
+
+class _SelectCollector:
+    """execute_wrapper 回调：记录执行过的 SELECT 语句"""
+
+    def __init__(self):
+        self.queries: List[Tuple[str, Any]] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith("SELECT"):
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def capture_queries(func: Callable[[], Any], using: str = "default") -> List[Tuple[str, Any]]:
+    """执行 func，返回其间执行的 SELECT 语句列表 [(sql, params)]"""
+    collector = _SelectCollector()
+    with connections[using].execute_wrapper(collector):
+        func()
+    return collector.queries
+
+
+def explain(sql: str, params: Any = None, analyze: bool = True, buffers: bool = True,
+            using: str = "default") -> Dict[str, Any]:
+    """
+    获取一条 SELECT 的 JSON 执行计划（PostgreSQL）
+
+    Returns:
+        EXPLAIN FORMAT JSON 结果中的顶层对象（包含 "Plan"，ANALYZE 时还有
+        "Planning Time" / "Execution Time"）
+    """
+    options = ["FORMAT JSON"]
+    if analyze:
+        options.insert(0, "ANALYZE")
+        if buffers:
+            options.insert(1, "BUFFERS")
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"EXPLAIN ({', '.join(options)}) {sql}", params)
+        result = cursor.fetchone()[0]
+    # psycopg 会把 json 列解码为 list；其他驱动可能返回字符串
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]
+
+
+@contextmanager
+def seq_scans_disabled(using: str = "default") -> Iterator[None]:
+    """会话内关闭顺序扫描（退出时恢复）"""
+    with connections[using].cursor() as cursor:
+        cursor.execute("SET enable_seqscan = off")
+    try:
+        yield
+    finally:
+        with connections[using].cursor() as cursor:
+            cursor.execute("RESET enable_seqscan")
+
+
+def iter_plan_nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """深度优先遍历计划节点（接受 explain() 的结果或单个 Plan 节点）"""
+    node = plan.get("Plan", plan)
+    yield node
+    for child in node.get("Plans", []):
+        yield from iter_plan_nodes(child)
+
+
+def find_seq_scans(plan: Dict[str, Any], tables: Optional[Iterable[str]] = None) -> List[str]:
+    """返回计划中顺序扫描的表名（tables 不为空时只返回其中的表）"""
+    tables = set(tables) if tables is not None else None
+    scanned = []
+    for node in iter_plan_nodes(plan):
+        if node.get("Node Type") != "Seq Scan":
+            continue
+        relation = node.get("Relation Name")
+        if tables is None or relation in tables:
+            scanned.append(relation)
+    return scanned
+
+
+def summarize_plan(plan: Dict[str, Any], large_tables: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """汇总执行计划：代价、耗时、缓冲区命中/读取、扫描节点和大表顺序扫描"""
+    root = plan["Plan"]
+    scans = sorted(
+        {
+            f"{node['Node Type']} on {node['Relation Name']}"
+            + (f" using {node['Index Name']}" if node.get("Index Name") else "")
+            for node in iter_plan_nodes(plan)
+            if node.get("Relation Name")
+        }
+    )
+    return {
+        "total_cost": root.get("Total Cost", 0.0),
+        "planning_ms": plan.get("Planning Time"),
+        "execution_ms": plan.get("Execution Time"),
+        "shared_hit_blocks": root.get("Shared Hit Blocks"),
+        "shared_read_blocks": root.get("Shared Read Blocks"),
+        "scans": scans,
+        "seq_scans": find_seq_scans(plan, large_tables),
+    }
+
+
+def explain_queries(func: Callable[[], Any], large_tables: Optional[Iterable[str]] = None,
+                    using: str = "default") -> List[Dict[str, Any]]:
+    """
+    捕获 func 执行的全部 SELECT，逐条 EXPLAIN ANALYZE 并汇总
+
+    每条结果额外包含 index_check_seq_scans：关闭 enable_seqscan 后仍然
+    顺序扫描的大表（即缺少可用索引）。
+    """
+    large_tables = get_large_tables() if large_tables is None else set(large_tables)
+    results = []
+    for sql, params in capture_queries(func, using=using):
+        summary = summarize_plan(explain(sql, params, using=using), large_tables)
+        with seq_scans_disabled(using=using):
+            forced = explain(sql, params, analyze=False, using=using)
+        summary["index_check_seq_scans"] = find_seq_scans(forced, large_tables)
+        summary["sql"] = sql
+        results.append(summary)
+    return results
+
+
+def compare_plan_reports(report: Dict[str, Any], previous: Optional[Dict[str, Any]],
+                         threshold: float = 0.2) -> Dict[str, Dict[str, Any]]:
+    """
+    按查询名对比两次报告的总代价（各语句 total_cost 之和）
+
+    report / previous 格式: {"scale": {...}, "queries": {name: [summary, ...]}}；
+    数据规模不同时不对比。
+
+    Returns:
+        dict: {name: {"previous_cost", "cost", "change", "regression"}}
+    """
+    if not previous or previous.get("scale") != report.get("scale"):
+        return {}
+    comparison = {}
+    for name, statements in report["queries"].items():
+        last = previous.get("queries", {}).get(name)
+        if not last:
+            continue
+        cost = sum(row["total_cost"] for row in statements)
+        previous_cost = sum(row["total_cost"] for row in last)
+        if not previous_cost:
+            continue
+        change = cost / previous_cost - 1
+        comparison[name] = {
+            "previous_cost": previous_cost,
+            "cost": cost,
+            "change": change,
+            "regression": change > threshold,
+        }
+    return comparison
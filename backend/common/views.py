@@ -0,0 +1,86 @@
+"""通用（运维 / 性能分析）视图"""
+
+import os
+
+from django.http import HttpResponse
+
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common.metrics.cpu_profiler import (
+    STATUS_RUNNING,
+    ProfilerBusy,
+    get_profile_result,
+    start_profile,
+)
+from common.middleware.silk_sampling_middleware import slow_request_buffer
+
+
+class SlowRequestListView(APIView):
+    """
+    管理员查看当前 worker 进程记录的慢请求（SampledSilkyMiddleware 环形缓冲区）
+    """
+    permission_classes = [IsAdminUser]  # 仅管理员可访问
+
+    def get(self, request):
+        return Response({
+            "pid": os.getpid(),
+            "results": slow_request_buffer.snapshot(),
+        })
+
+
+class CPUProfileView(APIView):
+    """
+    管理员对处理本请求的 worker 进程做采样 CPU 分析
+
+    POST {"duration": 30, "interval": 0.01} 立即返回 profile_id，分析在后台进行；
+    结果通过 CPUProfileDetailView 获取。
+    """
+    permission_classes = [IsAdminUser]  # 仅管理员可访问
+
+    def post(self, request):
+        try:
+            duration = float(request.data.get("duration", 30))
+            interval = request.data.get("interval")
+            interval = float(interval) if interval is not None else None
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "duration 和 interval 必须是数字"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if duration <= 0:
+            return Response(
+                {"error": "duration 必须大于 0"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            info = start_profile(duration, interval)
+        except ProfilerBusy:
+            return Response(
+                {"error": "当前进程已有正在进行的 CPU 分析"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(info, status=status.HTTP_202_ACCEPTED)
+
+
+class CPUProfileDetailView(APIView):
+    """
+    管理员获取 CPU 分析结果
+
+    进行中返回 202；完成后返回统计信息和 collapsed stacks
+    （?output=collapsed 时直接返回文本，可交给 flamegraph.pl / speedscope）。
+    """
+    permission_classes = [IsAdminUser]  # 仅管理员可访问
+
+    def get(self, request, profile_id):
+        result = get_profile_result(profile_id)
+        if result is None:
+            return Response({"error": "分析结果不存在或已过期"}, status=status.HTTP_404_NOT_FOUND)
+        if result["status"] == STATUS_RUNNING:
+            return Response(result, status=status.HTTP_202_ACCEPTED)
+        if request.query_params.get("output") == "collapsed":
+            return HttpResponse(result["collapsed"], content_type="text/plain; charset=utf-8")
+        return Response(result)
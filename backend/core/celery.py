@@ -2,6 +2,7 @@ import os
 from celery.schedules import crontab
 
 from celery import Celery
+from celery.signals import worker_process_init
 
 
 # 设置 Django 的默认设置模块
@@ -18,4 +19,12 @@ app.autodiscover_tasks()
 
 # 任务时间限制
 app.conf.task_soft_time_limit = 300  # 5分钟软超时
-app.conf.task_time_limit = 600  # 10分钟硬超时
\ No newline at end of file
+app.conf.task_time_limit = 600  # 10分钟硬超时
+
+
+@worker_process_init.connect
+def install_cpu_profiler(**kwargs):
+    """在每个 worker 子进程中安装采样 CPU 分析的信号处理器"""
+    from common.metrics.cpu_profiler import install_profiler_signals
+
+    install_profiler_signals()
@@ -61,6 +61,7 @@ INSTALLED_APPS = [
     "django_redis",
     "corsheaders",
     "silk",
+    "common.metrics",  # serve_metrics / profile_cpu 管理命令
     "courses.apps.CoursesConfig",
     "accounts.apps.AccountsConfig",
     "commerce.apps.CommerceConfig",
@@ -117,8 +118,10 @@ TESTING = "test" in sys.argv or "test_coverage" in sys.argv
 
 if not TESTING:
     MIDDLEWARE = [
-        "silk.middleware.SilkyMiddleware",
+        "common.middleware.metrics_middleware.PrometheusMetricsMiddleware",  # HTTP 指标
+        "common.middleware.silk_sampling_middleware.SampledSilkyMiddleware",  # Silk 采样记录
         "django.middleware.security.SecurityMiddleware",
+        "common.middleware.query_budget_middleware.QueryBudgetMiddleware",  # 查询预算 / N+1 检测
         "django.contrib.sessions.middleware.SessionMiddleware",
         "corsheaders.middleware.CorsMiddleware",
         #"common.middleware.cache_control_middleware.CacheControlMiddleware",  # Cache headers middleware
@@ -131,7 +134,9 @@ if not TESTING:
     ]
 else:
     MIDDLEWARE = [
+        "common.middleware.metrics_middleware.PrometheusMetricsMiddleware",  # HTTP 指标
         "django.middleware.security.SecurityMiddleware",
+        "common.middleware.query_budget_middleware.QueryBudgetMiddleware",  # 查询预算 / N+1 检测
         "django.contrib.sessions.middleware.SessionMiddleware",
         "corsheaders.middleware.CorsMiddleware",
         "common.middleware.cache_control_middleware.CacheControlMiddleware",  # Cache headers middleware
@@ -143,6 +148,33 @@ else:
         "common.middleware.logging_middleware.LoggingMiddleware",  # 日志中间件
     ]
 
+# Silk 采样记录（common.middleware.silk_sampling_middleware）：只有采样到的请求、
+# 带 SILK_PROFILE_HEADER 的管理员请求和最近变慢路由的请求写入 Silk；
+# 其余慢请求只进入进程内环形缓冲区（GET /api/v1/profiling/slow-requests/）
+SILKY_MIDDLEWARE_CLASS = "common.middleware.silk_sampling_middleware.SampledSilkyMiddleware"
+SILK_SAMPLE_RATE = env.float("SILK_SAMPLE_RATE", default=1.0 if DEBUG else 0.01)
+SILK_PROFILE_HEADER = "X-Silk-Profile"
+SILK_SLOW_REQUEST_MS = 1000
+SILK_SLOW_REQUEST_BUFFER_SIZE = 200
+SILK_SLOW_ROUTE_PROFILES = 3
+
+# 采样 CPU 分析（common.metrics.cpu_profiler）：worker 启动时安装信号处理器，
+# 空闲时没有开销；通过 POST /api/v1/profiling/cpu/ 或
+# manage.py profile_cpu --pid <pid> 触发，输出 collapsed stacks
+CPU_PROFILER_ENABLED = True
+CPU_PROFILER_INTERVAL = 0.01
+CPU_PROFILER_MAX_DURATION = 120
+CPU_PROFILER_RESULT_TTL = 3600
+CPU_PROFILER_TRIGGER_SIGNAL = "SIGUSR2"
+
+# Query budget / N+1 detection (common.middleware.query_budget_middleware).
+# Views declare `query_budget` (int or {action: int}); QUERY_BUDGETS overrides
+# by view label ("CourseViewSet.list"). Exceeding a budget raises in tests.
+QUERY_BUDGET_ENABLED = True
+QUERY_BUDGET_ENFORCE = TESTING
+QUERY_BUDGET_REPEAT_THRESHOLD = 5
+QUERY_BUDGETS = {}
+
 ROOT_URLCONF = "core.urls"
 
 TEMPLATES = [
@@ -171,7 +203,8 @@ CACHES = {
         "LOCATION": env("REDIS_URL", default="redis://127.0.0.1:6379/0"),
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
-            "COMPRESSOR": "django_redis.compressors.zlib.ZlibCompressor",
+            # zlib 压缩（含 session）；codec 层已压缩的载荷（如 orjson+lz4）不重复压缩
+            "COMPRESSOR": "common.utils.cache.CodecAwareZlibCompressor",
             "CONNECTION_POOL_KWARGS": {
                 "max_connections": 100,
                 "retry_on_timeout": True,
@@ -296,6 +329,47 @@ CACHES = {
     }
 }
 
+# Cache codec per key family (common.utils.cache.get_cache_codec)
+# Format: "<serializer>[+<compressor>]", serializer: json/orjson/msgpack,
+# compressor: zlib/lz4/zstd. Longest key-prefix match wins; "default" applies otherwise.
+# Missing optional packages fall back to json / zlib. Plain "json" keeps the legacy
+# string payload. Compare codecs with: python manage.py benchmark_cache_codecs
+CACHE_CODECS = {
+    "default": "json",
+    "courses:ChapterViewSet": "orjson+lz4",
+    "courses:ProblemViewSet": "orjson+lz4",
+}
+# Payloads smaller than this are stored uncompressed
+CACHE_CODEC_COMPRESS_MIN_BYTES = 1024
+
+# Tag sets used by CacheInvalidator (common.utils.cache.register_cache_tags).
+# Must be at least as long as the longest cache TTL.
+CACHE_TAG_TTL = 3600
+
+# Seconds a worker trusts its in-process copy of a cache namespace generation
+# (common.utils.cache.get_cache_generation) before re-reading it from Redis.
+CACHE_GENERATION_L1_TTL = 2
+# Upper bound on namespaces kept in that in-process copy (LRU eviction).
+CACHE_GENERATION_L1_MAX_ENTRIES = 10000
+
+# Models whose valid ids are tracked in a Redis bitmap so retrieve views can
+# reject ids that cannot exist before touching the cache or the database
+# (common.utils.cache.resource_id_may_exist). The bitmap is only trusted while
+# its ready marker (refreshed by rebuild_resource_id_bitmaps) is alive.
+RESOURCE_ID_BITMAP_MODELS = [
+    "courses.Course",
+    "courses.Chapter",
+    "courses.Problem",
+    "courses.Exam",
+]
+RESOURCE_ID_BITMAP_TTL = 7200
+
+# Fraction of cache reads recorded into the per-key-family adaptive TTL
+# statistics, and how often (seconds) workers reload the published TTL table
+# (common.utils.cache.AdaptiveTTLCalculator).
+ADAPTIVE_TTL_SAMPLE_RATE = 0.01
+ADAPTIVE_TTL_TABLE_REFRESH = 60
+
 # Session configuration to use Redis
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "default"
@@ -319,6 +393,9 @@ CACHE_PERFORMANCE_ALERT_THRESHOLDS = {
 CACHE_STATS_KEY_PREFIX = "cache:perf:stats"  # Prefix for statistics keys
 CACHE_ALERTS_KEY_PREFIX = "cache:perf:alerts"  # Prefix for alert suppression keys
 CACHE_STATS_TTL = 300  # Time-to-live for statistics in seconds (5 minutes)
+# Counters are buffered per process and merged into Redis per window
+CACHE_STATS_WINDOW_SECONDS = 60  # Statistics window (matches the summary task period)
+CACHE_STATS_FLUSH_INTERVAL = 5  # Max seconds between buffer flushes to Redis
 
 
 # 支付宝
@@ -383,6 +460,20 @@ CELERY_ENABLE_UTC = True
 CELERY_RESULT_EXTENDED = True  # 启用后才会记录 task_name、date_started 等字段
 CELERY_TASK_TRACK_STARTED = True  # 记录任务开始时间
 
+# 测验异步评分：提交时只保存原始答案，评分任务进入 exam_grading 队列。
+# 该队列由独立 worker 消费，并发数即评分并发上限，例如：
+#   celery -A core worker -Q exam_grading --concurrency 4
+# 未开启时 submit 仍同步评分。
+EXAM_ASYNC_GRADING = env.bool("EXAM_ASYNC_GRADING", default=False)
+CELERY_TASK_ROUTES = {
+    "courses.tasks.grade_exam_submission": {"queue": "exam_grading"},
+}
+
+# 代码草稿：超过该时长的中间自动保存由 compact_code_drafts 清理，只保留检查点
+CODE_DRAFT_AUTOSAVE_RETENTION_HOURS = env.int(
+    "CODE_DRAFT_AUTOSAVE_RETENTION_HOURS", default=24
+)
+
 # Celery Beat 定时任务调度
 CELERY_BEAT_SCHEDULE = {
     # Cache performance summary (Phase 2)
@@ -401,6 +492,22 @@ CELERY_BEAT_SCHEDULE = {
             "expires": 300,  # 任务过期时间 5 分钟
         },
     },
+    # Rebuild resource id bitmaps (cache penetration filter)
+    "rebuild-resource-id-bitmaps": {
+        "task": "common.cache_warming.tasks.rebuild_resource_id_bitmaps",
+        "schedule": 1800.0,  # 每 30 分钟执行一次
+        "options": {
+            "expires": 600,
+        },
+    },
+    # Recompute adaptive TTL tiers from sampled cache statistics
+    "refresh-adaptive-ttl-table": {
+        "task": "common.cache_warming.tasks.refresh_adaptive_ttl_table",
+        "schedule": 300.0,  # 每 5 分钟执行一次
+        "options": {
+            "expires": 300,
+        },
+    },
     # Refresh stale chapter unlock snapshots
     "refresh-stale-chapter-unlock-snapshots": {
         "task": "courses.tasks.scheduled_snapshot_refresh",
@@ -421,12 +528,25 @@ CELERY_BEAT_SCHEDULE = {
         "task": "courses.tasks.cleanup_old_problem_snapshots",
         "schedule": crontab(hour=3, minute=0),  # 每天凌晨 3 点
     },
+    # Compact intermediate code draft auto-saves
+    "compact-code-drafts": {
+        "task": "courses.tasks.compact_code_drafts",
+        "schedule": crontab(minute=30),  # 每小时第 30 分钟
+    },
+    # Flush buffered exam answer autosaves to the database
+    "flush-exam-autosaves": {
+        "task": "courses.tasks.flush_exam_autosaves",
+        "schedule": 30.0,  # 每 30 秒执行一次
+        "options": {
+            "expires": 30,
+        },
+    },
 }
 
 # CORS配置
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOWED_ORIGINS = env("CORS_ALLOWED_ORIGINS")
-CORS_ALLOW_HEADERS = ("authorization", "content-type")
+CORS_ALLOW_HEADERS = ("authorization", "content-type", "x-silk-profile")
 
 
 # 日志配置
@@ -560,3 +680,13 @@ LOGGING = {
         },
     },
 }
+
+# 异步日志：请求线程只把日志放入内存队列，格式化和写文件在后台线程完成
+LOGGING_CONFIG = "common.utils.logging.configure_logging"
+LOGGING_QUEUE_ENABLED = env.bool("LOGGING_QUEUE_ENABLED", default=not TESTING)
+LOGGING_QUEUE_LOGGERS = [name for name in LOGGING["loggers"] if name != "celery"]
+
+# 请求日志采样：只有被采样的请求记录参数/头部等详细信息；
+# 5xx 和慢请求始终记录
+REQUEST_LOG_SAMPLE_RATE = 1.0 if DEBUG else 0.05
+REQUEST_LOG_SLOW_MS = 1000
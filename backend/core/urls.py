@@ -26,7 +26,8 @@ urlpatterns = [
     path('api/v1/', include('courses.urls')),
     path('api/v1/', include('accounts.urls')),
     path('api/v1/', include('commerce.urls')),
-    path('api/v1/', include('file_management.urls'))
+    path('api/v1/', include('file_management.urls')),
+    path('api/v1/', include('common.urls')),
 ]
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
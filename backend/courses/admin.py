@@ -11,6 +11,7 @@ from django.urls import path
 from django.utils.encoding import escape_uri_path
 from django.utils.safestring import mark_safe
 import openpyxl
+from common.utils.cache import add_resource_ids
 from .models import (
     Chapter,
     ChoiceProblem,
@@ -369,6 +370,8 @@ class ProblemAdmin(admin.ModelAdmin):
             prob.full_clean()
             problem_objs.append(prob)
         created_problems = Problem.objects.bulk_create(problem_objs)
+        # bulk_create 不触发 post_save，需要手动登记资源 ID 位图
+        add_resource_ids(Problem, *[p.pk for p in created_problems])
 
         # 按顺序映射（假设标题唯一）
         title_to_problem = {p.title: p for p in created_problems}
@@ -681,7 +684,9 @@ class ChapterAdmin(admin.ModelAdmin):
             chapter_objs.append(chapter)
 
         # 4. 批量创建
-        Chapter.objects.bulk_create(chapter_objs)
+        created_chapters = Chapter.objects.bulk_create(chapter_objs)
+        # bulk_create 不触发 post_save，需要手动登记资源 ID 位图
+        add_resource_ids(Chapter, *[c.pk for c in created_chapters])
 
     # ========================
     # 导出 Action
@@ -13,6 +13,8 @@ from django.utils import timezone
 from django.db import transaction
 from django.core.exceptions import ValidationError
 
+from common.utils.cache import CacheInvalidator
+
 from courses.models import (
     Course, Chapter, Problem, AlgorithmProblem,
     ChoiceProblem, FillBlankProblem, TestCase, ProblemUnlockCondition,
@@ -147,6 +149,25 @@ class CourseImporter:
         # Import chapter unlock conditions (Phase 2)
         self._import_chapter_unlock_conditions(course, course_dir)
 
+        # Invalidate every cached entry of this course once the import commits
+        transaction.on_commit(lambda: self._invalidate_course_cache(course))
+
+    def _invalidate_course_cache(self, course: Course) -> None:
+        """
+        Invalidate all cache entries of an imported course.
+
+        Bumps the generation of the course namespace and each of its chapter
+        namespaces (one INCR each, no key enumeration).
+
+        Args:
+            course: Imported course
+        """
+        chapter_ids = Chapter.objects.filter(course=course).values_list('id', flat=True)
+        CacheInvalidator.invalidate_namespace(
+            f"course:{course.id}",
+            *[f"chapter:{chapter_id}" for chapter_id in chapter_ids],
+        )
+
     def _import_chapters(self, course: Course, course_dir: Path) -> None:
         """
         Import all chapters for a course.
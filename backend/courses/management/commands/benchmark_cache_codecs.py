@@ -0,0 +1,187 @@
+"""
+Management command to benchmark cache codecs on real chapter/problem payloads
+
+对比不同缓存 codec（序列化 + 压缩）在 ChapterGlobalSerializer /
+ProblemGlobalSerializer 真实输出上的编码耗时、解码耗时和载荷大小。
+"""
+
+import json
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.utils.cache import CacheCodec
+
+DEFAULT_CODECS = [
+    "json",
+    "json+zlib",
+    "orjson",
+    "orjson+lz4",
+    "orjson+zstd",
+    "msgpack",
+    "msgpack+lz4",
+    "msgpack+zstd",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark cache codecs (encode/decode time and payload size) on "
+        "ChapterGlobalSerializer and ProblemGlobalSerializer output"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--course-limit",
+            type=int,
+            default=10,
+            help="Number of courses to build chapter list payloads from (default: 10)",
+        )
+        parser.add_argument(
+            "--chapter-limit",
+            type=int,
+            default=50,
+            help="Number of chapters to build problem list payloads from (default: 50)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=100,
+            help="Encode/decode iterations per payload (default: 100)",
+        )
+        parser.add_argument(
+            "--codecs",
+            type=str,
+            default=",".join(DEFAULT_CODECS),
+            help="Comma separated codec names, e.g. json,orjson+lz4",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Output results as JSON",
+        )
+
+    def handle(self, *args, **options):
+        payloads = self._build_payloads(
+            options["course_limit"], options["chapter_limit"]
+        )
+        if not any(payloads.values()):
+            raise CommandError("No chapters/problems found to benchmark")
+
+        iterations = max(1, options["iterations"])
+        results = []
+        seen = set()
+        for name in [c.strip() for c in options["codecs"].split(",") if c.strip()]:
+            codec = CacheCodec.from_name(name)
+            # 可选依赖缺失时会回退到同一个 codec，跳过重复项
+            if codec.name in seen:
+                continue
+            seen.add(codec.name)
+
+            for family, family_payloads in payloads.items():
+                if family_payloads:
+                    results.append(
+                        benchmark_codec(codec, family, family_payloads, iterations)
+                    )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self._print_table(results)
+
+    def _build_payloads(self, course_limit, chapter_limit):
+        """构建真实的章节/题目列表载荷（与 SEPARATED:GLOBAL 缓存内容一致）"""
+        from courses.models import Chapter, Problem
+        from courses.serializers import ChapterGlobalSerializer, ProblemGlobalSerializer
+
+        chapters_by_course = defaultdict(list)
+        course_ids = list(
+            Chapter.objects.values_list("course_id", flat=True)
+            .order_by("course_id")
+            .distinct()[:course_limit]
+        )
+        for chapter in (
+            Chapter.objects.select_related("course", "unlock_condition")
+            .filter(course_id__in=course_ids)
+            .order_by("course_id", "order")
+        ):
+            chapters_by_course[chapter.course_id].append(chapter)
+
+        problems_by_chapter = defaultdict(list)
+        chapter_ids = list(
+            Problem.objects.filter(chapter__isnull=False)
+            .values_list("chapter_id", flat=True)
+            .order_by("chapter_id")
+            .distinct()[:chapter_limit]
+        )
+        for problem in (
+            Problem.objects.select_related("chapter")
+            .filter(chapter_id__in=chapter_ids)
+            .order_by("chapter_id", "id")
+        ):
+            problems_by_chapter[problem.chapter_id].append(problem)
+
+        return {
+            "ChapterGlobalSerializer": [
+                list(ChapterGlobalSerializer(chapters, many=True).data)
+                for chapters in chapters_by_course.values()
+            ],
+            "ProblemGlobalSerializer": [
+                list(ProblemGlobalSerializer(problems, many=True).data)
+                for problems in problems_by_chapter.values()
+            ],
+        }
+
+    def _print_table(self, results):
+        self.stdout.write(
+            f"{'codec':<14} {'payload':<24} {'encode(us)':>11} "
+            f"{'decode(us)':>11} {'bytes':>10} {'ratio':>7}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['codec']:<14} {row['family']:<24} "
+                f"{row['encode_us']:>11.1f} {row['decode_us']:>11.1f} "
+                f"{row['avg_bytes']:>10.0f} {row['ratio']:>7.2f}"
+            )
+
+
+def benchmark_codec(codec, family, payloads, iterations):
+    """对一组载荷测量 codec 的平均编码/解码耗时和平均载荷大小
+
+    Returns:
+        dict: codec、family、encode_us、decode_us、avg_bytes、ratio
+        （ratio 为相对 JSON 字符串 UTF-8 大小的比例）
+    """
+    encode_total = 0.0
+    decode_total = 0.0
+    encoded_bytes = 0
+    json_bytes = 0
+
+    for payload in payloads:
+        json_bytes += len(
+            json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        )
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            raw = codec.encode(payload)
+        encode_total += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            CacheCodec.decode(raw)
+        decode_total += time.perf_counter() - start
+
+        encoded_bytes += len(raw.encode("utf-8") if isinstance(raw, str) else raw)
+
+    count = len(payloads) * iterations
+    return {
+        "codec": codec.name,
+        "family": family,
+        "encode_us": encode_total / count * 1_000_000,
+        "decode_us": decode_total / count * 1_000_000,
+        "avg_bytes": encoded_bytes / len(payloads),
+        "ratio": encoded_bytes / json_bytes if json_bytes else 1.0,
+    }
@@ -0,0 +1,469 @@
+"""
+Management command to micro-benchmark hot service functions
+
+在合成数据（courses/tests/factories.py 构建，默认 200 章节 / 2000 题目 /
+1000 注册记录）上重复测量以下纯 CPU 热点的耗时：
+
+- ChapterViewSet._merge_global_and_user_status（章节列表分离缓存合并）
+- CourseUnlockSnapshot.recompute（章节解锁快照重算）
+- ExamGradingService.grade_fillblank_problem（填空题评分）
+- MarkdownFrontmatterParser.parse（课程导入解析）
+- get_standard_cache_key（缓存键生成）
+
+合成数据在一个事务中创建，测量结束后回滚，不会留在数据库中。
+结果以 JSON 写入 --output-dir（默认 BASE_DIR/benchmarks），并与该目录中
+最近一次结果对比，便于观察趋势。
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+RESULT_PREFIX = "hot_paths"
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark hot service functions on synthetic data "
+        "and store the results for trend comparison"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chapters",
+            type=int,
+            default=200,
+            help="Number of chapters in the synthetic course (default: 200)",
+        )
+        parser.add_argument(
+            "--problems",
+            type=int,
+            default=2000,
+            help="Number of problems spread over the chapters (default: 2000)",
+        )
+        parser.add_argument(
+            "--enrollments",
+            type=int,
+            default=1000,
+            help="Number of enrollments in the synthetic course (default: 1000)",
+        )
+        parser.add_argument(
+            "--snapshots",
+            type=int,
+            default=20,
+            help="Enrollments with chapter progress whose snapshots are recomputed (default: 20)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=7,
+            help="Timing rounds per benchmark (default: 7)",
+        )
+        parser.add_argument(
+            "--number",
+            type=int,
+            default=5,
+            help="Calls per timing round (default: 5)",
+        )
+        parser.add_argument(
+            "--only",
+            type=str,
+            default="",
+            help="Comma separated benchmark names to run (default: all)",
+        )
+        parser.add_argument(
+            "--output-dir",
+            type=str,
+            default=str(Path(settings.BASE_DIR) / "benchmarks"),
+            help="Directory for result JSON files (default: BASE_DIR/benchmarks)",
+        )
+        parser.add_argument(
+            "--no-save",
+            action="store_true",
+            help="Do not write the result file",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.1,
+            help="Median slowdown ratio reported as a regression (default: 0.1)",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Output results as JSON",
+        )
+
+    def handle(self, *args, **options):
+        only = {name.strip() for name in options["only"].split(",") if name.strip()}
+        repeat = max(1, options["repeat"])
+        number = max(1, options["number"])
+
+        with transaction.atomic(), tempfile.TemporaryDirectory() as markdown_dir:
+            fixtures = build_fixtures(
+                options["chapters"],
+                options["problems"],
+                options["enrollments"],
+                options["snapshots"],
+            )
+            results = []
+            for name, func in get_benchmarks(fixtures, Path(markdown_dir)).items():
+                if only and name not in only:
+                    continue
+                stats = measure(func, repeat, number)
+                stats["name"] = name
+                results.append(stats)
+            # 合成数据只用于测量，全部回滚
+            transaction.set_rollback(True)
+
+        report = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": get_git_commit(),
+            "python": platform.python_version(),
+            "database": settings.DATABASES["default"]["ENGINE"],
+            "scale": {
+                "chapters": options["chapters"],
+                "problems": options["problems"],
+                "enrollments": options["enrollments"],
+                "snapshots": options["snapshots"],
+            },
+            "results": results,
+        }
+
+        output_dir = Path(options["output_dir"])
+        previous = load_latest_report(output_dir)
+        comparison = compare_reports(report, previous, options["threshold"])
+
+        if not options["no_save"]:
+            output_dir.mkdir(parents=True, exist_ok=True)
+            path = output_dir / f"{RESULT_PREFIX}-{datetime.now():%Y%m%d-%H%M%S-%f}.json"
+            path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+            if not options["json"]:
+                self.stdout.write(f"Results written to {path}")
+
+        if options["json"]:
+            self.stdout.write(json.dumps({**report, "comparison": comparison}, indent=2))
+            return
+
+        self._print_table(results, comparison)
+
+    def _print_table(self, results, comparison):
+        self.stdout.write(
+            f"{'benchmark':<28} {'min(ms)':>10} {'median(ms)':>11} "
+            f"{'stdev(ms)':>10} {'vs last':>9}"
+        )
+        for row in results:
+            delta = comparison.get(row["name"])
+            delta_str = f"{delta['change']:+.1%}" if delta else "-"
+            line = (
+                f"{row['name']:<28} {row['min_ms']:>10.3f} {row['median_ms']:>11.3f} "
+                f"{row['stdev_ms']:>10.3f} {delta_str:>9}"
+            )
+            if delta and delta["regression"]:
+                line = self.style.WARNING(line + "  regression")
+            self.stdout.write(line)
+
+
+def build_fixtures(chapter_count, problem_count, enrollment_count, snapshot_count):
+    """用 factories 构建合成课程数据（bulk_create，跳过逐行信号）
+
+    Returns:
+        dict: course、chapters、enrollments、fillblank_problems、snapshots
+    """
+    from accounts.models import User
+    from accounts.tests.factories import UserFactory
+    from courses.models import (
+        Chapter,
+        ChapterProgress,
+        ChapterUnlockCondition,
+        CourseUnlockSnapshot,
+        Enrollment,
+        FillBlankProblem,
+        Problem,
+    )
+    from courses.tests.factories import (
+        ChapterFactory,
+        ChapterProgressFactory,
+        ChapterUnlockConditionFactory,
+        CourseFactory,
+        EnrollmentFactory,
+        FillBlankProblemFactory,
+        ProblemFactory,
+    )
+
+    course = CourseFactory()
+    chapters = Chapter.objects.bulk_create(
+        [ChapterFactory.build(course=course, order=i) for i in range(chapter_count)]
+    )
+
+    # 每隔一章设置前置章节条件（前 1-2 章）
+    conditions = ChapterUnlockCondition.objects.bulk_create(
+        [
+            ChapterUnlockConditionFactory.build(chapter=chapter, prerequisite_only=True)
+            for chapter in chapters[1::2]
+        ]
+    )
+    through = ChapterUnlockCondition.prerequisite_chapters.through
+    links = []
+    for condition in conditions:
+        index = chapters.index(condition.chapter)
+        for prerequisite in chapters[max(0, index - 2):index]:
+            links.append(
+                through(chapterunlockcondition=condition, chapter=prerequisite)
+            )
+    through.objects.bulk_create(links)
+
+    problem_types = ["algorithm", "choice", "fillblank"]
+    problems = Problem.objects.bulk_create(
+        [
+            ProblemFactory.build(
+                chapter=chapters[i % chapter_count], type=problem_types[i % 3]
+            )
+            for i in range(problem_count)
+        ]
+    )
+    FillBlankProblem.objects.bulk_create(
+        [
+            FillBlankProblemFactory.build(problem=problem)
+            for problem in problems
+            if problem.type == "fillblank"
+        ]
+    )
+
+    users = User.objects.bulk_create(
+        [UserFactory.build(username=f"bench_user_{i}") for i in range(enrollment_count)]
+    )
+    enrollments = Enrollment.objects.bulk_create(
+        [EnrollmentFactory.build(user=user, course=course) for user in users]
+    )
+
+    # 抽样注册记录：完成前半部分章节，正在学习下一章
+    sampled = enrollments[:snapshot_count]
+    progresses = []
+    for enrollment in sampled:
+        for i, chapter in enumerate(chapters[: chapter_count // 2 + 1]):
+            if i < chapter_count // 2:
+                progresses.append(
+                    ChapterProgressFactory.build(
+                        enrollment=enrollment, chapter=chapter, completed_chapter=True
+                    )
+                )
+            else:
+                progresses.append(
+                    ChapterProgressFactory.build(enrollment=enrollment, chapter=chapter)
+                )
+    ChapterProgress.objects.bulk_create(progresses)
+    snapshots = CourseUnlockSnapshot.objects.bulk_create(
+        [CourseUnlockSnapshot(course=course, enrollment=enrollment) for enrollment in sampled]
+    )
+
+    fillblank_problems = list(
+        Problem.objects.filter(chapter__course=course, type="fillblank").select_related(
+            "fillblank_info"
+        )
+    )
+
+    return {
+        "course": course,
+        "chapters": chapters,
+        "enrollments": enrollments,
+        "fillblank_problems": fillblank_problems,
+        "snapshots": snapshots,
+    }
+
+
+def get_benchmarks(fixtures, markdown_dir):
+    """构建各热点函数的无参调用（输入在计时前准备好，Markdown 文件写入 markdown_dir）"""
+    from courses.course_import_services.markdown_parser import MarkdownFrontmatterParser
+    from courses.models import ExamAnswer
+    from courses.serializers import ChapterListGlobalSerializer
+    from courses.services import ExamGradingService, get_chapter_list_global_queryset
+    from courses.views import ChapterViewSet
+    from common.utils.cache import get_standard_cache_key
+
+    course = fixtures["course"]
+    snapshots = fixtures["snapshots"]
+
+    # 章节列表：全局数据 + 用户状态（与分离缓存两层内容一致）
+    global_data = list(
+        ChapterListGlobalSerializer(
+            get_chapter_list_global_queryset().filter(course=course), many=True
+        ).data
+    )
+    if snapshots:
+        snapshots[0].recompute()
+        states = snapshots[0].unlock_states
+    else:
+        states = {}
+    user_status = {
+        chapter_id: {"status": state["status"], "is_locked": state["locked"]}
+        for chapter_id, state in states.items()
+    }
+    user_status["_meta"] = {
+        "completed_chapter_ids": [
+            int(chapter_id)
+            for chapter_id, state in states.items()
+            if state["status"] == "completed"
+        ]
+    }
+    chapter_viewset = ChapterViewSet()
+
+    # 填空题：每题一个作答（一半正确）
+    answers = []
+    for i, problem in enumerate(fixtures["fillblank_problems"]):
+        blanks = problem.fillblank_info.blanks.get("blanks", [])
+        answers.append(
+            ExamAnswer(
+                problem=problem,
+                fillblank_answers={
+                    f"blank{j + 1}": blank["answers"][0] if i % 2 == 0 else "wrong"
+                    for j, blank in enumerate(blanks)
+                },
+            )
+        )
+
+    # 课程仓库 Markdown：每章一个带 frontmatter 的文件
+    markdown_files = []
+    for chapter in fixtures["chapters"]:
+        path = markdown_dir / f"chapter-{chapter.order:03d}.md"
+        path.write_text(
+            "---\n"
+            f"title: \"{chapter.title}\"\n"
+            f"order: {chapter.order}\n"
+            "unlock_conditions:\n"
+            "  type: prerequisite\n"
+            f"  prerequisites: [{max(chapter.order - 1, 0)}]\n"
+            "---\n"
+            f"# {chapter.title}\n\n" + (chapter.content + "\n\n```python\nprint('hi')\n```\n\n") * 10,
+            encoding="utf-8",
+        )
+        markdown_files.append(path)
+
+    chapter_ids = [chapter.id for chapter in fixtures["chapters"]]
+
+    def merge_status():
+        chapter_viewset._merge_global_and_user_status(global_data, user_status)
+
+    def merge_status_exclude_content():
+        chapter_viewset._merge_global_and_user_status(
+            global_data, user_status, exclude_fields={"content"}
+        )
+
+    def snapshot_recompute():
+        for snapshot in snapshots:
+            snapshot.recompute()
+
+    def grade_fillblank():
+        for answer in answers:
+            ExamGradingService.grade_fillblank_problem(answer, 10)
+
+    def parse_markdown():
+        for path in markdown_files:
+            MarkdownFrontmatterParser.parse(path)
+
+    def standard_cache_keys():
+        for chapter_id in chapter_ids:
+            get_standard_cache_key(
+                "courses", "ChapterViewSet", pk=chapter_id,
+                parent_pks={"course_pk": course.id},
+            )
+            get_standard_cache_key(
+                "courses", "ChapterViewSet", parent_pks={"course_pk": course.id},
+                query_params={"page": chapter_id % 20, "page_size": 10},
+                user_id=chapter_id, is_separated=True, separated_type="STATUS",
+            )
+
+    return {
+        "merge_global_and_user_status": merge_status,
+        "merge_status_exclude_content": merge_status_exclude_content,
+        "snapshot_recompute": snapshot_recompute,
+        "grade_fillblank_problem": grade_fillblank,
+        "markdown_frontmatter_parse": parse_markdown,
+        "get_standard_cache_key": standard_cache_keys,
+    }
+
+
+def measure(func, repeat, number):
+    """测量 func 的单次调用耗时（repeat 轮，每轮调用 number 次）
+
+    Returns:
+        dict: min_ms、median_ms、mean_ms、max_ms、stdev_ms、repeat、number
+    """
+    # 代际 L1 缓存在测量期间保持有效，避免 get_standard_cache_key 回源 Redis
+    with override_settings(CACHE_GENERATION_L1_TTL=3600):
+        func()  # 预热
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            timings.append((time.perf_counter() - start) / number * 1000)
+
+    return {
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+        "mean_ms": statistics.mean(timings),
+        "max_ms": max(timings),
+        "stdev_ms": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def get_git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_latest_report(output_dir, prefix=RESULT_PREFIX):
+    """读取输出目录中最近一次的结果（没有则返回 None）"""
+    if not output_dir.is_dir():
+        return None
+    reports = sorted(output_dir.glob(f"{prefix}-*.json"))
+    if not reports:
+        return None
+    try:
+        return json.loads(reports[-1].read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def compare_reports(report, previous, threshold):
+    """按中位数对比两次结果（规模不同的结果不对比）
+
+    Returns:
+        dict: {name: {"previous_ms", "change", "regression"}}
+    """
+    if not previous or previous.get("scale") != report["scale"]:
+        return {}
+    previous_results = {row["name"]: row for row in previous.get("results", [])}
+    comparison = {}
+    for row in report["results"]:
+        last = previous_results.get(row["name"])
+        if not last or not last["median_ms"]:
+            continue
+        change = row["median_ms"] / last["median_ms"] - 1
+        comparison[row["name"]] = {
+            "previous_ms": last["median_ms"],
+            "change": change,
+            "regression": change > threshold,
+        }
+    return comparison
@@ -0,0 +1,305 @@
+"""
+Management command to capture query plans of hot querysets
+
+在合成数据上执行以下热点查询，捕获每条 SELECT（含 prefetch 查询）的
+EXPLAIN (ANALYZE, BUFFERS) 执行计划（仅支持 PostgreSQL）：
+
+- ChapterViewSet.get_queryset（快照模式 / _annotate_is_locked 降级模式）
+- ProblemViewSet.get_queryset（课程下题目列表）
+- ExamSubmissionViewSet.get_queryset（用户测验提交记录）
+- list_path_contents（根目录 / 多级目录）
+
+每条语句额外在关闭 enable_seqscan 的情况下取一次计划：此时仍对大表
+顺序扫描说明缺少可用索引。--fail-on-seq-scan 时出现这种情况命令失败。
+
+合成数据在事务中创建并回滚。结果写入 --output-dir（默认 BASE_DIR/benchmarks），
+并与最近一次相同规模的结果对比规划器代价。
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from common.utils.query_plan import (
+    compare_plan_reports,
+    explain_queries,
+    get_large_tables,
+)
+
+from .benchmark_hot_paths import build_fixtures, get_git_commit, load_latest_report
+
+RESULT_PREFIX = "query_plans"
+PAGE_SIZE = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Capture EXPLAIN (ANALYZE, BUFFERS) plans of hot querysets on synthetic "
+        "data, check for sequential scans on large tables and compare planner costs"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chapters",
+            type=int,
+            default=200,
+            help="Number of chapters in the synthetic course (default: 200)",
+        )
+        parser.add_argument(
+            "--problems",
+            type=int,
+            default=2000,
+            help="Number of problems spread over the chapters (default: 2000)",
+        )
+        parser.add_argument(
+            "--enrollments",
+            type=int,
+            default=1000,
+            help="Number of enrollments in the synthetic course (default: 1000)",
+        )
+        parser.add_argument(
+            "--files-per-user",
+            type=int,
+            default=5,
+            help="Files in each user's synthetic folder (default: 5)",
+        )
+        parser.add_argument(
+            "--only",
+            type=str,
+            default="",
+            help="Comma separated query names to explain (default: all)",
+        )
+        parser.add_argument(
+            "--output-dir",
+            type=str,
+            default=str(Path(settings.BASE_DIR) / "benchmarks"),
+            help="Directory for result JSON files (default: BASE_DIR/benchmarks)",
+        )
+        parser.add_argument(
+            "--no-save",
+            action="store_true",
+            help="Do not write the result file",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Planner cost increase ratio reported as a regression (default: 0.2)",
+        )
+        parser.add_argument(
+            "--fail-on-seq-scan",
+            action="store_true",
+            help="Exit with an error when a large table has no usable index",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Output results as JSON",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("explain_hot_queries requires PostgreSQL")
+
+        only = {name.strip() for name in options["only"].split(",") if name.strip()}
+        large_tables = get_large_tables()
+
+        with transaction.atomic():
+            fixtures = build_plan_fixtures(
+                options["chapters"],
+                options["problems"],
+                options["enrollments"],
+                options["files_per_user"],
+            )
+            analyze_tables(large_tables)
+            queries = {}
+            for name, func in get_hot_queries(fixtures).items():
+                if only and name not in only:
+                    continue
+                queries[name] = explain_queries(func, large_tables)
+            # 合成数据只用于取计划，全部回滚
+            transaction.set_rollback(True)
+
+        report = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": get_git_commit(),
+            "server_version": connection.pg_version,
+            "scale": {
+                "chapters": options["chapters"],
+                "problems": options["problems"],
+                "enrollments": options["enrollments"],
+                "files_per_user": options["files_per_user"],
+            },
+            "queries": queries,
+        }
+
+        output_dir = Path(options["output_dir"])
+        previous = load_latest_report(output_dir, prefix=RESULT_PREFIX)
+        comparison = compare_plan_reports(report, previous, options["threshold"])
+
+        if not options["no_save"]:
+            output_dir.mkdir(parents=True, exist_ok=True)
+            path = output_dir / f"{RESULT_PREFIX}-{datetime.now():%Y%m%d-%H%M%S-%f}.json"
+            path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+            if not options["json"]:
+                self.stdout.write(f"Results written to {path}")
+
+        if options["json"]:
+            self.stdout.write(json.dumps({**report, "comparison": comparison}, indent=2))
+        else:
+            self._print_table(queries, comparison)
+
+        missing_indexes = find_missing_indexes(queries)
+        if missing_indexes and options["fail_on_seq_scan"]:
+            raise CommandError(
+                "Sequential scans on large tables without a usable index:\n"
+                + "\n".join(f"  {name}: {', '.join(tables)}" for name, tables in missing_indexes.items())
+            )
+
+    def _print_table(self, queries, comparison):
+        self.stdout.write(
+            f"{'query':<26} {'stmts':>5} {'cost':>12} {'exec(ms)':>10} "
+            f"{'vs last':>9}  seq scans"
+        )
+        for name, statements in queries.items():
+            cost = sum(row["total_cost"] for row in statements)
+            execution = sum(row["execution_ms"] or 0 for row in statements)
+            seq_scans = sorted({table for row in statements for table in row["seq_scans"]})
+            delta = comparison.get(name)
+            delta_str = f"{delta['change']:+.1%}" if delta else "-"
+            line = (
+                f"{name:<26} {len(statements):>5} {cost:>12.1f} {execution:>10.2f} "
+                f"{delta_str:>9}  {', '.join(seq_scans) or '-'}"
+            )
+            if (delta and delta["regression"]) or any(
+                row["index_check_seq_scans"] for row in statements
+            ):
+                line = self.style.WARNING(line)
+            self.stdout.write(line)
+
+
+def build_plan_fixtures(chapter_count, problem_count, enrollment_count, files_per_user):
+    """在 build_fixtures 的课程数据上补充测验提交和文件夹/文件
+
+    Returns:
+        dict: build_fixtures 的结果，另含 exam、locked_user、snapshot_user、folder_path
+    """
+    from courses.models import CourseUnlockSnapshot, ExamSubmission
+    from courses.tests.factories import ExamFactory, ExamSubmissionFactory
+    from file_management.models import FileEntry, Folder
+
+    # 至少两个快照：一个删掉快照走 _annotate_is_locked，一个走快照模式
+    fixtures = build_fixtures(
+        chapter_count, problem_count, enrollment_count, min(2, enrollment_count)
+    )
+    locked_snapshot, fresh_snapshot = fixtures["snapshots"][:2]
+    CourseUnlockSnapshot.objects.filter(pk=locked_snapshot.pk).delete()
+
+    exam = ExamFactory(course=fixtures["course"], status="published")
+    ExamSubmission.objects.bulk_create(
+        [
+            ExamSubmissionFactory.build(
+                exam=exam, enrollment=enrollment, user=enrollment.user, submitted=True
+            )
+            for enrollment in fixtures["enrollments"]
+        ]
+    )
+
+    # 每个用户：/bench_root/docs/ 下 files_per_user 个文件
+    users = [enrollment.user for enrollment in fixtures["enrollments"]]
+    roots = Folder.objects.bulk_create(
+        [Folder(name="bench_root", owner=user) for user in users]
+    )
+    folders = Folder.objects.bulk_create(
+        [Folder(name="docs", owner=root.owner, parent=root) for root in roots]
+    )
+    FileEntry.objects.bulk_create(
+        [
+            FileEntry(
+                name=f"file_{i}.txt",
+                file=f"bench/{folder.id}/file_{i}.txt",
+                file_size=1024,
+                mime_type="text/plain",
+                owner=folder.owner,
+                folder=folder,
+            )
+            for folder in folders
+            for i in range(files_per_user)
+        ]
+    )
+
+    fixtures.update(
+        {
+            "exam": exam,
+            "locked_user": locked_snapshot.enrollment.user,
+            "snapshot_user": fresh_snapshot.enrollment.user,
+            "folder_path": "/bench_root/docs",
+        }
+    )
+    return fixtures
+
+
+def analyze_tables(tables):
+    """刷新表统计信息，使规划器基于合成数据的实际规模"""
+    with connection.cursor() as cursor:
+        for table in sorted(tables):
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(table)}")
+
+
+def list_view_queryset(viewset_class, user, **kwargs):
+    """按 list 请求构造视图集的查询集并取第一页（触发全部 prefetch 查询）"""
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    request = Request(APIRequestFactory().get("/"))
+    request.user = user
+    view = viewset_class(
+        request=request, args=(), kwargs=kwargs, action="list", format_kwarg=None
+    )
+    queryset = view.filter_queryset(view.get_queryset())
+    return list(queryset[:PAGE_SIZE])
+
+
+def get_hot_queries(fixtures):
+    """构建各热点查询的无参调用"""
+    from courses.views import ChapterViewSet, ExamSubmissionViewSet, ProblemViewSet
+    from file_management.utils.path_utils import list_path_contents
+
+    course_pk = fixtures["course"].pk
+    locked_user = fixtures["locked_user"]
+    snapshot_user = fixtures["snapshot_user"]
+
+    return {
+        "chapter_list_annotated": lambda: list_view_queryset(
+            ChapterViewSet, locked_user, course_pk=course_pk
+        ),
+        "chapter_list_snapshot": lambda: list_view_queryset(
+            ChapterViewSet, snapshot_user, course_pk=course_pk
+        ),
+        "problem_list": lambda: list_view_queryset(
+            ProblemViewSet, locked_user, course_pk=course_pk
+        ),
+        "exam_submission_list": lambda: list_view_queryset(
+            ExamSubmissionViewSet, locked_user
+        ),
+        "path_contents_root": lambda: list_path_contents("/", locked_user),
+        "path_contents_folder": lambda: list_path_contents(
+            fixtures["folder_path"], locked_user
+        ),
+    }
+
+
+def find_missing_indexes(queries):
+    """返回关闭 enable_seqscan 后仍顺序扫描的大表 {query_name: [table, ...]}"""
+    missing = {}
+    for name, statements in queries.items():
+        tables = sorted(
+            {table for row in statements for table in row["index_check_seq_scans"]}
+        )
+        if tables:
+            missing[name] = tables
+    return missing
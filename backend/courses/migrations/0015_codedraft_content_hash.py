@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0014_add_status_to_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='codedraft',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='内容哈希'),
+        ),
+    ]
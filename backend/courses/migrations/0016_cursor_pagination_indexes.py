@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_codedraft_content_hash'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='discussionthread',
+            name='courses_dis_course__52e8aa_idx',
+        ),
+        migrations.AddIndex(
+            model_name='codedraft',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='courses_cod_user_id_9f91c2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='discussionthread',
+            index=models.Index(fields=['course', '-last_activity_at', '-id'], name='courses_dis_course__cf29e5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examsubmission',
+            index=models.Index(fields=['user', '-started_at', '-id'], name='courses_exa_user_id_8a592b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='courses_sub_user_id_fbf60d_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated data migration to fill content_hash for existing code drafts
+
+import hashlib
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def backfill_content_hash(apps, schema_editor):
+    """
+    为 0015 之前已有的 CodeDraft 计算 content_hash
+
+    字段默认值为 ''，不回填的话 save_draft 的去重比较不会命中任何历史草稿。
+    哈希算法与 CodeDraft.compute_content_hash 相同（历史模型上没有该方法）。
+    """
+    CodeDraft = apps.get_model('courses', 'CodeDraft')
+
+    pending = (
+        CodeDraft.objects.filter(content_hash='')
+        .only('id', 'code')
+        .order_by('id')
+    )
+    batch = []
+    for draft in pending.iterator(chunk_size=BATCH_SIZE):
+        draft.content_hash = hashlib.sha256((draft.code or '').encode('utf-8')).hexdigest()
+        batch.append(draft)
+        if len(batch) >= BATCH_SIZE:
+            CodeDraft.objects.bulk_update(batch, ['content_hash'])
+            batch = []
+    if batch:
+        CodeDraft.objects.bulk_update(batch, ['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0016_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_content_hash,
+            reverse_code=migrations.RunPython.noop,
+        ),
+    ]
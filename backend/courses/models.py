@@ -1,3 +1,5 @@
+import hashlib
+
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from accounts.models import User
@@ -630,6 +632,8 @@ class Submission(models.Model):
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["user", "problem", "status"]),
+            # 游标分页：WHERE user_id = ? ORDER BY created_at DESC, id DESC
+            models.Index(fields=["user", "-created_at", "-id"]),
         ]
 
     def __str__(self):
@@ -659,6 +663,10 @@ class CodeDraft(models.Model):
         limit_choices_to={"type": "algorithm"},
     )
     code = models.TextField(verbose_name="代码内容")
+    # 代码内容的 SHA-256，用于判断代码是否变化（保存时自动计算）
+    content_hash = models.CharField(
+        max_length=64, blank=True, default="", editable=False, verbose_name="内容哈希"
+    )
     language = models.CharField(
         max_length=50, verbose_name="编程语言", default="python"
     )
@@ -687,11 +695,25 @@ class CodeDraft(models.Model):
         indexes = [
             models.Index(fields=["user", "problem", "-created_at"]),
             models.Index(fields=["user", "problem", "save_type"]),
+            # 游标分页：WHERE user_id = ? ORDER BY created_at DESC, id DESC
+            models.Index(fields=["user", "-created_at", "-id"]),
         ]
 
     def __str__(self):
         return f"{self.user.username} - {self.problem.title} - {self.get_save_type_display()} - {self.created_at}"
 
+    @staticmethod
+    def compute_content_hash(code):
+        """计算代码内容哈希"""
+        return hashlib.sha256((code or "").encode("utf-8")).hexdigest()
+
+    def save(self, *args, **kwargs):
+        self.content_hash = self.compute_content_hash(self.code)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "code" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "content_hash"}
+        super().save(*args, **kwargs)
+
 
 class Enrollment(models.Model):
     """
@@ -866,7 +888,8 @@ class DiscussionThread(models.Model):
     class Meta:
         ordering = ["-is_pinned", "-last_activity_at"]
         indexes = [
-            models.Index(fields=["course", "-last_activity_at"]),
+            # 游标分页需要 id 作为并列排序键（同时覆盖原 (course, -last_activity_at) 索引）
+            models.Index(fields=["course", "-last_activity_at", "-id"]),
         ]
         verbose_name = "主题贴"
         verbose_name_plural = "主题贴"
@@ -1105,6 +1128,8 @@ class ExamSubmission(models.Model):
         indexes = [
             # Note: unique_together already creates index on (exam, user), no need to duplicate
             models.Index(fields=["status", "-started_at"]),
+            # 游标分页：WHERE user_id = ? ORDER BY started_at DESC, id DESC
+            models.Index(fields=["user", "-started_at", "-id"]),
         ]
 
     def __str__(self):
@@ -1,6 +1,6 @@
 # pagination.py
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 class CustomPageNumberPagination(PageNumberPagination):
     page_size = 10                     # 默认每页数量
@@ -16,4 +16,57 @@ class CustomPageNumberPagination(PageNumberPagination):
             'previous': self.get_previous_link(),
             'page_size':self.get_page_size(self.request),
             'results': data,
-        })
\ No newline at end of file
+        })
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    游标（keyset）分页：按 (排序字段, id) 定位，不执行 COUNT，也不使用 OFFSET，
+    深翻页与第一页代价相同。
+
+    排序取视图的 cursor_ordering（默认 ('-created_at', '-id')），忽略 ?ordering，
+    保证始终命中对应的复合索引。
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, 'cursor_ordering', self.ordering))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'page_size': self.page_size,
+            'results': data,
+        })
+
+
+class OptionalCursorPagination(CustomPageNumberPagination):
+    """
+    默认页码分页；请求带 ?pagination=cursor 或 ?cursor= 时改用 KeysetCursorPagination
+    （响应中没有 count）。游标模式的 next/previous 链接保留原有查询参数。
+    """
+    cursor_pagination_class = KeysetCursorPagination
+    cursor_pagination_param = 'pagination'
+
+    def use_cursor(self, request):
+        params = request.query_params
+        return (
+            self.cursor_pagination_class.cursor_query_param in params
+            or params.get(self.cursor_pagination_param) == 'cursor'
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
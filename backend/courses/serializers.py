@@ -163,6 +163,26 @@ class ChapterGlobalSerializer(serializers.ModelSerializer):
         return [{"id": ch.id, "title": ch.title, "order": ch.order} for ch in chapters]
 
 
+class ChapterListGlobalSerializer(ChapterGlobalSerializer):
+    """
+    章节列表全局数据序列化器
+    不包含 content（完整 Markdown 正文），用于章节列表的全局数据缓存；
+    正文只在 retrieve 时返回，查询集应配合 .defer("content") 使用
+    """
+
+    class Meta(ChapterGlobalSerializer.Meta):
+        fields = [
+            "id",
+            "course",
+            "course_title",
+            "title",
+            "order",
+            "created_at",
+            "updated_at",
+            "prerequisite_chapters",
+        ]
+
+
 class ChapterSummarySerializer(serializers.ModelSerializer):
     """
     简化的章节序列化器
@@ -1508,11 +1528,19 @@ class ExamAnswerDetailSerializer(serializers.ModelSerializer):
         return None
 
     def get_problem_data(self, obj):
-        """Return additional problem data for display"""
+        """Return additional problem data for display
+
+        context 中的 exam_problem_scores（{problem_id: score}）可避免逐题查询分值。
+        """
+        scores = self.context.get("exam_problem_scores")
+        if scores is not None and obj.problem_id in scores:
+            score = scores[obj.problem_id]
+        else:
+            score = obj.submission.exam.exam_problems.get(problem=obj.problem).score
         return {
             "content": obj.problem.content,
             "difficulty": obj.problem.difficulty,
-            "score": obj.submission.exam.exam_problems.get(problem=obj.problem).score,
+            "score": score,
         }
 
 
@@ -1,3 +1,5 @@
+import copy
+import json
 import logging
 from typing import Dict, Any, Optional
 from django.core.cache import cache
@@ -877,106 +879,690 @@ class ProblemUnlockSnapshotService:
         return {"unlock_states": unlock_states, "source": "realtime"}
 
 
+class AnswerKeyService:
+    """
+    答案键服务
+
+    把选择题 / 填空题的答案配置编译为便于判分的结构，并按题目缓存在进程内：
+    - 填空题：统一三种 blanks 格式，每个空白预先 strip（不区分大小写时再
+      lower）为 frozenset，判分只需一次集合查找
+    - 选择题：多选答案编译为 frozenset
+
+    缓存以题目主键为 key，同时保存编译时的原始配置；取用时原始配置不一致
+    （其他进程修改过题目）会重新编译。FillBlankProblem / ChoiceProblem 保存
+    或删除时由信号调用 invalidate。
+    """
+
+    MAX_ENTRIES = 4096
+
+    _fillblank_keys: Dict[int, tuple] = {}
+    _choice_keys: Dict[int, tuple] = {}
+
+    @staticmethod
+    def normalize_blanks(blanks_data) -> Dict[str, Dict[str, Any]]:
+        """
+        统一 blanks 的三种格式
+
+        Returns:
+            dict: {"blank1": {"answers": [...], "case_sensitive": bool}, ...}
+        """
+        correct_blanks = {}
+        if not isinstance(blanks_data, dict):
+            return correct_blanks
+
+        if all(k.startswith("blank") and k[5:].isdigit() for k in blanks_data.keys()):
+            # 格式1（详细）
+            for key, config in blanks_data.items():
+                correct_blanks[key] = {
+                    "answers": config.get("answer", config.get("answers", [])),
+                    "case_sensitive": config.get("case_sensitive", False),
+                }
+        elif "blanks" in blanks_data:
+            blanks_list = blanks_data["blanks"]
+            if blanks_list and isinstance(blanks_list[0], dict):
+                # 格式3（推荐）
+                for i, blank in enumerate(blanks_list):
+                    correct_blanks[f"blank{i + 1}"] = {
+                        "answers": blank["answers"],
+                        "case_sensitive": blank.get("case_sensitive", False),
+                    }
+            else:
+                # 格式2（简单）
+                case_sensitive = blanks_data.get("case_sensitive", False)
+                for i, answer in enumerate(blanks_list):
+                    correct_blanks[f"blank{i + 1}"] = {
+                        "answers": [answer] if isinstance(answer, str) else answer,
+                        "case_sensitive": case_sensitive,
+                    }
+        return correct_blanks
+
+    @classmethod
+    def compile_fillblank_key(cls, blanks_data) -> Dict[str, Dict[str, Any]]:
+        """
+        编译填空题答案键
+
+        Returns:
+            dict: {"blank1": {"answers": [...], "case_sensitive": bool,
+                   "accepted": frozenset}, ...}
+        """
+        compiled = {}
+        for blank_id, config in cls.normalize_blanks(blanks_data).items():
+            case_sensitive = config["case_sensitive"]
+            accepted = frozenset(
+                answer.strip() if case_sensitive else answer.strip().lower()
+                for answer in config["answers"]
+            )
+            compiled[blank_id] = {**config, "accepted": accepted}
+        return compiled
+
+    @staticmethod
+    def compile_choice_key(correct_answer):
+        """编译选择题答案键：多选为 frozenset，单选保持原值"""
+        if isinstance(correct_answer, list):
+            return frozenset(correct_answer)
+        return correct_answer
+
+    @classmethod
+    def _get_compiled(cls, store, pk, raw, compiler):
+        """按主键取编译结果；原始配置变化或未缓存时重新编译"""
+        entry = store.get(pk)
+        if entry is not None and entry[0] == raw:
+            return entry[1]
+
+        compiled = compiler(raw)
+        if pk is not None:
+            if len(store) >= cls.MAX_ENTRIES:
+                store.clear()
+            store[pk] = (copy.deepcopy(raw), compiled)
+        return compiled
+
+    @classmethod
+    def get_fillblank_key(cls, fillblank_problem):
+        """获取填空题的编译答案键"""
+        return cls._get_compiled(
+            cls._fillblank_keys,
+            fillblank_problem.pk,
+            fillblank_problem.blanks,
+            cls.compile_fillblank_key,
+        )
+
+    @classmethod
+    def get_choice_key(cls, choice_problem):
+        """获取选择题的编译答案键"""
+        return cls._get_compiled(
+            cls._choice_keys,
+            choice_problem.pk,
+            choice_problem.correct_answer,
+            cls.compile_choice_key,
+        )
+
+    @classmethod
+    def invalidate(cls, fillblank_id=None, choice_id=None):
+        """清除题目的编译答案键"""
+        if fillblank_id is not None:
+            cls._fillblank_keys.pop(fillblank_id, None)
+        if choice_id is not None:
+            cls._choice_keys.pop(choice_id, None)
+
+    @classmethod
+    def check_fillblank(cls, fillblank_problem, user_answers) -> Dict[str, Any]:
+        """
+        判定填空题答案
+
+        Args:
+            fillblank_problem: FillBlankProblem 实例
+            user_answers: {"blank1": "user_answer1", ...}
+
+        Returns:
+            dict: {"results": {blank_id: {"user_answer", "is_correct",
+                   "correct_answers"}}, "correct_count": int, "total_count": int}
+        """
+        user_answers = user_answers or {}
+        results = {}
+        correct_count = 0
+
+        for blank_id, blank in cls.get_fillblank_key(fillblank_problem).items():
+            user_answer = user_answers.get(blank_id, "").strip()
+            candidate = user_answer if blank["case_sensitive"] else user_answer.lower()
+            is_correct = candidate in blank["accepted"]
+            if is_correct:
+                correct_count += 1
+            results[blank_id] = {
+                "user_answer": user_answer,
+                "is_correct": is_correct,
+                "correct_answers": blank["answers"],
+            }
+
+        return {
+            "results": results,
+            "correct_count": correct_count,
+            "total_count": len(results),
+        }
+
+    @classmethod
+    def check_choice(cls, choice_problem, user_answer) -> bool:
+        """判定选择题答案（多选需选项集合完全一致）"""
+        correct_answer = cls.get_choice_key(choice_problem)
+        if isinstance(correct_answer, frozenset):
+            return isinstance(user_answer, list) and set(user_answer) == correct_answer
+        return user_answer == correct_answer
+
+
+class ExamGradingService:
+    """
+    测验评分服务
+
+    同步提交（ExamViewSet.submit）和异步评分任务（grade_exam_submission）
+    共用。答案和分值一次性取出，评分结果用 bulk_update 一次写回。
+    """
+
+    @staticmethod
+    def get_answers_queryset(submission=None):
+        """答案查询集：连同题目和选择题/填空题的答案配置一起取出"""
+        from .models import ExamAnswer
+
+        queryset = ExamAnswer.objects.select_related(
+            "problem__choice_info", "problem__fillblank_info"
+        )
+        if submission is not None:
+            queryset = queryset.filter(submission=submission)
+        return queryset
+
+    @staticmethod
+    def get_problem_scores(exam):
+        """测验各题分值 {problem_id: score}（利用预取的 exam_problems）"""
+        return {
+            exam_problem.problem_id: exam_problem.score
+            for exam_problem in exam.exam_problems.all()
+        }
+
+    @classmethod
+    def grade_submission(cls, submission, answers=None, problem_scores=None):
+        """
+        评分提交
+        支持选择题和填空题
+
+        只更新 submission 的 total_score / is_passed，由调用方保存。
+
+        Args:
+            submission: 测验提交
+            answers: 已取出的答案列表（可选，默认查询提交的全部答案）
+            problem_scores: 各题分值 {problem_id: score}（可选）
+        """
+        from django.utils import timezone
+        from .models import ExamAnswer
+
+        if answers is None:
+            answers = list(cls.get_answers_queryset(submission))
+        if problem_scores is None:
+            problem_scores = cls.get_problem_scores(submission.exam)
+        total_score = 0
+        now = timezone.now()
+
+        for answer in answers:
+            # 获取该题在测验中的分值
+            max_score = problem_scores.get(answer.problem_id, 0)
+
+            if answer.problem.type == "choice":
+                result = cls.grade_choice_problem(answer, max_score)
+            elif answer.problem.type == "fillblank":
+                result = cls.grade_fillblank_problem(answer, max_score)
+            else:
+                # 不应该发生，因为测验只包含选择题和填空题
+                result = {"score": 0, "is_correct": False}
+
+            answer.score = result["score"]
+            answer.is_correct = result.get("is_correct", False)
+            answer.correct_percentage = result.get("correct_percentage")
+            # bulk_update 不会自动更新 auto_now 字段
+            answer.updated_at = now
+
+            total_score += result["score"]
+
+        ExamAnswer.objects.bulk_update(
+            answers,
+            [
+                "choice_answers",
+                "fillblank_answers",
+                "score",
+                "is_correct",
+                "correct_percentage",
+                "updated_at",
+            ],
+        )
+
+        # 更新提交记录
+        submission.total_score = total_score
+        submission.is_passed = total_score >= submission.exam.passing_score
+
+    @staticmethod
+    def grade_choice_problem(answer, max_score):
+        """评分选择题"""
+        from .models import ChoiceProblem
+
+        try:
+            choice_info = answer.problem.choice_info
+        except ChoiceProblem.DoesNotExist:
+            return {"score": 0, "is_correct": False}
+
+        is_correct = AnswerKeyService.check_choice(choice_info, answer.choice_answers)
+
+        return {"score": max_score if is_correct else 0, "is_correct": is_correct}
+
+    @staticmethod
+    def grade_fillblank_problem(answer, max_score):
+        """
+        评分填空题
+        基于正确比例计分（如3个空白答对2个，得分为题目分数的2/3）
+        """
+        from .models import FillBlankProblem
+
+        try:
+            fillblank_problem = answer.problem.fillblank_info
+        except FillBlankProblem.DoesNotExist:
+            return {"score": 0, "is_correct": False, "correct_percentage": 0}
+
+        # 使用编译后的答案键判分（与 check_fillblank 共用）
+        checked = AnswerKeyService.check_fillblank(
+            fillblank_problem, answer.fillblank_answers
+        )
+        correct_count = checked["correct_count"]
+        total_count = checked["total_count"]
+
+        # 计算得分（按正确比例）
+        correct_percentage = correct_count / total_count if total_count > 0 else 0
+        score = max_score * correct_percentage
+
+        return {
+            "score": round(score, 2),
+            "is_correct": correct_count == total_count,
+            "correct_percentage": round(correct_percentage, 2),
+            "correct_count": correct_count,
+            "total_count": total_count,
+        }
+
+
+class ExamAutosaveService:
+    """
+    测验答案自动保存（Redis 缓冲 + 合并写入）
+
+    进行中的测验频繁自动保存时，答案增量先写入 Redis 哈希
+    exam_autosave:<submission_id>（字段为 problem_id，值为该题答案 JSON），
+    同一题的多次保存直接覆盖，一次自动保存只是一次 HSET。
+    有缓冲的提交ID记录在 exam_autosave:dirty 集合中，由定时任务
+    flush_exam_autosaves 批量写回 ExamAnswer；submit 时也会先合并缓冲。
+
+    写回后用比较删除（值未变才删除字段）清理缓冲，写回期间新到的
+    自动保存不会丢失。Redis 不可用时直接写数据库。
+    """
+
+    KEY_PREFIX = "exam_autosave"
+    DIRTY_KEY = "exam_autosave:dirty"
+    BUFFER_TTL = 24 * 3600
+    ANSWER_FIELDS = ("choice_answers", "fillblank_answers")
+
+    # 字段值未变时才删除（KEYS[1] 为缓冲键，ARGV 为 field, value 交替）
+    _DISCARD_SCRIPT = """
+local removed = 0
+for i = 1, #ARGV, 2 do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+        removed = removed + redis.call('HDEL', KEYS[1], ARGV[i])
+    end
+end
+return removed
+"""
+
+    @classmethod
+    def get_buffer_key(cls, submission_id) -> str:
+        return f"{cls.KEY_PREFIX}:{submission_id}"
+
+    @classmethod
+    def _get_redis(cls):
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+
+    @classmethod
+    def to_delta(cls, answer_data) -> Dict[str, Any]:
+        """从提交格式的单题答案中取出答案字段"""
+        problem_type = answer_data.get("problem_type")
+        if problem_type == "choice":
+            return {"choice_answers": answer_data.get("choice_answers")}
+        if problem_type == "fillblank":
+            return {"fillblank_answers": answer_data.get("fillblank_answers")}
+        return {
+            field: answer_data[field]
+            for field in cls.ANSWER_FIELDS
+            if field in answer_data
+        }
+
+    @classmethod
+    def buffer(cls, submission_id, deltas: Dict[int, Dict[str, Any]]) -> bool:
+        """
+        缓冲答案增量
+
+        Args:
+            submission_id: 进行中的测验提交ID
+            deltas: {problem_id: {"choice_answers" / "fillblank_answers": ...}}
+
+        Returns:
+            bool: 是否写入了 Redis（False 表示 Redis 不可用，调用方应直接写库）
+        """
+        if not deltas:
+            return True
+        key = cls.get_buffer_key(submission_id)
+        mapping = {
+            str(problem_id): json.dumps(delta, ensure_ascii=False, sort_keys=True)
+            for problem_id, delta in deltas.items()
+        }
+        try:
+            pipe = cls._get_redis().pipeline(transaction=False)
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, cls.BUFFER_TTL)
+            pipe.sadd(cls.DIRTY_KEY, submission_id)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to buffer exam autosave for {submission_id}: {e}")
+            return False
+        return True
+
+    @classmethod
+    def read(cls, submission_id) -> Dict[str, str]:
+        """读取缓冲的原始内容 {problem_id(str): 答案 JSON}（失败时为空）"""
+        try:
+            raw = cls._get_redis().hgetall(cls.get_buffer_key(submission_id))
+        except Exception as e:
+            logger.warning(f"Failed to read exam autosave for {submission_id}: {e}")
+            return {}
+        return {
+            (k.decode() if isinstance(k, bytes) else k): (
+                v.decode() if isinstance(v, bytes) else v
+            )
+            for k, v in raw.items()
+        }
+
+    @classmethod
+    def apply(cls, answers_by_problem, buffered: Dict[str, str]) -> list:
+        """
+        把缓冲内容合并到已取出的 ExamAnswer 上（不写库）
+
+        Returns:
+            list: 被修改的 ExamAnswer
+        """
+        changed = []
+        for problem_id, raw in buffered.items():
+            answer = answers_by_problem.get(int(problem_id))
+            if answer is None:
+                continue
+            for field, value in json.loads(raw).items():
+                if field in cls.ANSWER_FIELDS:
+                    setattr(answer, field, value)
+            changed.append(answer)
+        return changed
+
+    @classmethod
+    def discard(cls, submission_id, buffered: Dict[str, str]):
+        """删除已写回的缓冲字段（值已被新的自动保存覆盖的字段保留）"""
+        key = cls.get_buffer_key(submission_id)
+        try:
+            redis_conn = cls._get_redis()
+            if buffered:
+                args = [item for pair in buffered.items() for item in pair]
+                redis_conn.eval(cls._DISCARD_SCRIPT, 1, key, *args)
+            if not redis_conn.exists(key):
+                redis_conn.srem(cls.DIRTY_KEY, submission_id)
+        except Exception as e:
+            logger.warning(f"Failed to discard exam autosave for {submission_id}: {e}")
+
+    @classmethod
+    def write_answers(cls, answers):
+        """把答案字段批量写回数据库"""
+        from django.utils import timezone
+        from .models import ExamAnswer
+
+        now = timezone.now()
+        for answer in answers:
+            # bulk_update 不会自动更新 auto_now 字段
+            answer.updated_at = now
+        ExamAnswer.objects.bulk_update(answers, [*cls.ANSWER_FIELDS, "updated_at"])
+
+    @classmethod
+    def flush(cls, submission_id) -> int:
+        """
+        把单个提交的缓冲写回 ExamAnswer
+
+        只写回仍在进行中的提交；已提交的提交在 submit 时已合并过缓冲，
+        剩余内容直接丢弃。写回时持有提交记录的行锁（与 submit 相同），
+        避免 submit 提交后再用旧的缓冲覆盖已评分的答案。
+
+        Returns:
+            int: 写回的答案数
+        """
+        from django.db import transaction
+        from .models import ExamAnswer, ExamSubmission
+
+        buffered = cls.read(submission_id)
+        if not buffered:
+            cls.discard(submission_id, buffered)
+            return 0
+
+        changed = []
+        with transaction.atomic():
+            submission = (
+                ExamSubmission.objects.select_for_update()
+                .only("id", "status")
+                .filter(pk=submission_id)
+                .first()
+            )
+            # 在锁内重新检查状态：submit 已提交时不再写回
+            if submission is not None and submission.status == "in_progress":
+                answers = {
+                    answer.problem_id: answer
+                    for answer in ExamAnswer.objects.filter(
+                        submission_id=submission_id,
+                        problem_id__in=[int(problem_id) for problem_id in buffered],
+                    )
+                }
+                changed = cls.apply(answers, buffered)
+                if changed:
+                    cls.write_answers(changed)
+        # 事务提交后再清理缓冲，回滚时缓冲仍保留
+        cls.discard(submission_id, buffered)
+        return len(changed)
+
+    @classmethod
+    def flush_pending(cls, batch_size: int = 500) -> int:
+        """写回最多 batch_size 个有缓冲的提交，返回处理的提交数"""
+        try:
+            members = cls._get_redis().srandmember(cls.DIRTY_KEY, batch_size)
+        except Exception as e:
+            logger.warning(f"Failed to list pending exam autosaves: {e}")
+            return 0
+
+        for member in members:
+            submission_id = int(member)
+            try:
+                cls.flush(submission_id)
+            except Exception as e:
+                logger.error(
+                    f"Failed to flush exam autosave for {submission_id}: {e}",
+                    exc_info=True,
+                )
+        return len(members)
+
+
 # Batch user status retrieval functions for cache separation
 
 
+# 一次往返读取用户状态：报名记录、解锁快照中的锁定状态和学习进度在同一条
+# SQL 中按章节/问题展开。快照缺失时 has_snapshot 为 FALSE，由调用方回退到
+# 实时计算。unlock_states 为 jsonb，键为字符串形式的ID。
+_CHAPTER_USER_STATUS_SQL = """
+WITH enrollment AS (
+    SELECT id FROM courses_enrollment WHERE user_id = %s AND course_id = %s
+)
+SELECT ch.id,
+       e.id,
+       s.id IS NOT NULL,
+       COALESCE((s.unlock_states -> CAST(ch.id AS text) ->> 'locked')::boolean, FALSE),
+       p.completed
+FROM courses_chapter ch
+LEFT JOIN enrollment e ON TRUE
+LEFT JOIN courses_courseunlocksnapshot s ON s.enrollment_id = e.id
+LEFT JOIN courses_chapterprogress p
+    ON p.enrollment_id = e.id AND p.chapter_id = ch.id
+WHERE ch.course_id = %s
+ORDER BY ch."order", ch.id
+"""
+
+_PROBLEM_USER_STATUS_SQL = """
+WITH target AS (
+    SELECT ch.id AS chapter_id, e.id AS enrollment_id
+    FROM courses_chapter ch
+    LEFT JOIN courses_enrollment e
+        ON e.course_id = ch.course_id AND e.user_id = %s
+    WHERE ch.id = %s
+)
+SELECT pr.id,
+       t.enrollment_id,
+       s.id IS NOT NULL,
+       COALESCE((s.unlock_states -> CAST(pr.id AS text) ->> 'unlocked')::boolean, FALSE),
+       pp.status
+FROM target t
+JOIN courses_problem pr ON pr.chapter_id = t.chapter_id
+LEFT JOIN courses_problemunlocksnapshot s ON s.enrollment_id = t.enrollment_id
+LEFT JOIN courses_problemprogress pp
+    ON pp.enrollment_id = t.enrollment_id AND pp.problem_id = pr.id
+ORDER BY pr.id
+"""
+
+
+def _fetch_user_status_rows(sql, params):
+    """执行用户状态查询，返回 (id, enrollment_id, has_snapshot, flag, progress) 行"""
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
 def _compute_chapter_user_status(chapter_ids, user_id, course_id):
     """
     计算章节用户状态（纯业务逻辑，无缓存）
+
+    报名记录、快照锁定状态和章节进度由一条 SQL 读取；只有快照缺失时
+    才额外查询并实时计算。结果包含课程下的全部章节，chapter_ids 中
+    不属于该课程的ID按未开始处理。
     """
-    from .models import Enrollment, ChapterProgress, CourseUnlockSnapshot
+    rows = _fetch_user_status_rows(
+        _CHAPTER_USER_STATUS_SQL, [user_id, course_id, course_id]
+    )
+    enrollment_id = rows[0][1] if rows else None
+    if chapter_ids is None:
+        chapter_ids = [row[0] for row in rows]
 
-    # 从数据库获取用户状态
-    try:
-        enrollment = Enrollment.objects.get(user_id=user_id, course_id=course_id)
-    except Enrollment.DoesNotExist:
+    if enrollment_id is None:
         # 未注册课程，返回默认状态
         return {
             str(ch_id): {"status": "not_started", "is_locked": True}
             for ch_id in chapter_ids
         }
 
-    # 优先从快照获取解锁状态
-    unlock_states = {}
-    try:
-        snapshot = CourseUnlockSnapshot.objects.get(enrollment=enrollment)
-        unlock_states = snapshot.unlock_states
-    except CourseUnlockSnapshot.DoesNotExist:
-        # 如果快照不存在，触发异步创建
+    unlock_states = None
+    if not rows[0][2]:
+        # 如果快照不存在，触发异步创建，并使用实时计算作为回退
+        from .models import Enrollment
         from .tasks import refresh_unlock_snapshot
 
-        refresh_unlock_snapshot.delay(enrollment.id)
-        # 使用实时计算作为回退
-        from .services import UnlockSnapshotService
-
-        realtime_result = UnlockSnapshotService._compute_realtime(
+        refresh_unlock_snapshot.delay(enrollment_id)
+        enrollment = Enrollment.objects.select_related("course").get(id=enrollment_id)
+        unlock_states = UnlockSnapshotService._compute_realtime(
             enrollment.course, enrollment
-        )
-        unlock_states = realtime_result["unlock_states"]
-
-    # 获取章节进度
-    progress_records = ChapterProgress.objects.filter(
-        enrollment=enrollment, chapter_id__in=chapter_ids
-    ).values("chapter_id", "completed")
+        )["unlock_states"]
 
-    progress_map = {p["chapter_id"]: p["completed"] for p in progress_records}
-
-    # 获取用户在课程中所有已完成的章节ID（用于 prerequisite_progress 计算）
-    completed_chapter_ids = set(
-        ChapterProgress.objects.filter(
-            enrollment=enrollment, completed=True
-        ).values_list("chapter_id", flat=True)
-    )
-
-    # 合并状态
     result = {}
-    for ch_id in chapter_ids:
-        ch_id_str = str(ch_id)
-        is_completed = progress_map.get(ch_id, False)
-
-        # 确定状态
-        if ch_id not in progress_map:
+    completed_chapter_ids = []
+    for ch_id, _, _, snapshot_locked, completed in rows:
+        if completed is None:
             status = "not_started"
-        elif is_completed:
+        elif completed:
             status = "completed"
+            completed_chapter_ids.append(ch_id)
         else:
             status = "in_progress"
 
-        # 获取锁定状态（从快照或实时计算结果）
-        unlock_state = unlock_states.get(ch_id_str, {})
-        is_locked = unlock_state.get("locked", False)
+        if unlock_states is None:
+            is_locked = snapshot_locked
+        else:
+            is_locked = unlock_states.get(str(ch_id), {}).get("locked", False)
+
+        result[str(ch_id)] = {"status": status, "is_locked": is_locked}
 
-        result[ch_id_str] = {"status": status, "is_locked": is_locked}
+    for ch_id in chapter_ids:
+        result.setdefault(str(ch_id), {"status": "not_started", "is_locked": False})
 
     # 添加已完成章节ID列表（用于 prerequisite_progress 计算）
-    result["_meta"] = {"completed_chapter_ids": list(completed_chapter_ids)}
+    result["_meta"] = {"completed_chapter_ids": completed_chapter_ids}
 
     return result
 
 
-def get_chapter_user_status(chapter_ids, user_id, course_id):
+def get_chapter_list_global_queryset():
+    """
+    章节列表全局数据的查询集（配合 ChapterListGlobalSerializer）
+
+    不读取 content 列，并预取解锁条件和前置章节，避免逐章查询。
+    """
+    from django.db.models import Prefetch
+    from .models import Chapter
+
+    return (
+        Chapter.objects.defer("content")
+        .select_related("course", "unlock_condition")
+        .prefetch_related(
+            Prefetch(
+                "unlock_condition__prerequisite_chapters",
+                queryset=Chapter.objects.only("id", "title", "order"),
+                to_attr="prerequisite_chapters_all",
+            )
+        )
+        .order_by("order")
+    )
+
+
+def get_chapter_user_status_cache_key(user_id, course_id):
+    """章节用户状态的缓存key（供批量预读使用）"""
+    return get_standard_cache_key(
+        prefix="courses",
+        view_name="business:ChapterStatus",
+        parent_pks={"course_pk": course_id},
+        user_id=user_id,
+    )
+
+
+def get_chapter_user_status(chapter_ids, user_id, course_id, prefetched=None):
     """
     批量获取章节用户状态
 
+    缓存按课程保存全部章节的状态，chapter_ids 只在缓存未命中时用于计算，
+    因此必须是课程的全部章节；传 None 时从数据库读取。
+
     Args:
-        chapter_ids: 章节ID列表
+        chapter_ids: 课程全部章节的ID列表（可选）
         user_id: 用户ID
         course_id: 课程ID
+        prefetched: 已批量读取的缓存结果（可选，见 SeparatedCacheService.get_many）
 
     Returns:
         dict: 章节ID到用户状态的映射
     """
-    cache_key = get_standard_cache_key(
-        prefix="courses",
-        view_name="business:ChapterStatus",
-        parent_pks={"course_pk": course_id},
-        query_params={"user_id": user_id},
-    )
+    cache_key = get_chapter_user_status_cache_key(user_id, course_id)
 
     result = BusinessCacheService.cache_result(
         cache_key=cache_key,
         fetcher=lambda: _compute_chapter_user_status(chapter_ids, user_id, course_id),
         timeout=300,
+        prefetched=prefetched,
     )
 
     return result
@@ -985,73 +1571,62 @@ def get_chapter_user_status(chapter_ids, user_id, course_id):
 def _compute_problem_user_status(problem_ids, user_id, chapter_id):
     """
     计算问题用户状态（纯业务逻辑，无缓存）
-    """
-    from .models import Enrollment, ProblemProgress, ProblemUnlockSnapshot, Chapter
 
-    # 获取章节所属课程
-    try:
-        chapter = Chapter.objects.select_related("course").get(id=chapter_id)
-        course_id = chapter.course_id
-    except Chapter.DoesNotExist:
-        # 章节不存在，返回默认状态
-        return {
-            str(p_id): {"status": "not_started", "is_unlocked": False}
-            for p_id in problem_ids
-        }
+    章节、报名记录、快照解锁状态和问题进度由一条 SQL 读取；只有快照
+    缺失时才额外查询并实时计算。结果包含章节下的全部问题，因为缓存按
+    章节保存；problem_ids 中不属于该章节的ID按未解锁处理。
+    """
+    rows = _fetch_user_status_rows(_PROBLEM_USER_STATUS_SQL, [user_id, chapter_id])
+    enrollment_id = rows[0][1] if rows else None
 
-    # 从数据库获取用户状态
-    try:
-        enrollment = Enrollment.objects.get(user_id=user_id, course_id=course_id)
-    except Enrollment.DoesNotExist:
-        # 未注册课程，返回默认状态
+    if enrollment_id is None:
+        # 章节不存在或未注册课程，返回默认状态
         return {
             str(p_id): {"status": "not_started", "is_unlocked": False}
             for p_id in problem_ids
         }
 
-    # 优先从快照获取解锁状态
-    unlock_states = {}
-    try:
-        snapshot = ProblemUnlockSnapshot.objects.get(enrollment=enrollment)
-        unlock_states = snapshot.unlock_states
-    except ProblemUnlockSnapshot.DoesNotExist:
-        # 如果快照不存在，触发异步创建
+    unlock_states = None
+    if not rows[0][2]:
+        # 如果快照不存在，触发异步创建，并使用实时计算作为回退
+        from .models import Enrollment
         from .tasks import refresh_problem_unlock_snapshot
 
-        refresh_problem_unlock_snapshot.delay(enrollment.id)
-        # 使用实时计算作为回退
-        from .services import ProblemUnlockSnapshotService
-
-        realtime_result = ProblemUnlockSnapshotService._compute_realtime(
+        refresh_problem_unlock_snapshot.delay(enrollment_id)
+        enrollment = Enrollment.objects.select_related("course").get(id=enrollment_id)
+        unlock_states = ProblemUnlockSnapshotService._compute_realtime(
             enrollment.course, enrollment
-        )
-        unlock_states = realtime_result["unlock_states"]
+        )["unlock_states"]
 
-    # 获取问题进度
-    progress_records = ProblemProgress.objects.filter(
-        enrollment=enrollment, problem_id__in=problem_ids
-    ).values("problem_id", "status")
+    result = {}
+    for p_id, _, _, snapshot_unlocked, status in rows:
+        if unlock_states is None:
+            is_unlocked = snapshot_unlocked
+        else:
+            is_unlocked = unlock_states.get(str(p_id), {}).get("unlocked", False)
 
-    progress_map = {p["problem_id"]: p["status"] for p in progress_records}
+        result[str(p_id)] = {
+            "status": status or "not_started",
+            "is_unlocked": is_unlocked,
+        }
 
-    # 合并状态
-    result = {}
     for p_id in problem_ids:
-        p_id_str = str(p_id)
-
-        # 获取进度状态
-        status = progress_map.get(p_id, "not_started")
+        result.setdefault(str(p_id), {"status": "not_started", "is_unlocked": False})
 
-        # 获取解锁状态（从快照或实时计算结果）
-        unlock_state = unlock_states.get(p_id_str, {})
-        is_unlocked = unlock_state.get("unlocked", False)
+    return result
 
-        result[p_id_str] = {"status": status, "is_unlocked": is_unlocked}
 
-    return result
+def get_problem_user_status_cache_key(user_id, chapter_id):
+    """问题用户状态的缓存key（供批量预读使用）"""
+    return get_standard_cache_key(
+        prefix="courses",
+        view_name="business:ProblemStatus",
+        parent_pks={"chapter_pk": chapter_id},
+        user_id=user_id,
+    )
 
 
-def get_problem_user_status(problem_ids, user_id, chapter_id):
+def get_problem_user_status(problem_ids, user_id, chapter_id, prefetched=None):
     """
     批量获取问题用户状态
 
@@ -1059,21 +1634,18 @@ def get_problem_user_status(problem_ids, user_id, chapter_id):
         problem_ids: 问题ID列表
         user_id: 用户ID
         chapter_id: 章节ID
+        prefetched: 已批量读取的缓存结果（可选，见 SeparatedCacheService.get_many）
 
     Returns:
         dict: 问题ID到用户状态的映射
     """
-    cache_key = get_standard_cache_key(
-        prefix="courses",
-        view_name="business:ProblemStatus",
-        parent_pks={"chapter_pk": chapter_id},
-        query_params={"user_id": user_id},
-    )
+    cache_key = get_problem_user_status_cache_key(user_id, chapter_id)
 
     result = BusinessCacheService.cache_result(
         cache_key=cache_key,
         fetcher=lambda: _compute_problem_user_status(problem_ids, user_id, chapter_id),
         timeout=300,
+        prefetched=prefetched,
     )
 
     return result
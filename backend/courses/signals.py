@@ -14,8 +14,12 @@ from .models import (
     ChapterUnlockCondition,
     Chapter,
     Problem,
+    Course,
+    Exam,
+    FillBlankProblem,
+    ChoiceProblem,
 )
-from .services import ChapterUnlockService
+from .services import AnswerKeyService, ChapterUnlockService
 from common.utils.cache import delete_cache_pattern, CacheInvalidator
 from common.utils.cache import CacheInvalidator
 import logging
@@ -169,6 +173,18 @@ def invalidate_enrollment_cache_on_create(sender, instance, created, **kwargs):
             view_name=EnrollmentViewSet.__name__,
             user_id=instance.user.id,
         )
+        # 选课变化影响该用户的所有课程相关缓存，递增用户命名空间代际
+        CacheInvalidator.invalidate_namespace(f"user:{instance.user_id}")
+
+
+@receiver(post_delete, sender=Enrollment)
+def invalidate_user_namespace_on_enrollment_delete(sender, instance, **kwargs):
+    """
+    当 Enrollment 被删除时，递增该用户的缓存命名空间代际。
+
+    退课后该用户的选课列表、章节/题目状态等缓存全部失效，无需枚举缓存键。
+    """
+    CacheInvalidator.invalidate_namespace(f"user:{instance.user_id}")
 
 
 @receiver(post_save, sender=ChapterProgress)
@@ -284,7 +300,7 @@ def on_chapter_progress_change(sender, instance, **kwargs):
         prefix="courses",
         view_name="business:ChapterStatus",
         parent_pks={"course_pk": course_id},
-        query_params={"user_id": user_id},
+        user_id=user_id,
     )
     cache.delete(status_cache_key)
 
@@ -325,7 +341,7 @@ def on_problem_progress_change(sender, instance, **kwargs):
         prefix="courses",
         view_name="business:ProblemStatus",
         parent_pks={"chapter_pk": chapter_id},
-        query_params={"user_id": user_id},
+        user_id=user_id,
     )
     cache.delete(cache_key)
 
@@ -335,16 +351,17 @@ def on_problem_progress_change(sender, instance, **kwargs):
 
 
 @receiver(post_save, sender=Chapter)
+@receiver(post_delete, sender=Chapter)
 def on_chapter_content_change(sender, instance, **kwargs):
     """
     章节内容变化 → 失效全局数据缓存
 
-    当章节内容（title, content, order等）被修改时，失效该章节的全局数据缓存
-    和该课程所属的章节列表缓存。
+    当章节内容（title, content, order等）被修改或章节被删除时，失效该章节的
+    全局数据缓存和该课程所属的章节列表缓存（包括按页缓存的列表）。
     不影响用户状态缓存。
     """
     from django.core.cache import cache
-    from common.utils.cache import get_standard_cache_key
+    from common.utils.cache import CacheInvalidator, get_standard_cache_key
 
     chapter_id = instance.id
     course_id = instance.course_id
@@ -369,6 +386,11 @@ def on_chapter_content_change(sender, instance, **kwargs):
     )
     cache.delete(list_cache_key)
 
+    # 按页缓存的列表（ChapterViewSet.list）登记在课程的 GLOBAL 标签下
+    CacheInvalidator.invalidate_tags(
+        f"courses:ChapterViewSet:SEPARATED:GLOBAL:course_pk={course_id}"
+    )
+
     logger.debug(
         f"Invalidated chapter global cache for chapter {chapter_id} and course {course_id}"
     )
@@ -413,3 +435,48 @@ def on_problem_content_change(sender, instance, **kwargs):
     logger.debug(
         f"Invalidated problem global cache for problem {problem_id} and chapter {chapter_id}"
     )
+
+
+@receiver([post_save, post_delete], sender=FillBlankProblem)
+def invalidate_fillblank_answer_key(sender, instance, **kwargs):
+    """填空题答案配置变化 → 清除编译后的答案键"""
+    AnswerKeyService.invalidate(fillblank_id=instance.pk)
+
+
+@receiver([post_save, post_delete], sender=ChoiceProblem)
+def invalidate_choice_answer_key(sender, instance, **kwargs):
+    """选择题答案变化 → 清除编译后的答案键"""
+    AnswerKeyService.invalidate(choice_id=instance.pk)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Chapter)
+@receiver(post_save, sender=Problem)
+@receiver(post_save, sender=Exam)
+def add_resource_id_on_create(sender, instance, created, **kwargs):
+    """
+    资源创建 → 在资源 ID 位图中标记该 ID
+
+    位图用于在 retrieve 时拒绝一定不存在的 ID（见 ResourceIdFilterMixin）。
+    """
+    if created:
+        from common.utils.cache import add_resource_ids
+
+        add_resource_ids(sender, instance.pk)
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Chapter)
+@receiver(post_delete, sender=Problem)
+@receiver(post_delete, sender=Exam)
+def remove_resource_id_on_delete(sender, instance, **kwargs):
+    """
+    资源删除 → 事务提交后从资源 ID 位图中清除该 ID
+
+    提交前清除的话，事务回滚会让仍然存在的资源被误判为不存在。
+    """
+    from django.db import transaction
+    from common.utils.cache import remove_resource_ids
+
+    pk = instance.pk
+    transaction.on_commit(lambda: remove_resource_ids(sender, pk))
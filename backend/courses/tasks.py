@@ -287,4 +287,141 @@ def cleanup_old_problem_snapshots(days: int = 30):
         extra={'days': days}
     )
 
-    return count
\ No newline at end of file
+    return count
+
+@shared_task(
+    bind=True,
+    max_retries=3,
+    default_retry_delay=10,
+    autoretry_for=(Exception,),
+    acks_late=True,
+)
+def grade_exam_submission(self, submission_id: int):
+    """
+    异步评分测验提交（EXAM_ASYNC_GRADING 模式）
+
+    路由到 exam_grading 队列（见 CELERY_TASK_ROUTES），并发由该队列
+    worker 的 --concurrency 限制，平滑测验截止时的提交洪峰。
+
+    幂等：行锁内只处理 submitted / auto_submitted 状态的提交，
+    重复投递或重试时已评分的提交直接跳过。
+
+    Returns:
+        dict: {'submission_id', 'total_score', 'is_passed'}，跳过时返回 None
+    """
+    from django.db import transaction
+    from .models import ExamSubmission
+    from .services import ExamGradingService
+
+    with transaction.atomic():
+        try:
+            submission = (
+                ExamSubmission.objects.select_for_update(of=('self',))
+                .select_related('exam')
+                .get(id=submission_id)
+            )
+        except ExamSubmission.DoesNotExist:
+            logger.warning(
+                f"Exam submission {submission_id} no longer exists, skipping grading",
+                extra={'submission_id': submission_id}
+            )
+            return None
+
+        if submission.status not in ('submitted', 'auto_submitted'):
+            logger.info(
+                f"Exam submission {submission_id} is {submission.status}, skipping grading",
+                extra={'submission_id': submission_id}
+            )
+            return None
+
+        ExamGradingService.grade_submission(submission)
+        submission.status = 'graded'
+        submission.save(update_fields=['total_score', 'is_passed', 'status'])
+
+    logger.info(
+        f"Graded exam submission {submission_id}",
+        extra={
+            'submission_id': submission_id,
+            'exam_id': submission.exam_id,
+            'total_score': str(submission.total_score),
+        }
+    )
+
+    return {
+        'submission_id': submission_id,
+        'total_score': str(submission.total_score),
+        'is_passed': submission.is_passed,
+    }
+
+
+@shared_task
+def flush_exam_autosaves(batch_size: int = 500):
+    """
+    把 Redis 中缓冲的测验自动保存批量写回 ExamAnswer
+
+    调用频率：每 30 秒（见 CELERY_BEAT_SCHEDULE）
+
+    Returns:
+        int: 处理的提交数
+    """
+    from .services import ExamAutosaveService
+
+    count = ExamAutosaveService.flush_pending(batch_size)
+    if count:
+        logger.info(
+            f"Flushed exam autosaves for {count} submissions",
+            extra={'count': count}
+        )
+    return count
+
+
+@shared_task
+def compact_code_drafts(hours: int = None, batch_size: int = 1000):
+    """
+    压缩代码草稿历史
+
+    超过 hours 小时（默认 settings.CODE_DRAFT_AUTOSAVE_RETENTION_HOURS）
+    未更新的自动保存只是两个检查点之间的中间状态，删除它们，只保留
+    手动保存、提交记录，以及每个 (user, problem) 的最新一条草稿。
+    按 batch_size 分批删除，避免长事务。
+
+    调度：Celery Beat，每小时执行
+
+    Returns:
+        int: 删除的草稿数
+    """
+    from datetime import timedelta
+    from django.conf import settings
+    from django.db.models import OuterRef, Subquery
+    from django.utils import timezone
+    from .models import CodeDraft
+
+    if hours is None:
+        hours = getattr(settings, 'CODE_DRAFT_AUTOSAVE_RETENTION_HOURS', 24)
+    cutoff = timezone.now() - timedelta(hours=hours)
+
+    latest_draft = (
+        CodeDraft.objects.filter(user=OuterRef('user'), problem=OuterRef('problem'))
+        .order_by('-created_at')
+        .values('id')[:1]
+    )
+    expired = (
+        CodeDraft.objects.filter(save_type='auto_save', updated_at__lt=cutoff)
+        .exclude(id=Subquery(latest_draft))
+        .values_list('id', flat=True)
+    )
+
+    total = 0
+    while True:
+        ids = list(expired[:batch_size])
+        if not ids:
+            break
+        total += CodeDraft.objects.filter(id__in=ids).delete()[0]
+
+    if total:
+        logger.info(
+            f"Compacted {total} code drafts older than {hours} hours",
+            extra={'hours': hours, 'count': total}
+        )
+
+    return total
@@ -0,0 +1,62 @@
+"""
+benchmark_hot_paths 管理命令测试
+"""
+
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from courses.models import Chapter
+
+
+class TestBenchmarkHotPathsCommand(TestCase):
+    """测试 benchmark_hot_paths 管理命令"""
+
+    def _run(self, *args):
+        out = StringIO()
+        call_command(
+            "benchmark_hot_paths",
+            "--chapters=4",
+            "--problems=12",
+            "--enrollments=3",
+            "--snapshots=2",
+            "--repeat=1",
+            "--number=1",
+            "--json",
+            *args,
+            stdout=out,
+        )
+        return json.loads(out.getvalue())
+
+    def test_reports_every_benchmark_and_rolls_back_fixtures(self):
+        report = self._run("--no-save")
+
+        names = {row["name"] for row in report["results"]}
+        self.assertEqual(
+            names,
+            {
+                "merge_global_and_user_status",
+                "merge_status_exclude_content",
+                "snapshot_recompute",
+                "grade_fillblank_problem",
+                "markdown_frontmatter_parse",
+                "get_standard_cache_key",
+            },
+        )
+        for row in report["results"]:
+            self.assertGreaterEqual(row["median_ms"], 0)
+        self.assertFalse(Chapter.objects.exists())
+
+    def test_compares_with_previous_report(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            self._run(f"--output-dir={output_dir}", "--only=get_standard_cache_key")
+            report = self._run(
+                f"--output-dir={output_dir}", "--only=get_standard_cache_key"
+            )
+
+            self.assertEqual(len(list(Path(output_dir).glob("hot_paths-*.json"))), 2)
+            self.assertIn("get_standard_cache_key", report["comparison"])
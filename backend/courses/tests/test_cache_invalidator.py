@@ -210,10 +210,10 @@ class CacheInvalidatorTestCase(TestCase):
             self.assertFalse(result)
             mock_delete.assert_called_once()
 
-    def test_invalidate_cache_pattern_error_handling(self):
-        """Test pattern deletion error handling"""
-        # Mock delete_cache_pattern to raise an exception
-        with patch("common.utils.cache.delete_cache_pattern") as mock_delete_pattern:
+    def test_invalidate_cache_tag_error_handling(self):
+        """Test tag invalidation error handling"""
+        # Mock invalidate_cache_tags to raise an exception
+        with patch("common.utils.cache.invalidate_cache_tags") as mock_delete_pattern:
             mock_delete_pattern.side_effect = Exception("Redis connection error")
 
             # Should not raise exception, should return False
@@ -225,39 +225,37 @@ class CacheInvalidatorTestCase(TestCase):
             mock_delete_pattern.assert_called_once()
 
     def test_invalidate_viewset_list_with_user_id(self):
-        """Test invalidating a ViewSet list with user_id generates correct pattern"""
-        with patch("common.utils.cache.delete_cache_pattern") as mock_delete_pattern:
+        """Test invalidating a ViewSet list with user_id uses the user tag"""
+        with patch("common.utils.cache.invalidate_cache_tags") as mock_invalidate_tags:
             result = CacheInvalidator.invalidate_viewset_list(
                 prefix="api", view_name="EnrollmentViewSet", user_id=self.user.id
             )
 
             self.assertTrue(result)
-            # Pattern should match: api:EnrollmentViewSet:*user_id=X
-            # This matches both: api:EnrollmentViewSet:user_id=X (no params)
+            # Tag covers both: api:EnrollmentViewSet:user_id=X (no params)
             # and: api:EnrollmentViewSet:page=1:user_id=X (with params)
-            expected_pattern = f"api:EnrollmentViewSet*user_id={self.user.id}"
-            mock_delete_pattern.assert_called_once_with(expected_pattern)
+            expected_tag = f"api:EnrollmentViewSet:user_id={self.user.id}"
+            mock_invalidate_tags.assert_called_once_with(expected_tag)
 
     def test_invalidate_viewset_list_backward_compatibility(self):
         """Test that invalidate_viewset_list works without user_id (backward compatibility)"""
-        with patch("common.utils.cache.delete_cache_pattern") as mock_delete_pattern:
+        with patch("common.utils.cache.invalidate_cache_tags") as mock_invalidate_tags:
             result = CacheInvalidator.invalidate_viewset_list(
                 prefix="api", view_name="CourseViewSet"
             )
 
             self.assertTrue(result)
-            expected_pattern = "api:CourseViewSet:*"
-            mock_delete_pattern.assert_called_once_with(expected_pattern)
+            mock_invalidate_tags.assert_called_once_with("api:CourseViewSet")
 
     def test_user_id_isolation(self):
         """Test that invalidating with user_id doesn't affect other users' cache"""
-        with patch("common.utils.cache.delete_cache_pattern") as mock_delete_pattern:
+        with patch("common.utils.cache.invalidate_cache_tags") as mock_invalidate_tags:
             CacheInvalidator.invalidate_viewset_list(
                 prefix="api", view_name="EnrollmentViewSet", user_id=self.user.id
             )
 
-            expected_pattern = f"api:EnrollmentViewSet*user_id={self.user.id}"
-            mock_delete_pattern.assert_called_once_with(expected_pattern)
+            expected_tag = f"api:EnrollmentViewSet:user_id={self.user.id}"
+            mock_invalidate_tags.assert_called_once_with(expected_tag)
 
 
 class CacheInvalidatorIntegrationTestCase(TestCase):
@@ -368,10 +366,10 @@ def test_enrollment_cache_invalidation_with_user_id(self):
         username="user1", email="user1@example.com", password="testpass123"
     )
 
-    with patch("common.utils.cache.delete_cache_pattern") as mock_delete_pattern:
+    with patch("common.utils.cache.invalidate_cache_tags") as mock_invalidate_tags:
         new_enrollment = EnrollmentFactory(user=user1, course=self.course)
 
-        # Pattern should be: api:EnrollmentViewSet*user_id=X
-        # This matches all cache keys for this user
-        expected_pattern = f"{EnrollmentViewSet.cache_prefix}*user_id={user1.id}"
-        mock_delete_pattern.assert_called_once_with(expected_pattern)
+        # Tag should be: api:EnrollmentViewSet:user_id=X
+        # This covers all cache keys for this user
+        expected_tag = f"{EnrollmentViewSet.cache_prefix}:EnrollmentViewSet:user_id={user1.id}"
+        mock_invalidate_tags.assert_called_once_with(expected_tag)
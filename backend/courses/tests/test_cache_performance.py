@@ -128,26 +128,30 @@ class CachePerformanceTest(TestCase):
         from common.utils.cache import AdaptiveTTLCalculator
 
         cache_key = "test:adaptive:ttl"
+        AdaptiveTTLCalculator._ttl_table_expires_at = 0.0
 
-        # First access (no stats) should use default TTL
+        # First access (no published table) should use default TTL
         ttl1 = AdaptiveTTLCalculator.calculate_ttl(cache_key, 900)
         self.assertEqual(ttl1, 900)  # Default TTL
 
-        # Record a few hits (cold data: < 10 hits)
-        for _ in range(5):
-            AdaptiveTTLCalculator.record_hit(cache_key)
+        with self.settings(ADAPTIVE_TTL_SAMPLE_RATE=1.0):
+            # Record a few hits (cold data: < 10 hits per key)
+            for i in range(25):
+                AdaptiveTTLCalculator.record_hit(f"{cache_key}:{i % 5}")
 
-        # Cold data should get shorter TTL (5 minutes)
-        ttl2 = AdaptiveTTLCalculator.calculate_ttl(cache_key, 900)
-        self.assertEqual(ttl2, 300)  # Cold data TTL
+            # Cold data should get shorter TTL (5 minutes)
+            AdaptiveTTLCalculator.build_ttl_table()
+            ttl2 = AdaptiveTTLCalculator.calculate_ttl(cache_key, 900)
+            self.assertEqual(ttl2, 300)  # Cold data TTL
 
-        # Record more hits to make it warm data (> 10 hits, good hit rate)
-        for _ in range(10):
-            AdaptiveTTLCalculator.record_hit(cache_key)
+            # Record more hits to make it warm data (> 10 hits per key, good hit rate)
+            for i in range(50):
+                AdaptiveTTLCalculator.record_hit(f"{cache_key}:{i % 5}")
 
-        # Warm data should get default TTL (15 minutes)
-        ttl3 = AdaptiveTTLCalculator.calculate_ttl(cache_key, 900)
-        self.assertEqual(ttl3, 900)  # Warm data TTL
+            # Warm data should get default TTL (15 minutes)
+            AdaptiveTTLCalculator.build_ttl_table()
+            ttl3 = AdaptiveTTLCalculator.calculate_ttl(cache_key, 900)
+            self.assertEqual(ttl3, 900)  # Warm data TTL
 
     def test_cache_key_structure(self):
         """Test cache keys are properly structured"""
@@ -487,19 +491,19 @@ class SeparatedCachePerformanceTestCase(TestCase):
             prefix="courses",
             view_name="business:ChapterStatus",
             parent_pks={"course_pk": course_id},
-            query_params={"user_id": self.user1.id},
+            user_id=self.user1.id,
         )
         user2_status_key = get_standard_cache_key(
             prefix="courses",
             view_name="business:ChapterStatus",
             parent_pks={"course_pk": course_id},
-            query_params={"user_id": self.user2.id},
+            user_id=self.user2.id,
         )
         user3_status_key = get_standard_cache_key(
             prefix="courses",
             view_name="business:ChapterStatus",
             parent_pks={"course_pk": course_id},
-            query_params={"user_id": self.user3.id},
+            user_id=self.user3.id,
         )
 
         status1 = get_cache(user1_status_key)
@@ -1027,3 +1027,42 @@ class UnderscoreCourseFilterTestCase(TestCase):
         self.assertEqual(stats['courses_skipped'], 1)
         self.assertEqual(stats['courses_filtered'], 1)
         self.assertEqual(Course.objects.count(), 1)
+
+
+
+class ImportCacheInvalidationTestCase(TestCase):
+    """测试导入课程后按命名空间失效缓存"""
+
+    def setUp(self):
+        """设置测试数据"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.repo_path = Path(self.temp_dir)
+        course_dir = self.repo_path / 'courses' / 'python-basics'
+        (course_dir / 'chapters').mkdir(parents=True)
+        (course_dir / 'course.md').write_text(textwrap.dedent('''
+            ---
+            title: Python Basics
+            description: Test course
+            ---
+            Test course content
+        ''').strip(), encoding='utf-8')
+
+    def tearDown(self):
+        """清理测试数据"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_import_bumps_course_generation_on_commit(self):
+        """测试导入提交后递增课程命名空间代际"""
+        from common.utils.cache import get_cache_generation
+        from courses.course_import_services.course_importer import CourseImporter
+
+        importer = CourseImporter(self.repo_path, update_mode=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            importer.import_all()
+        course = Course.objects.get(title='Python Basics')
+        generation = get_cache_generation(f"course:{course.id}")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            importer.import_all()
+
+        self.assertEqual(get_cache_generation(f"course:{course.id}"), generation + 1)
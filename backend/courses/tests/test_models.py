@@ -1138,6 +1138,27 @@ class CodeDraftModelTestCase(TestCase):
         self.assertEqual(drafts[0], draft2)
         self.assertEqual(drafts[1], draft1)
 
+    def test_content_hash_backfill_migration(self):
+        """Test the data migration fills content_hash for pre-existing drafts."""
+        from importlib import import_module
+        from django.apps import apps
+
+        migration = import_module(
+            'courses.migrations.0017_backfill_codedraft_content_hash'
+        )
+        old_draft = CodeDraftFactory(user=self.user, problem=self.problem, code="print(1)")
+        new_draft = CodeDraftFactory(user=self.user, problem=self.problem, code="print(2)")
+        CodeDraft.objects.filter(pk=old_draft.pk).update(content_hash='')
+
+        migration.backfill_content_hash(apps, None)
+
+        old_draft.refresh_from_db()
+        self.assertEqual(old_draft.content_hash, CodeDraft.compute_content_hash("print(1)"))
+        self.assertEqual(
+            CodeDraft.objects.get(pk=new_draft.pk).content_hash,
+            CodeDraft.compute_content_hash("print(2)"),
+        )
+
 
 # ============================================================================
 # Phase 5: Learning Progress
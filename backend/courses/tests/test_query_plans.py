@@ -0,0 +1,77 @@
+"""
+热点查询执行计划回归测试
+
+在小规模合成数据上关闭 enable_seqscan 取计划：数据量小时规划器本来就
+倾向顺序扫描，但关闭后仍顺序扫描说明该查询在大表上没有可用索引。
+"""
+
+import json
+import unittest
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from common.utils.query_plan import explain_queries, get_large_tables
+from courses.management.commands.explain_hot_queries import (
+    analyze_tables,
+    build_plan_fixtures,
+    get_hot_queries,
+)
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "EXPLAIN JSON requires PostgreSQL")
+class TestHotQueryPlans(TestCase):
+    """热点查询不应对大表顺序扫描"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fixtures = build_plan_fixtures(
+            chapter_count=6, problem_count=30, enrollment_count=8, files_per_user=2
+        )
+        analyze_tables(get_large_tables())
+
+    def test_hot_queries_use_indexes_on_large_tables(self):
+        for name, func in get_hot_queries(self.fixtures).items():
+            with self.subTest(query=name):
+                statements = explain_queries(func)
+                self.assertTrue(statements)
+                for row in statements:
+                    self.assertEqual(row["index_check_seq_scans"], [], row["sql"])
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "EXPLAIN JSON requires PostgreSQL")
+class TestExplainHotQueriesCommand(TestCase):
+    """测试 explain_hot_queries 管理命令"""
+
+    def test_command_reports_every_query(self):
+        out = StringIO()
+        call_command(
+            "explain_hot_queries",
+            "--chapters=4",
+            "--problems=12",
+            "--enrollments=3",
+            "--files-per-user=1",
+            "--no-save",
+            "--json",
+            "--fail-on-seq-scan",
+            stdout=out,
+        )
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(
+            set(report["queries"]),
+            {
+                "chapter_list_annotated",
+                "chapter_list_snapshot",
+                "problem_list",
+                "exam_submission_list",
+                "path_contents_root",
+                "path_contents_folder",
+            },
+        )
+        for statements in report["queries"].values():
+            for row in statements:
+                self.assertIn("total_cost", row)
+                self.assertIsNotNone(row["execution_ms"])
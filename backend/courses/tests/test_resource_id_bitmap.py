@@ -0,0 +1,226 @@
+"""
+Tests for the resource id bitmap (cache penetration filter).
+
+Covers bitmap rebuild, maintenance by create/delete signals, and the
+early 404 in retrieve views for ids that cannot exist.
+"""
+
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import override_settings
+from django_redis import get_redis_connection
+
+from accounts.tests.factories import UserFactory
+from common.utils.cache import (
+    get_resource_id_bitmap_key,
+    get_standard_cache_key,
+    rebuild_resource_id_bitmap,
+    resource_id_may_exist,
+)
+from courses.models import Chapter, Course, Problem
+from .conftest import CoursesTestCase
+from .factories import ChapterFactory, CourseFactory, EnrollmentFactory
+
+
+# 远大于测试中会创建的 ID，保证位图中对应位为 0
+MISSING_ID = 9_000_000
+
+
+def clear_resource_id_bitmaps():
+    redis_conn = get_redis_connection("default")
+    for model in (Course, Chapter, Problem):
+        key = get_resource_id_bitmap_key(model)
+        redis_conn.delete(key, f"{key}:ready")
+
+
+class ResourceIdBitmapTestCase(CoursesTestCase):
+    """Test cases for the resource id bitmap helpers."""
+
+    def setUp(self):
+        super().setUp()
+        clear_resource_id_bitmaps()
+        self.addCleanup(clear_resource_id_bitmaps)
+
+    def test_fails_open_before_rebuild(self):
+        """位图未构建时任何 ID 都视为可能存在"""
+        self.assertTrue(resource_id_may_exist(Course, MISSING_ID))
+
+    def test_rebuild_marks_existing_ids(self):
+        """重建后已有 ID 存在，未知 ID 不存在"""
+        course = CourseFactory()
+
+        count = rebuild_resource_id_bitmap(Course)
+
+        self.assertGreaterEqual(count, 1)
+        self.assertTrue(resource_id_may_exist(Course, course.pk))
+        self.assertTrue(resource_id_may_exist(Course, str(course.pk)))
+        self.assertFalse(resource_id_may_exist(Course, MISSING_ID))
+
+    def test_fails_open_when_bitmap_is_evicted(self):
+        """ready 标记仍在但位图被淘汰/删除时不拒绝请求"""
+        course = CourseFactory()
+        rebuild_resource_id_bitmap(Course)
+
+        get_redis_connection("default").delete(get_resource_id_bitmap_key(Course))
+
+        self.assertTrue(resource_id_may_exist(Course, course.pk))
+        self.assertTrue(resource_id_may_exist(Course, MISSING_ID))
+
+    def test_create_after_eviction_does_not_recreate_bitmap(self):
+        """位图被淘汰后新建资源不会重建出只有一位的位图"""
+        course = CourseFactory()
+        rebuild_resource_id_bitmap(Course)
+        bitmap_key = get_resource_id_bitmap_key(Course)
+        redis_conn = get_redis_connection("default")
+        redis_conn.delete(bitmap_key)
+
+        new_course = CourseFactory()
+
+        self.assertFalse(redis_conn.exists(bitmap_key))
+        self.assertTrue(resource_id_may_exist(Course, course.pk))
+        self.assertTrue(resource_id_may_exist(Course, new_course.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            new_course.delete()
+
+        self.assertFalse(redis_conn.exists(bitmap_key))
+        self.assertTrue(resource_id_may_exist(Course, course.pk))
+
+    def test_rebuild_after_eviction_keeps_ids_created_meanwhile(self):
+        """位图缺失时重建先删除残留的 ready 标记，构建期间新建的 ID 不丢失"""
+        rebuild_resource_id_bitmap(Course)
+        bitmap_key = get_resource_id_bitmap_key(Course)
+        redis_conn = get_redis_connection("default")
+        redis_conn.delete(bitmap_key)
+        created = []
+        values_list = Course._default_manager.values_list
+
+        def values_list_then_create(*args, **kwargs):
+            queryset = values_list(*args, **kwargs)
+            self.assertFalse(redis_conn.exists(f"{bitmap_key}:ready"))
+            created.append(CourseFactory())
+            return queryset.filter(pk__in=[])
+
+        with patch.object(
+            Course._default_manager, "values_list", side_effect=values_list_then_create
+        ):
+            rebuild_resource_id_bitmap(Course)
+
+        self.assertTrue(resource_id_may_exist(Course, created[0].pk))
+        self.assertFalse(resource_id_may_exist(Course, MISSING_ID))
+
+    def test_create_signal_adds_id(self):
+        """重建后新建的资源通过 post_save 信号登记"""
+        rebuild_resource_id_bitmap(Course)
+
+        course = CourseFactory()
+
+        self.assertTrue(resource_id_may_exist(Course, course.pk))
+
+    def test_delete_signal_removes_id_after_commit(self):
+        """删除的资源在事务提交后从位图中清除"""
+        course = CourseFactory()
+        rebuild_resource_id_bitmap(Course)
+        pk = course.pk
+
+        with self.captureOnCommitCallbacks(execute=True):
+            course.delete()
+
+        self.assertFalse(resource_id_may_exist(Course, pk))
+
+    def test_unparseable_ids_pass_through(self):
+        """无法作为位图偏移量的 ID 交给数据库判断"""
+        rebuild_resource_id_bitmap(Course)
+
+        self.assertTrue(resource_id_may_exist(Course, "abc"))
+        self.assertTrue(resource_id_may_exist(Course, -1))
+        self.assertTrue(resource_id_may_exist(Course, 2**40))
+
+    @override_settings(RESOURCE_ID_BITMAP_MODELS=[])
+    def test_disabled_models_pass_through(self):
+        """未启用的模型不做过滤"""
+        rebuild_resource_id_bitmap(Course)
+
+        self.assertTrue(resource_id_may_exist(Course, MISSING_ID))
+
+    def test_redis_failure_fails_open(self):
+        """Redis 故障时放行"""
+        rebuild_resource_id_bitmap(Course)
+
+        with patch(
+            "common.utils.cache.get_redis_connection",
+            side_effect=ConnectionError("redis down"),
+        ):
+            self.assertTrue(resource_id_may_exist(Course, MISSING_ID))
+
+    def test_rebuild_task_rebuilds_configured_models(self):
+        """定时任务重建所有配置的模型位图"""
+        from common.cache_warming.tasks import rebuild_resource_id_bitmaps
+
+        CourseFactory()
+
+        with self.settings(RESOURCE_ID_BITMAP_MODELS=["courses.Course"]):
+            results = rebuild_resource_id_bitmaps()
+
+        self.assertEqual(list(results), ["courses.Course"])
+        self.assertFalse(resource_id_may_exist(Course, MISSING_ID))
+
+
+class ResourceIdFilterViewTestCase(CoursesTestCase):
+    """Test cases for the early 404 in retrieve views."""
+
+    def setUp(self):
+        super().setUp()
+        clear_resource_id_bitmaps()
+        self.addCleanup(clear_resource_id_bitmaps)
+        self.user = UserFactory()
+        self.course = CourseFactory()
+        self.chapter = ChapterFactory(course=self.course, order=0)
+        EnrollmentFactory(user=self.user, course=self.course)
+        self.client.force_authenticate(user=self.user)
+        for model in (Course, Chapter, Problem):
+            rebuild_resource_id_bitmap(model)
+
+    def test_course_retrieve_rejects_missing_id_without_db(self):
+        """不存在的课程 ID 直接 404，不查库也不写空值标记"""
+        with self.assertNumQueries(0):
+            response = self.client.get(f"/api/v1/courses/{MISSING_ID}/")
+
+        self.assertEqual(response.status_code, 404)
+        cache_key = get_standard_cache_key(
+            prefix="courses", view_name="CourseViewSet", pk=str(MISSING_ID)
+        )
+        self.assertIsNone(cache.get(cache_key))
+
+    def test_course_retrieve_existing_id(self):
+        """存在的课程正常返回"""
+        response = self.client.get(f"/api/v1/courses/{self.course.id}/")
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_chapter_retrieve_rejects_missing_id(self):
+        """不存在的章节 ID 直接 404"""
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                f"/api/v1/courses/{self.course.id}/chapters/{MISSING_ID}/"
+            )
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_chapter_retrieve_existing_id(self):
+        """存在的章节正常返回"""
+        response = self.client.get(
+            f"/api/v1/courses/{self.course.id}/chapters/{self.chapter.id}/"
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_penetration_attempt_recorded(self):
+        """被拒绝的 ID 记录为缓存穿透尝试"""
+        with patch(
+            "common.mixins.cache_mixin.record_penetration_attempt"
+        ) as mock_record:
+            self.client.get(f"/api/v1/courses/{MISSING_ID}/")
+
+        mock_record.assert_called_once_with("CourseViewSet", str(MISSING_ID))
@@ -9,11 +9,19 @@ Run with:
 python manage.py test courses.tests.test_separated_cache --verbosity=2
 """
 
+from unittest.mock import patch
+
 from django.test import TestCase
 from django.core.cache import cache
+from rest_framework.test import APIClient
 from courses.tests.factories import CourseFactory, ChapterFactory, EnrollmentFactory
 from accounts.models import User
-from common.utils.cache import get_standard_cache_key, set_cache, get_cache
+from common.utils.cache import (
+    get_standard_cache_key,
+    set_cache,
+    get_cache,
+    get_cache_many,
+)
 
 
 class SeparatedCacheTestCase(TestCase):
@@ -326,3 +334,104 @@ class SeparatedCacheIntegrationTestCase(TestCase):
 
         # The behavior here depends on the specific business logic
         # This test just verifies that the cache keys are correctly isolated
+
+
+class SeparatedCacheBatchReadTestCase(TestCase):
+    """Test that list views resolve global data and user status in one batched read"""
+
+    def setUp(self):
+        cache.clear()
+        self.course = CourseFactory()
+        self.chapter = ChapterFactory(course=self.course)
+        self.user = User.objects.create_user("batch", "batch@example.com", "password")
+        EnrollmentFactory(user=self.user, course=self.course)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_chapter_list_reads_both_layers_with_single_batch(self):
+        url = f"/api/v1/courses/{self.course.id}/chapters/"
+        # 首次请求填充两层缓存
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        with patch(
+            "common.services.separated_cache.get_cache"
+        ) as mock_separated_get, patch(
+            "common.services.business_cache.get_cache"
+        ) as mock_business_get, patch(
+            "common.services.separated_cache.get_cache_many",
+            wraps=get_cache_many,
+        ) as mock_get_many:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        mock_get_many.assert_called_once()
+        mock_separated_get.assert_not_called()
+        mock_business_get.assert_not_called()
+        self.assertEqual(response.data["results"][0]["id"], self.chapter.id)
+
+
+class SeparatedCachePaginationTestCase(TestCase):
+    """Test that the chapter list paginates the global data before merging user status"""
+
+    def setUp(self):
+        cache.clear()
+        self.course = CourseFactory()
+        self.chapters = [
+            ChapterFactory(course=self.course, order=i) for i in range(1, 26)
+        ]
+        self.user = User.objects.create_user("pager", "pager@example.com", "password")
+        EnrollmentFactory(user=self.user, course=self.course)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = f"/api/v1/courses/{self.course.id}/chapters/"
+
+    def test_merges_only_requested_page(self):
+        from courses.views import ChapterViewSet
+
+        with patch.object(
+            ChapterViewSet,
+            "_merge_global_and_user_status",
+            autospec=True,
+            side_effect=ChapterViewSet._merge_global_and_user_status,
+        ) as mock_merge:
+            response = self.client.get(self.url, {"page": 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 25)
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            [chapter.id for chapter in self.chapters[10:20]],
+        )
+        merged_items = mock_merge.call_args[0][1]
+        self.assertEqual(len(merged_items), 10)
+
+    def test_cached_page_does_not_load_full_list(self):
+        from courses.views import ChapterViewSet
+
+        self.assertEqual(self.client.get(self.url, {"page": 3}).status_code, 200)
+
+        with patch.object(ChapterViewSet, "_get_global_list") as mock_full_list:
+            response = self.client.get(self.url, {"page": 3})
+
+        mock_full_list.assert_not_called()
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            [chapter.id for chapter in self.chapters[20:]],
+        )
+        # 状态缓存包含全部章节，而不只是首次请求的那一页
+        self.assertIn("status", response.data["results"][0])
+
+    def test_chapter_change_invalidates_cached_pages(self):
+        self.client.get(self.url, {"page": 1})
+
+        chapter = self.chapters[0]
+        chapter.title = "Renamed chapter"
+        chapter.save()
+
+        response = self.client.get(self.url, {"page": 1})
+        self.assertEqual(response.data["results"][0]["title"], "Renamed chapter")
+
+    def test_out_of_range_page_returns_404(self):
+        response = self.client.get(self.url, {"page": 9})
+
+        self.assertEqual(response.status_code, 404)
@@ -19,6 +19,7 @@ from courses.serializers import (
     CourseModelSerializer,
     ChapterSerializer,
     ChapterGlobalSerializer,
+    ChapterListGlobalSerializer,
     ProblemSerializer,
     ProblemGlobalSerializer,
     AlgorithmProblemSerializer,
@@ -2211,6 +2212,36 @@ class ChapterGlobalSerializerTestCase(TestCase):
         self.assertTrue(all("title" in item for item in data))
 
 
+class ChapterListGlobalSerializerTestCase(TestCase):
+    """Test cases for ChapterListGlobalSerializer."""
+
+    def test_omits_content_and_keeps_prerequisites(self):
+        """List representation drops the Markdown body but keeps prerequisite data."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from courses.services import get_chapter_list_global_queryset
+
+        course = CourseFactory()
+        first = ChapterFactory(course=course, order=1)
+        second = ChapterFactory(course=course, order=2)
+        condition = ChapterUnlockConditionFactory(
+            chapter=second, unlock_condition_type="prerequisite"
+        )
+        condition.prerequisite_chapters.set([first])
+
+        with CaptureQueriesContext(connection) as queries:
+            data = ChapterListGlobalSerializer(
+                get_chapter_list_global_queryset().filter(course=course), many=True
+            ).data
+
+        self.assertEqual(len(queries), 2)  # 章节（含解锁条件）+ 前置章节
+        self.assertNotIn("content", data[0])
+        self.assertEqual(
+            data[1]["prerequisite_chapters"],
+            [{"id": first.id, "title": first.title, "order": first.order}],
+        )
+
+
 class ProblemGlobalSerializerTestCase(TestCase):
     """Test cases for ProblemGlobalSerializer."""
 
@@ -1,5 +1,9 @@
+import threading
+import time
+import unittest
 from unittest.mock import patch, MagicMock
-from django.test import TestCase
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase
 from django.utils import timezone
 from datetime import timedelta
 
@@ -800,7 +804,7 @@ class GetChapterUserStatusTestCase(TestCase):
         with patch.object(
             BusinessCacheService,
             "cache_result",
-            side_effect=lambda cache_key, fetcher, timeout: fetcher(),
+            side_effect=lambda cache_key, fetcher, timeout, **kwargs: fetcher(),
         ) as mock_cache:
             # Call function (should query DB and cache result)
             result1 = get_chapter_user_status(chapter_ids, self.user.id, self.course.id)
@@ -941,7 +945,7 @@ class GetProblemUserStatusTestCase(TestCase):
         # Call function and verify BusinessCacheService is used
         with patch.object(BusinessCacheService, "cache_result") as mock_cache:
             # Set up mock to call the actual fetcher function
-            def side_effect(cache_key, fetcher, timeout):
+            def side_effect(cache_key, fetcher, timeout, **kwargs):
                 return fetcher()
 
             mock_cache.side_effect = side_effect
@@ -1101,3 +1105,340 @@ class CourseUnlockSnapshotStatusTestCase(TestCase):
 
         # Verify status comes from database (fallback)
         self.assertEqual(serializer.data["status"], "completed")
+
+
+class ComputeUserStatusSingleQueryTestCase(TestCase):
+    """用户状态缓存未命中时只需一次数据库往返"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.course = CourseFactory()
+        self.enrollment = EnrollmentFactory(user=self.user, course=self.course)
+        self.chapter1 = ChapterFactory(course=self.course, order=1)
+        self.chapter2 = ChapterFactory(course=self.course, order=2)
+        self.chapter3 = ChapterFactory(course=self.course, order=3)
+        self.problem1 = ProblemFactory(chapter=self.chapter1)
+        self.problem2 = ProblemFactory(chapter=self.chapter1)
+        ChapterProgressFactory(
+            enrollment=self.enrollment, chapter=self.chapter1, completed=True
+        )
+        ChapterProgressFactory(
+            enrollment=self.enrollment, chapter=self.chapter2, completed=False
+        )
+        ProblemProgressFactory(
+            enrollment=self.enrollment, problem=self.problem1, status="solved"
+        )
+
+    def test_chapter_status_with_snapshot_uses_one_query(self):
+        from courses.services import _compute_chapter_user_status
+
+        CourseUnlockSnapshot.objects.create(
+            course=self.course,
+            enrollment=self.enrollment,
+            unlock_states={
+                str(self.chapter1.id): {"locked": False, "reason": None},
+                str(self.chapter2.id): {"locked": False, "reason": None},
+                str(self.chapter3.id): {"locked": True, "reason": "prerequisite"},
+            },
+        )
+
+        with self.assertNumQueries(1):
+            result = _compute_chapter_user_status(None, self.user.id, self.course.id)
+
+        self.assertEqual(
+            result[str(self.chapter1.id)], {"status": "completed", "is_locked": False}
+        )
+        self.assertEqual(
+            result[str(self.chapter2.id)], {"status": "in_progress", "is_locked": False}
+        )
+        self.assertEqual(
+            result[str(self.chapter3.id)], {"status": "not_started", "is_locked": True}
+        )
+        self.assertEqual(result["_meta"], {"completed_chapter_ids": [self.chapter1.id]})
+
+    def test_chapter_status_not_enrolled_uses_one_query(self):
+        from courses.services import _compute_chapter_user_status
+
+        with self.assertNumQueries(1):
+            result = _compute_chapter_user_status(None, UserFactory().id, self.course.id)
+
+        self.assertEqual(len(result), 3)
+        for state in result.values():
+            self.assertEqual(state, {"status": "not_started", "is_locked": True})
+
+    @patch("courses.tasks.refresh_unlock_snapshot.delay")
+    def test_chapter_status_without_snapshot_falls_back_to_realtime(self, mock_delay):
+        from courses.services import _compute_chapter_user_status
+
+        condition = ChapterUnlockConditionFactory(
+            chapter=self.chapter3, unlock_condition_type="prerequisite"
+        )
+        condition.prerequisite_chapters.set([self.chapter2])
+
+        result = _compute_chapter_user_status(None, self.user.id, self.course.id)
+
+        mock_delay.assert_called_once_with(self.enrollment.id)
+        self.assertFalse(result[str(self.chapter2.id)]["is_locked"])
+        self.assertTrue(result[str(self.chapter3.id)]["is_locked"])
+
+    def test_problem_status_with_snapshot_uses_one_query(self):
+        from courses.services import _compute_problem_user_status
+
+        ProblemUnlockSnapshot.objects.create(
+            course=self.course,
+            enrollment=self.enrollment,
+            unlock_states={
+                str(self.problem1.id): {"unlocked": True, "reason": None},
+                str(self.problem2.id): {"unlocked": False, "reason": "prerequisite"},
+            },
+        )
+
+        with self.assertNumQueries(1):
+            result = _compute_problem_user_status(
+                [self.problem2.id], self.user.id, self.chapter1.id
+            )
+
+        # 缓存按章节保存，结果包含章节下的全部问题
+        self.assertEqual(
+            result,
+            {
+                str(self.problem1.id): {"status": "solved", "is_unlocked": True},
+                str(self.problem2.id): {"status": "not_started", "is_unlocked": False},
+            },
+        )
+
+    def test_problem_status_missing_chapter_uses_one_query(self):
+        from courses.services import _compute_problem_user_status
+
+        with self.assertNumQueries(1):
+            result = _compute_problem_user_status([self.problem1.id], self.user.id, 0)
+
+        self.assertEqual(
+            result, {str(self.problem1.id): {"status": "not_started", "is_unlocked": False}}
+        )
+
+
+class AnswerKeyServiceTestCase(TestCase):
+    """测试编译答案键的判分和缓存失效"""
+
+    def setUp(self):
+        from courses.services import AnswerKeyService
+
+        AnswerKeyService._fillblank_keys.clear()
+        AnswerKeyService._choice_keys.clear()
+
+    def test_normalizes_all_blank_formats(self):
+        from courses.services import AnswerKeyService
+
+        detailed = {"blank1": {"answer": [" Print "], "case_sensitive": True}}
+        simple = {"blanks": ["print", ["len", "size"]], "case_sensitive": False}
+        recommended = {"blanks": [{"answers": ["Print", "echo"]}]}
+
+        self.assertEqual(
+            AnswerKeyService.compile_fillblank_key(detailed)["blank1"]["accepted"],
+            frozenset({"Print"}),
+        )
+        simple_key = AnswerKeyService.compile_fillblank_key(simple)
+        self.assertEqual(simple_key["blank1"]["accepted"], frozenset({"print"}))
+        self.assertEqual(simple_key["blank2"]["accepted"], frozenset({"len", "size"}))
+        self.assertEqual(
+            AnswerKeyService.compile_fillblank_key(recommended)["blank1"]["accepted"],
+            frozenset({"print", "echo"}),
+        )
+
+    def test_check_fillblank(self):
+        from courses.services import AnswerKeyService
+        from .factories import FillBlankProblemFactory
+
+        fillblank = FillBlankProblemFactory(
+            blanks={
+                "blanks": [
+                    {"answers": ["Print"], "case_sensitive": True},
+                    {"answers": ["len", "size"], "case_sensitive": False},
+                ]
+            }
+        )
+
+        checked = AnswerKeyService.check_fillblank(
+            fillblank, {"blank1": "print", "blank2": " SIZE "}
+        )
+
+        self.assertEqual(checked["correct_count"], 1)
+        self.assertEqual(checked["total_count"], 2)
+        self.assertFalse(checked["results"]["blank1"]["is_correct"])
+        self.assertEqual(checked["results"]["blank2"]["user_answer"], "SIZE")
+        self.assertEqual(checked["results"]["blank2"]["correct_answers"], ["len", "size"])
+
+    def test_check_choice(self):
+        from courses.services import AnswerKeyService
+        from .factories import ChoiceProblemFactory
+
+        single = ChoiceProblemFactory(correct_answer="B")
+        multiple = ChoiceProblemFactory(multiple=True)
+
+        self.assertTrue(AnswerKeyService.check_choice(single, "B"))
+        self.assertFalse(AnswerKeyService.check_choice(single, "A"))
+        self.assertTrue(AnswerKeyService.check_choice(multiple, ["C", "A"]))
+        self.assertFalse(AnswerKeyService.check_choice(multiple, ["A"]))
+        self.assertFalse(AnswerKeyService.check_choice(multiple, "A"))
+
+    def test_compiles_once_and_recompiles_after_save(self):
+        from courses.models import FillBlankProblem
+        from courses.services import AnswerKeyService
+        from .factories import FillBlankProblemFactory
+
+        fillblank = FillBlankProblemFactory(blanks={"blanks": ["print"]})
+
+        with patch.object(
+            AnswerKeyService,
+            "compile_fillblank_key",
+            wraps=AnswerKeyService.compile_fillblank_key,
+        ) as mock_compile:
+            for _ in range(3):
+                AnswerKeyService.check_fillblank(fillblank, {"blank1": "print"})
+            self.assertEqual(mock_compile.call_count, 1)
+
+            fillblank.blanks = {"blanks": ["len"]}
+            fillblank.save()
+            self.assertNotIn(fillblank.pk, AnswerKeyService._fillblank_keys)
+
+            # 另一进程修改过的实例（原始配置不同）也会重新编译
+            stale = FillBlankProblem.objects.get(pk=fillblank.pk)
+            stale.blanks = {"blanks": ["max"]}
+            checked = AnswerKeyService.check_fillblank(stale, {"blank1": "max"})
+            self.assertEqual(checked["correct_count"], 1)
+
+
+class ExamAutosaveServiceTestCase(TestCase):
+    """测试测验自动保存的缓冲、合并和写回"""
+
+    def setUp(self):
+        from courses.services import ExamAutosaveService
+        from .factories import ExamAnswerFactory, ExamSubmissionFactory
+
+        self.service = ExamAutosaveService
+        self.submission = ExamSubmissionFactory(status="in_progress")
+        self.choice = ProblemFactory(type="choice")
+        self.fillblank = ProblemFactory(type="fillblank")
+        self.choice_answer = ExamAnswerFactory(
+            submission=self.submission, problem=self.choice
+        )
+        self.fillblank_answer = ExamAnswerFactory(
+            submission=self.submission, problem=self.fillblank
+        )
+        self.addCleanup(self._clear_buffer)
+
+    def _clear_buffer(self):
+        redis_conn = self.service._get_redis()
+        redis_conn.delete(self.service.get_buffer_key(self.submission.id))
+        redis_conn.srem(self.service.DIRTY_KEY, self.submission.id)
+
+    def test_buffer_coalesces_repeated_saves_without_db_writes(self):
+        with self.assertNumQueries(0):
+            for value in ("A", "B", "C"):
+                self.service.buffer(
+                    self.submission.id, {self.choice.id: {"choice_answers": value}}
+                )
+
+        buffered = self.service.read(self.submission.id)
+        self.assertEqual(buffered, {str(self.choice.id): '{"choice_answers": "C"}'})
+        self.choice_answer.refresh_from_db()
+        self.assertIsNone(self.choice_answer.choice_answers)
+
+    def test_flush_writes_answers_and_clears_buffer(self):
+        self.service.buffer(
+            self.submission.id,
+            {
+                self.choice.id: {"choice_answers": ["A", "B"]},
+                self.fillblank.id: {"fillblank_answers": {"blank1": "x"}},
+            },
+        )
+
+        self.assertEqual(self.service.flush(self.submission.id), 2)
+
+        self.choice_answer.refresh_from_db()
+        self.fillblank_answer.refresh_from_db()
+        self.assertEqual(self.choice_answer.choice_answers, ["A", "B"])
+        self.assertEqual(self.fillblank_answer.fillblank_answers, {"blank1": "x"})
+        self.assertEqual(self.service.read(self.submission.id), {})
+        redis_conn = self.service._get_redis()
+        self.assertFalse(
+            redis_conn.sismember(self.service.DIRTY_KEY, self.submission.id)
+        )
+
+    def test_discard_keeps_values_saved_after_read(self):
+        self.service.buffer(self.submission.id, {self.choice.id: {"choice_answers": "A"}})
+        buffered = self.service.read(self.submission.id)
+        # 写回期间又来了一次自动保存
+        self.service.buffer(self.submission.id, {self.choice.id: {"choice_answers": "B"}})
+
+        self.service.discard(self.submission.id, buffered)
+
+        self.assertEqual(
+            self.service.read(self.submission.id),
+            {str(self.choice.id): '{"choice_answers": "B"}'},
+        )
+
+    def test_flush_skips_submitted_submission(self):
+        self.service.buffer(self.submission.id, {self.choice.id: {"choice_answers": "A"}})
+        self.submission.status = "submitted"
+        self.submission.save(update_fields=["status"])
+
+        self.assertEqual(self.service.flush(self.submission.id), 0)
+        self.choice_answer.refresh_from_db()
+        self.assertIsNone(self.choice_answer.choice_answers)
+        self.assertEqual(self.service.read(self.submission.id), {})
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "Row locks require PostgreSQL")
+class ExamAutosaveFlushConcurrencyTestCase(TransactionTestCase):
+    """写回与 submit 并发：submit 持有行锁期间提交后，写回不能覆盖已评分的答案"""
+
+    def setUp(self):
+        from courses.services import ExamAutosaveService
+        from .factories import ExamAnswerFactory, ExamSubmissionFactory
+
+        self.service = ExamAutosaveService
+        self.submission = ExamSubmissionFactory(status="in_progress")
+        self.choice = ProblemFactory(type="choice")
+        self.answer = ExamAnswerFactory(submission=self.submission, problem=self.choice)
+        self.addCleanup(self._clear_buffer)
+
+    def _clear_buffer(self):
+        redis_conn = self.service._get_redis()
+        redis_conn.delete(self.service.get_buffer_key(self.submission.id))
+        redis_conn.srem(self.service.DIRTY_KEY, self.submission.id)
+
+    def _flush_in_thread(self, result):
+        try:
+            result["flushed"] = self.service.flush(self.submission.id)
+        finally:
+            connections.close_all()
+
+    def test_flush_waits_for_submit_and_skips_submitted(self):
+        from courses.models import ExamAnswer, ExamSubmission
+
+        self.service.buffer(self.submission.id, {self.choice.id: {"choice_answers": "A"}})
+        result = {}
+        worker = threading.Thread(target=self._flush_in_thread, args=(result,))
+
+        with transaction.atomic():
+            # 与 ExamViewSet.submit 相同的行锁
+            ExamSubmission.objects.select_for_update().get(pk=self.submission.pk)
+            worker.start()
+            time.sleep(0.3)
+            # 写回此时阻塞在行锁上
+            self.assertTrue(worker.is_alive())
+            ExamAnswer.objects.filter(pk=self.answer.pk).update(
+                choice_answers="B", is_correct=True, score=10
+            )
+            ExamSubmission.objects.filter(pk=self.submission.pk).update(
+                status="submitted"
+            )
+
+        worker.join(timeout=10)
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(result["flushed"], 0)
+        self.answer.refresh_from_db()
+        self.assertEqual(self.answer.choice_answers, "B")
+        self.assertTrue(self.answer.is_correct)
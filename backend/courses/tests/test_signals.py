@@ -57,7 +57,7 @@ class ChapterProgressSignalTestCase(CoursesTestCase):
             prefix="courses",
             view_name="business:ChapterStatus",
             parent_pks={"course_pk": self.course.id},
-            query_params={"user_id": self.user.id},
+            user_id=self.user.id,
         )
 
         return (
@@ -551,7 +551,7 @@ class SeparatedCacheSignalHandlersTestCase(TestCase):
             prefix="courses",
             view_name="business:ChapterStatus",
             parent_pks={"course_pk": course_id},
-            query_params={"user_id": user_id},
+            user_id=user_id,
         )
         cache.set(cache_key, {"1": {"status": "completed"}}, timeout=300)
 
@@ -579,13 +579,13 @@ class SeparatedCacheSignalHandlersTestCase(TestCase):
             prefix="courses",
             view_name="business:ChapterStatus",
             parent_pks={"course_pk": self.course.id},
-            query_params={"user_id": self.user.id},
+            user_id=self.user.id,
         )
         other_cache_key = get_standard_cache_key(
             prefix="courses",
             view_name="business:ChapterStatus",
             parent_pks={"course_pk": self.course.id},
-            query_params={"user_id": other_user.id},
+            user_id=other_user.id,
         )
 
         cache.set(user_cache_key, {"1": {"status": "not_started"}}, timeout=300)
@@ -615,7 +615,7 @@ class SeparatedCacheSignalHandlersTestCase(TestCase):
             prefix="courses",
             view_name="business:ProblemStatus",
             parent_pks={"chapter_pk": chapter_id},
-            query_params={"user_id": user_id},
+            user_id=user_id,
         )
         cache.set(cache_key, {"1": {"status": "solved"}}, timeout=300)
 
@@ -720,7 +720,7 @@ class SeparatedCacheSignalHandlersTestCase(TestCase):
             prefix="courses",
             view_name="business:ChapterStatus",
             parent_pks={"course_pk": self.course.id},
-            query_params={"user_id": self.user.id},
+            user_id=self.user.id,
         )
         cache.set(user_cache_key, {"1": {"status": "completed"}}, timeout=300)
 
@@ -760,3 +760,56 @@ class SeparatedCacheSignalHandlersTestCase(TestCase):
 
         # Verify cache was invalidated
         self.assertIsNone(cache.get(problem_cache_key))
+
+
+class EnrollmentNamespaceSignalTestCase(TestCase):
+    """
+    Test that enrollment changes bump the user's cache namespace generation.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory()
+        self.course = CourseFactory()
+
+    def _user_generation(self):
+        from common.utils.cache import get_cache_generation
+
+        return get_cache_generation(f"user:{self.user.id}")
+
+    def test_enrollment_create_bumps_user_generation(self):
+        before = self._user_generation()
+
+        EnrollmentFactory(user=self.user, course=self.course)
+
+        self.assertEqual(self._user_generation(), before + 1)
+
+    def test_enrollment_delete_bumps_user_generation(self):
+        enrollment = EnrollmentFactory(user=self.user, course=self.course)
+        before = self._user_generation()
+
+        enrollment.delete()
+
+        self.assertEqual(self._user_generation(), before + 1)
+
+    def test_enrollment_delete_invalidates_user_status_caches(self):
+        from common.utils.cache import get_cache, set_cache
+        from courses.services import (
+            get_chapter_user_status_cache_key,
+            get_problem_user_status_cache_key,
+        )
+
+        enrollment = EnrollmentFactory(user=self.user, course=self.course)
+        chapter_key = get_chapter_user_status_cache_key(self.user.id, self.course.id)
+        problem_key = get_problem_user_status_cache_key(self.user.id, 1)
+        set_cache(chapter_key, {"1": {"status": "completed"}})
+        set_cache(problem_key, {"1": {"status": "solved"}})
+
+        enrollment.delete()
+
+        self.assertIsNone(
+            get_cache(get_chapter_user_status_cache_key(self.user.id, self.course.id))
+        )
+        self.assertIsNone(
+            get_cache(get_problem_user_status_cache_key(self.user.id, 1))
+        )
@@ -16,8 +16,14 @@ from .factories import (
     ProblemFactory,
     ProblemUnlockConditionFactory,
     ProblemProgressFactory,
+    ChoiceProblemFactory,
+    ExamFactory,
+    ExamProblemFactory,
+    ExamSubmissionFactory,
+    ExamAnswerFactory,
+    CodeDraftFactory,
 )
-from courses.models import CourseUnlockSnapshot, ChapterProgress, ProblemUnlockSnapshot, ProblemProgress
+from courses.models import CodeDraft, CourseUnlockSnapshot, ChapterProgress, ProblemUnlockSnapshot, ProblemProgress
 from courses.tasks import (
     refresh_unlock_snapshot,
     batch_refresh_stale_snapshots,
@@ -27,6 +33,8 @@ from courses.tasks import (
     batch_refresh_stale_problem_snapshots,
     scheduled_problem_snapshot_refresh,
     cleanup_old_problem_snapshots,
+    grade_exam_submission,
+    compact_code_drafts,
 )
 
 
@@ -590,4 +598,83 @@ class CleanupOldProblemSnapshotsTaskTestCase(TestCase):
         # Snapshot should still exist
         self.assertTrue(
             ProblemUnlockSnapshot.objects.filter(id=snapshot.id).exists()
-        )
\ No newline at end of file
+        )
+
+class GradeExamSubmissionTaskTestCase(TestCase):
+    """Test grade_exam_submission task"""
+
+    def setUp(self):
+        """Set up a submitted exam with one correct choice answer."""
+        self.user = UserFactory()
+        self.course = CourseFactory()
+        self.enrollment = EnrollmentFactory(user=self.user, course=self.course)
+        self.exam = ExamFactory(course=self.course, status='published', passing_score=5)
+        choice = ChoiceProblemFactory(correct_answer='A')
+        ExamProblemFactory(exam=self.exam, problem=choice.problem, score=10)
+        self.submission = ExamSubmissionFactory(
+            exam=self.exam, enrollment=self.enrollment, user=self.user, status='submitted'
+        )
+        self.answer = ExamAnswerFactory(
+            submission=self.submission, problem=choice.problem, choice_answers='A'
+        )
+
+    def test_grades_submission_and_marks_graded(self):
+        """Test that the task scores answers and moves the submission to graded"""
+        result = grade_exam_submission(submission_id=self.submission.id)
+
+        self.submission.refresh_from_db()
+        self.answer.refresh_from_db()
+        self.assertEqual(self.submission.status, 'graded')
+        self.assertEqual(float(self.submission.total_score), 10)
+        self.assertTrue(self.submission.is_passed)
+        self.assertTrue(self.answer.is_correct)
+        self.assertEqual(result['submission_id'], self.submission.id)
+
+    def test_skips_already_graded_or_in_progress(self):
+        """Test that redelivered tasks do not regrade"""
+        grade_exam_submission(submission_id=self.submission.id)
+        self.assertIsNone(grade_exam_submission(submission_id=self.submission.id))
+
+        self.submission.status = 'in_progress'
+        self.submission.save(update_fields=['status'])
+        self.assertIsNone(grade_exam_submission(submission_id=self.submission.id))
+
+    def test_handles_nonexistent_submission(self):
+        """Test that a deleted submission is skipped"""
+        self.assertIsNone(grade_exam_submission(submission_id=99999))
+
+
+class CompactCodeDraftsTaskTestCase(TestCase):
+    """Test compact_code_drafts task"""
+
+    def setUp(self):
+        """Set up old auto-saves around a manual checkpoint."""
+        from datetime import timedelta
+        from django.utils import timezone
+
+        self.user = UserFactory()
+        self.problem = ProblemFactory(type='algorithm')
+        self.old_auto = CodeDraftFactory(user=self.user, problem=self.problem)
+        self.checkpoint = CodeDraftFactory(
+            user=self.user, problem=self.problem, save_type='manual_save'
+        )
+        self.latest = CodeDraftFactory(user=self.user, problem=self.problem)
+        self.recent = CodeDraftFactory(problem=self.problem)
+        CodeDraft.objects.exclude(id=self.recent.id).update(
+            updated_at=timezone.now() - timedelta(hours=48)
+        )
+
+    def test_deletes_expired_intermediate_auto_saves(self):
+        """Test that only old auto-saves that are not the latest draft are deleted"""
+        deleted = compact_code_drafts(hours=24, batch_size=1)
+
+        self.assertEqual(deleted, 1)
+        self.assertEqual(
+            set(CodeDraft.objects.values_list('id', flat=True)),
+            {self.checkpoint.id, self.latest.id, self.recent.id},
+        )
+
+    def test_respects_retention_window(self):
+        """Test that drafts newer than the window are kept"""
+        self.assertEqual(compact_code_drafts(hours=72), 0)
+        self.assertEqual(CodeDraft.objects.count(), 4)
@@ -44,10 +44,12 @@ from .factories import (
 from accounts.tests.factories import UserFactory
 
 from ..models import (
+    ExamAnswer,
     ExamSubmission,
     ChapterProgress,
     ProblemProgress,
     CodeDraft,
+    DiscussionThread,
 )
 
 User = get_user_model()
@@ -651,6 +653,38 @@ class ChapterViewSetTestCase(CoursesTestCase):
         self.assertIn(chapter2.id, chapter_ids)
         self.assertEqual(len(response.data["results"]), 2)
 
+    def test_annotate_is_locked_requires_every_prerequisite(self):
+        """Lock annotation needs all prerequisites completed and its SQL ignores progress size."""
+        from courses.views import ChapterViewSet
+
+        course = CourseFactory()
+        chapter1 = ChapterFactory(course=course, order=1)
+        chapter2 = ChapterFactory(course=course, order=2)
+        chapter3 = ChapterFactory(course=course, order=3)
+        condition = ChapterUnlockConditionFactory(
+            chapter=chapter3, unlock_condition_type="prerequisite"
+        )
+        condition.prerequisite_chapters.set([chapter1, chapter2])
+
+        partial = EnrollmentFactory(user=UserFactory(), course=course)
+        ChapterProgressFactory(enrollment=partial, chapter=chapter1, completed=True)
+        finished = EnrollmentFactory(user=UserFactory(), course=course)
+        ChapterProgressFactory(enrollment=finished, chapter=chapter1, completed=True)
+        ChapterProgressFactory(enrollment=finished, chapter=chapter2, completed=True)
+
+        viewset = ChapterViewSet()
+        queryset = Chapter.objects.filter(course_id=course.id)
+        partial_qs = viewset._annotate_is_locked(queryset, partial)
+        finished_qs = viewset._annotate_is_locked(queryset, finished)
+
+        self.assertTrue(partial_qs.get(pk=chapter3.pk).is_locked_db)
+        self.assertFalse(finished_qs.get(pk=chapter3.pk).is_locked_db)
+        self.assertFalse(partial_qs.get(pk=chapter2.pk).is_locked_db)
+        self.assertEqual(
+            partial_qs.query.sql_with_params()[0],
+            finished_qs.query.sql_with_params()[0],
+        )
+
     def test_all_condition_type_requires_both_conditions(self):
         """Test that 'all' condition type requires both prerequisites and date."""
         from django.utils import timezone
@@ -825,21 +859,67 @@ class ChapterViewSetTestCase(CoursesTestCase):
         response_normal = self.client.get(f"/api/v1/courses/{self.course.id}/chapters/")
         self.assertEqual(response_normal.status_code, 200)
         chapter_normal = response_normal.data["results"][0]
-        self.assertIn("content", chapter_normal)
+        self.assertIn("status", chapter_normal)
 
-        # Get response with exclude=content
+        # Get response with exclude=status
         response_excluded = self.client.get(
-            f"/api/v1/courses/{self.course.id}/chapters/?exclude=content"
+            f"/api/v1/courses/{self.course.id}/chapters/?exclude=status"
         )
         self.assertEqual(response_excluded.status_code, 200)
         chapter_excluded = response_excluded.data["results"][0]
-        self.assertNotIn("content", chapter_excluded)
+        self.assertNotIn("status", chapter_excluded)
 
         # Verify other fields are present
         self.assertIn("id", chapter_excluded)
         self.assertIn("title", chapter_excluded)
         self.assertIn("order", chapter_excluded)
 
+    def test_list_omits_content_by_default(self):
+        """Chapter list omits the Markdown body unless ?include=content is given."""
+        EnrollmentFactory(user=self.user, course=self.course)
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(f"/api/v1/courses/{self.course.id}/chapters/")
+        self.assertEqual(response.status_code, 200)
+        chapter = response.data["results"][0]
+        self.assertNotIn("content", chapter)
+        self.assertIn("is_locked", chapter)
+
+        response_included = self.client.get(
+            f"/api/v1/courses/{self.course.id}/chapters/?include=content"
+        )
+        self.assertEqual(response_included.status_code, 200)
+        self.assertEqual(
+            response_included.data["results"][0]["content"], self.chapter.content
+        )
+
+        response_detail = self.client.get(
+            f"/api/v1/courses/{self.course.id}/chapters/{self.chapter.id}/"
+        )
+        self.assertEqual(response_detail.data["content"], self.chapter.content)
+
+    def test_list_queryset_defers_content(self):
+        """The non-cached list path does not read the content column."""
+        EnrollmentFactory(user=self.user, course=self.course)
+        self.client.force_authenticate(user=self.user)
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                f"/api/v1/courses/{self.course.id}/chapters/?search={self.chapter.title}"
+            )
+        self.assertEqual(response.status_code, 200)
+        chapter_selects = [
+            q["sql"]
+            for q in queries.captured_queries
+            if q["sql"].startswith("SELECT") and 'FROM "courses_chapter"' in q["sql"]
+        ]
+        self.assertTrue(chapter_selects)
+        for sql in chapter_selects:
+            self.assertNotIn('"courses_chapter"."content"', sql.split(" FROM ")[0])
+
     def test_exclude_multiple_fields(self):
         """Test excluding multiple fields from the response."""
         EnrollmentFactory(user=self.user, course=self.course)
@@ -1465,6 +1545,40 @@ class SubmissionViewSetTestCase(CoursesTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertGreaterEqual(len(response.data["results"]), 2)
 
+    def test_list_submissions_cursor_pagination(self):
+        """Test that cursor pagination walks every page without a COUNT query."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        created = [
+            SubmissionFactory(user=self.user, problem=self.algorithm_problem)
+            for _ in range(5)
+        ]
+        self.client.force_authenticate(user=self.user)
+
+        seen = []
+        url = "/api/v1/submissions/?pagination=cursor&page_size=2"
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn("count", response.data)
+                seen.extend(item["id"] for item in response.data["results"])
+                url = response.data["next"]
+
+        self.assertEqual(seen, [submission.id for submission in reversed(created)])
+        self.assertFalse(
+            any("COUNT(" in query["sql"].upper() for query in queries.captured_queries)
+        )
+
+    def test_list_submissions_page_number_by_default(self):
+        """Test that page-number pagination with count stays the default."""
+        SubmissionFactory(user=self.user, problem=self.algorithm_problem)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get("/api/v1/submissions/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 1)
+
     # -------------------------------------------------------------------------
     # Retrieve action tests
     # -------------------------------------------------------------------------
@@ -1735,6 +1849,62 @@ class CodeDraftViewSetTestCase(CoursesTestCase):
         response = self.client.post("/api/v1/drafts/save_draft/", data)
         self.assertEqual(response.status_code, 400)
 
+    def _save(self, code, save_type="auto_save"):
+        return self.client.post(
+            "/api/v1/drafts/save_draft/",
+            {"problem_id": self.problem.id, "code": code, "save_type": save_type},
+        )
+
+    def test_save_draft_unchanged_code_does_not_insert(self):
+        """Test that saving identical code returns the latest draft without a new row."""
+        self.client.force_authenticate(user=self.user)
+        first = self._save("same code", "manual_save")
+        second = self._save("same code", "manual_save")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data["id"], first.data["id"])
+        self.assertEqual(second.data["code"], "same code")
+        self.assertEqual(CodeDraft.objects.filter(user=self.user).count(), 1)
+
+    def test_save_draft_coalesces_consecutive_auto_saves(self):
+        """Test that consecutive auto-saves update one row."""
+        self.client.force_authenticate(user=self.user)
+        first = self._save("v1")
+        second = self._save("v2")
+
+        self.assertEqual(second.status_code, 200)
+        draft = CodeDraft.objects.get(user=self.user)
+        self.assertEqual(draft.id, first.data["id"])
+        self.assertEqual(draft.code, "v2")
+        self.assertEqual(draft.content_hash, CodeDraft.compute_content_hash("v2"))
+
+    def test_save_draft_manual_save_promotes_auto_save(self):
+        """Test that a manual save of unchanged code turns the auto-save into a checkpoint."""
+        self.client.force_authenticate(user=self.user)
+        self._save("v1")
+        response = self._save("v1", "manual_save")
+
+        self.assertEqual(response.status_code, 200)
+        draft = CodeDraft.objects.get(user=self.user)
+        self.assertEqual(draft.save_type, "manual_save")
+
+    def test_save_draft_keeps_checkpoints(self):
+        """Test that an auto-save after a manual save creates a new row."""
+        self.client.force_authenticate(user=self.user)
+        self._save("v1", "manual_save")
+        response = self._save("v2")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            list(
+                CodeDraft.objects.filter(user=self.user)
+                .order_by("created_at")
+                .values_list("save_type", flat=True)
+            ),
+            ["manual_save", "auto_save"],
+        )
+
 
 # =============================================================================
 # Phase 3: Progress ViewSets
@@ -1957,6 +2127,40 @@ class DiscussionThreadViewSetTestCase(CoursesTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertGreaterEqual(len(response.data["results"]), 1)
 
+    def test_list_threads_cursor_pagination_uses_last_activity(self):
+        """Test that cursor pagination orders by last activity and ignores ?ordering."""
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        threads = [
+            DiscussionThreadFactory(course=self.course, author=self.user)
+            for _ in range(3)
+        ]
+        now = timezone.now()
+        for hours, thread in enumerate(threads):
+            DiscussionThread.objects.filter(pk=thread.pk).update(
+                last_activity_at=now - timedelta(hours=hours)
+            )
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(
+            f"/api/v1/courses/{self.course.id}/threads/"
+            "?pagination=cursor&page_size=2&ordering=reply_count"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("count", response.data)
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            [threads[0].id, threads[1].id],
+        )
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], [threads[2].id]
+        )
+        self.assertIsNone(response.data["next"])
+
     # -------------------------------------------------------------------------
     # Create action tests
     # -------------------------------------------------------------------------
@@ -2326,10 +2530,263 @@ class ExamViewSetTestCase(CoursesTestCase):
         submission.refresh_from_db()
         self.assertEqual(submission.status, "submitted")
 
+    def _start_and_submit(self, user, exam, answers):
+        """Start and submit an exam, returning (submit response, query count)."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.client.force_authenticate(user=user)
+        self.client.post(f"/api/v1/exams/{exam.id}/start/")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                f"/api/v1/exams/{exam.id}/submit/", {"answers": answers}, format="json"
+            )
+        return response, len(queries)
+
+    def test_submit_exam_query_count_independent_of_problem_count(self):
+        """Test that start/submit/grading use a constant number of queries."""
+        small_user, large_user = UserFactory(), UserFactory()
+        EnrollmentFactory(user=small_user, course=self.course)
+        EnrollmentFactory(user=large_user, course=self.course)
+        large_exam = ExamFactory(course=self.course, status="published")
+
+        answers = []
+        for i in range(6):
+            choice = ChoiceProblemFactory(correct_answer="A")
+            fillblank = FillBlankProblemFactory(
+                blanks={"blanks": [{"answers": ["x"], "case_sensitive": False}]}
+            )
+            ExamProblemFactory(exam=large_exam, problem=choice.problem, order=2 * i)
+            ExamProblemFactory(
+                exam=large_exam, problem=fillblank.problem, order=2 * i + 1
+            )
+            answers.append(
+                {
+                    "problem_id": choice.problem_id,
+                    "problem_type": "choice",
+                    "choice_answers": "A",
+                }
+            )
+            answers.append(
+                {
+                    "problem_id": fillblank.problem_id,
+                    "problem_type": "fillblank",
+                    "fillblank_answers": {"blank1": "X" if i % 2 else "y"},
+                }
+            )
+
+        small_response, small_count = self._start_and_submit(
+            small_user,
+            self.exam,
+            [
+                {
+                    "problem_id": self.choice_problem.id,
+                    "problem_type": "choice",
+                    "choice_answers": "A",
+                }
+            ],
+        )
+        large_response, large_count = self._start_and_submit(
+            large_user, large_exam, answers
+        )
+
+        self.assertEqual(small_response.status_code, 200)
+        self.assertEqual(large_response.status_code, 200)
+        self.assertEqual(large_count, small_count)
+        self.assertEqual(len(large_response.data["answers"]), 12)
+        # 6 道选择题全对，填空题答对 3 道
+        self.assertEqual(float(large_response.data["total_score"]), 90)
+        self.assertEqual(
+            ExamAnswer.objects.filter(
+                submission_id=large_response.data["id"], is_correct=True
+            ).count(),
+            9,
+        )
+
+    def test_submit_exam_unknown_problem_returns_404(self):
+        """Test that answering a problem outside the submission returns 404."""
+        EnrollmentFactory(user=self.user, course=self.course)
+        other_problem = ProblemFactory(type="choice")
+
+        response, _ = self._start_and_submit(
+            self.user,
+            self.exam,
+            [
+                {
+                    "problem_id": other_problem.id,
+                    "problem_type": "choice",
+                    "choice_answers": "A",
+                }
+            ],
+        )
+
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(
+            ExamSubmission.objects.filter(
+                exam=self.exam, user=self.user, status="in_progress"
+            ).exists()
+        )
+
+    @override_settings(EXAM_ASYNC_GRADING=True)
+    def test_submit_exam_async_grading_queues_task(self):
+        """Test that async mode stores raw answers and grades after commit."""
+        from unittest.mock import patch
+
+        EnrollmentFactory(user=self.user, course=self.course)
+        self.client.force_authenticate(user=self.user)
+        self.client.post(f"/api/v1/exams/{self.exam.id}/start/")
+        data = {
+            "answers": [
+                {
+                    "problem_id": self.choice_problem.id,
+                    "problem_type": "choice",
+                    "choice_answers": "A",
+                }
+            ]
+        }
+
+        with patch("courses.tasks.grade_exam_submission.delay") as mock_delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    f"/api/v1/exams/{self.exam.id}/submit/", data, format="json"
+                )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], "submitted")
+        mock_delay.assert_called_once_with(response.data["submission_id"])
+        answer = ExamAnswer.objects.get(submission_id=response.data["submission_id"])
+        self.assertEqual(answer.choice_answers, "A")
+        self.assertIsNone(answer.score)
+
+        from courses.tasks import grade_exam_submission
+
+        grade_exam_submission(response.data["submission_id"])
+        results = self.client.get(f"/api/v1/exams/{self.exam.id}/results/")
+        self.assertEqual(results.data["status"], "graded")
+        self.assertTrue(results.data["answers"][0]["is_correct"])
+
+    def test_autosave_buffers_answers_and_submit_merges_them(self):
+        """Test that autosaved answers are returned by GET and graded at submit."""
+        from courses.services import ExamAutosaveService
+
+        fillblank = FillBlankProblemFactory(
+            blanks={"blanks": [{"answers": ["x"], "case_sensitive": False}]}
+        )
+        ExamProblemFactory(exam=self.exam, problem=fillblank.problem, order=1)
+        EnrollmentFactory(user=self.user, course=self.course)
+        self.client.force_authenticate(user=self.user)
+        submission_id = self.client.post(f"/api/v1/exams/{self.exam.id}/start/").data[
+            "submission_id"
+        ]
+        self.addCleanup(
+            ExamAutosaveService._get_redis().delete,
+            ExamAutosaveService.get_buffer_key(submission_id),
+        )
+        url = f"/api/v1/exams/{self.exam.id}/autosave/"
+
+        for value in ("y", "x"):
+            response = self.client.post(
+                url,
+                {
+                    "answers": [
+                        {
+                            "problem_id": fillblank.problem_id,
+                            "problem_type": "fillblank",
+                            "fillblank_answers": {"blank1": value},
+                        }
+                    ]
+                },
+                format="json",
+            )
+            self.assertEqual(response.status_code, 200)
+
+        # 尚未写回数据库
+        self.assertIsNone(
+            ExamAnswer.objects.get(
+                submission_id=submission_id, problem=fillblank.problem
+            ).fillblank_answers
+        )
+        saved = self.client.get(url).data["answers"]
+        self.assertIn(
+            {
+                "problem_id": fillblank.problem_id,
+                "choice_answers": None,
+                "fillblank_answers": {"blank1": "x"},
+            },
+            saved,
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f"/api/v1/exams/{self.exam.id}/submit/",
+                {
+                    "answers": [
+                        {
+                            "problem_id": self.choice_problem.id,
+                            "problem_type": "choice",
+                            "choice_answers": "A",
+                        }
+                    ]
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 200)
+        answer = ExamAnswer.objects.get(
+            submission_id=submission_id, problem=fillblank.problem
+        )
+        self.assertEqual(answer.fillblank_answers, {"blank1": "x"})
+        self.assertTrue(answer.is_correct)
+        self.assertEqual(ExamAutosaveService.read(submission_id), {})
+
+    def test_autosave_rejects_problem_outside_exam(self):
+        """Test that autosave only accepts problems of the exam."""
+        EnrollmentFactory(user=self.user, course=self.course)
+        self.client.force_authenticate(user=self.user)
+        self.client.post(f"/api/v1/exams/{self.exam.id}/start/")
+
+        response = self.client.post(
+            f"/api/v1/exams/{self.exam.id}/autosave/",
+            {
+                "answers": [
+                    {
+                        "problem_id": ProblemFactory(type="choice").id,
+                        "problem_type": "choice",
+                        "choice_answers": "A",
+                    }
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+
     # -------------------------------------------------------------------------
     # Custom action: results
     # -------------------------------------------------------------------------
 
+    def test_grade_fillblank_recommended_blanks_format(self):
+        """Test fill-blank grading accepts the {"blanks": [...]} answer format."""
+        from courses.services import ExamGradingService
+
+        fillblank = FillBlankProblemFactory(
+            blanks={
+                "blanks": [
+                    {"answers": ["print"], "case_sensitive": False},
+                    {"answers": ["len"], "case_sensitive": False},
+                ]
+            }
+        )
+        answer = ExamAnswerFactory(
+            problem=fillblank.problem,
+            fillblank_answers={"blank1": "PRINT", "blank2": "max"},
+        )
+
+        result = ExamGradingService.grade_fillblank_problem(answer, 10)
+
+        self.assertEqual(result["score"], 5)
+        self.assertFalse(result["is_correct"])
+
     def test_get_exam_results_success(self):
         """Test getting exam results."""
         enrollment = EnrollmentFactory(user=self.user, course=self.course)
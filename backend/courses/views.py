@@ -14,7 +14,10 @@ from django.db.models import (
     Value,
     BooleanField,
     Prefetch,
+    prefetch_related_objects,
 )
+from django.conf import settings
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 
@@ -22,9 +25,11 @@ from common.mixins.cache_mixin import (
     StandardCacheListMixin,
     StandardCacheRetrieveMixin,
     InvalidateCacheMixin,
+    ResourceIdFilterMixin,
 )
 from common.mixins.dynamic_fields_mixin import DynamicFieldsMixin
 from common.decorators.logging_decorators import audit_log, log_api_call
+from .pagination import OptionalCursorPagination
 from .permissions import IsAuthorOrReadOnly
 from .models import (
     Course,
@@ -38,11 +43,8 @@ from .models import (
     ProblemProgress,
     CodeDraft,
     Exam,
-    ExamProblem,
     ExamSubmission,
     ExamAnswer,
-    ChoiceProblem,
-    FillBlankProblem,
     ChapterUnlockCondition,
     TestCase,
     CourseUnlockSnapshot,
@@ -68,11 +70,17 @@ from .serializers import (
     ExamAnswerDetailSerializer,
 )
 from .services import CodeExecutorService
-from .services import ChapterUnlockService, UnlockSnapshotService
+from .services import (
+    AnswerKeyService,
+    ChapterUnlockService,
+    ExamAutosaveService,
+    ExamGradingService,
+    UnlockSnapshotService,
+)
 from django.db.models import Q
 
 from common.services import SeparatedCacheService
-from common.utils.cache import get_standard_cache_key
+from common.utils.cache import get_standard_cache_key, set_cache
 
 logger = logging.getLogger(__name__)
 
@@ -101,6 +109,8 @@ class CourseViewSet(
     queryset = Course.objects.all().order_by("title")
     serializer_class = CourseModelSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # 查询预算（见 QueryBudgetMiddleware），测试中超出即失败
+    query_budget = {"list": 6, "retrieve": 4}
     filter_backends = [
         DjangoFilterBackend,
         filters.SearchFilter,
@@ -152,7 +162,27 @@ class CourseViewSet(
 
 
 # ChapterViewSet
+class _GlobalPageSequence:
+    """
+    只持有一页数据的序列，供 Paginator 分页使用
+
+    len() 返回列表总数，切片返回缓存的当前页。Paginator 先按总数校验页码，
+    再对校验后的页做一次切片，因此不需要加载完整列表。
+    """
+
+    def __init__(self, total, results):
+        self.total = total
+        self.results = results
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        return self.results
+
+
 class ChapterViewSet(
+    ResourceIdFilterMixin,
     DynamicFieldsMixin,
     viewsets.ModelViewSet,
 ):
@@ -169,6 +199,8 @@ class ChapterViewSet(
             - 可排除字段: content, status, is_locked, prerequisite_progress
             - 示例: ?exclude=content,status
             - 多个字段用逗号分隔
+        include: 列表默认不返回 content（Markdown 正文），正文通过 retrieve 获取
+            - 确实需要时使用 ?include=content（不走分离缓存）
     """
 
     queryset = Chapter.objects.all().order_by("course__title", "order")  # 默认排序
@@ -182,6 +214,28 @@ class ChapterViewSet(
     search_fields = ["title", "content"]
     ordering_fields = ["title", "order", "created_at", "updated_at"]
 
+    def get_exclude_fields(self):
+        """列表默认排除 content，除非请求 ?include=content"""
+        exclude_fields = super().get_exclude_fields()
+        if getattr(self, "action", None) == "list" and not self._include_content():
+            exclude_fields = exclude_fields | {"content"}
+        return exclude_fields
+
+    def _include_content(self):
+        include_param = self.request.query_params.get("include", "")
+        return "content" in {f.strip() for f in include_param.split(",")}
+
+    def _defer_content(self, queryset):
+        """不返回正文时在 ORM 层也不读取 content 列"""
+        try:
+            exclude_fields = self.get_exclude_fields()
+        except Exception:
+            # 参数验证错误在 list/retrieve 中处理
+            return queryset
+        if "content" in exclude_fields:
+            return queryset.defer("content")
+        return queryset
+
     def get_queryset(self):
         if getattr(self, "action", None) in ("mark_as_completed",):
             return Chapter.objects.all()
@@ -215,7 +269,7 @@ class ChapterViewSet(
                         queryset = Chapter.objects.filter(course_id=course_id).order_by(
                             "course__title", "order"
                         )
-                        return queryset
+                        return self._defer_content(queryset)
                     else:
                         # 快照过期，标记为降级模式
                         self._use_snapshot = False
@@ -243,7 +297,7 @@ class ChapterViewSet(
             .prefetch_related(
                 Prefetch(
                     "unlock_condition__prerequisite_chapters",
-                    queryset=Chapter.objects.select_related("course"),
+                    queryset=Chapter.objects.select_related("course").defer("content"),
                     to_attr="prerequisite_chapters_all",
                 ),
                 Prefetch(
@@ -262,7 +316,7 @@ class ChapterViewSet(
         if course_id:
             queryset = queryset.filter(course_id=course_id)
 
-        return queryset
+        return self._defer_content(queryset)
 
     def get_serializer_context(self):
         """
@@ -300,24 +354,24 @@ class ChapterViewSet(
         """
         from django.utils import timezone
 
-        # 优先使用缓存的 completed_chapter_ids，避免重复查询
-        if hasattr(self, "_completed_chapter_ids"):
-            completed_chapter_ids = self._completed_chapter_ids
-        else:
-            # 回退逻辑：如果缓存不存在，使用原查询方式
-            completed_chapter_ids = set(
-                ChapterProgress.objects.filter(
-                    enrollment=enrollment, completed=True
-                ).values_list("chapter_id", flat=True)
-            )
-
+        # 存在未完成的前置章节：逐条前置关系关联用户的 ChapterProgress，
+        # SQL 只依赖 enrollment_id，不内联已完成章节集合，查询文本和执行计划
+        # 不随用户进度变化，并且全部走唯一索引
+        # (chapterunlockcondition_id, chapter_id) / (enrollment_id, chapter_id)
+        prerequisite_through = ChapterUnlockCondition.prerequisite_chapters.through
+        prerequisite_completed = ChapterProgress.objects.filter(
+            enrollment_id=enrollment.id,
+            chapter_id=OuterRef("chapter_id"),
+            completed=True,
+        )
         has_unmet_prerequisites = Exists(
-            ChapterUnlockCondition.objects.filter(
-                chapter=OuterRef("pk"),
-                unlock_condition_type__in=["prerequisite", "all"],
-            )
-            .filter(prerequisite_chapters__isnull=False)
-            .exclude(prerequisite_chapters__id__in=completed_chapter_ids)
+            prerequisite_through.objects.filter(
+                chapterunlockcondition__chapter_id=OuterRef("pk"),
+                chapterunlockcondition__unlock_condition_type__in=[
+                    "prerequisite",
+                    "all",
+                ],
+            ).filter(~Exists(prerequisite_completed))
         )
 
         # 检查是否未到解锁日期
@@ -349,21 +403,24 @@ class ChapterViewSet(
     # 当前用户状态仍使用直接缓存访问，需要在 Phase 3 迁移到 BusinessCacheService
     # TODO: Phase 3 - 迁移用户状态缓存到 BusinessCacheService
     # 当前用户状态缓存仍使用直接 cache.get/set，需要在 Phase 3 迁移
-    def _get_user_status_batch(self, chapter_ids, user_id, course_id):
+    def _get_user_status_batch(self, chapter_ids, user_id, course_id, prefetched=None):
         """
         批量获取用户状态
 
         Args:
-            chapter_ids: 章节ID列表
+            chapter_ids: 课程全部章节的ID列表（None 表示缓存未命中时从数据库读取）
             user_id: 用户ID
             course_id: 课程ID
+            prefetched: 已批量读取的状态缓存结果（可选）
 
         Returns:
             dict: 章节ID到用户状态的映射
         """
         from .services import get_chapter_user_status
 
-        return get_chapter_user_status(chapter_ids, user_id, course_id)
+        return get_chapter_user_status(
+            chapter_ids, user_id, course_id, prefetched=prefetched
+        )
 
     def _merge_global_and_user_status(
         self, global_data, user_status, exclude_fields=None
@@ -443,6 +500,10 @@ class ChapterViewSet(
         if course_id is None:
             return super().list(request, *args, **kwargs)
 
+        # 显式请求正文时使用父类实现（分离缓存只保存不含正文的列表）
+        if self._include_content():
+            return super().list(request, *args, **kwargs)
+
         # 获取需要排除的字段，检查是否需要 prerequisite_progress
         from rest_framework.serializers import ValidationError
 
@@ -467,12 +528,18 @@ class ChapterViewSet(
                 # 有 search 或 ordering 参数，使用父类实现
                 return super().list(request, *args, **kwargs)
 
-        from django.core.cache import cache
-        from .serializers import ChapterGlobalSerializer
+        from .services import get_chapter_user_status_cache_key
 
         user_id = request.user.id
+        paginator = self.paginator
+        page_size = paginator.get_page_size(request) if paginator else None
+        page_number = (
+            request.query_params.get(paginator.page_query_param, 1)
+            if paginator
+            else None
+        )
 
-        # 1. 获取全局数据缓存（使用 SeparatedCacheService）
+        # 0. 一次往返批量读取当前页的全局数据和用户状态缓存
         cache_key = get_standard_cache_key(
             prefix="courses",
             view_name="ChapterViewSet",
@@ -480,12 +547,81 @@ class ChapterViewSet(
             is_separated=True,
             separated_type="GLOBAL",
         )
+        page_cache_key = self._get_global_page_cache_key(
+            course_id, page_number, page_size
+        )
+        status_cache_key = (
+            get_chapter_user_status_cache_key(user_id, course_id)
+            if request.user.is_authenticated
+            else None
+        )
+        prefetched = SeparatedCacheService.get_many(
+            [page_cache_key, status_cache_key]
+        )
+
+        # 1. 获取全局数据：优先读取当前页缓存，未命中时从完整列表切片
+        page_entry = None
+        page_result = prefetched.get(page_cache_key) if page_cache_key else None
+        if page_result and page_result.is_hit:
+            page_entry = page_result.data
+            logger.debug(
+                f"Global page cache HIT for course {course_id} page {page_number}"
+            )
+
+        global_data = None
+        if page_entry is None:
+            global_data = self._get_global_list(course_id, cache_key)
+            if page_cache_key:
+                page_entry = self._build_global_page(
+                    global_data, int(page_number), page_size
+                )
+                # 只缓存有效页，避免任意页码产生大量缓存键
+                if page_entry["results"] or int(page_number) == 1:
+                    set_cache(page_cache_key, page_entry, timeout=1800)
+
+        # 2. 先分页：越界页码在这里返回 404，后续只处理当前页
+        if page_entry is not None:
+            sequence = _GlobalPageSequence(page_entry["count"], page_entry["results"])
+            page_items = paginator.paginate_queryset(sequence, request, view=self)
+        elif paginator:
+            page_items = paginator.paginate_queryset(global_data, request, view=self)
+        else:
+            page_items = None
+        is_paginated = page_items is not None
+        if not is_paginated:
+            page_items = global_data
+
+        # 3. 获取用户状态缓存（缓存按课程保存全部章节的状态，未命中时按课程计算）
+        if request.user.is_authenticated:
+            user_status = self._get_user_status_batch(
+                [item["id"] for item in global_data] if global_data is not None else None,
+                user_id,
+                course_id,
+                prefetched=prefetched.get(status_cache_key),
+            )
+        else:
+            # 未登录用户，使用默认状态
+            user_status = {}
+
+        # 4. 只合并当前页的数据，并排除指定字段
+        merged_data = self._merge_global_and_user_status(
+            page_items, user_status, exclude_fields
+        )
+
+        if is_paginated:
+            return paginator.get_paginated_response(merged_data)
+
+        return Response(merged_data)
+
+    def _get_global_list(self, course_id, cache_key):
+        """获取课程章节列表的全局数据（完整列表，不含正文，未命中时回源数据库）"""
+        from .serializers import ChapterListGlobalSerializer
+        from .services import get_chapter_list_global_queryset
+
         global_data, is_hit = SeparatedCacheService.get_global_data(
             cache_key=cache_key,
-            data_fetcher=lambda: ChapterGlobalSerializer(
-                Chapter.objects.filter(course_id=course_id)
-                .select_related("course")
-                .order_by("order"),
+            data_fetcher=lambda: ChapterListGlobalSerializer(
+                get_chapter_list_global_queryset().filter(course_id=course_id),
                 many=True,
             ).data,
             ttl=1800,
@@ -499,29 +635,41 @@ class ChapterViewSet(
                 f"Global cache MISS for course {course_id}, data fetched from DB"
             )
 
-        # 2. 获取用户状态缓存
-        if request.user.is_authenticated:
-            chapter_ids = [item["id"] for item in global_data]
-            user_status = self._get_user_status_batch(chapter_ids, user_id, course_id)
-        else:
-            # 未登录用户，使用默认状态
-            user_status = {}
-
-        # 3. 合并数据，并排除指定字段
-        merged_data = self._merge_global_and_user_status(
-            global_data, user_status, exclude_fields
-        )
+        return global_data or []
 
-        # 4. 返回分页响应
-        from rest_framework.pagination import PageNumberPagination
+    def _get_global_page_cache_key(self, course_id, page_number, page_size):
+        """
+        当前页全局数据的缓存key
 
-        paginator = PageNumberPagination()
-        page = paginator.paginate_queryset(merged_data, request, view=self)
+        与完整列表共用 course_pk 标签（章节变更时由 signals 一并失效）。
+        页码不是正整数（如 page=last）时返回 None，直接使用完整列表分页。
+        """
+        if not page_size:
+            return None
+        try:
+            page_number = int(page_number)
+        except (TypeError, ValueError):
+            return None
+        if page_number < 1:
+            return None
 
-        if page is not None:
-            return paginator.get_paginated_response(page)
+        return get_standard_cache_key(
+            prefix="courses",
+            view_name="ChapterViewSet",
+            parent_pks={"course_pk": course_id},
+            query_params={"page": page_number, "page_size": page_size},
+            is_separated=True,
+            separated_type="GLOBAL",
+        )
 
-        return Response(merged_data)
+    @staticmethod
+    def _build_global_page(global_data, page_number, page_size):
+        """从完整列表切出一页：{"count": 总数, "results": 当前页}"""
+        offset = (page_number - 1) * page_size
+        return {
+            "count": len(global_data),
+            "results": list(global_data[offset : offset + page_size]),
+        }
 
     def retrieve(self, request, *args, **kwargs):
         """
@@ -720,6 +868,10 @@ class ChapterViewSet(
         获取章节详情，检查解锁状态
         使用快照缓存避免重复查询
         """
+        rejected = self._reject_nonexistent_pk(kwargs.get("pk"))
+        if rejected is not None:
+            return rejected
+
         chapter = self.get_object()
 
         enrollment = getattr(self, "_enrollment", None)
@@ -778,6 +930,7 @@ class ChapterViewSet(
 
 # ProblemViewset
 class ProblemViewSet(
+    ResourceIdFilterMixin,
     DynamicFieldsMixin,
     viewsets.ModelViewSet,
 ):
@@ -1069,7 +1222,9 @@ class ProblemViewSet(
 
     # TODO: Phase 3 - 迁移用户状态缓存到 BusinessCacheService
     # 当前用户状态缓存仍使用直接 cache.get/set，需要在 Phase 3 迁移
-    def _get_problem_user_status_batch(self, problem_ids, user_id, chapter_id):
+    def _get_problem_user_status_batch(
+        self, problem_ids, user_id, chapter_id, prefetched=None
+    ):
         """
         批量获取问题用户状态
 
@@ -1077,13 +1232,16 @@ class ProblemViewSet(
             problem_ids: 问题ID列表
             user_id: 用户ID
             chapter_id: 章节ID
+            prefetched: 已批量读取的状态缓存结果（可选）
 
         Returns:
             dict: 问题ID到用户状态的映射
         """
         from .services import get_problem_user_status
 
-        return get_problem_user_status(problem_ids, user_id, chapter_id)
+        return get_problem_user_status(
+            problem_ids, user_id, chapter_id, prefetched=prefetched
+        )
 
     def _merge_problem_global_and_user_status(
         self, global_data, user_status, exclude_fields=None
@@ -1152,13 +1310,14 @@ class ProblemViewSet(
 
         from django.core.cache import cache
         from .serializers import ProblemGlobalSerializer
+        from .services import get_problem_user_status_cache_key
 
         user_id = request.user.id
 
         # 获取需要排除的字段
         exclude_fields = self.get_exclude_fields()
 
-        # 1. 获取全局数据缓存（使用 SeparatedCacheService）
+        # 0. 一次往返批量读取全局数据和用户状态缓存
         cache_key = get_standard_cache_key(
             prefix="courses",
             view_name="ProblemViewSet",
@@ -1166,6 +1325,14 @@ class ProblemViewSet(
             is_separated=True,
             separated_type="GLOBAL",
         )
+        status_cache_key = (
+            get_problem_user_status_cache_key(user_id, chapter_id)
+            if request.user.is_authenticated
+            else None
+        )
+        prefetched = SeparatedCacheService.get_many([cache_key, status_cache_key])
+
+        # 1. 获取全局数据缓存（使用 SeparatedCacheService）
         global_data, is_hit = SeparatedCacheService.get_global_data(
             cache_key=cache_key,
             data_fetcher=lambda: ProblemGlobalSerializer(
@@ -1175,6 +1342,7 @@ class ProblemViewSet(
                 many=True,
             ).data,
             ttl=1800,
+            prefetched=prefetched.get(cache_key),
         )
 
         # 添加 cache hit/miss 日志
@@ -1189,7 +1357,10 @@ class ProblemViewSet(
         if request.user.is_authenticated:
             problem_ids = [item["id"] for item in global_data]
             user_status = self._get_problem_user_status_batch(
-                problem_ids, user_id, chapter_id
+                problem_ids,
+                user_id,
+                chapter_id,
+                prefetched=prefetched.get(status_cache_key),
             )
         else:
             # 未登录用户，使用默认状态
@@ -1223,6 +1394,10 @@ class ProblemViewSet(
         2. 用户状态缓存：使用标准缓存 key 格式（含 user_id，按用户隔离）
         3. 合并两层缓存数据后返回
         """
+        rejected = self._reject_nonexistent_pk(kwargs.get("pk"))
+        if rejected is not None:
+            return rejected
+
         # 如果不是通过章节路由访问，使用父类的默认实现
         chapter_id = self.kwargs.get("chapter_pk")
         if chapter_id is None:
@@ -1230,6 +1405,7 @@ class ProblemViewSet(
 
         from django.core.cache import cache
         from .serializers import ProblemGlobalSerializer
+        from .services import get_problem_user_status_cache_key
 
         problem = self.get_object()
         chapter_id = problem.chapter_id
@@ -1239,7 +1415,7 @@ class ProblemViewSet(
         # 获取需要排除的字段
         exclude_fields = self.get_exclude_fields()
 
-        # 1. 获取全局数据缓存（使用 SeparatedCacheService）
+        # 0. 一次往返批量读取全局数据和用户状态缓存
         cache_key = get_standard_cache_key(
             prefix="courses",
             view_name="ProblemViewSet",
@@ -1248,10 +1424,19 @@ class ProblemViewSet(
             is_separated=True,
             separated_type="GLOBAL",
         )
+        status_cache_key = (
+            get_problem_user_status_cache_key(user_id, chapter_id)
+            if request.user.is_authenticated and chapter_id
+            else None
+        )
+        prefetched = SeparatedCacheService.get_many([cache_key, status_cache_key])
+
+        # 1. 获取全局数据缓存（使用 SeparatedCacheService）
         global_data, is_hit = SeparatedCacheService.get_global_data(
             cache_key=cache_key,
             data_fetcher=lambda: ProblemGlobalSerializer(problem).data,
             ttl=1800,
+            prefetched=prefetched.get(cache_key),
         )
 
         # 添加 cache hit/miss 日志
@@ -1265,7 +1450,10 @@ class ProblemViewSet(
         # 2. 获取用户状态缓存
         if request.user.is_authenticated and chapter_id:
             user_status = self._get_problem_user_status_batch(
-                [problem_id], user_id, chapter_id
+                [problem_id],
+                user_id,
+                chapter_id,
+                prefetched=prefetched.get(status_cache_key),
             )
         else:
             # 未登录用户或孤儿问题，使用默认状态
@@ -1468,65 +1656,10 @@ class ProblemViewSet(
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # 获取正确的答案配置
-        blanks_data = fillblank_problem.blanks
-        correct_blanks = {}
-
-        # 统一转换 blanks 格式
-        if all(k.startswith("blank") and k[5:].isdigit() for k in blanks_data.keys()):
-            # 格式1（详细）
-            for key, config in blanks_data.items():
-                correct_blanks[key] = {
-                    "answers": config.get("answer", config.get("answers", [])),
-                    "case_sensitive": config.get("case_sensitive", False),
-                }
-        elif "blanks" in blanks_data:
-            blanks_list = blanks_data["blanks"]
-            if blanks_list and isinstance(blanks_list[0], dict):
-                # 格式3（推荐）
-                for i, blank in enumerate(blanks_list):
-                    correct_blanks[f"blank{i + 1}"] = {
-                        "answers": blank["answers"],
-                        "case_sensitive": blank.get("case_sensitive", False),
-                    }
-            else:
-                # 格式2（简单）
-                case_sensitive = blanks_data.get("case_sensitive", False)
-                for i, answer in enumerate(blanks_list):
-                    correct_blanks[f"blank{i + 1}"] = {
-                        "answers": [answer] if isinstance(answer, str) else answer,
-                        "case_sensitive": case_sensitive,
-                    }
-
-        # 验证用户答案
-        results = {}
-        all_correct = True
-
-        for blank_id, correct_config in correct_blanks.items():
-            user_answer = user_answers.get(blank_id, "").strip()
-            correct_answers = correct_config["answers"]
-            case_sensitive = correct_config["case_sensitive"]
-
-            # 检查答案是否正确
-            is_correct = False
-            for correct_answer in correct_answers:
-                if case_sensitive:
-                    if user_answer == correct_answer.strip():
-                        is_correct = True
-                        break
-                else:
-                    if user_answer.lower() == correct_answer.strip().lower():
-                        is_correct = True
-                        break
-
-            results[blank_id] = {
-                "user_answer": user_answer,
-                "is_correct": is_correct,
-                "correct_answers": correct_answers,
-            }
-
-            if not is_correct:
-                all_correct = False
+        # 使用编译后的答案键验证用户答案
+        checked = AnswerKeyService.check_fillblank(fillblank_problem, user_answers)
+        results = checked["results"]
+        all_correct = checked["correct_count"] == checked["total_count"]
 
         # 更新用户进度
         user = request.user
@@ -1570,11 +1703,15 @@ class SubmissionViewSet(DynamicFieldsMixin, viewsets.ModelViewSet):
             - 可排除字段: code, output, error, execution_time, memory_used
             - 示例: ?exclude=code,output,error
             - 多个字段用逗号分隔
+        pagination: 传 cursor 时改用游标分页（按 (-created_at, -id)，无 count）
     """
 
     queryset = Submission.objects.all()
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = SubmissionSerializer
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = ("-created_at", "-id")
+    query_budget = {"list": 10, "retrieve": 5}
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -1701,6 +1838,9 @@ class CodeDraftViewSet(viewsets.ModelViewSet):
     queryset = CodeDraft.objects.all()
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = CodeDraftSerializer
+    query_budget = {"list": 6, "retrieve": 4, "latest": 4}
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = ("-created_at", "-id")
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["problem", "save_type"]
 
@@ -1716,7 +1856,7 @@ class CodeDraftViewSet(viewsets.ModelViewSet):
         if problem_pk is not None:
             queryset = queryset.filter(problem_id=problem_pk)
 
-        return queryset.order_by("-created_at")
+        return queryset.select_related("user", "problem").order_by("-created_at")
 
     def perform_create(self, serializer):
         """
@@ -1799,7 +1939,38 @@ class CodeDraftViewSet(viewsets.ModelViewSet):
                     {"error": "未找到该提交记录"}, status=status.HTTP_404_NOT_FOUND
                 )
 
-        # 创建新的草稿记录（始终创建新记录，不更新，以保留完整历史）
+        # 与最新草稿比较（走 (user, problem, -created_at) 索引，不读取 code 列）
+        latest_draft = (
+            CodeDraft.objects.filter(user=request.user, problem=problem)
+            .select_related("user", "problem")
+            .defer("code")
+            .order_by("-created_at")
+            .first()
+        )
+        content_hash = CodeDraft.compute_content_hash(code)
+
+        if latest_draft and submission is None and save_type != "submission":
+            if (
+                latest_draft.content_hash == content_hash
+                and latest_draft.language == language
+            ):
+                # 代码未变化：不插入新记录；手动保存把最新的自动保存提升为检查点
+                latest_draft.code = code
+                if save_type == "manual_save" and latest_draft.save_type == "auto_save":
+                    latest_draft.save_type = "manual_save"
+                    latest_draft.save(update_fields=["save_type", "updated_at"])
+                serializer = self.get_serializer(latest_draft)
+                return Response(serializer.data, status=status.HTTP_200_OK)
+
+            if save_type == "auto_save" and latest_draft.save_type == "auto_save":
+                # 连续的自动保存合并为一条记录
+                latest_draft.code = code
+                latest_draft.language = language
+                latest_draft.save(update_fields=["code", "language", "updated_at"])
+                serializer = self.get_serializer(latest_draft)
+                return Response(serializer.data, status=status.HTTP_200_OK)
+
+        # 创建新的草稿记录（手动保存、提交和代码变化后的首次自动保存作为检查点保留）
         draft = CodeDraft.objects.create(
             user=request.user,
             problem=problem,
@@ -1833,6 +2004,7 @@ class EnrollmentViewSet(
     queryset = Enrollment.objects.all()
     serializer_class = EnrollmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {"list": 6, "retrieve": 4}
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["course"]
 
@@ -1967,6 +2139,8 @@ class DiscussionThreadViewSet(DynamicFieldsMixin, viewsets.ModelViewSet):
             - 可排除字段: content, replies
             - 示例: ?exclude=content,replies
             - 多个字段用逗号分隔
+        pagination: 传 cursor 时改用游标分页（按 (-last_activity_at, -id)，
+            忽略 ordering 参数，无 count）
     """
 
     serializer_class = DiscussionThreadSerializer
@@ -1974,6 +2148,9 @@ class DiscussionThreadViewSet(DynamicFieldsMixin, viewsets.ModelViewSet):
         permissions.IsAuthenticatedOrReadOnly,
         IsAuthorOrReadOnly,
     ]  # 作者可改，匿名或者其他用户可读
+    query_budget = {"list": 6}
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = ("-last_activity_at", "-id")
     filter_backends = [
         DjangoFilterBackend,
         filters.SearchFilter,
@@ -2189,12 +2366,13 @@ class ExamViewSet(
                 status="in_progress",
             )
 
-            # 为所有题目创建答案记录
-            exam_problems = exam.exam_problems.select_related("problem").all()
-            for exam_problem in exam_problems:
-                ExamAnswer.objects.create(
-                    submission=submission, problem=exam_problem.problem
-                )
+            # 为所有题目批量创建答案记录（exam_problems 已在查询集中预取）
+            ExamAnswer.objects.bulk_create(
+                [
+                    ExamAnswer(submission=submission, problem_id=exam_problem.problem_id)
+                    for exam_problem in exam.exam_problems.all()
+                ]
+            )
 
             return Response(
                 {
@@ -2224,9 +2402,14 @@ class ExamViewSet(
         """
         exam = self.get_object()
 
-        # 获取用户的进行中提交
+        # 获取用户的进行中提交（行锁：与自动保存写回任务互斥）
         submission = get_object_or_404(
-            ExamSubmission, exam=exam, user=request.user, status="in_progress"
+            ExamSubmission.objects.select_related("exam", "user").select_for_update(
+                of=("self",)
+            ),
+            exam=exam,
+            user=request.user,
+            status="in_progress",
         )
 
         # 验证并解析答案
@@ -2234,21 +2417,42 @@ class ExamViewSet(
         serializer.is_valid(raise_exception=True)
         answers_data = serializer.validated_data["answers"]
 
-        # 更新答案记录
+        # 一次查询取出全部答案（连同评分所需的题目和答案配置），按题目ID索引
+        answers = {
+            answer.problem_id: answer
+            for answer in ExamGradingService.get_answers_queryset(submission)
+        }
+
+        # 更新答案记录（内存中修改，评分后统一写回）
         for answer_data in answers_data:
             problem_id = answer_data.get("problem_id")
             problem_type = answer_data.get("problem_type")
 
-            answer = get_object_or_404(
-                ExamAnswer, submission=submission, problem_id=problem_id
-            )
+            try:
+                answer = answers.get(int(problem_id))
+            except (TypeError, ValueError):
+                answer = None
+            if answer is None:
+                raise Http404("No ExamAnswer matches the given query.")
 
             if problem_type == "choice":
                 answer.choice_answers = answer_data.get("choice_answers")
             elif problem_type == "fillblank":
                 answer.fillblank_answers = answer_data.get("fillblank_answers")
 
-            answer.save()
+        # 合并自动保存缓冲中尚未写回的题目（本次请求中的答案优先）
+        buffered = ExamAutosaveService.read(submission.id)
+        submitted_ids = {
+            str(answer_data.get("problem_id")) for answer_data in answers_data
+        }
+        ExamAutosaveService.apply(
+            answers,
+            {pid: raw for pid, raw in buffered.items() if pid not in submitted_ids},
+        )
+        submission_id = submission.id
+        transaction.on_commit(
+            lambda: ExamAutosaveService.discard(submission_id, buffered)
+        )
 
         # 计算时间花费
         now = timezone.now()
@@ -2269,151 +2473,128 @@ class ExamViewSet(
         submission.submitted_at = now
         submission.time_spent_seconds = time_spent
 
+        if getattr(settings, "EXAM_ASYNC_GRADING", False):
+            return self._submit_for_async_grading(submission, list(answers.values()))
+
         # 评分
-        self._grade_submission(submission)
+        problem_scores = ExamGradingService.get_problem_scores(exam)
+        ExamGradingService.grade_submission(
+            submission, answers=list(answers.values()), problem_scores=problem_scores
+        )
 
         submission.save()
         # if exam.show_results_after_submit:
         #     submission.status = 'graded'
         # 返回结果
-        result_serializer = ExamSubmissionSerializer(submission)
+        prefetch_related_objects(
+            [submission],
+            Prefetch("answers", queryset=ExamGradingService.get_answers_queryset()),
+        )
+        result_serializer = ExamSubmissionSerializer(
+            submission, context={"exam_problem_scores": problem_scores}
+        )
         return Response(result_serializer.data, status=status.HTTP_200_OK)
 
-    def _grade_submission(self, submission):
+    @action(detail=True, methods=["get", "post"], url_path="autosave")
+    def autosave(self, request, pk=None, course_pk=None):
         """
-        评分提交
-        支持选择题和填空题
+        自动保存进行中测验的答案
+
+        POST 请求体与 submit 相同：{"answers": [{"problem_id", "problem_type", ...}]}。
+        答案先缓冲在 Redis（同一题多次保存只保留最新值），由定时任务批量
+        写回 ExamAnswer，submit 时也会合并。GET 返回当前已保存的答案
+        （数据库中的答案叠加尚未写回的缓冲）。
         """
-        answers = submission.answers.all()
-        total_score = 0
+        exam = self.get_object()
+        submission = get_object_or_404(
+            ExamSubmission.objects.only("id"),
+            exam=exam,
+            user=request.user,
+            status="in_progress",
+        )
 
-        for answer in answers:
-            # 获取该题在测验中的分值
-            exam_problem = ExamProblem.objects.get(
-                exam=submission.exam, problem=answer.problem
+        if request.method == "GET":
+            answers = {
+                answer.problem_id: answer
+                for answer in ExamAnswer.objects.filter(submission=submission).only(
+                    "id", "problem_id", "choice_answers", "fillblank_answers"
+                )
+            }
+            ExamAutosaveService.apply(answers, ExamAutosaveService.read(submission.id))
+            return Response(
+                {
+                    "submission_id": submission.id,
+                    "answers": [
+                        {
+                            "problem_id": problem_id,
+                            "choice_answers": answer.choice_answers,
+                            "fillblank_answers": answer.fillblank_answers,
+                        }
+                        for problem_id, answer in sorted(answers.items())
+                    ],
+                }
             )
-            max_score = exam_problem.score
-
-            if answer.problem.type == "choice":
-                result = self._grade_choice_problem(answer, max_score)
-            elif answer.problem.type == "fillblank":
-                result = self._grade_fillblank_problem(answer, max_score)
-            else:
-                # 不应该发生，因为测验只包含选择题和填空题
-                result = {"score": 0, "is_correct": False}
-
-            answer.score = result["score"]
-            answer.is_correct = result.get("is_correct", False)
-            answer.correct_percentage = result.get("correct_percentage")
-            answer.save()
 
-            total_score += result["score"]
+        serializer = ExamSubmitSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-        # 更新提交记录
-        submission.total_score = total_score
-        submission.is_passed = total_score >= submission.exam.passing_score
+        exam_problem_ids = set(ExamGradingService.get_problem_scores(exam))
+        deltas = {}
+        for answer_data in serializer.validated_data["answers"]:
+            try:
+                problem_id = int(answer_data.get("problem_id"))
+            except (TypeError, ValueError):
+                problem_id = None
+            if problem_id not in exam_problem_ids:
+                return Response(
+                    {"error": f"题目 {answer_data.get('problem_id')} 不属于该测验"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            deltas[problem_id] = ExamAutosaveService.to_delta(answer_data)
 
-    def _grade_choice_problem(self, answer, max_score):
-        """评分选择题"""
-        try:
-            choice_info = answer.problem.choice_info
-        except ChoiceProblem.DoesNotExist:
-            return {"score": 0, "is_correct": False}
-
-        user_answer = answer.choice_answers
-        correct_answer = choice_info.correct_answer
-
-        # 判断是否正确
-        if isinstance(correct_answer, list):
-            # 多选题
-            is_correct = isinstance(user_answer, list) and set(user_answer) == set(
-                correct_answer
+        if not ExamAutosaveService.buffer(submission.id, deltas):
+            # Redis 不可用时直接写库
+            answers = list(
+                ExamAnswer.objects.filter(submission=submission, problem_id__in=deltas)
             )
-        else:
-            # 单选题
-            is_correct = user_answer == correct_answer
+            for answer in answers:
+                for field, value in deltas[answer.problem_id].items():
+                    setattr(answer, field, value)
+            ExamAutosaveService.write_answers(answers)
 
-        return {"score": max_score if is_correct else 0, "is_correct": is_correct}
+        return Response(
+            {"submission_id": submission.id, "saved": len(deltas)},
+            status=status.HTTP_200_OK,
+        )
 
-    def _grade_fillblank_problem(self, answer, max_score):
+    def _submit_for_async_grading(self, submission, answers):
         """
-        评分填空题
-        基于正确比例计分（如3个空白答对2个，得分为题目分数的2/3）
+        异步评分模式：只保存原始答案和提交状态，评分交给 Celery
+
+        测验截止时大量提交集中到达，同步评分会把压力全部压在 Web 进程和
+        数据库锁上。这里事务提交后把评分任务投递到 exam_grading 队列，
+        由该队列的 worker 按其并发数逐个评分，完成后状态变为 graded，
+        结果通过 results 接口查看。
         """
-        try:
-            fillblank_problem = answer.problem.fillblank_info
-        except FillBlankProblem.DoesNotExist:
-            return {"score": 0, "is_correct": False, "correct_percentage": 0}
-
-        user_answers = answer.fillblank_answers or {}
-
-        # 获取正确的答案配置（复用现有逻辑）
-        blanks_data = fillblank_problem.blanks
-        correct_blanks = {}
-
-        # 统一转换 blanks 格式（与 check_fillblank API 相同）
-        if all(k.startswith("blank") for k in blanks_data.keys()):
-            # 格式1（详细）
-            for key, config in blanks_data.items():
-                correct_blanks[key] = {
-                    "answers": config.get("answer", config.get("answers", [])),
-                    "case_sensitive": config.get("case_sensitive", False),
-                }
-        elif "blanks" in blanks_data:
-            blanks_list = blanks_data["blanks"]
-            if blanks_list and isinstance(blanks_list[0], dict):
-                # 格式3（推荐）
-                for i, blank in enumerate(blanks_list):
-                    correct_blanks[f"blank{i + 1}"] = {
-                        "answers": blank["answers"],
-                        "case_sensitive": blank.get("case_sensitive", False),
-                    }
-            else:
-                # 格式2（简单）
-                case_sensitive = blanks_data.get("case_sensitive", False)
-                for i, blank_answer in enumerate(blanks_list):
-                    correct_blanks[f"blank{i + 1}"] = {
-                        "answers": [blank_answer]
-                        if isinstance(blank_answer, str)
-                        else blank_answer,
-                        "case_sensitive": case_sensitive,
-                    }
-
-        # 计算正确的空白比例
-        correct_count = 0
-        total_count = len(correct_blanks)
-
-        for blank_id, correct_config in correct_blanks.items():
-            user_answer = user_answers.get(blank_id, "").strip()
-            correct_answers_list = correct_config["answers"]
-            case_sensitive = correct_config["case_sensitive"]
-
-            # 检查答案是否正确
-            is_correct = False
-            for correct_answer in correct_answers_list:
-                if case_sensitive:
-                    if user_answer == correct_answer.strip():
-                        is_correct = True
-                        break
-                else:
-                    if user_answer.lower() == correct_answer.strip().lower():
-                        is_correct = True
-                        break
+        from .tasks import grade_exam_submission
 
-            if is_correct:
-                correct_count += 1
+        ExamAutosaveService.write_answers(answers)
+        submission.save(
+            update_fields=["status", "submitted_at", "time_spent_seconds"]
+        )
 
-        # 计算得分（按正确比例）
-        correct_percentage = correct_count / total_count if total_count > 0 else 0
-        score = max_score * correct_percentage
+        submission_id = submission.id
+        transaction.on_commit(lambda: grade_exam_submission.delay(submission_id))
 
-        return {
-            "score": round(score, 2),
-            "is_correct": correct_count == total_count,
-            "correct_percentage": round(correct_percentage, 2),
-            "correct_count": correct_count,
-            "total_count": total_count,
-        }
+        return Response(
+            {
+                "submission_id": submission_id,
+                "status": submission.status,
+                "submitted_at": submission.submitted_at,
+                "time_spent_seconds": submission.time_spent_seconds,
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
 
     @action(detail=True, methods=["get"], url_path="results")
     def results(self, request, pk=None, course_pk=None):
@@ -2464,6 +2645,8 @@ class ExamSubmissionViewSet(
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["exam", "status"]
     ordering = ["-started_at"]
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = ("-started_at", "-id")
 
     def get_queryset(self):
         """只返回当前用户的提交记录"""
@@ -2,7 +2,7 @@
 Utility functions for path-based file and folder operations
 """
 
-from common.utils.cache import delete_cache_pattern, get_cache, set_cache
+from common.utils.cache import delete_cache, get_cache, set_cache
 from file_management.models import FileEntry, Folder
 from django.db.models import Q
 
@@ -145,7 +145,7 @@ def resolve_path_to_object(path, user, include_files=True, include_folders=True)
                 raise PermissionError(f"No permission to access '{path}'")
         except Folder.DoesNotExist:
             # 缓存了无效 ID，清除它
-            delete_cache_pattern(cache_key)
+            delete_cache(cache_key)
 
     # 缓存未命中
     if current_folder is None:
@@ -0,0 +1,35 @@
+"""
+Gunicorn configuration (loaded automatically from the working directory).
+
+Prometheus multiprocess mode: when PROMETHEUS_MULTIPROC_DIR is set every worker
+writes its metric samples to that directory and `manage.py serve_metrics`
+aggregates them. The directory is wiped on master start-up and samples of
+dead workers are marked so live gauges stay accurate.
+
+Each worker installs the sampling CPU profiler signal handlers after start-up
+(see common.metrics.cpu_profiler), so `manage.py profile_cpu --pid <pid>` can
+profile it on demand.
+"""
+
+import os
+import shutil
+
+
+def on_starting(server):
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    from common.metrics.cpu_profiler import install_profiler_signals
+
+    install_profiler_signals()
@@ -25,6 +25,12 @@ else
     echo "Not first run. Skipping migrations and static collection."
 fi
 
+# Prometheus 多进程模式：各 worker 写入同一目录，由 serve_metrics 聚合导出
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus_multiproc}"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+echo "Starting Prometheus metrics exporter on :8001..."
+uv run python manage.py serve_metrics --host 0.0.0.0 --port 8001 &
+
 # 3. 启动 Gunicorn（始终执行）
 echo "Starting Gunicorn server..."
 exec uv run gunicorn --bind 0.0.0.0:8000 core.wsgi:application --workers 4
\ No newline at end of file
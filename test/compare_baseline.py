@@ -0,0 +1,117 @@
+# compare_baseline.py
+"""
+对比 Locust 结果与基线，标记性能回归
+
+用法：
+    python compare_baseline.py results/latest.json
+    python compare_baseline.py results/latest.json --baseline baseline.json --tolerance 0.2
+    python compare_baseline.py results/latest.json --update   # 以本次结果作为新基线
+
+结果文件由 slo.py 在测试结束时写入（LOCUST_RESULTS_FILE）。某接口的
+p50/p95/p99 比基线高出 tolerance 比例且绝对差值超过 --min-delta-ms，
+或失败率上升超过 --max-failure-increase，即视为回归，退出码为 1。
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+
+PERCENTILES = ("p50", "p95", "p99")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(results, baseline, tolerance=0.2, min_delta_ms=20, max_failure_increase=0.01, min_requests=20):
+    """
+    对比结果与基线
+
+    Returns:
+        (regressions, notes)：回归描述列表和提示信息列表
+    """
+    regressions = []
+    notes = []
+    current = results["endpoints"]
+    previous = baseline.get("endpoints", {})
+
+    for name in sorted(current):
+        summary = current[name]
+        if name not in previous:
+            notes.append(f"{name}: 基线中没有该接口")
+            continue
+        base = previous[name]
+        if summary["requests"] < min_requests or base["requests"] < min_requests:
+            notes.append(f"{name}: 样本不足，跳过")
+            continue
+
+        for percentile in PERCENTILES:
+            value = summary[percentile]
+            base_value = base[percentile]
+            if value > base_value * (1 + tolerance) and value - base_value > min_delta_ms:
+                regressions.append(
+                    f"{name}: {percentile} {base_value:.0f}ms -> {value:.0f}ms "
+                    f"(+{(value - base_value) / base_value:.0%})"
+                )
+
+        failure_increase = summary["failure_ratio"] - base["failure_ratio"]
+        if failure_increase > max_failure_increase:
+            regressions.append(
+                f"{name}: failure_ratio {base['failure_ratio']:.2%} -> {summary['failure_ratio']:.2%}"
+            )
+
+    for name in sorted(set(previous) - set(current)):
+        notes.append(f"{name}: 本次结果中没有该接口")
+
+    return regressions, notes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比 Locust 结果与基线")
+    parser.add_argument("results", help="slo.py 写出的结果 JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线 JSON（默认 baseline.json）")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的分位数增幅（默认 0.2 = 20%%）")
+    parser.add_argument("--min-delta-ms", type=float, default=20, help="忽略小于该值的绝对增幅（默认 20ms）")
+    parser.add_argument(
+        "--max-failure-increase", type=float, default=0.01, help="允许的失败率增幅（默认 0.01）"
+    )
+    parser.add_argument("--min-requests", type=int, default=20, help="参与对比的最少请求数（默认 20）")
+    parser.add_argument("--update", action="store_true", help="把本次结果保存为新基线")
+    args = parser.parse_args()
+
+    if args.update:
+        shutil.copyfile(args.results, args.baseline)
+        print(f"基线已更新: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"基线文件不存在: {args.baseline}（使用 --update 生成）")
+        return 0
+
+    regressions, notes = compare(
+        load_json(args.results),
+        load_json(args.baseline),
+        tolerance=args.tolerance,
+        min_delta_ms=args.min_delta_ms,
+        max_failure_increase=args.max_failure_increase,
+        min_requests=args.min_requests,
+    )
+
+    for note in notes:
+        print(f"[info] {note}")
+    for regression in regressions:
+        print(f"[regression] {regression}")
+
+    if regressions:
+        print(f"发现 {len(regressions)} 项性能回归")
+        return 1
+    print("未发现性能回归")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# judge0_stub.py
+"""
+本地 Judge0 桩服务，用于离线压测
+
+实现 Judge0Backend 用到的两个接口：
+- POST /submissions          返回 {"token": ...}（201）
+- GET  /submissions/{token}  返回 Accepted 状态；stdout 为提交时的
+                             expected_output（没有则为空），time/memory 为固定值
+
+后端启动时设置 JUDGE0_BASE_URL=http://127.0.0.1:2358 即可指向本服务。
+--latency-ms 模拟判题耗时：提交后在该时间内查询结果返回 Processing 状态。
+
+用法：
+    python judge0_stub.py --port 2358 --latency-ms 200
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STATUS_PROCESSING = {"id": 2, "description": "Processing"}
+STATUS_ACCEPTED = {"id": 3, "description": "Accepted"}
+
+_submissions = {}
+_lock = threading.Lock()
+
+
+class Judge0StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+
+    def _send_json(self, status_code, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path.split("?")[0].rstrip("/") != "/submissions":
+            self._send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "invalid json"})
+            return
+
+        token = uuid.uuid4().hex
+        with _lock:
+            _submissions[token] = {
+                "ready_at": time.monotonic() + self.latency,
+                "stdout": payload.get("expected_output") or "",
+            }
+        self._send_json(201, {"token": token})
+
+    def do_GET(self):
+        path = self.path.split("?")[0].rstrip("/")
+        if not path.startswith("/submissions/"):
+            self._send_json(404, {"error": "not found"})
+            return
+        token = path.rsplit("/", 1)[-1]
+        with _lock:
+            submission = _submissions.get(token)
+        if submission is None:
+            self._send_json(404, {"error": "submission not found"})
+            return
+
+        if time.monotonic() < submission["ready_at"]:
+            self._send_json(200, {"status": STATUS_PROCESSING})
+            return
+        with _lock:
+            _submissions.pop(token, None)
+        self._send_json(
+            200,
+            {
+                "status": STATUS_ACCEPTED,
+                "stdout": submission["stdout"],
+                "stderr": None,
+                "time": "0.012",
+                "memory": 3072,
+            },
+        )
+
+    def log_message(self, format, *args):
+        # 压测时请求量大，不逐条打印
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 Judge0 桩服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2358)
+    parser.add_argument("--latency-ms", type=float, default=0, help="模拟判题耗时（毫秒）")
+    args = parser.parse_args()
+
+    Judge0StubHandler.latency = args.latency_ms / 1000.0
+    server = ThreadingHTTPServer((args.host, args.port), Judge0StubHandler)
+    print(f"Judge0 stub listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ import csv
 import os
 from threading import Lock
 
+import slo  # noqa: F401  测试结束时检查 SLO 并导出结果（见 slo.py）
+
 # 账户池管理（线程安全）
 ACCOUNT_POOL = []
 ACCOUNT_LOCK = Lock()
@@ -16,6 +18,12 @@ BACKEND_URL = os.getenv(
 # 测试用课程和章节ID配置
 DEFAULT_COURSE_ID = 2
 DEFAULT_CHAPTER_ID = 7
+# 测验 / 填空题 / 讨论场景使用的 ID（可用环境变量覆盖）
+DEFAULT_EXAM_ID = int(os.getenv("LOCUST_EXAM_ID", "1"))
+FILLBLANK_PROBLEM_IDS = [
+    int(i) for i in os.getenv("LOCUST_FILLBLANK_PROBLEM_IDS", "3,4").split(",")
+]
+DISCUSSION_PROBLEM_ID = int(os.getenv("LOCUST_DISCUSSION_PROBLEM_ID", "1"))
 
 
 def load_accounts():
@@ -1069,6 +1077,297 @@ class ComprehensiveScenario(SequentialTaskSet):
         print(f"用户 {self.username}: 综合测试场景结束")
 
 
+# 后端接口场景：直接调用 API，用于 SLO 断言和基线对比
+
+
+class ApiScenario(SequentialTaskSet):
+    """后端接口场景基类：启动时通过 API 登录，结束时归还账户"""
+
+    wait_time = between(1, 3)
+
+    def on_start(self):
+        """用户启动时获取账户并登录"""
+        self.account = get_account()
+        self.username = self.account["username"]
+        self.access_token = None
+        response = self.client.post(
+            f"{BACKEND_URL}/auth/login",
+            json={
+                "username": self.username,
+                "password": self.account["password"],
+            },
+            name="POST /auth/login",
+        )
+        if response.status_code == 200:
+            self.access_token = response.json().get("access")
+        else:
+            print(f"用户 {self.username}: 登录失败，状态码: {response.status_code}")
+            self.interrupt()
+
+    @property
+    def auth_headers(self):
+        return {"Authorization": f"Bearer {self.access_token}"}
+
+    def on_stop(self):
+        """用户停止时归还账户"""
+        return_account(self.account)
+
+
+class ExamScenario(ApiScenario):
+    """测验场景：查看测验、开始测验、提交答案"""
+
+    def on_start(self):
+        super().on_start()
+        self.exam_id = DEFAULT_EXAM_ID
+        self.exam_problems = []
+
+    @task(1)
+    def step1_get_exam_detail(self):
+        """步骤1：获取测验详情（题目列表，不含答案）"""
+        with self.client.get(
+            f"{BACKEND_URL}/exams/{self.exam_id}/",
+            headers=self.auth_headers,
+            name="GET /api/v1/exams/{id}/",
+            catch_response=True,
+        ) as response:
+            if response.status_code == 200:
+                self.exam_problems = response.json().get("exam_problems", [])
+                response.success()
+            else:
+                response.failure(f"Unexpected status code: {response.status_code}")
+                self.interrupt()
+
+    @task(1)
+    def step2_start_exam(self):
+        """步骤2：开始测验"""
+        with self.client.post(
+            f"{BACKEND_URL}/exams/{self.exam_id}/start/",
+            headers=self.auth_headers,
+            name="POST /api/v1/exams/{id}/start/",
+            catch_response=True,
+        ) as response:
+            if response.status_code in (200, 201):
+                response.success()
+            elif response.status_code == 400 and "已经参加过" in response.text:
+                # 每个账户只能参加一次，重复运行时跳过提交
+                response.success()
+                self.interrupt()
+            else:
+                response.failure(f"Unexpected status code: {response.status_code}")
+                self.interrupt()
+
+    @task(1)
+    def step3_submit_exam(self):
+        """步骤3：提交答案并评分"""
+        answers = []
+        for problem in self.exam_problems:
+            if problem["type"] == "choice":
+                options = list(problem.get("options") or {})
+                answers.append(
+                    {
+                        "problem_id": problem["problem_id"],
+                        "problem_type": "choice",
+                        "choice_answers": [random.choice(options)] if options else [],
+                    }
+                )
+            elif problem["type"] == "fillblank":
+                answers.append(
+                    {
+                        "problem_id": problem["problem_id"],
+                        "problem_type": "fillblank",
+                        "fillblank_answers": {
+                            f"blank{i + 1}": "answer"
+                            for i in range(problem.get("blank_count", 0))
+                        },
+                    }
+                )
+        if not answers:
+            self.interrupt()
+
+        with self.client.post(
+            f"{BACKEND_URL}/exams/{self.exam_id}/submit/",
+            json={"answers": answers},
+            headers=self.auth_headers,
+            name="POST /api/v1/exams/{id}/submit/",
+            catch_response=True,
+        ) as response:
+            if response.status_code == 200:
+                response.success()
+            else:
+                response.failure(f"Unexpected status code: {response.status_code}")
+        self.interrupt()
+
+
+class FillBlankScenario(ApiScenario):
+    """填空题场景：打开填空题并多次检查答案"""
+
+    def on_start(self):
+        super().on_start()
+        self.problem_id = random.choice(FILLBLANK_PROBLEM_IDS)
+
+    @task(1)
+    def step1_get_problem_detail(self):
+        """步骤1：获取填空题详情"""
+        self.client.get(
+            f"{BACKEND_URL}/problems/{self.problem_id}",
+            headers=self.auth_headers,
+            name="GET /api/v1/problems/{id}",
+        )
+
+    @task(3)
+    def step2_check_fillblank(self):
+        """步骤2：检查填空答案"""
+        with self.client.post(
+            f"{BACKEND_URL}/problems/{self.problem_id}/check_fillblank/",
+            json={"answers": {"blank1": random.choice(["print", "def", "return"])}},
+            headers=self.auth_headers,
+            name="POST /api/v1/problems/{id}/check_fillblank/",
+            catch_response=True,
+        ) as response:
+            if response.status_code == 200:
+                response.success()
+            else:
+                response.failure(f"Unexpected status code: {response.status_code}")
+
+
+class DiscussionScenario(ApiScenario):
+    """讨论场景：浏览讨论列表、发帖、回复"""
+
+    def on_start(self):
+        super().on_start()
+        self.problem_id = DISCUSSION_PROBLEM_ID
+        self.thread_id = None
+
+    @task(1)
+    def step1_list_threads(self):
+        """步骤1：获取问题讨论列表"""
+        self.client.get(
+            f"{BACKEND_URL}/problems/{self.problem_id}/threads/?page=1&page_size=10",
+            headers=self.auth_headers,
+            name="GET /api/v1/problems/{id}/threads/",
+        )
+
+    @task(1)
+    def step2_create_thread(self):
+        """步骤2：发布讨论"""
+        with self.client.post(
+            f"{BACKEND_URL}/problems/{self.problem_id}/threads/",
+            json={
+                "title": f"压测讨论 {self.username}",
+                "content": "这道题的边界条件应该怎么处理？",
+            },
+            headers=self.auth_headers,
+            name="POST /api/v1/problems/{id}/threads/",
+            catch_response=True,
+        ) as response:
+            if response.status_code == 201:
+                self.thread_id = response.json().get("id")
+                response.success()
+            else:
+                response.failure(f"Unexpected status code: {response.status_code}")
+                self.interrupt()
+
+    @task(1)
+    def step3_reply_thread(self):
+        """步骤3：回复讨论"""
+        self.client.post(
+            f"{BACKEND_URL}/threads/{self.thread_id}/replies/",
+            json={"content": "可以先考虑空输入的情况。"},
+            headers=self.auth_headers,
+            name="POST /api/v1/threads/{id}/replies/",
+        )
+
+    @task(1)
+    def step4_get_thread(self):
+        """步骤4：查看讨论详情（含回复）"""
+        self.client.get(
+            f"{BACKEND_URL}/threads/{self.thread_id}/",
+            headers=self.auth_headers,
+            name="GET /api/v1/threads/{id}/",
+        )
+
+
+class FileScenario(ApiScenario):
+    """文件场景：上传、下载、删除文件"""
+
+    def on_start(self):
+        super().on_start()
+        self.file_id = None
+
+    @task(1)
+    def step1_upload_file(self):
+        """步骤1：上传文件"""
+        content = ("# locust\n" + "print('hello')\n" * 200).encode("utf-8")
+        with self.client.post(
+            f"{BACKEND_URL}/files/upload/",
+            data={"name": f"locust_{self.username}_{random.randint(0, 10**6)}.py", "is_public": "false"},
+            files={"file": ("locust.py", content, "text/x-python")},
+            headers=self.auth_headers,
+            name="POST /api/v1/files/upload/",
+            catch_response=True,
+        ) as response:
+            if response.status_code == 201:
+                self.file_id = response.json().get("id")
+                response.success()
+            else:
+                response.failure(f"Unexpected status code: {response.status_code}")
+                self.interrupt()
+
+    @task(1)
+    def step2_download_file(self):
+        """步骤2：下载文件"""
+        self.client.get(
+            f"{BACKEND_URL}/files/{self.file_id}/download/",
+            headers=self.auth_headers,
+            name="GET /api/v1/files/{id}/download/",
+        )
+
+    @task(1)
+    def step3_delete_file(self):
+        """步骤3：删除文件，避免压测占用存储配额"""
+        self.client.delete(
+            f"{BACKEND_URL}/files/{self.file_id}/",
+            headers=self.auth_headers,
+            name="DELETE /api/v1/files/{id}/",
+        )
+
+
+class ChapterListScenario(ApiScenario):
+    """章节列表场景：翻页读取章节列表（快照 + 用户状态合并的热点路径）"""
+
+    def on_start(self):
+        super().on_start()
+        self.course_id = DEFAULT_COURSE_ID
+
+    @task(3)
+    def step1_get_chapters(self):
+        """步骤1：获取章节列表（不含正文，章节列表页的默认请求）"""
+        page = random.choice([1, 1, 1, 2, 3])
+        self.client.get(
+            f"{BACKEND_URL}/courses/{self.course_id}/chapters/?page={page}&page_size=10&exclude=content",
+            headers=self.auth_headers,
+            name="GET /api/v1/courses/{id}/chapters/",
+        )
+
+    @task(1)
+    def step2_get_chapters_full(self):
+        """步骤2：获取包含正文的章节列表"""
+        self.client.get(
+            f"{BACKEND_URL}/courses/{self.course_id}/chapters/?page=1&page_size=20",
+            headers=self.auth_headers,
+            name="GET /api/v1/courses/{id}/chapters/ (full)",
+        )
+
+    @task(1)
+    def step3_get_chapter_detail(self):
+        """步骤3：获取章节详情"""
+        self.client.get(
+            f"{BACKEND_URL}/courses/{self.course_id}/chapters/{DEFAULT_CHAPTER_ID}/",
+            headers=self.auth_headers,
+            name="GET /api/v1/courses/{id}/chapters/{chapterId}",
+        )
+
+
 class WebsiteUser(HttpUser):
     """网站用户：执行完整的测试场景"""
 
@@ -1079,4 +1378,9 @@ class WebsiteUser(HttpUser):
         (HomeBrowsingScenario, 2),  # 首页浏览场景（新增）
         (ProfileBrowsingScenario, 2),  # 个人资料浏览场景（新增）
         (ComprehensiveScenario, 1),  # 综合测试场景（新增）
+        (ChapterListScenario, 3),  # 章节列表（快照）场景
+        (FillBlankScenario, 2),  # 填空题检查场景
+        (DiscussionScenario, 1),  # 讨论场景
+        (FileScenario, 1),  # 文件上传下载场景
+        (ExamScenario, 1),  # 测验开始 / 提交场景
     ]
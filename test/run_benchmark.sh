@@ -0,0 +1,53 @@
+#!/bin/bash
+# Headless load test with SLO assertions and baseline comparison
+#
+# 1. Starts the local Judge0 stub (judge0_stub.py) so "Run Code" works offline.
+#    The backend must be started with JUDGE0_BASE_URL=http://127.0.0.1:$JUDGE0_STUB_PORT
+# 2. Runs locust headless; slo.py writes results/latest.json and fails on SLO violations
+# 3. Compares results/latest.json with baseline.json (compare_baseline.py)
+#
+# Usage:
+#   ./run_benchmark.sh                    # run and compare
+#   UPDATE_BASELINE=1 ./run_benchmark.sh  # run and save the result as the new baseline
+
+set -u
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+cd "$SCRIPT_DIR"
+
+HOST="${LOCUST_HOST:-http://localhost:3000}"
+USERS="${LOCUST_USERS:-50}"
+SPAWN_RATE="${LOCUST_SPAWN_RATE:-5}"
+RUN_TIME="${LOCUST_RUN_TIME:-5m}"
+JUDGE0_STUB_PORT="${JUDGE0_STUB_PORT:-2358}"
+JUDGE0_STUB_LATENCY_MS="${JUDGE0_STUB_LATENCY_MS:-200}"
+RESULTS_DIR="${RESULTS_DIR:-$SCRIPT_DIR/results}"
+
+mkdir -p "$RESULTS_DIR"
+
+echo "=== Starting Judge0 stub on port $JUDGE0_STUB_PORT ==="
+python judge0_stub.py --port "$JUDGE0_STUB_PORT" --latency-ms "$JUDGE0_STUB_LATENCY_MS" &
+STUB_PID=$!
+trap 'kill $STUB_PID 2>/dev/null' EXIT
+
+echo "=== Running locust: $USERS users, spawn rate $SPAWN_RATE, $RUN_TIME against $HOST ==="
+LOCUST_RESULTS_FILE="$RESULTS_DIR/latest.json" locust -f locustfile.py \
+    --headless \
+    --host "$HOST" \
+    -u "$USERS" -r "$SPAWN_RATE" -t "$RUN_TIME" \
+    --csv "$RESULTS_DIR/latest" \
+    --only-summary
+SLO_STATUS=$?
+
+if [ "${UPDATE_BASELINE:-0}" = "1" ]; then
+    python compare_baseline.py "$RESULTS_DIR/latest.json" --update
+    exit $SLO_STATUS
+fi
+
+echo "=== Comparing with baseline ==="
+python compare_baseline.py "$RESULTS_DIR/latest.json"
+COMPARE_STATUS=$?
+
+if [ $SLO_STATUS -ne 0 ] || [ $COMPARE_STATUS -ne 0 ]; then
+    exit 1
+fi
@@ -0,0 +1,127 @@
+# slo.py
+"""
+Locust SLO 断言与结果导出
+
+locustfile 导入本模块后，测试结束（quitting 事件）时：
+1. 把每个接口的请求数、失败率、p50/p95/p99 汇总为 JSON，
+   写入 LOCUST_RESULTS_FILE（未设置则不写），供 compare_baseline.py 对比基线
+2. 按 LOCUST_SLO_FILE（默认 slo.json）检查各接口的分位数阈值，
+   任一接口超标时把进程退出码设为 1，headless 运行可直接作为 CI 门禁
+
+slo.json 格式：
+    {
+        "min_requests": 20,
+        "default": {"p95": 1000, "p99": 2000, "max_failure_ratio": 0.01},
+        "endpoints": {
+            "GET /api/v1/courses/{id}/chapters/": {"p50": 150, "p95": 600, "p99": 1200}
+        }
+    }
+endpoints 中的阈值覆盖 default；请求数少于 min_requests 的接口不做判断。
+"""
+
+import json
+import logging
+import os
+import time
+
+from locust import events
+from locust.runners import WorkerRunner
+
+SLO_FILE = os.getenv(
+    "LOCUST_SLO_FILE", os.path.join(os.path.dirname(__file__), "slo.json")
+)
+RESULTS_FILE = os.getenv("LOCUST_RESULTS_FILE")
+
+PERCENTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+
+logger = logging.getLogger(__name__)
+
+
+def load_slos(path=SLO_FILE):
+    """读取 SLO 配置，文件不存在时返回空配置"""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _entry_summary(entry):
+    summary = {
+        "requests": entry.num_requests,
+        "failures": entry.num_failures,
+        "failure_ratio": entry.fail_ratio,
+        "avg": entry.avg_response_time,
+        "rps": entry.total_rps,
+    }
+    for name, percentile in PERCENTILES.items():
+        summary[name] = entry.get_response_time_percentile(percentile)
+    return summary
+
+
+def collect_results(stats):
+    """把 Locust 统计汇总为 {"endpoints": {name: summary}, "total": summary}"""
+    endpoints = {}
+    for entry in stats.entries.values():
+        # 名称已包含 HTTP 方法（如 "GET /api/v1/problems/"）
+        endpoints[entry.name] = _entry_summary(entry)
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "endpoints": endpoints,
+        "total": _entry_summary(stats.total),
+    }
+
+
+def check_slos(results, slos):
+    """
+    检查结果是否满足 SLO
+
+    Returns:
+        违规描述列表（为空表示全部满足）
+    """
+    min_requests = slos.get("min_requests", 0)
+    default = slos.get("default", {})
+    overrides = slos.get("endpoints", {})
+    violations = []
+
+    for name, summary in sorted(results["endpoints"].items()):
+        if summary["requests"] < min_requests:
+            continue
+        thresholds = {**default, **overrides.get(name, {})}
+
+        for percentile in PERCENTILES:
+            limit = thresholds.get(percentile)
+            if limit is not None and summary[percentile] > limit:
+                violations.append(
+                    f"{name}: {percentile}={summary[percentile]:.0f}ms > {limit}ms"
+                )
+
+        max_failure_ratio = thresholds.get("max_failure_ratio")
+        if max_failure_ratio is not None and summary["failure_ratio"] > max_failure_ratio:
+            violations.append(
+                f"{name}: failure_ratio={summary['failure_ratio']:.2%} > {max_failure_ratio:.2%}"
+            )
+
+    return violations
+
+
+@events.quitting.add_listener
+def _on_quitting(environment, **kwargs):
+    # 分布式运行时只在 master 上汇总（worker 只有本地统计）
+    if isinstance(environment.runner, WorkerRunner):
+        return
+
+    results = collect_results(environment.stats)
+
+    if RESULTS_FILE:
+        os.makedirs(os.path.dirname(os.path.abspath(RESULTS_FILE)), exist_ok=True)
+        with open(RESULTS_FILE, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        logger.info(f"结果已写入 {RESULTS_FILE}")
+
+    violations = check_slos(results, load_slos())
+    if violations:
+        for violation in violations:
+            logger.error(f"SLO 未达标: {violation}")
+        environment.process_exit_code = 1
+    else:
+        logger.info("所有接口均满足 SLO")